@@ -99,5 +99,72 @@ def dev(
     )
 
 
+@app.command("ingest-worker")
+def ingest_worker(
+    concurrency: Optional[int] = None,
+):
+    """Run a dedicated file ingestion worker against the shared queue."""
+    import asyncio
+
+    os.environ["FROM_INIT_PY"] = "true"
+    if os.getenv("WEBUI_SECRET_KEY") is None and KEY_FILE.exists():
+        os.environ["WEBUI_SECRET_KEY"] = KEY_FILE.read_text()
+
+    from open_webui.main import app as webui_app
+    from open_webui.env import (
+        INGESTION_WORKER_CONCURRENCY,
+        REDIS_URL,
+        REDIS_CLUSTER,
+        REDIS_SENTINEL_HOSTS,
+        REDIS_SENTINEL_PORT,
+    )
+    from open_webui.utils.file_status import file_status_broker
+    from open_webui.utils.ingestion import IngestionWorker
+    from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+    async def run():
+        # Status updates are relayed through Redis to the web workers' subscribers
+        await file_status_broker.start(
+            get_redis_connection(
+                redis_url=REDIS_URL,
+                redis_sentinels=get_sentinels_from_env(
+                    REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+                ),
+                redis_cluster=REDIS_CLUSTER,
+                async_mode=True,
+            )
+        )
+        worker = IngestionWorker(
+            webui_app, concurrency=concurrency or INGESTION_WORKER_CONCURRENCY
+        )
+        try:
+            await worker.run_forever()
+        finally:
+            await file_status_broker.stop()
+
+    asyncio.run(run())
+
+
+@app.command("vector-maintenance")
+def vector_maintenance(
+    rebuild: Annotated[
+        bool, typer.Option(help="Rebuild existing ANN indexes, re-sizing ivfflat lists")
+    ] = False,
+):
+    """Analyze the vector store and create, rebuild or drop its indexes."""
+    os.environ["FROM_INIT_PY"] = "true"
+
+    from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+
+    if not hasattr(VECTOR_DB_CLIENT, "maintain"):
+        typer.echo(f"{type(VECTOR_DB_CLIENT).__name__} does not need maintenance.")
+        raise typer.Exit()
+
+    summary = VECTOR_DB_CLIENT.maintain(rebuild=rebuild)
+    typer.echo(f"Rows: {summary['rows']}")
+    typer.echo(f"Created indexes: {', '.join(summary['created']) or '-'}")
+    typer.echo(f"Dropped indexes: {', '.join(summary['dropped']) or '-'}")
+
+
 if __name__ == "__main__":
     app()
@@ -903,6 +903,29 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Files with identical bytes share their stored object and, when processed with
+# the same extraction and embedding settings, their extracted text and vectors
+ENABLE_FILE_DEDUPLICATION = (
+    os.environ.get("ENABLE_FILE_DEDUPLICATION", "false").lower() == "true"
+)
+
+# Local read-through cache of objects downloaded from s3/gcs/azure
+STORAGE_CACHE_ENABLED = (
+    os.environ.get("STORAGE_CACHE_ENABLED", "true").lower() == "true"
+)
+STORAGE_CACHE_MAX_SIZE_MB = int(os.environ.get("STORAGE_CACHE_MAX_SIZE_MB", "5120"))
+# Entries not read for this many seconds are evicted
+STORAGE_CACHE_MAX_AGE = int(os.environ.get("STORAGE_CACHE_MAX_AGE", "604800"))
+
+# How /api/v1/files/{id}/content is served for s3/gcs/azure:
+# local (download to the cache), redirect (presigned URL), stream (ranged reads)
+STORAGE_CONTENT_DELIVERY = os.environ.get("STORAGE_CONTENT_DELIVERY", "local").lower()
+if STORAGE_CONTENT_DELIVERY not in ("local", "redirect", "stream"):
+    STORAGE_CONTENT_DELIVERY = "local"
+STORAGE_PRESIGNED_URL_EXPIRY = int(
+    os.environ.get("STORAGE_PRESIGNED_URL_EXPIRY", "300")
+)
+
 ####################################
 # File Upload DIR
 ####################################
@@ -2102,6 +2125,35 @@ else:
     except Exception:
         PGVECTOR_POOL_RECYCLE = 3600
 
+# Index method for the shared document_chunk table: ivfflat, hnsw or none
+PGVECTOR_INDEX_METHOD = os.environ.get("PGVECTOR_INDEX_METHOD", "ivfflat").lower()
+if PGVECTOR_INDEX_METHOD not in ("ivfflat", "hnsw", "none"):
+    PGVECTOR_INDEX_METHOD = "ivfflat"
+
+PGVECTOR_HNSW_M = int(os.environ.get("PGVECTOR_HNSW_M", "16"))
+PGVECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("PGVECTOR_HNSW_EF_CONSTRUCTION", "64")
+)
+PGVECTOR_HNSW_EF_SEARCH = int(os.environ.get("PGVECTOR_HNSW_EF_SEARCH", "40"))
+# off, relaxed_order or strict_order (requires pgvector >= 0.8)
+PGVECTOR_HNSW_ITERATIVE_SCAN = os.environ.get("PGVECTOR_HNSW_ITERATIVE_SCAN", "")
+
+# 0 sizes lists from the row count when the index is (re)built
+PGVECTOR_IVFFLAT_LISTS = int(os.environ.get("PGVECTOR_IVFFLAT_LISTS", "0"))
+# 0 derives probes from the number of lists
+PGVECTOR_IVFFLAT_PROBES = int(os.environ.get("PGVECTOR_IVFFLAT_PROBES", "0"))
+
+# Collections up to this many chunks are searched exactly instead of through
+# the table-wide ANN index
+PGVECTOR_EXACT_SEARCH_MAX_ROWS = int(
+    os.environ.get("PGVECTOR_EXACT_SEARCH_MAX_ROWS", "10000")
+)
+# Collections above this many chunks get their own partial ANN index when
+# running `open-webui vector-maintenance`, 0 disables partial indexes
+PGVECTOR_PARTIAL_INDEX_MIN_ROWS = int(
+    os.environ.get("PGVECTOR_PARTIAL_INDEX_MIN_ROWS", "100000")
+)
+
 # Pinecone
 PINECONE_API_KEY = os.environ.get("PINECONE_API_KEY", None)
 PINECONE_ENVIRONMENT = os.environ.get("PINECONE_ENVIRONMENT", None)
@@ -2141,6 +2193,33 @@ log.info(f"VECTOR_DB: {VECTOR_DB}")
 S3_VECTOR_BUCKET_NAME = os.environ.get("S3_VECTOR_BUCKET_NAME", None)
 S3_VECTOR_REGION = os.environ.get("S3_VECTOR_REGION", None)
 
+# Local (embedded memory-mapped store, no external service)
+LOCAL_VECTOR_DB_PATH = os.environ.get(
+    "LOCAL_VECTOR_DB_PATH", f"{DATA_DIR}/vector_db_local"
+)
+LOCAL_VECTOR_DTYPE = os.environ.get("LOCAL_VECTOR_DTYPE", "float32").lower()
+if LOCAL_VECTOR_DTYPE not in ("float16", "float32"):
+    LOCAL_VECTOR_DTYPE = "float32"
+
+LOCAL_VECTOR_COMPACTION_MAX_SEGMENTS = int(
+    os.environ.get("LOCAL_VECTOR_COMPACTION_MAX_SEGMENTS", "8")
+)
+LOCAL_VECTOR_COMPACTION_DEAD_RATIO = float(
+    os.environ.get("LOCAL_VECTOR_COMPACTION_DEAD_RATIO", "0.3")
+)
+
+# Requires the optional hnswlib package, collections below the row threshold are
+# searched exhaustively
+LOCAL_VECTOR_HNSW_ENABLED = (
+    os.environ.get("LOCAL_VECTOR_HNSW_ENABLED", "false").lower() == "true"
+)
+LOCAL_VECTOR_HNSW_MIN_ROWS = int(os.environ.get("LOCAL_VECTOR_HNSW_MIN_ROWS", "20000"))
+LOCAL_VECTOR_HNSW_M = int(os.environ.get("LOCAL_VECTOR_HNSW_M", "16"))
+LOCAL_VECTOR_HNSW_EF_CONSTRUCTION = int(
+    os.environ.get("LOCAL_VECTOR_HNSW_EF_CONSTRUCTION", "200")
+)
+LOCAL_VECTOR_HNSW_EF_SEARCH = int(os.environ.get("LOCAL_VECTOR_HNSW_EF_SEARCH", "64"))
+
 ####################################
 # Information Retrieval (RAG)
 ####################################
@@ -3263,6 +3342,14 @@ WHISPER_VAD_FILTER = PersistentConfig(
 
 WHISPER_LANGUAGE = os.getenv("WHISPER_LANGUAGE", "").lower() or None
 
+# Local transcription runs in dedicated worker processes, each holding a copy of the model
+WHISPER_WORKERS = max(int(os.getenv("WHISPER_WORKERS", "1")), 1)
+WHISPER_BATCH_SIZE = max(int(os.getenv("WHISPER_BATCH_SIZE", "8")), 1)
+# Seconds a worker waits for more short utterances to transcribe them in one batch
+WHISPER_BATCH_WINDOW = float(os.getenv("WHISPER_BATCH_WINDOW", "0.05"))
+# Seconds a transcription request waits for the next segment before giving up
+WHISPER_TIMEOUT = float(os.getenv("WHISPER_TIMEOUT", "600"))
+
 # Add Deepgram configuration
 DEEPGRAM_API_KEY = PersistentConfig(
     "DEEPGRAM_API_KEY",
@@ -3399,6 +3486,14 @@ AUDIO_TTS_AZURE_SPEECH_OUTPUT_FORMAT = PersistentConfig(
     ),
 )
 
+# Synthesized speech is cached on disk, least recently played clips go first
+AUDIO_TTS_CACHE_MAX_SIZE_MB = int(os.getenv("AUDIO_TTS_CACHE_MAX_SIZE_MB", "1024"))
+# Clips not played for this many seconds are evicted
+AUDIO_TTS_CACHE_MAX_AGE = int(os.getenv("AUDIO_TTS_CACHE_MAX_AGE", "604800"))
+AUDIO_TTS_CACHE_CLEANUP_INTERVAL = int(
+    os.getenv("AUDIO_TTS_CACHE_CLEANUP_INTERVAL", "3600")
+)
+
 
 ####################################
 # LDAP
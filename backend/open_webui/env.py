@@ -530,6 +530,53 @@ else:
     except Exception:
         MODELS_CACHE_TTL = 1
 
+# Seconds past MODELS_CACHE_TTL that a model list is still served while it is
+# refreshed in the background, and that a connection's last model list stands
+# in for it when the connection fails
+try:
+    MODELS_CACHE_MAX_STALE = int(os.environ.get("MODELS_CACHE_MAX_STALE", "300"))
+except Exception:
+    MODELS_CACHE_MAX_STALE = 300
+
+# Seconds between checks of function/tool update stamps, loaded modules are
+# reused until their stamp changes
+try:
+    PLUGIN_VERSION_CHECK_INTERVAL = float(
+        os.environ.get("PLUGIN_VERSION_CHECK_INTERVAL", "1")
+    )
+except Exception:
+    PLUGIN_VERSION_CHECK_INTERVAL = 1.0
+
+# How requests for a model served by several Ollama backends are spread across
+# them: "least_outstanding", "latency_ewma" or "random"
+OLLAMA_ROUTING_POLICY = os.environ.get(
+    "OLLAMA_ROUTING_POLICY", "least_outstanding"
+).lower()
+
+# The same for OpenAI-compatible connections that expose the same model id
+OPENAI_ROUTING_POLICY = os.environ.get(
+    "OPENAI_ROUTING_POLICY", "least_outstanding"
+).lower()
+
+# Seconds a backend's /api/ps list of loaded models is trusted before it is
+# refreshed in the background
+try:
+    OLLAMA_LOADED_MODELS_TTL = float(os.environ.get("OLLAMA_LOADED_MODELS_TTL", "5"))
+except Exception:
+    OLLAMA_LOADED_MODELS_TTL = 5.0
+
+# Consecutive failures (connection errors or 5xx responses) after which a model
+# backend is skipped, and the seconds until it is tried again
+try:
+    UPSTREAM_FAILURE_THRESHOLD = int(os.environ.get("UPSTREAM_FAILURE_THRESHOLD", "3"))
+except Exception:
+    UPSTREAM_FAILURE_THRESHOLD = 3
+
+try:
+    UPSTREAM_FAILURE_COOLDOWN = float(os.environ.get("UPSTREAM_FAILURE_COOLDOWN", "30"))
+except Exception:
+    UPSTREAM_FAILURE_COOLDOWN = 30.0
+
 
 ####################################
 # CHAT
@@ -563,6 +610,109 @@ else:
         CHAT_RESPONSE_MAX_TOOL_CALL_RETRIES = 30
 
 
+####################################
+# FILE INGESTION QUEUE
+####################################
+
+# Route uploaded file processing through the persistent ingestion queue
+# instead of running it as a FastAPI background task in the web worker.
+ENABLE_INGESTION_QUEUE = (
+    os.environ.get("ENABLE_INGESTION_QUEUE", "False").lower() == "true"
+)
+
+# Run ingestion workers inside every web worker. Disable this when dedicated
+# worker processes are started with `open-webui ingest-worker`.
+ENABLE_INGESTION_EMBEDDED_WORKER = (
+    os.environ.get("ENABLE_INGESTION_EMBEDDED_WORKER", "True").lower() == "true"
+)
+
+INGESTION_WORKER_CONCURRENCY = os.environ.get("INGESTION_WORKER_CONCURRENCY", "2")
+try:
+    INGESTION_WORKER_CONCURRENCY = int(INGESTION_WORKER_CONCURRENCY)
+    if INGESTION_WORKER_CONCURRENCY < 1:
+        INGESTION_WORKER_CONCURRENCY = 1
+except ValueError:
+    INGESTION_WORKER_CONCURRENCY = 2
+
+INGESTION_JOB_MAX_ATTEMPTS = os.environ.get("INGESTION_JOB_MAX_ATTEMPTS", "3")
+try:
+    INGESTION_JOB_MAX_ATTEMPTS = int(INGESTION_JOB_MAX_ATTEMPTS)
+    if INGESTION_JOB_MAX_ATTEMPTS < 1:
+        INGESTION_JOB_MAX_ATTEMPTS = 1
+except ValueError:
+    INGESTION_JOB_MAX_ATTEMPTS = 3
+
+# Base delay in seconds for exponential retry backoff (base * 2 ** attempt)
+INGESTION_JOB_RETRY_BACKOFF = os.environ.get("INGESTION_JOB_RETRY_BACKOFF", "10")
+try:
+    INGESTION_JOB_RETRY_BACKOFF = float(INGESTION_JOB_RETRY_BACKOFF)
+except ValueError:
+    INGESTION_JOB_RETRY_BACKOFF = 10.0
+
+# Jobs locked by a worker for longer than this are considered abandoned
+# (e.g. the worker was killed) and are handed to another worker.
+INGESTION_JOB_LOCK_TIMEOUT = os.environ.get("INGESTION_JOB_LOCK_TIMEOUT", "3600")
+try:
+    INGESTION_JOB_LOCK_TIMEOUT = int(INGESTION_JOB_LOCK_TIMEOUT)
+except ValueError:
+    INGESTION_JOB_LOCK_TIMEOUT = 3600
+
+INGESTION_WORKER_POLL_INTERVAL = os.environ.get("INGESTION_WORKER_POLL_INTERVAL", "1")
+try:
+    INGESTION_WORKER_POLL_INTERVAL = float(INGESTION_WORKER_POLL_INTERVAL)
+except ValueError:
+    INGESTION_WORKER_POLL_INTERVAL = 1.0
+
+# Processes used to extract text with the built-in (CPU-bound) loaders, 0 extracts
+# in the calling thread instead
+DOCUMENT_EXTRACTION_WORKERS = os.environ.get(
+    "DOCUMENT_EXTRACTION_WORKERS", str(min(os.cpu_count() or 1, 4))
+)
+try:
+    DOCUMENT_EXTRACTION_WORKERS = max(int(DOCUMENT_EXTRACTION_WORKERS), 0)
+except ValueError:
+    DOCUMENT_EXTRACTION_WORKERS = min(os.cpu_count() or 1, 4)
+
+# PDFs with more pages are split into ranges of this many pages extracted in parallel
+DOCUMENT_EXTRACTION_PAGES_PER_TASK = os.environ.get(
+    "DOCUMENT_EXTRACTION_PAGES_PER_TASK", "50"
+)
+try:
+    DOCUMENT_EXTRACTION_PAGES_PER_TASK = max(int(DOCUMENT_EXTRACTION_PAGES_PER_TASK), 1)
+except ValueError:
+    DOCUMENT_EXTRACTION_PAGES_PER_TASK = 50
+
+# Seconds a single file may take to extract before its workers are killed
+DOCUMENT_EXTRACTION_TIMEOUT = os.environ.get("DOCUMENT_EXTRACTION_TIMEOUT", "600")
+try:
+    DOCUMENT_EXTRACTION_TIMEOUT = int(DOCUMENT_EXTRACTION_TIMEOUT)
+except ValueError:
+    DOCUMENT_EXTRACTION_TIMEOUT = 600
+
+# Address space limit of each extraction process in MB, 0 for no limit
+DOCUMENT_EXTRACTION_MAX_MEMORY_MB = os.environ.get(
+    "DOCUMENT_EXTRACTION_MAX_MEMORY_MB", "0"
+)
+try:
+    DOCUMENT_EXTRACTION_MAX_MEMORY_MB = int(DOCUMENT_EXTRACTION_MAX_MEMORY_MB)
+except ValueError:
+    DOCUMENT_EXTRACTION_MAX_MEMORY_MB = 0
+
+# Documents sent to each external OCR engine (Mistral, Datalab Marker) at once
+DOCUMENT_OCR_MAX_CONCURRENCY = os.environ.get("DOCUMENT_OCR_MAX_CONCURRENCY", "4")
+try:
+    DOCUMENT_OCR_MAX_CONCURRENCY = max(int(DOCUMENT_OCR_MAX_CONCURRENCY), 1)
+except ValueError:
+    DOCUMENT_OCR_MAX_CONCURRENCY = 4
+
+# Seconds OCR results are kept for reuse when the same file is processed again
+DOCUMENT_OCR_CACHE_MAX_AGE = os.environ.get("DOCUMENT_OCR_CACHE_MAX_AGE", "2592000")
+try:
+    DOCUMENT_OCR_CACHE_MAX_AGE = int(DOCUMENT_OCR_CACHE_MAX_AGE)
+except ValueError:
+    DOCUMENT_OCR_CACHE_MAX_AGE = 2592000
+
+
 ####################################
 # WEBSOCKET SUPPORT
 ####################################
@@ -638,6 +788,112 @@ AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL = (
     os.environ.get("AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL", "True").lower() == "true"
 )
 
+# Seconds an unused MCP session is kept open for later chats
+try:
+    MCP_SESSION_IDLE_TIMEOUT = int(os.environ.get("MCP_SESSION_IDLE_TIMEOUT", "300"))
+except Exception:
+    MCP_SESSION_IDLE_TIMEOUT = 300
+
+# Seconds an MCP server's tool list is reused, unless the server reports that it
+# changed
+try:
+    MCP_TOOL_SPECS_TTL = int(os.environ.get("MCP_TOOL_SPECS_TTL", "300"))
+except Exception:
+    MCP_TOOL_SPECS_TTL = 300
+
+# Seconds between background refreshes of OpenAPI tool server specs
+try:
+    TOOL_SERVER_SPECS_REFRESH_INTERVAL = int(
+        os.environ.get("TOOL_SERVER_SPECS_REFRESH_INTERVAL", "300")
+    )
+except Exception:
+    TOOL_SERVER_SPECS_REFRESH_INTERVAL = 300
+
+####################################
+# JUPYTER KERNEL POOL
+####################################
+
+# Kernels kept started and idle on each Jupyter server, ready for code to run
+try:
+    JUPYTER_KERNEL_POOL_SIZE = int(os.environ.get("JUPYTER_KERNEL_POOL_SIZE", "2"))
+except Exception:
+    JUPYTER_KERNEL_POOL_SIZE = 2
+
+# "execution" runs each execution in a fresh kernel, "chat" keeps a kernel and
+# its state for all code interpreter runs of a chat
+JUPYTER_KERNEL_ISOLATION = os.environ.get("JUPYTER_KERNEL_ISOLATION", "execution")
+if JUPYTER_KERNEL_ISOLATION not in ("execution", "chat"):
+    JUPYTER_KERNEL_ISOLATION = "execution"
+
+# Seconds a chat's kernel is kept after its last run
+try:
+    JUPYTER_KERNEL_LEASE_TIMEOUT = int(
+        os.environ.get("JUPYTER_KERNEL_LEASE_TIMEOUT", "600")
+    )
+except Exception:
+    JUPYTER_KERNEL_LEASE_TIMEOUT = 600
+
+# Peak memory in MB after which a chat's kernel is replaced, 0 for no limit
+try:
+    JUPYTER_KERNEL_MAX_MEMORY_MB = int(
+        os.environ.get("JUPYTER_KERNEL_MAX_MEMORY_MB", "0")
+    )
+except Exception:
+    JUPYTER_KERNEL_MAX_MEMORY_MB = 0
+
+####################################
+# COMFYUI
+####################################
+
+# ComfyUI results kept for repeated requests with the same workflow and seed,
+# 0 to disable
+try:
+    COMFYUI_RESULT_CACHE_SIZE = int(os.environ.get("COMFYUI_RESULT_CACHE_SIZE", "256"))
+except Exception:
+    COMFYUI_RESULT_CACHE_SIZE = 256
+
+####################################
+# NVIDIA
+####################################
+
+NVIDIA_API_BASE_URL = os.environ.get(
+    "NVIDIA_API_BASE_URL", "https://integrate.api.nvidia.com/v1"
+).rstrip("/")
+
+# Key for models that do not set their own "api_key"
+NVIDIA_API_KEY = os.environ.get("NVIDIA_API_KEY", "")
+
+DEFAULT_NVIDIA_MODELS = [
+    {
+        "id": "nvidia/qwen3-coder-480b-a35b-instruct",
+        "name": "Qwen3 Coder 480B A35B Instruct",
+        "model_name": "qwen/qwen3-coder-480b-a35b-instruct",
+    },
+    {
+        "id": "nvidia/moonshotai-kimi-k2-instruct-0905",
+        "name": "Moonshot AI Kimi K2 Instruct 0905",
+        "model_name": "moonshotai/kimi-k2-instruct-0905",
+    },
+    {
+        "id": "nvidia/deepseek-r1-0528",
+        "name": "DeepSeek R1 0528",
+        "model_name": "deepseek-ai/deepseek-r1-0528",
+    },
+]
+
+# JSON list of models, each with an "id", a "name", the upstream "model_name"
+# and optionally an "api_key" to use instead of NVIDIA_API_KEY
+try:
+    NVIDIA_MODELS = json.loads(os.environ.get("NVIDIA_MODELS", "")) or []
+except Exception:
+    NVIDIA_MODELS = DEFAULT_NVIDIA_MODELS
+
+# Connections kept to the NVIDIA API, 0 for no limit
+try:
+    NVIDIA_MAX_CONNECTIONS = int(os.environ.get("NVIDIA_MAX_CONNECTIONS", "0"))
+except Exception:
+    NVIDIA_MAX_CONNECTIONS = 0
+
 
 ####################################
 # SENTENCE TRANSFORMERS
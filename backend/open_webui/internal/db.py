@@ -1,10 +1,10 @@
 import os
-import json
 import logging
 from contextlib import contextmanager
 from typing import Any, Optional
 
 from open_webui.internal.wrappers import register_connection
+from open_webui.utils import serialization
 from open_webui.env import (
     OPEN_WEBUI_DIR,
     DATABASE_URL,
@@ -33,21 +33,21 @@ class JSONField(types.TypeDecorator):
     cache_ok = True
 
     def process_bind_param(self, value: Optional[_T], dialect: Dialect) -> Any:
-        return json.dumps(value)
+        return serialization.dumps(value)
 
     def process_result_value(self, value: Optional[_T], dialect: Dialect) -> Any:
         if value is not None:
-            return json.loads(value)
+            return serialization.loads(value)
 
     def copy(self, **kw: Any) -> Self:
         return JSONField(self.impl.length)
 
     def db_value(self, value):
-        return json.dumps(value)
+        return serialization.dumps(value)
 
     def python_value(self, value):
         if value is not None:
-            return json.loads(value)
+            return serialization.loads(value)
 
 
 # Workaround to handle the peewee migration
@@ -82,6 +82,12 @@ handle_peewee_migration(DATABASE_URL)
 
 SQLALCHEMY_DATABASE_URL = DATABASE_URL
 
+# Used by the JSON columns; JSONField columns encode themselves
+JSON_SERIALIZATION_ARGS = {
+    "json_serializer": serialization.dumps,
+    "json_deserializer": serialization.loads,
+}
+
 # Handle SQLCipher URLs
 if SQLALCHEMY_DATABASE_URL.startswith("sqlite+sqlcipher://"):
     database_password = os.environ.get("DATABASE_PASSWORD")
@@ -107,13 +113,16 @@ if SQLALCHEMY_DATABASE_URL.startswith("sqlite+sqlcipher://"):
         "sqlite://",  # Dummy URL since we're using creator
         creator=create_sqlcipher_connection,
         echo=False,
+        **JSON_SERIALIZATION_ARGS,
     )
 
     log.info("Connected to encrypted SQLite database using SQLCipher")
 
 elif "sqlite" in SQLALCHEMY_DATABASE_URL:
     engine = create_engine(
-        SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        **JSON_SERIALIZATION_ARGS,
     )
 
     def on_connect(dbapi_connection, connection_record):
@@ -136,13 +145,19 @@ else:
                 pool_recycle=DATABASE_POOL_RECYCLE,
                 pool_pre_ping=True,
                 poolclass=QueuePool,
+                **JSON_SERIALIZATION_ARGS,
             )
         else:
             engine = create_engine(
-                SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, poolclass=NullPool
+                SQLALCHEMY_DATABASE_URL,
+                pool_pre_ping=True,
+                poolclass=NullPool,
+                **JSON_SERIALIZATION_ARGS,
             )
     else:
-        engine = create_engine(SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+        engine = create_engine(
+            SQLALCHEMY_DATABASE_URL, pool_pre_ping=True, **JSON_SERIALIZATION_ARGS
+        )
 
 
 SessionLocal = sessionmaker(
@@ -448,6 +448,8 @@ from open_webui.env import (
     ENABLE_OTEL,
     EXTERNAL_PWA_MANIFEST_URL,
     AIOHTTP_CLIENT_SESSION_SSL,
+    ENABLE_INGESTION_QUEUE,
+    ENABLE_INGESTION_EMBEDDED_WORKER,
 )
 
 
@@ -481,6 +483,13 @@ from open_webui.utils.oauth import (
     OAuthClientInformationFull,
 )
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
+from open_webui.utils.serialization import ORJSONResponse
+from open_webui.utils.ingestion import IngestionWorker
+from open_webui.retrieval.loaders.executor import extraction_executor
+from open_webui.utils.mcp.pool import mcp_session_pool
+from open_webui.utils.code_interpreter import jupyter_kernel_pool
+from open_webui.utils.images.comfyui import close_comfyui_clients
+from open_webui.utils.file_status import file_status_broker
 from open_webui.utils.redis import get_redis_connection
 
 from open_webui.tasks import (
@@ -574,6 +583,13 @@ async def lifespan(app: FastAPI):
 
     asyncio.create_task(periodic_usage_pool_cleanup())
 
+    await file_status_broker.start(app.state.redis)
+    audio.speech_cache.start()
+
+    if ENABLE_INGESTION_QUEUE and ENABLE_INGESTION_EMBEDDED_WORKER:
+        app.state.ingestion_worker = IngestionWorker(app)
+        app.state.ingestion_worker.start()
+
     if app.state.config.ENABLE_BASE_MODELS_CACHE:
         await get_all_models(
             Request(
@@ -600,6 +616,18 @@ async def lifespan(app: FastAPI):
     if hasattr(app.state, "redis_task_command_listener"):
         app.state.redis_task_command_listener.cancel()
 
+    if hasattr(app.state, "ingestion_worker"):
+        await app.state.ingestion_worker.stop()
+
+    await audio.speech_cache.stop()
+    await asyncio.to_thread(audio.whisper_pool.stop)
+    extraction_executor.shutdown()
+    await file_status_broker.stop()
+    await mcp_session_pool.close()
+    await jupyter_kernel_pool.close()
+    await close_comfyui_clients()
+    await nvidia.close_nvidia_session()
+
 
 app = FastAPI(
     title="FLOAT CHAT",
@@ -607,6 +635,7 @@ app = FastAPI(
     openapi_url="/openapi.json" if ENV == "dev" else None,
     redoc_url=None,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # For FLOAT CHAT OIDC/OAuth2
@@ -787,9 +816,11 @@ app.state.EXTERNAL_PWA_MANIFEST_URL = EXTERNAL_PWA_MANIFEST_URL
 app.state.USER_COUNT = None
 
 app.state.TOOLS = {}
+app.state.TOOL_VERSIONS = {}
 app.state.TOOL_CONTENTS = {}
 
 app.state.FUNCTIONS = {}
+app.state.FUNCTION_VERSIONS = {}
 app.state.FUNCTION_CONTENTS = {}
 
 ########################################
@@ -1110,7 +1141,6 @@ app.state.config.TTS_AZURE_SPEECH_BASE_URL = AUDIO_TTS_AZURE_SPEECH_BASE_URL
 app.state.config.TTS_AZURE_SPEECH_OUTPUT_FORMAT = AUDIO_TTS_AZURE_SPEECH_OUTPUT_FORMAT
 
 
-app.state.faster_whisper_model = None
 app.state.speech_synthesiser = None
 app.state.speech_speaker_embeddings_dataset = None
 
@@ -1551,14 +1581,6 @@ async def chat_completion(
 
                 except:
                     pass
-        finally:
-            try:
-                if mcp_clients := metadata.get("mcp_clients"):
-                    for client in mcp_clients:
-                        await client.disconnect()
-            except Exception as e:
-                log.debug(f"Error cleaning up: {e}")
-                pass
 
     if (
         metadata.get("session_id")
@@ -0,0 +1,57 @@
+"""Add ingestion_job table
+
+Revision ID: 5c3aef62773b
+Revises: 38d63c18f30f
+Create Date: 2026-10-19 09:12:44.318207
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "5c3aef62773b"
+down_revision: Union[str, None] = "38d63c18f30f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ingestion_job",
+        sa.Column("id", sa.Text(), nullable=False),
+        sa.Column("file_id", sa.Text(), nullable=False),
+        sa.Column("user_id", sa.Text(), nullable=False),
+        sa.Column("status", sa.Text(), nullable=False),
+        sa.Column("stage", sa.Text(), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("max_attempts", sa.Integer(), nullable=False, server_default="1"),
+        sa.Column("next_attempt_at", sa.BigInteger(), nullable=False),
+        sa.Column("locked_by", sa.Text(), nullable=True),
+        sa.Column("locked_at", sa.BigInteger(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("data", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+    op.create_index(
+        "idx_ingestion_job_status_next_attempt",
+        "ingestion_job",
+        ["status", "next_attempt_at"],
+    )
+    op.create_index("idx_ingestion_job_file_id", "ingestion_job", ["file_id"])
+    op.create_index(
+        "idx_ingestion_job_user_id_status", "ingestion_job", ["user_id", "status"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_ingestion_job_user_id_status", table_name="ingestion_job")
+    op.drop_index("idx_ingestion_job_file_id", table_name="ingestion_job")
+    op.drop_index("idx_ingestion_job_status_next_attempt", table_name="ingestion_job")
+
+    op.drop_table("ingestion_job")
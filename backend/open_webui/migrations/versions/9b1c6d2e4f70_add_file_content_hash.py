@@ -0,0 +1,28 @@
+"""Add content_hash to file table
+
+Revision ID: 9b1c6d2e4f70
+Revises: 5c3aef62773b
+Create Date: 2026-10-19 11:02:47.318265
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9b1c6d2e4f70"
+down_revision: Union[str, None] = "5c3aef62773b"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade():
+    op.add_column("file", sa.Column("content_hash", sa.Text(), nullable=True))
+    op.create_index("idx_file_content_hash", "file", ["content_hash"])
+
+
+def downgrade():
+    op.drop_index("idx_file_content_hash", table_name="file")
+    op.drop_column("file", "content_hash")
@@ -5,7 +5,7 @@ from typing import Optional
 from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, Index, String, Text, JSON
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -20,6 +20,8 @@ class File(Base):
     id = Column(String, primary_key=True)
     user_id = Column(String)
     hash = Column(Text, nullable=True)
+    # SHA-256 of the stored bytes, files with the same one share their object
+    content_hash = Column(Text, nullable=True)
 
     filename = Column(Text)
     path = Column(Text, nullable=True)
@@ -32,6 +34,8 @@ class File(Base):
     created_at = Column(BigInteger)
     updated_at = Column(BigInteger)
 
+    __table_args__ = (Index("idx_file_content_hash", "content_hash"),)
+
 
 class FileModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -39,6 +43,7 @@ class FileModel(BaseModel):
     id: str
     user_id: str
     hash: Optional[str] = None
+    content_hash: Optional[str] = None
 
     filename: str
     path: Optional[str] = None
@@ -90,6 +95,7 @@ class FileMetadataResponse(BaseModel):
 class FileForm(BaseModel):
     id: str
     hash: Optional[str] = None
+    content_hash: Optional[str] = None
     filename: str
     path: str
     data: dict = {}
@@ -122,6 +128,56 @@ class FilesTable:
                 log.exception(f"Error inserting a new file: {e}")
                 return None
 
+    def insert_new_deduplicated_file(
+        self, user_id: str, form_data: FileForm
+    ) -> Optional[FileModel]:
+        """
+        Insert a file that shares the stored object of the oldest file with the
+        same content hash, if there is one, instead of its own.
+
+        The new row is written before that file is looked up and locked, so a
+        concurrent delete of it either commits first, and the new file keeps
+        its own object, or commits after and finds the new file still using
+        the shared one.
+        """
+        with get_db() as db:
+            file = FileModel(
+                **{
+                    **form_data.model_dump(),
+                    "user_id": user_id,
+                    "created_at": int(time.time()),
+                    "updated_at": int(time.time()),
+                }
+            )
+
+            try:
+                result = File(**file.model_dump())
+                db.add(result)
+                # Takes SQLite's write lock before the lookup
+                db.flush()
+
+                if form_data.content_hash:
+                    duplicate = (
+                        db.query(File.path)
+                        .filter(
+                            File.content_hash == form_data.content_hash,
+                            File.id != form_data.id,
+                            File.path.isnot(None),
+                        )
+                        .order_by(File.created_at)
+                        .with_for_update()
+                        .first()
+                    )
+                    if duplicate:
+                        result.path = duplicate.path
+
+                db.commit()
+                db.refresh(result)
+                return FileModel.model_validate(result)
+            except Exception as e:
+                log.exception(f"Error inserting a new file: {e}")
+                return None
+
     def get_file_by_id(self, id: str) -> Optional[FileModel]:
         with get_db() as db:
             try:
@@ -199,6 +255,37 @@ class FilesTable:
                 for file in db.query(File).filter_by(user_id=user_id).all()
             ]
 
+    def get_file_paths_by_content_hash(
+        self, content_hash: str
+    ) -> dict[str, Optional[str]]:
+        """Ids and storage paths of the files with these contents, oldest first."""
+        with get_db() as db:
+            return dict(
+                db.query(File.id, File.path)
+                .filter_by(content_hash=content_hash)
+                .order_by(File.created_at)
+                .all()
+            )
+
+    def get_file_metadatas_by_content_hash(
+        self, content_hash: str
+    ) -> list[FileMetadataResponse]:
+        with get_db() as db:
+            return [
+                FileMetadataResponse(
+                    id=file.id,
+                    meta=file.meta or {},
+                    created_at=file.created_at,
+                    updated_at=file.updated_at,
+                )
+                for file in db.query(
+                    File.id, File.meta, File.created_at, File.updated_at
+                )
+                .filter_by(content_hash=content_hash)
+                .order_by(File.created_at)
+                .all()
+            ]
+
     def update_file_hash_by_id(self, id: str, hash: str) -> Optional[FileModel]:
         with get_db() as db:
             try:
@@ -6,7 +6,7 @@ from open_webui.internal.db import Base, JSONField, get_db
 from open_webui.models.users import Users
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, Index
+from sqlalchemy import BigInteger, Boolean, Column, String, Text, Index, case
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -99,6 +99,16 @@ class FunctionValves(BaseModel):
     valves: Optional[dict] = None
 
 
+def next_updated_at():
+    """
+    The current time, or one past the stored stamp when that is not older, so
+    that every update gets a new updated_at even within the same second.
+    Compiled filters are keyed on it.
+    """
+    now = int(time.time())
+    return case((Function.updated_at >= now, Function.updated_at + 1), else_=now)
+
+
 class FunctionsTable:
     def insert_new_function(
         self, user_id: str, type: str, form_data: FunctionForm
@@ -147,7 +157,7 @@ class FunctionsTable:
                             {
                                 **func.model_dump(),
                                 "user_id": user_id,
-                                "updated_at": int(time.time()),
+                                "updated_at": next_updated_at(),
                             }
                         )
                     else:
@@ -204,22 +214,28 @@ class FunctionsTable:
                 ]
 
     def get_functions_by_type(
-        self, type: str, active_only=False
-    ) -> list[FunctionModel]:
+        self, type: str, active_only=False, include_valves=False
+    ) -> list[FunctionModel | FunctionWithValvesModel]:
+        model = FunctionWithValvesModel if include_valves else FunctionModel
         with get_db() as db:
             if active_only:
                 return [
-                    FunctionModel.model_validate(function)
+                    model.model_validate(function)
                     for function in db.query(Function)
                     .filter_by(type=type, is_active=True)
                     .all()
                 ]
             else:
                 return [
-                    FunctionModel.model_validate(function)
+                    model.model_validate(function)
                     for function in db.query(Function).filter_by(type=type).all()
                 ]
 
+    def get_function_versions(self) -> dict[str, int]:
+        """Map of function id to its updated_at stamp, without loading the source."""
+        with get_db() as db:
+            return dict(db.query(Function.id, Function.updated_at).all())
+
     def get_global_filter_functions(self) -> list[FunctionModel]:
         with get_db() as db:
             return [
@@ -254,7 +270,7 @@ class FunctionsTable:
             try:
                 function = db.get(Function, id)
                 function.valves = valves
-                function.updated_at = int(time.time())
+                function.updated_at = next_updated_at()
                 db.commit()
                 db.refresh(function)
                 return self.get_function_by_id(id)
@@ -274,7 +290,7 @@ class FunctionsTable:
                     else:
                         function.meta = metadata
 
-                    function.updated_at = int(time.time())
+                    function.updated_at = next_updated_at()
                     db.commit()
                     db.refresh(function)
                     return self.get_function_by_id(id)
@@ -333,7 +349,7 @@ class FunctionsTable:
                 db.query(Function).filter_by(id=id).update(
                     {
                         **updated,
-                        "updated_at": int(time.time()),
+                        "updated_at": next_updated_at(),
                     }
                 )
                 db.commit()
@@ -347,7 +363,7 @@ class FunctionsTable:
                 db.query(Function).update(
                     {
                         "is_active": False,
-                        "updated_at": int(time.time()),
+                        "updated_at": next_updated_at(),
                     }
                 )
                 db.commit()
@@ -0,0 +1,343 @@
+import logging
+import time
+import uuid
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Index, Integer, Text, JSON, func
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# Ingestion Job DB Schema
+####################
+
+# queued -> running -> completed
+#                   \-> queued (retry with backoff) -> ... -> failed
+# queued | running -> cancelled
+INGESTION_JOB_ACTIVE_STATUSES = ("queued", "running")
+INGESTION_JOB_FINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class IngestionJob(Base):
+    __tablename__ = "ingestion_job"
+
+    id = Column(Text, primary_key=True)
+    file_id = Column(Text, nullable=False)
+    user_id = Column(Text, nullable=False)
+
+    status = Column(Text, nullable=False)
+    stage = Column(Text, nullable=True)  # extract | split | embed | index
+
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=1)
+    next_attempt_at = Column(BigInteger, nullable=False)
+
+    locked_by = Column(Text, nullable=True)
+    locked_at = Column(BigInteger, nullable=True)
+
+    error = Column(Text, nullable=True)
+    data = Column(JSON, nullable=True)
+
+    created_at = Column(BigInteger, nullable=False)
+    updated_at = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index("idx_ingestion_job_status_next_attempt", "status", "next_attempt_at"),
+        Index("idx_ingestion_job_file_id", "file_id"),
+        Index("idx_ingestion_job_user_id_status", "user_id", "status"),
+    )
+
+
+class IngestionJobModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    file_id: str
+    user_id: str
+
+    status: str
+    stage: Optional[str] = None
+
+    attempts: int = 0
+    max_attempts: int = 1
+    next_attempt_at: int
+
+    locked_by: Optional[str] = None
+    locked_at: Optional[int] = None
+
+    error: Optional[str] = None
+    data: Optional[dict] = None
+
+    created_at: int  # timestamp in epoch
+    updated_at: int  # timestamp in epoch
+
+
+####################
+# Forms
+####################
+
+
+class IngestionJobResponse(BaseModel):
+    id: str
+    file_id: str
+    status: str
+    stage: Optional[str] = None
+    attempts: int
+    error: Optional[str] = None
+    created_at: int
+    updated_at: int
+
+
+class IngestionJobsTable:
+    def insert_new_job(
+        self,
+        file_id: str,
+        user_id: str,
+        max_attempts: int = 1,
+        data: Optional[dict] = None,
+    ) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            now = int(time.time())
+            job = IngestionJobModel(
+                **{
+                    "id": str(uuid.uuid4()),
+                    "file_id": file_id,
+                    "user_id": user_id,
+                    "status": "queued",
+                    "attempts": 0,
+                    "max_attempts": max_attempts,
+                    "next_attempt_at": now,
+                    "data": data or {},
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+
+            try:
+                result = IngestionJob(**job.model_dump())
+                db.add(result)
+                db.commit()
+                db.refresh(result)
+                return IngestionJobModel.model_validate(result)
+            except Exception as e:
+                log.exception(f"Error inserting a new ingestion job: {e}")
+                return None
+
+    def get_job_by_id(self, id: str) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            try:
+                job = db.get(IngestionJob, id)
+                return IngestionJobModel.model_validate(job) if job else None
+            except Exception:
+                return None
+
+    def get_latest_job_by_file_id(self, file_id: str) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            job = (
+                db.query(IngestionJob)
+                .filter_by(file_id=file_id)
+                .order_by(IngestionJob.created_at.desc())
+                .first()
+            )
+            return IngestionJobModel.model_validate(job) if job else None
+
+    def get_job_status_by_id(self, id: str) -> Optional[str]:
+        with get_db() as db:
+            return db.query(IngestionJob.status).filter(IngestionJob.id == id).scalar()
+
+    def expire_stale_jobs(self, lock_timeout: int) -> list[IngestionJobModel]:
+        """
+        Release the jobs whose worker died (or stalled) while holding the lock:
+        requeue them, or fail them once they used up their attempts, so a job
+        that crashes its worker does not loop forever. Returns the failed jobs.
+        """
+        now = int(time.time())
+        stale = (
+            IngestionJob.status == "running",
+            IngestionJob.locked_at < now - lock_timeout,
+        )
+        with get_db() as db:
+            failed = [
+                IngestionJobModel.model_validate(job)
+                for job in db.query(IngestionJob)
+                .filter(*stale, IngestionJob.attempts >= IngestionJob.max_attempts)
+                .all()
+            ]
+            if failed:
+                db.query(IngestionJob).filter(
+                    IngestionJob.id.in_([job.id for job in failed]), *stale
+                ).update(
+                    {
+                        "status": "failed",
+                        "error": "The worker stopped while processing the file",
+                        "locked_by": None,
+                        "locked_at": None,
+                        "updated_at": now,
+                    },
+                    synchronize_session=False,
+                )
+
+            db.query(IngestionJob).filter(*stale).update(
+                {
+                    "status": "queued",
+                    "locked_by": None,
+                    "locked_at": None,
+                    "updated_at": now,
+                },
+                synchronize_session=False,
+            )
+            db.commit()
+            return failed
+
+    def claim_next_job(
+        self, worker_id: str, candidates: int = 100
+    ) -> Optional[IngestionJobModel]:
+        """
+        Atomically lock the next runnable job for `worker_id`.
+
+        Fairness: among the oldest runnable jobs, the one belonging to the user
+        with the fewest running jobs wins, so a single bulk upload cannot starve
+        everyone else's files.
+        """
+        now = int(time.time())
+        with get_db() as db:
+            queued = (
+                db.query(IngestionJob.id, IngestionJob.user_id)
+                .filter(
+                    IngestionJob.status == "queued",
+                    IngestionJob.next_attempt_at <= now,
+                )
+                .order_by(IngestionJob.next_attempt_at, IngestionJob.created_at)
+                .limit(candidates)
+                .all()
+            )
+            if not queued:
+                return None
+
+            running = dict(
+                db.query(IngestionJob.user_id, func.count(IngestionJob.id))
+                .filter(
+                    IngestionJob.status == "running",
+                    IngestionJob.user_id.in_({user_id for _, user_id in queued}),
+                )
+                .group_by(IngestionJob.user_id)
+                .all()
+            )
+
+            # Stable sort keeps FIFO order within the same load level
+            for job_id, _ in sorted(queued, key=lambda row: running.get(row[1], 0)):
+                claimed = (
+                    db.query(IngestionJob)
+                    .filter(IngestionJob.id == job_id, IngestionJob.status == "queued")
+                    .update(
+                        {
+                            "status": "running",
+                            "locked_by": worker_id,
+                            "locked_at": now,
+                            "attempts": IngestionJob.attempts + 1,
+                            "updated_at": now,
+                        },
+                        synchronize_session=False,
+                    )
+                )
+                db.commit()
+
+                if claimed:
+                    return IngestionJobModel.model_validate(
+                        db.get(IngestionJob, job_id)
+                    )
+
+            return None
+
+    def update_job_by_id(self, id: str, updated: dict) -> Optional[IngestionJobModel]:
+        with get_db() as db:
+            try:
+                db.query(IngestionJob).filter_by(id=id).update(
+                    {**updated, "updated_at": int(time.time())}
+                )
+                db.commit()
+                return IngestionJobModel.model_validate(db.get(IngestionJob, id))
+            except Exception as e:
+                log.exception(f"Error updating ingestion job {id}: {e}")
+                return None
+
+    def update_job_stage_by_id(
+        self, id: str, stage: str, locked_by: Optional[str] = None
+    ) -> Optional[str]:
+        """Record the current stage, renew the lock and return the job status
+        so workers can notice cancellation between stages."""
+        now = int(time.time())
+        with get_db() as db:
+            query = db.query(IngestionJob).filter(
+                IngestionJob.id == id, IngestionJob.status == "running"
+            )
+            if locked_by is not None:
+                query = query.filter(IngestionJob.locked_by == locked_by)
+            query.update(
+                {"stage": stage, "locked_at": now, "updated_at": now},
+                synchronize_session=False,
+            )
+            db.commit()
+            return db.query(IngestionJob.status).filter(IngestionJob.id == id).scalar()
+
+    def finish_job_by_id(self, id: str, locked_by: str, updated: dict) -> bool:
+        """
+        Apply the outcome of a run, unless the job was cancelled (or its lock
+        expired and another worker claimed it) in the meantime.
+        """
+        with get_db() as db:
+            count = (
+                db.query(IngestionJob)
+                .filter(
+                    IngestionJob.id == id,
+                    IngestionJob.status == "running",
+                    IngestionJob.locked_by == locked_by,
+                )
+                .update(
+                    {**updated, "updated_at": int(time.time())},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return count > 0
+
+    def cancel_jobs_by_file_id(self, file_id: str) -> int:
+        with get_db() as db:
+            count = (
+                db.query(IngestionJob)
+                .filter(
+                    IngestionJob.file_id == file_id,
+                    IngestionJob.status.in_(INGESTION_JOB_ACTIVE_STATUSES),
+                )
+                .update(
+                    {"status": "cancelled", "updated_at": int(time.time())},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return count
+
+    def delete_jobs_by_file_id(self, file_id: str) -> bool:
+        with get_db() as db:
+            try:
+                db.query(IngestionJob).filter_by(file_id=file_id).delete()
+                db.commit()
+                return True
+            except Exception:
+                return False
+
+    def delete_all_jobs(self) -> bool:
+        with get_db() as db:
+            try:
+                db.query(IngestionJob).delete()
+                db.commit()
+                return True
+            except Exception:
+                return False
+
+
+IngestionJobs = IngestionJobsTable()
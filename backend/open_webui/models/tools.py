@@ -8,7 +8,7 @@ from open_webui.models.groups import Groups
 
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Column, String, Text, JSON, case
 
 from open_webui.utils.access_control import has_access
 
@@ -110,6 +110,15 @@ class ToolValves(BaseModel):
     valves: Optional[dict] = None
 
 
+def next_updated_at():
+    """
+    The current time, or one past the stored stamp when that is not older, so
+    that every update gets a new updated_at even within the same second.
+    """
+    now = int(time.time())
+    return case((Tool.updated_at >= now, Tool.updated_at + 1), else_=now)
+
+
 class ToolsTable:
     def insert_new_tool(
         self, user_id: str, form_data: ToolForm, specs: list[dict]
@@ -181,6 +190,11 @@ class ToolsTable:
             or has_access(user_id, permission, tool.access_control, user_group_ids)
         ]
 
+    def get_tool_versions(self) -> dict[str, int]:
+        """Map of tool id to its updated_at stamp, without loading the source."""
+        with get_db() as db:
+            return dict(db.query(Tool.id, Tool.updated_at).all())
+
     def get_tool_valves_by_id(self, id: str) -> Optional[dict]:
         try:
             with get_db() as db:
@@ -194,7 +208,7 @@ class ToolsTable:
         try:
             with get_db() as db:
                 db.query(Tool).filter_by(id=id).update(
-                    {"valves": valves, "updated_at": int(time.time())}
+                    {"valves": valves, "updated_at": next_updated_at()}
                 )
                 db.commit()
                 return self.get_tool_by_id(id)
@@ -250,7 +264,7 @@ class ToolsTable:
         try:
             with get_db() as db:
                 db.query(Tool).filter_by(id=id).update(
-                    {**updated, "updated_at": int(time.time())}
+                    {**updated, "updated_at": next_updated_at()}
                 )
                 db.commit()
 
@@ -1,14 +1,21 @@
+import asyncio
 import os
 import time
-import requests
+import aiohttp
 import logging
 import json
 from typing import List, Optional
 from langchain_core.documents import Document
 from fastapi import HTTPException, status
 
+from open_webui.env import AIOHTTP_CLIENT_SESSION_SSL, AIOHTTP_CLIENT_TIMEOUT
+from open_webui.retrieval.loaders.remote import get_poll_delays, remote_extractor
+
 log = logging.getLogger(__name__)
 
+# Seconds to wait for the Marker API to finish processing a document
+POLL_TIMEOUT = 600
+
 
 class DatalabMarkerLoader:
     def __init__(
@@ -63,32 +70,7 @@ class DatalabMarkerLoader:
         }
         return mime_map.get(ext, "application/octet-stream")
 
-    def check_marker_request_status(self, request_id: str) -> dict:
-        url = f"{self.api_base_url}/{request_id}"
-        headers = {"X-Api-Key": self.api_key}
-        try:
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()
-            result = response.json()
-            log.info(f"Marker API status check for request {request_id}: {result}")
-            return result
-        except requests.HTTPError as e:
-            log.error(f"Error checking Marker request status: {e}")
-            raise HTTPException(
-                status.HTTP_502_BAD_GATEWAY,
-                detail=f"Failed to check Marker request: {e}",
-            )
-        except ValueError as e:
-            log.error(f"Invalid JSON checking Marker request: {e}")
-            raise HTTPException(
-                status.HTTP_502_BAD_GATEWAY, detail=f"Invalid JSON: {e}"
-            )
-
-    def load(self) -> List[Document]:
-        filename = os.path.basename(self.file_path)
-        mime_type = self._get_mime_type(filename)
-        headers = {"X-Api-Key": self.api_key}
-
+    def _get_form_data(self) -> dict:
         form_data = {
             "use_llm": str(self.use_llm).lower(),
             "skip_cache": str(self.skip_cache).lower(),
@@ -103,127 +85,187 @@ class DatalabMarkerLoader:
         if self.additional_config and self.additional_config.strip():
             form_data["additional_config"] = self.additional_config
 
-        log.info(
-            f"Datalab Marker POST request parameters: {{'filename': '{filename}', 'mime_type': '{mime_type}', **{form_data}}}"
-        )
+        return form_data
+
+    def get_cache_options(self) -> dict:
+        """Options that change the output, for caching results across loads."""
+        return {"api_base_url": self.api_base_url, **self._get_form_data()}
 
+    async def check_marker_request_status(
+        self, session: aiohttp.ClientSession, request_id: str
+    ) -> dict:
+        url = f"{self.api_base_url}/{request_id}"
+        headers = {"X-Api-Key": self.api_key}
         try:
-            with open(self.file_path, "rb") as f:
-                files = {"file": (filename, f, mime_type)}
-                response = requests.post(
-                    f"{self.api_base_url}",
-                    data=form_data,
-                    files=files,
-                    headers=headers,
-                )
+            async with session.get(
+                url, headers=headers, ssl=AIOHTTP_CLIENT_SESSION_SSL
+            ) as response:
                 response.raise_for_status()
-                result = response.json()
-        except FileNotFoundError:
-            raise HTTPException(
-                status.HTTP_404_NOT_FOUND, detail=f"File not found: {self.file_path}"
-            )
-        except requests.HTTPError as e:
+                result = await response.json(content_type=None)
+            log.info(f"Marker API status check for request {request_id}: {result}")
+            return result
+        except aiohttp.ClientResponseError as e:
+            log.error(f"Error checking Marker request status: {e}")
             raise HTTPException(
-                status.HTTP_400_BAD_REQUEST,
-                detail=f"Datalab Marker request failed: {e}",
+                status.HTTP_502_BAD_GATEWAY,
+                detail=f"Failed to check Marker request: {e}",
             )
         except ValueError as e:
+            log.error(f"Invalid JSON checking Marker request: {e}")
             raise HTTPException(
-                status.HTTP_502_BAD_GATEWAY, detail=f"Invalid JSON response: {e}"
+                status.HTTP_502_BAD_GATEWAY, detail=f"Invalid JSON: {e}"
             )
-        except Exception as e:
-            raise HTTPException(status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
-        if not result.get("success"):
-            raise HTTPException(
-                status.HTTP_400_BAD_REQUEST,
-                detail=f"Datalab Marker request failed: {result.get('error', 'Unknown error')}",
-            )
+    async def _poll(self, session: aiohttp.ClientSession, check_url: str) -> dict:
+        headers = {"X-Api-Key": self.api_key}
+        deadline = time.monotonic() + POLL_TIMEOUT
 
-        check_url = result.get("request_check_url")
-        request_id = result.get("request_id")
+        for delay in get_poll_delays():
+            if time.monotonic() + delay > deadline:
+                raise HTTPException(
+                    status.HTTP_504_GATEWAY_TIMEOUT,
+                    detail="Marker processing timed out",
+                )
+            await asyncio.sleep(delay)
 
-        # Check if this is a direct response (self-hosted) or polling response (DataLab)
-        if check_url:
-            # DataLab polling pattern
-            for _ in range(300):  # Up to 10 minutes
-                time.sleep(2)
-                try:
-                    poll_response = requests.get(check_url, headers=headers)
+            raw_body = ""
+            try:
+                async with session.get(
+                    check_url, headers=headers, ssl=AIOHTTP_CLIENT_SESSION_SSL
+                ) as poll_response:
+                    raw_body = await poll_response.text()
                     poll_response.raise_for_status()
-                    poll_result = poll_response.json()
-                except (requests.HTTPError, ValueError) as e:
-                    raw_body = poll_response.text
-                    log.error(f"Polling error: {e}, response body: {raw_body}")
-                    raise HTTPException(
-                        status.HTTP_502_BAD_GATEWAY, detail=f"Polling failed: {e}"
-                    )
+                    poll_result = json.loads(raw_body)
+            except (aiohttp.ClientResponseError, ValueError) as e:
+                log.error(f"Polling error: {e}, response body: {raw_body}")
+                raise HTTPException(
+                    status.HTTP_502_BAD_GATEWAY, detail=f"Polling failed: {e}"
+                )
 
-                status_val = poll_result.get("status")
-                success_val = poll_result.get("success")
-
-                if status_val == "complete":
-                    summary = {
-                        k: poll_result.get(k)
-                        for k in (
-                            "status",
-                            "output_format",
-                            "success",
-                            "error",
-                            "page_count",
-                            "total_cost",
-                        )
-                    }
-                    log.info(
-                        f"Marker processing completed successfully: {json.dumps(summary, indent=2)}"
-                    )
-                    break
+            status_val = poll_result.get("status")
+            success_val = poll_result.get("success")
 
-                if status_val == "failed" or success_val is False:
-                    log.error(
-                        f"Marker poll failed full response: {json.dumps(poll_result, indent=2)}"
-                    )
-                    error_msg = (
-                        poll_result.get("error")
-                        or "Marker returned failure without error message"
+            if status_val == "complete":
+                summary = {
+                    k: poll_result.get(k)
+                    for k in (
+                        "status",
+                        "output_format",
+                        "success",
+                        "error",
+                        "page_count",
+                        "total_cost",
                     )
-                    raise HTTPException(
-                        status.HTTP_400_BAD_REQUEST,
-                        detail=f"Marker processing failed: {error_msg}",
-                    )
-            else:
-                raise HTTPException(
-                    status.HTTP_504_GATEWAY_TIMEOUT,
-                    detail="Marker processing timed out",
+                }
+                log.info(
+                    f"Marker processing completed successfully: {json.dumps(summary, indent=2)}"
                 )
+                return poll_result
 
-            if not poll_result.get("success", False):
-                error_msg = poll_result.get("error") or "Unknown processing error"
+            if status_val == "failed" or success_val is False:
+                log.error(
+                    f"Marker poll failed full response: {json.dumps(poll_result, indent=2)}"
+                )
+                error_msg = (
+                    poll_result.get("error")
+                    or "Marker returned failure without error message"
+                )
                 raise HTTPException(
                     status.HTTP_400_BAD_REQUEST,
-                    detail=f"Final processing failed: {error_msg}",
+                    detail=f"Marker processing failed: {error_msg}",
                 )
 
-            # DataLab format - content in format-specific fields
-            content_key = self.output_format.lower()
-            raw_content = poll_result.get(content_key)
-            final_result = poll_result
-        else:
-            # Self-hosted direct response - content in "output" field
-            if "output" in result:
-                log.info("Self-hosted Marker returned direct response without polling")
-                raw_content = result.get("output")
-                final_result = result
-            else:
-                available_fields = (
-                    list(result.keys())
-                    if isinstance(result, dict)
-                    else "non-dict response"
+    def load(self) -> List[Document]:
+        return remote_extractor.run(self.load_async())
+
+    async def load_async(self) -> List[Document]:
+        filename = os.path.basename(self.file_path)
+        mime_type = self._get_mime_type(filename)
+        headers = {"X-Api-Key": self.api_key}
+        form_data = self._get_form_data()
+
+        log.info(
+            f"Datalab Marker POST request parameters: {{'filename': '{filename}', 'mime_type': '{mime_type}', **{form_data}}}"
+        )
+
+        async with aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+            trust_env=True,
+        ) as session:
+            try:
+                with open(self.file_path, "rb") as f:
+                    data = aiohttp.FormData(form_data)
+                    data.add_field("file", f, filename=filename, content_type=mime_type)
+                    async with session.post(
+                        f"{self.api_base_url}",
+                        data=data,
+                        headers=headers,
+                        ssl=AIOHTTP_CLIENT_SESSION_SSL,
+                    ) as response:
+                        response.raise_for_status()
+                        result = await response.json(content_type=None)
+            except FileNotFoundError:
+                raise HTTPException(
+                    status.HTTP_404_NOT_FOUND,
+                    detail=f"File not found: {self.file_path}",
                 )
+            except aiohttp.ClientResponseError as e:
                 raise HTTPException(
-                    status.HTTP_502_BAD_GATEWAY,
-                    detail=f"Custom Marker endpoint returned success but no 'output' field found. Available fields: {available_fields}. Expected either 'request_check_url' for polling or 'output' field for direct response.",
+                    status.HTTP_400_BAD_REQUEST,
+                    detail=f"Datalab Marker request failed: {e}",
                 )
+            except ValueError as e:
+                raise HTTPException(
+                    status.HTTP_502_BAD_GATEWAY, detail=f"Invalid JSON response: {e}"
+                )
+            except Exception as e:
+                raise HTTPException(
+                    status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
+                )
+
+            if not result.get("success"):
+                raise HTTPException(
+                    status.HTTP_400_BAD_REQUEST,
+                    detail=f"Datalab Marker request failed: {result.get('error', 'Unknown error')}",
+                )
+
+            check_url = result.get("request_check_url")
+            request_id = result.get("request_id")
+
+            # Check if this is a direct response (self-hosted) or polling response (DataLab)
+            if check_url:
+                # DataLab polling pattern
+                poll_result = await self._poll(session, check_url)
+
+                if not poll_result.get("success", False):
+                    error_msg = poll_result.get("error") or "Unknown processing error"
+                    raise HTTPException(
+                        status.HTTP_400_BAD_REQUEST,
+                        detail=f"Final processing failed: {error_msg}",
+                    )
+
+                # DataLab format - content in format-specific fields
+                content_key = self.output_format.lower()
+                raw_content = poll_result.get(content_key)
+                final_result = poll_result
+            else:
+                # Self-hosted direct response - content in "output" field
+                if "output" in result:
+                    log.info(
+                        "Self-hosted Marker returned direct response without polling"
+                    )
+                    raw_content = result.get("output")
+                    final_result = result
+                else:
+                    available_fields = (
+                        list(result.keys())
+                        if isinstance(result, dict)
+                        else "non-dict response"
+                    )
+                    raise HTTPException(
+                        status.HTTP_502_BAD_GATEWAY,
+                        detail=f"Custom Marker endpoint returned success but no 'output' field found. Available fields: {available_fields}. Expected either 'request_check_url' for polling or 'output' field for direct response.",
+                    )
 
         if self.output_format.lower() == "json":
             full_text = json.dumps(raw_content, indent=2)
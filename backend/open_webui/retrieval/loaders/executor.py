@@ -0,0 +1,318 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import ftfy
+from langchain_core.documents import Document
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    DOCUMENT_EXTRACTION_WORKERS,
+    DOCUMENT_EXTRACTION_PAGES_PER_TASK,
+    DOCUMENT_EXTRACTION_TIMEOUT,
+    DOCUMENT_EXTRACTION_MAX_MEMORY_MB,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# How often running tasks are checked for timeouts and dead workers
+MONITOR_INTERVAL = 0.1
+
+# Set in extraction processes, which must extract inline rather than start pools
+# of their own
+_in_worker = False
+# Where extraction processes announce the tasks they start
+_events = None
+
+
+class _Task:
+    def __init__(self, timeout: Optional[float]):
+        self.future = Future()
+        self.timeout = timeout
+        self.pid: Optional[int] = None
+        self.started_at: Optional[float] = None
+
+
+class ExtractionExecutor:
+    """
+    Runs the built-in, CPU-bound document loaders in a pool of processes so
+    that extraction uses every core and never holds the web worker's GIL.
+
+    PDFs longer than `pages_per_task` pages are split into page ranges that
+    are extracted in parallel and reassembled in page order. Each task has
+    `timeout` seconds from the moment a process starts on it, so time spent
+    queued behind other files does not count; on timeout only the process
+    running it is killed, and the pool replaces it. Each process is limited to
+    `max_memory` MB of address space so that a pathological file fails with an
+    error instead of taking the server down.
+    """
+
+    def __init__(
+        self,
+        workers: int,
+        pages_per_task: int = 50,
+        timeout: int = 600,
+        max_memory: int = 0,
+    ):
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+        self.timeout = timeout
+        self.max_memory = max_memory
+
+        self._pool = None
+        self._tasks: dict[int, _Task] = {}
+        self._task_ids = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0 and not _in_worker
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # Forking would copy the web worker's threads and connections
+                context = multiprocessing.get_context("spawn")
+                events = context.SimpleQueue()
+                # Unlike ProcessPoolExecutor, a Pool replaces a process that
+                # dies without failing the tasks of the others
+                self._pool = context.Pool(
+                    self.workers,
+                    initializer=_init_worker,
+                    initargs=(self.max_memory, events),
+                )
+                threading.Thread(
+                    target=self._monitor,
+                    args=(self._pool, events),
+                    name="extraction-monitor",
+                    daemon=True,
+                ).start()
+            return self._pool
+
+    def _monitor(self, pool, events):
+        """Fail the tasks of processes that died and kill those that ran too long."""
+        while True:
+            with self._lock:
+                if self._pool is not pool:
+                    return
+
+            now = time.monotonic()
+            while not events.empty():
+                task_id, pid = events.get()
+                with self._lock:
+                    task = self._tasks.get(task_id)
+                    if task is not None:
+                        task.pid, task.started_at = pid, now
+
+            processes = {
+                process.pid: process for process in pool._pool if process.is_alive()
+            }
+            failed = []
+            with self._lock:
+                for task_id, task in list(self._tasks.items()):
+                    if task.pid is None:
+                        continue
+                    if task.pid not in processes:
+                        error = BrokenProcessPool(
+                            "Extraction process exited while running a task"
+                        )
+                    elif task.timeout and now - task.started_at > task.timeout:
+                        processes[task.pid].kill()
+                        error = TimeoutError(
+                            f"Task ran longer than {task.timeout} seconds"
+                        )
+                    else:
+                        continue
+                    del self._tasks[task_id]
+                    failed.append((task, error))
+
+            for task, error in failed:
+                _set_exception(task.future, error)
+            time.sleep(MONITOR_INTERVAL)
+
+    def _submit(self, fn, args, timeout: Optional[float] = None) -> Future:
+        pool = self._get_pool()
+        task_id = next(self._task_ids)
+        task = _Task(timeout)
+        with self._lock:
+            self._tasks[task_id] = task
+
+        def finish(result=None, error=None):
+            with self._lock:
+                # Already failed by the monitor
+                if self._tasks.pop(task_id, None) is None:
+                    return
+            if error is not None:
+                _set_exception(task.future, error)
+            else:
+                _set_result(task.future, result)
+
+        pool.apply_async(
+            _run_task,
+            (task_id, fn, args),
+            callback=finish,
+            error_callback=lambda e: finish(error=e),
+        )
+        return task.future
+
+    def submit(self, fn, *args) -> Future:
+        """Run another CPU-bound step of the pipeline (e.g. splitting) in the pool."""
+        return self._submit(fn, args)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            tasks, self._tasks = self._tasks, {}
+        for task in tasks.values():
+            task.future.cancel()
+        if pool is not None:
+            pool.terminate()
+
+    def load(
+        self,
+        engine: str,
+        kwargs: dict,
+        filename: str,
+        file_content_type: str,
+        file_path: str,
+        page_count: Optional[int] = None,
+    ) -> list[Document]:
+        if page_count and page_count > self.pages_per_task:
+            tasks = [
+                (
+                    _load_pdf_pages,
+                    (
+                        file_path,
+                        start,
+                        min(start + self.pages_per_task, page_count),
+                        kwargs.get("PDF_EXTRACT_IMAGES"),
+                    ),
+                )
+                for start in range(0, page_count, self.pages_per_task)
+            ]
+            log.info(
+                f"Extracting {page_count} pages of {filename} in {len(tasks)} parallel tasks"
+            )
+        else:
+            tasks = [(_load, (engine, kwargs, filename, file_content_type, file_path))]
+
+        futures = [self._submit(fn, args, self.timeout) for fn, args in tasks]
+        try:
+            docs = []
+            for future in futures:
+                docs.extend(future.result())
+            return docs
+        except TimeoutError:
+            raise TimeoutError(
+                f"Extracting {filename} took longer than {self.timeout} seconds"
+            )
+        except MemoryError:
+            raise MemoryError(
+                f"Extracting {filename} exceeded the memory limit of {self.max_memory} MB"
+            )
+        except BrokenProcessPool:
+            raise RuntimeError(
+                f"Extraction process crashed while extracting {filename}"
+            )
+
+
+def _set_result(future: Future, result):
+    try:
+        future.set_result(result)
+    except InvalidStateError:
+        # Cancelled by the caller
+        pass
+
+
+def _set_exception(future: Future, error: BaseException):
+    try:
+        future.set_exception(error)
+    except InvalidStateError:
+        pass
+
+
+def _init_worker(max_memory: int, events):
+    global _in_worker, _events
+    _in_worker = True
+    _events = events
+
+    if max_memory > 0:
+        try:
+            import resource
+
+            limit = max_memory * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            log.warning(f"Could not limit extraction memory: {e}")
+
+
+def _run_task(task_id: int, fn, args):
+    _events.put((task_id, os.getpid()))
+    return fn(*args)
+
+
+def _load(
+    engine: str, kwargs: dict, filename: str, file_content_type: str, file_path: str
+) -> list[Document]:
+    from open_webui.retrieval.loaders.main import Loader
+
+    return Loader(engine, **kwargs).load(filename, file_content_type, file_path)
+
+
+def _load_pdf_pages(
+    file_path: str, start: int, end: int, extract_images: bool = False
+) -> list[Document]:
+    """Extract pages [start, end) exactly as PyPDFLoader would."""
+    import pypdf
+    from langchain_community.document_loaders.parsers.pdf import (
+        PyPDFParser,
+        _merge_text_and_extras,
+        _purge_metadata,
+        _validate_metadata,
+    )
+
+    parser = PyPDFParser(extract_images=extract_images)
+    reader = pypdf.PdfReader(file_path)
+
+    doc_metadata = _purge_metadata(
+        {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+        | dict(reader.metadata or {})
+        | {"source": file_path, "total_pages": len(reader.pages)}
+    )
+    # Computed for every page on each access
+    page_labels = reader.page_labels
+
+    docs = []
+    for page_number in range(start, end):
+        page = reader.pages[page_number]
+        text = page.extract_text(
+            extraction_mode=parser.extraction_mode, **parser.extraction_kwargs
+        )
+        images = parser.extract_images_from_page(page)
+        docs.append(
+            Document(
+                page_content=ftfy.fix_text(
+                    _merge_text_and_extras([images], text).strip()
+                ),
+                metadata=_validate_metadata(
+                    doc_metadata
+                    | {"page": page_number, "page_label": page_labels[page_number]}
+                ),
+            )
+        )
+    return docs
+
+
+extraction_executor = ExtractionExecutor(
+    DOCUMENT_EXTRACTION_WORKERS,
+    pages_per_task=DOCUMENT_EXTRACTION_PAGES_PER_TASK,
+    timeout=DOCUMENT_EXTRACTION_TIMEOUT,
+    max_memory=DOCUMENT_EXTRACTION_MAX_MEMORY_MB,
+)
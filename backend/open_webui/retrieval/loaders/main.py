@@ -3,6 +3,7 @@ import logging
 import ftfy
 import sys
 import json
+from typing import Optional
 
 from azure.identity import DefaultAzureCredential
 from langchain_community.document_loaders import (
@@ -22,11 +23,14 @@ from langchain_community.document_loaders import (
     YoutubeLoader,
 )
 from langchain_core.documents import Document
+from pypdf import PdfReader
 
+from open_webui.retrieval.loaders.executor import extraction_executor
 from open_webui.retrieval.loaders.external_document import ExternalDocumentLoader
 
 from open_webui.retrieval.loaders.mistral import MistralLoader
 from open_webui.retrieval.loaders.datalab_marker import DatalabMarkerLoader
+from open_webui.retrieval.loaders.remote import remote_extractor
 
 
 from open_webui.env import SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
@@ -88,6 +92,22 @@ known_source_ext = [
     "json",
 ]
 
+# Loaders that parse the file in-process and are worth running in the extraction
+# pool; the others mostly wait on a remote service
+CPU_BOUND_LOADERS = (
+    PyPDFLoader,
+    CSVLoader,
+    UnstructuredRSTLoader,
+    UnstructuredXMLLoader,
+    BSHTMLLoader,
+    UnstructuredEPubLoader,
+    Docx2txtLoader,
+    UnstructuredExcelLoader,
+    UnstructuredPowerPointLoader,
+    OutlookMessageLoader,
+    UnstructuredODTLoader,
+)
+
 
 class TikaLoader:
     def __init__(self, url, file_path, mime_type=None, extract_images=None):
@@ -233,7 +253,30 @@ class Loader:
         self, filename: str, file_content_type: str, file_path: str
     ) -> list[Document]:
         loader = self._get_loader(filename, file_content_type, file_path)
-        docs = loader.load()
+        if extraction_executor.enabled and isinstance(loader, CPU_BOUND_LOADERS):
+            return extraction_executor.load(
+                self.engine,
+                self.kwargs,
+                filename,
+                file_content_type,
+                file_path,
+                page_count=(
+                    self._get_page_count(file_path)
+                    if isinstance(loader, PyPDFLoader)
+                    else None
+                ),
+            )
+
+        if isinstance(loader, (MistralLoader, DatalabMarkerLoader)):
+            # External OCR, bounded per engine and cached by file content
+            docs = remote_extractor.load(
+                self.engine,
+                file_path,
+                loader.get_cache_options(),
+                loader.load_async,
+            )
+        else:
+            docs = loader.load()
 
         return [
             Document(
@@ -242,6 +285,13 @@ class Loader:
             for doc in docs
         ]
 
+    def _get_page_count(self, file_path: str) -> Optional[int]:
+        try:
+            return len(PdfReader(file_path).pages)
+        except Exception as e:
+            log.debug(f"Could not count the pages of {file_path}: {e}")
+            return None
+
     def _is_text_file(self, file_ext: str, file_content_type: str) -> bool:
         return file_ext in known_source_ext or (
             file_content_type
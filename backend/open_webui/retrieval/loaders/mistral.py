@@ -88,6 +88,10 @@ class MistralLoader:
             "User-Agent": "OpenWebUI-MistralLoader/2.0",  # Helps API provider track usage
         }
 
+    def get_cache_options(self) -> dict:
+        """Options that change the output, for caching results across loads."""
+        return {"model": "mistral-ocr-latest", "base_url": self.BASE_API_URL}
+
     def _debug_log(self, message: str, *args) -> None:
         """
         PERFORMANCE OPTIMIZATION: Conditional debug logging for performance.
@@ -493,7 +497,6 @@ class MistralLoader:
             keepalive_timeout=60,  # Increased keepalive for connection reuse
             enable_cleanup_closed=True,
             force_close=False,  # Allow connection reuse
-            resolver=aiohttp.AsyncResolver(),  # Use async DNS resolver
         )
 
         timeout = aiohttp.ClientTimeout(
@@ -0,0 +1,168 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+from langchain_core.documents import Document
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    DATA_DIR,
+    DOCUMENT_OCR_MAX_CONCURRENCY,
+    DOCUMENT_OCR_CACHE_MAX_AGE,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class RemoteExtractor:
+    """
+    Runs the async loaders of external OCR engines on one shared event loop.
+
+    Calls to the same engine are bounded by `max_concurrency` across all
+    threads, identical extractions in flight are shared, and successful
+    results are cached on disk keyed by the file's SHA-256 and the engine
+    options, so reprocessing or re-uploading a file does not OCR it again.
+    """
+
+    def __init__(self, cache_dir: Path, max_concurrency: int, max_age: int):
+        self.cache_dir = cache_dir
+        self.max_concurrency = max_concurrency
+        self.max_age = max_age
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._last_cleanup = 0.0
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._loop.run_forever, name="remote-extraction", daemon=True
+                ).start()
+            return self._loop
+
+    def run(self, coro: Awaitable):
+        """Run `coro` on the shared loop and wait for its result."""
+        return asyncio.run_coroutine_threadsafe(coro, self._get_loop()).result()
+
+    def load(
+        self,
+        engine: str,
+        file_path: str,
+        options: dict,
+        load: Callable[[], Awaitable[list[Document]]],
+    ) -> list[Document]:
+        key = hashlib.sha256(
+            f"{engine}:{get_file_hash(file_path)}:{json.dumps(options, sort_keys=True)}".encode()
+        ).hexdigest()
+
+        docs = self._read(key)
+        if docs is not None:
+            log.info(f"Reusing cached {engine} extraction of {file_path}")
+            return docs
+
+        return self.run(self._load(engine, key, load))
+
+    async def _load(self, engine, key, load) -> list[Document]:
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            semaphore = self._semaphores.setdefault(
+                engine, asyncio.Semaphore(self.max_concurrency)
+            )
+            async with semaphore:
+                docs = await load()
+
+            # The loaders report some failures as documents rather than raising
+            if not any(doc.metadata.get("error") for doc in docs):
+                await asyncio.to_thread(self._write, key, docs)
+
+            future.set_result(docs)
+            return docs
+        except BaseException as e:
+            future.set_exception(e)
+            # Retrieved here so an unawaited future does not log the error again
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    def _read(self, key: str) -> Optional[list[Document]]:
+        path = self.cache_dir / f"{key}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                docs = [Document(**doc) for doc in json.load(f)]
+            os.utime(path)
+            return docs
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log.warning(f"Ignoring unreadable extraction cache entry {path}: {e}")
+            return None
+
+    def _write(self, key: str, docs: list[Document]):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_dir / f"{key}.{uuid.uuid4().hex}.part"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    [
+                        {"page_content": doc.page_content, "metadata": doc.metadata}
+                        for doc in docs
+                    ],
+                    f,
+                )
+            os.replace(tmp_path, self.cache_dir / f"{key}.json")
+        except Exception as e:
+            log.warning(f"Failed to cache extraction {key}: {e}")
+
+        if time.time() - self._last_cleanup > 3600:
+            self._last_cleanup = time.time()
+            self._evict()
+
+    def _evict(self):
+        expired = time.time() - self.max_age
+        for entry in os.scandir(self.cache_dir):
+            try:
+                if entry.stat().st_mtime < expired:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+
+def get_file_hash(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_poll_delays(initial: float = 1, maximum: float = 15, factor: float = 1.5):
+    """Exponentially growing delays between status checks of a running job."""
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * factor, maximum)
+
+
+remote_extractor = RemoteExtractor(
+    DATA_DIR / "cache" / "extraction",
+    max_concurrency=DOCUMENT_OCR_MAX_CONCURRENCY,
+    max_age=DOCUMENT_OCR_CACHE_MAX_AGE,
+)
@@ -0,0 +1,164 @@
+import logging
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from typing import Iterable, Iterator
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
+from langchain_core.documents import Document
+from langchain_text_splitters import MarkdownHeaderTextSplitter
+
+from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.loaders.executor import extraction_executor
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Characters of text handed to an extraction process at a time; smaller inputs
+# are split inline, where the round trip would cost more than it saves
+PARALLEL_SPLIT_BATCH_SIZE = 4 * 1024 * 1024
+
+# Headers to split on - covering most common markdown header levels
+HEADERS_TO_SPLIT_ON = [
+    ("#", "Header 1"),
+    ("##", "Header 2"),
+    ("###", "Header 3"),
+    ("####", "Header 4"),
+    ("#####", "Header 5"),
+    ("######", "Header 6"),
+]
+
+
+@lru_cache(maxsize=32)
+def get_text_splitter(
+    text_splitter: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    encoding_name: str = "cl100k_base",
+):
+    """
+    Splitters hold no per-call state, so one instance (and for the token
+    splitter, its tiktoken encoding) is reused for every split with the
+    same settings.
+    """
+    if text_splitter in ["", "character", "markdown_header"]:
+        return RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+        )
+    elif text_splitter == "token":
+        return TokenTextSplitter(
+            encoding_name=encoding_name,
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            add_start_index=True,
+        )
+    else:
+        raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+
+@lru_cache(maxsize=1)
+def get_markdown_splitter() -> MarkdownHeaderTextSplitter:
+    return MarkdownHeaderTextSplitter(
+        headers_to_split_on=HEADERS_TO_SPLIT_ON,
+        strip_headers=False,  # Keep headers in content for context
+    )
+
+
+def split_documents(
+    docs: list[Document],
+    text_splitter: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    encoding_name: str = "cl100k_base",
+) -> list[Document]:
+    splitter = get_text_splitter(
+        text_splitter, chunk_size, chunk_overlap, encoding_name
+    )
+    if text_splitter != "markdown_header":
+        return splitter.split_documents(docs)
+
+    md_split_docs = []
+    for doc in docs:
+        md_header_splits = get_markdown_splitter().split_text(doc.page_content)
+        md_header_splits = splitter.split_documents(md_header_splits)
+
+        # Convert back to Document objects, preserving original metadata
+        for split_chunk in md_header_splits:
+            headings_list = []
+            # Extract header values in order based on headers_to_split_on
+            for _, header_meta_key_name in HEADERS_TO_SPLIT_ON:
+                if header_meta_key_name in split_chunk.metadata:
+                    headings_list.append(split_chunk.metadata[header_meta_key_name])
+
+            md_split_docs.append(
+                Document(
+                    page_content=split_chunk.page_content,
+                    metadata={**doc.metadata, "headings": headings_list},
+                )
+            )
+    return md_split_docs
+
+
+def iter_split_documents(
+    docs: Iterable[Document],
+    text_splitter: str,
+    chunk_size: int,
+    chunk_overlap: int,
+    encoding_name: str = "cl100k_base",
+) -> Iterator[Document]:
+    """
+    Yield the splits of `docs` in order, identical to splitting them all at
+    once. Documents are split independently of each other, so large inputs
+    are split in parallel in the extraction processes while the caller
+    consumes (e.g. embeds) the splits that are already done.
+    """
+    args = (text_splitter, chunk_size, chunk_overlap, encoding_name)
+
+    batches = list(_batch_by_size(docs, PARALLEL_SPLIT_BATCH_SIZE))
+    if (
+        len(batches) < 2
+        or not extraction_executor.enabled
+        or extraction_executor.workers < 2
+    ):
+        for batch in batches:
+            yield from split_documents(batch, *args)
+        return
+
+    try:
+        futures = [
+            extraction_executor.submit(split_documents, batch, *args)
+            for batch in batches
+        ]
+    except (BrokenProcessPool, RuntimeError):
+        # The pool is shutting down or broke while submitting
+        futures = []
+
+    for i, future in enumerate(futures):
+        try:
+            splits = future.result()
+        except BrokenProcessPool:
+            log.warning("Extraction pool broke while splitting, splitting inline")
+            for future in futures[i:]:
+                future.cancel()
+            for batch in batches[i:]:
+                yield from split_documents(batch, *args)
+            return
+        yield from splits
+
+    if not futures:
+        for batch in batches:
+            yield from split_documents(batch, *args)
+
+
+def _batch_by_size(docs: Iterable[Document], size: int) -> Iterator[list[Document]]:
+    batch, batch_size = [], 0
+    for doc in docs:
+        batch.append(doc)
+        batch_size += len(doc.page_content)
+        if batch_size >= size:
+            yield batch
+            batch, batch_size = [], 0
+    if batch:
+        yield batch
@@ -25,6 +25,7 @@ from open_webui.models.notes import Notes
 
 from open_webui.retrieval.vector.main import GetResult
 from open_webui.utils.access_control import has_access
+from open_webui.utils.file_dedup import is_shared_collection
 from open_webui.utils.misc import get_message_list
 
 
@@ -293,42 +294,42 @@ def query_collection(
     results = []
     error = False
 
-    def process_query_collection(collection_name, query_embedding):
-        try:
-            if collection_name:
-                result = query_doc(
-                    collection_name=collection_name,
-                    k=k,
-                    query_embedding=query_embedding,
-                )
-                if result is not None:
-                    return result.model_dump(), None
-            return None, None
-        except Exception as e:
-            log.exception(f"Error when querying the collection: {e}")
-            return None, e
-
     # Generate all query embeddings (in one call)
     query_embeddings = embedding_function(queries, prefix=RAG_EMBEDDING_QUERY_PREFIX)
     log.debug(
         f"query_collection: processing {len(queries)} queries across {len(collection_names)} collections"
     )
 
-    with ThreadPoolExecutor() as executor:
-        future_results = []
-        for query_embedding in query_embeddings:
-            for collection_name in collection_names:
-                result = executor.submit(
-                    process_query_collection, collection_name, query_embedding
-                )
-                future_results.append(result)
-        task_results = [future.result() for future in future_results]
+    # Let the backend answer every (collection, query) pair at once, batched
+    # natively where supported
+    collection_names = [name for name in collection_names if name]
+    try:
+        search_results = VECTOR_DB_CLIENT.search_many(
+            collection_names=collection_names,
+            vectors=query_embeddings,
+            limit=k,
+        )
+    except Exception as e:
+        log.exception(f"Error when querying the collections: {e}")
+        search_results = [None] * len(collection_names)
 
-    for result, err in task_results:
-        if err is not None:
+    for collection_name, result in zip(collection_names, search_results):
+        if result is None:
             error = True
-        elif result is not None:
-            results.append(result)
+            continue
+
+        log.debug(
+            f"query_collection: {collection_name} returned {sum(len(ids) for ids in result.ids or [])} results"
+        )
+        for idx in range(len(result.ids or [])):
+            results.append(
+                {
+                    "distances": [result.distances[idx]],
+                    "documents": [result.documents[idx]],
+                    "metadatas": [result.metadatas[idx]],
+                    "ids": [result.ids[idx]],
+                }
+            )
 
     if error and not results:
         log.warning("All collection queries failed. No results returned.")
@@ -495,6 +496,8 @@ def get_sources_from_items(
     for item in items:
         query_result = None
         collection_names = []
+        # Metadata overriding that of the chunks, for files sharing a collection
+        file_metadata = None
 
         if item.get("type") == "text":
             # Raw Text
@@ -615,7 +618,25 @@ def get_sources_from_items(
                 if item.get("legacy"):
                     collection_names.append(f"{item['id']}")
                 else:
-                    collection_names.append(f"file-{item['id']}")
+                    file_meta = Files.get_file_metadata_by_id(item["id"])
+                    collection_name = (
+                        (file_meta.meta or {}).get("collection_name")
+                        if file_meta
+                        else None
+                    )
+
+                    if is_shared_collection(collection_name):
+                        # Deduplicated file, the chunks carry the metadata of
+                        # whichever file was processed first
+                        collection_names.append(collection_name)
+                        name = item.get("name") or file_meta.meta.get("name")
+                        file_metadata = {
+                            "file_id": item["id"],
+                            "name": name,
+                            "source": name,
+                        }
+                    else:
+                        collection_names.append(f"file-{item['id']}")
 
         elif item.get("type") == "collection":
             if (
@@ -718,6 +739,11 @@ def get_sources_from_items(
         if query_result:
             if "data" in item:
                 del item["data"]
+            if file_metadata and query_result.get("metadatas"):
+                query_result["metadatas"] = [
+                    [{**(metadata or {}), **file_metadata} for metadata in metadatas]
+                    for metadatas in query_result["metadatas"]
+                ]
             query_results.append({**query_result, "file": item})
 
     sources = []
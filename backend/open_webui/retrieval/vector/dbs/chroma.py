@@ -84,9 +84,9 @@ class ChromaClient(VectorDBBase):
 
                 # chromadb has cosine distance, 2 (worst) -> 0 (best). Re-odering to 0 -> 1
                 # https://docs.trychroma.com/docs/collections/configure cosine equation
-                distances: list = result["distances"][0]
-                distances = [2 - dist for dist in distances]
-                distances = [[dist / 2 for dist in distances]]
+                distances = [
+                    [(2 - dist) / 2 for dist in row] for row in result["distances"]
+                ]
 
                 return SearchResult(
                     **{
@@ -100,6 +100,15 @@ class ChromaClient(VectorDBBase):
         except Exception as e:
             return None
 
+    def search_many(
+        self, collection_names: list[str], vectors: list[list[float | int]], limit: int
+    ) -> list[Optional[SearchResult]]:
+        # Chroma answers every query vector of a collection in a single query call
+        return [
+            self.search(collection_name=collection_name, vectors=vectors, limit=limit)
+            for collection_name in collection_names
+        ]
+
     def query(
         self, collection_name: str, filter: dict, limit: Optional[int] = None
     ) -> Optional[GetResult]:
@@ -0,0 +1,732 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from open_webui.retrieval.vector.main import (
+    VectorDBBase,
+    VectorItem,
+    SearchResult,
+    GetResult,
+)
+from open_webui.config import (
+    LOCAL_VECTOR_DB_PATH,
+    LOCAL_VECTOR_DTYPE,
+    LOCAL_VECTOR_COMPACTION_MAX_SEGMENTS,
+    LOCAL_VECTOR_COMPACTION_DEAD_RATIO,
+    LOCAL_VECTOR_HNSW_ENABLED,
+    LOCAL_VECTOR_HNSW_MIN_ROWS,
+    LOCAL_VECTOR_HNSW_M,
+    LOCAL_VECTOR_HNSW_EF_CONSTRUCTION,
+    LOCAL_VECTOR_HNSW_EF_SEARCH,
+)
+from open_webui.env import SRC_LOG_LEVELS
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+class _Segment:
+    """
+    Immutable, memory-mapped matrix of unit-length vectors. Rows are never
+    rewritten: an upsert or delete only marks the old row dead, compaction
+    later folds the live rows of several segments into a new one.
+    """
+
+    def __init__(
+        self,
+        id: int,
+        path: str,
+        ids: list[Optional[str]],
+        vectors: Optional[np.ndarray] = None,
+        index=None,
+    ):
+        self.id = id
+        self.path = path
+        self.vectors = np.load(path, mmap_mode="r") if vectors is None else vectors
+        self.ids = ids  # row -> item id, None once superseded or deleted
+        self.live = np.array([item_id is not None for item_id in ids], dtype=bool)
+        self.index = index  # optional HNSW graph over the rows
+
+    @property
+    def live_count(self) -> int:
+        return int(self.live.sum())
+
+    def kill(self, row: int):
+        self.ids[row] = None
+        self.live[row] = False
+
+    def search(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k (rows, cosine similarities) per query, dead rows excluded."""
+        k = min(k, self.live_count)
+        if k == 0:
+            return (
+                np.empty((len(queries), 0), dtype=np.int64),
+                np.empty((len(queries), 0), dtype=np.float32),
+            )
+
+        if self.index is not None:
+            try:
+                labels, distances = self.index.knn_query(
+                    queries, k=k, num_threads=1, filter=lambda row: self.live[row]
+                )
+                return labels.astype(np.int64), 1.0 - distances
+            except RuntimeError:
+                # Heavily deleted graphs may not reach k live rows, scan instead
+                pass
+
+        scores = queries @ np.asarray(self.vectors, dtype=np.float32).T
+        scores[:, ~self.live] = -np.inf
+        rows = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        return rows, np.take_along_axis(scores, rows, axis=1)
+
+
+class _Collection:
+    def __init__(self, name: str, dimension: int, directory: str):
+        self.name = name
+        self.dimension = dimension
+        self.directory = directory
+        self.version = None  # of the database state loaded into memory
+        self.segments: dict[int, _Segment] = {}
+        self.locations: dict[str, tuple[int, int]] = {}  # item id -> (segment, row)
+
+    def segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f"{segment_id:08d}.npy")
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class LocalVectorClient(VectorDBBase):
+    """
+    Embedded vector store for single-node deployments.
+
+    Each collection is a set of append-only segment files (NumPy matrices
+    memory-mapped on read), text and metadata live in SQLite. Search is an
+    exhaustive inner product over the segments, or an HNSW graph lookup for
+    large compacted segments when hnswlib is installed. Compaction runs in the
+    background once a collection accumulates too many segments or dead rows.
+
+    Every worker process of a deployment may open the same directory. Writes
+    are serialized by SQLite, segment ids are allocated in the database, and
+    each write stamps the collection with a new version from a shared clock;
+    a process whose in-memory state is older reloads it from the database.
+    """
+
+    def __init__(self):
+        self.path = LOCAL_VECTOR_DB_PATH
+        os.makedirs(self.path, exist_ok=True)
+
+        self.dtype = np.float16 if LOCAL_VECTOR_DTYPE == "float16" else np.float32
+        self.hnsw_enabled = LOCAL_VECTOR_HNSW_ENABLED
+        if self.hnsw_enabled and hnswlib is None:
+            log.warning(
+                "LOCAL_VECTOR_HNSW_ENABLED is set but hnswlib is not installed, falling back to exhaustive search"
+            )
+            self.hnsw_enabled = False
+
+        self._lock = threading.RLock()
+        self._collections: dict[str, _Collection] = {}
+        self._compacting: set[str] = set()
+        self._compactor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="local-vector-compaction"
+        )
+
+        self.db = sqlite3.connect(
+            os.path.join(self.path, "metadata.sqlite3"), check_same_thread=False
+        )
+        with self.db:
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS collection ("
+                "name TEXT PRIMARY KEY, dimension INTEGER NOT NULL, "
+                "next_segment INTEGER NOT NULL DEFAULT 0, "
+                "version INTEGER NOT NULL DEFAULT 0)"
+            )
+            # Never reset, so a dropped and recreated collection gets a new version
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS clock ("
+                "id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL)"
+            )
+            self.db.execute("INSERT OR IGNORE INTO clock (id, version) VALUES (0, 0)")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS segment ("
+                "collection TEXT NOT NULL, id INTEGER NOT NULL, rows INTEGER NOT NULL, "
+                "PRIMARY KEY (collection, id))"
+            )
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS item ("
+                "collection TEXT NOT NULL, id TEXT NOT NULL, "
+                "segment INTEGER NOT NULL, row INTEGER NOT NULL, "
+                "text TEXT, metadata TEXT, PRIMARY KEY (collection, id))"
+            )
+            self.db.execute(
+                "CREATE INDEX IF NOT EXISTS idx_item_segment ON item (collection, segment, row)"
+            )
+
+    def _collection_directory(self, collection_name: str) -> str:
+        # Collection names are user controlled, keep them out of the file system
+        digest = hashlib.sha256(collection_name.encode()).hexdigest()[:32]
+        return os.path.join(self.path, digest)
+
+    def _get_collection(self, collection_name: str) -> Optional[_Collection]:
+        """The collection state, reloaded if another process changed it."""
+        with self._lock:
+            collection = self._collections.get(collection_name)
+
+            with self.db:
+                # One snapshot for the version, segments and items
+                self.db.execute("BEGIN")
+                row = self.db.execute(
+                    "SELECT dimension, version FROM collection WHERE name = ?",
+                    (collection_name,),
+                ).fetchone()
+                if row is None:
+                    self._collections.pop(collection_name, None)
+                    return None
+                if collection is not None and collection.version == row[1]:
+                    return collection
+
+                segment_rows = self.db.execute(
+                    "SELECT id, rows FROM segment WHERE collection = ?",
+                    (collection_name,),
+                ).fetchall()
+                item_rows = self.db.execute(
+                    "SELECT id, segment, row FROM item WHERE collection = ?",
+                    (collection_name,),
+                ).fetchall()
+
+            if collection is None:
+                collection = _Collection(
+                    collection_name,
+                    row[0],
+                    self._collection_directory(collection_name),
+                )
+                os.makedirs(collection.directory, exist_ok=True)
+
+            ids = {segment_id: [None] * rows for segment_id, rows in segment_rows}
+            locations = {}
+            for item_id, segment_id, item_row in item_rows:
+                ids[segment_id][item_row] = item_id
+                locations[item_id] = (segment_id, item_row)
+
+            # Segment files are immutable, the mapped vectors and graphs of
+            # segments already loaded are reused
+            collection.segments = {
+                segment_id: self._load_segment(
+                    collection,
+                    segment_id,
+                    segment_ids,
+                    collection.segments.get(segment_id),
+                )
+                for segment_id, segment_ids in ids.items()
+            }
+            collection.locations = locations
+            collection.dimension, collection.version = row
+            self._collections[collection_name] = collection
+            return collection
+
+    def _load_segment(
+        self,
+        collection: _Collection,
+        segment_id: int,
+        ids: list[Optional[str]],
+        loaded: Optional[_Segment] = None,
+    ) -> _Segment:
+        path = collection.segment_path(segment_id)
+        if loaded is not None:
+            return _Segment(segment_id, path, ids, loaded.vectors, loaded.index)
+
+        segment = _Segment(segment_id, path, ids)
+
+        if self.hnsw_enabled and os.path.exists(f"{path}.hnsw"):
+            index = hnswlib.Index(space="ip", dim=collection.dimension)
+            index.load_index(f"{path}.hnsw", max_elements=len(ids))
+            index.set_ef(LOCAL_VECTOR_HNSW_EF_SEARCH)
+            segment.index = index
+
+        return segment
+
+    def _allocate_segment(self, collection_name: str) -> Optional[int]:
+        row = self.db.execute(
+            "SELECT next_segment FROM collection WHERE name = ?", (collection_name,)
+        ).fetchone()
+        if row is None:
+            return None
+        self.db.execute(
+            "UPDATE collection SET next_segment = ? WHERE name = ?",
+            (row[0] + 1, collection_name),
+        )
+        return row[0]
+
+    def _bump_version(self, collection_name: str) -> tuple[Optional[int], int]:
+        """Stamp a change to the collection, returns its (previous, new) version."""
+        row = self.db.execute(
+            "SELECT version FROM collection WHERE name = ?", (collection_name,)
+        ).fetchone()
+        self.db.execute("UPDATE clock SET version = version + 1")
+        (version,) = self.db.execute("SELECT version FROM clock").fetchone()
+        self.db.execute(
+            "UPDATE collection SET version = ? WHERE name = ?",
+            (version, collection_name),
+        )
+        return (row[0] if row else None), version
+
+    def _write_segment(self, path: str, vectors: np.ndarray):
+        # Write then rename, a crash never leaves a truncated segment behind
+        with open(f"{path}.tmp", "wb") as f:
+            np.save(f, vectors)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(f"{path}.tmp", path)
+
+    def _build_index(self, path: str, vectors: np.ndarray):
+        index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        index.init_index(
+            max_elements=len(vectors),
+            ef_construction=LOCAL_VECTOR_HNSW_EF_CONSTRUCTION,
+            M=LOCAL_VECTOR_HNSW_M,
+        )
+        index.add_items(np.asarray(vectors, dtype=np.float32), np.arange(len(vectors)))
+        index.save_index(f"{path}.hnsw")
+
+    def _remove_segment_files(self, path: str):
+        for file_path in (path, f"{path}.hnsw"):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # Still mapped by an in-flight search on platforms that lock open files
+                log.debug(f"Could not remove {file_path}: {e}")
+
+    def has_collection(self, collection_name: str) -> bool:
+        with self._lock:
+            return (
+                self.db.execute(
+                    "SELECT 1 FROM collection WHERE name = ?", (collection_name,)
+                ).fetchone()
+                is not None
+            )
+
+    def delete_collection(self, collection_name: str):
+        with self._lock:
+            with self.db:
+                self.db.execute("BEGIN IMMEDIATE")
+                self.db.execute(
+                    "DELETE FROM item WHERE collection = ?", (collection_name,)
+                )
+                self.db.execute(
+                    "DELETE FROM segment WHERE collection = ?", (collection_name,)
+                )
+                self.db.execute(
+                    "DELETE FROM collection WHERE name = ?", (collection_name,)
+                )
+            self._collections.pop(collection_name, None)
+            shutil.rmtree(
+                self._collection_directory(collection_name), ignore_errors=True
+            )
+
+    def search(
+        self, collection_name: str, vectors: list[list[float | int]], limit: int
+    ) -> Optional[SearchResult]:
+        try:
+            collection = self._get_collection(collection_name)
+            if collection is None or not vectors:
+                return None
+
+            queries = np.asarray(vectors, dtype=np.float32)
+            if queries.shape[1] != collection.dimension:
+                log.warning(
+                    f"Query dimension {queries.shape[1]} does not match collection {collection_name} ({collection.dimension})"
+                )
+                return None
+            queries = _normalize(queries)
+
+            with self._lock:
+                segments = list(collection.segments.values())
+            if limit is None:
+                limit = sum(len(segment.ids) for segment in segments)
+
+            # Merge the per-segment top-k into a global top-k per query
+            candidates = [[] for _ in range(len(queries))]
+            for segment in segments:
+                rows, scores = segment.search(queries, limit)
+                for qid in range(len(queries)):
+                    for row, score in zip(rows[qid], scores[qid]):
+                        item_id = segment.ids[row] if row >= 0 else None
+                        if item_id is not None and np.isfinite(score):
+                            candidates[qid].append((float(score), item_id))
+
+            hits = [
+                sorted(rows, key=lambda hit: hit[0], reverse=True)[:limit]
+                for rows in candidates
+            ]
+
+            records = self._get_records(
+                collection_name, {item_id for rows in hits for _, item_id in rows}
+            )
+
+            ids, distances, documents, metadatas = [], [], [], []
+            for rows in hits:
+                rows = [
+                    (score, item_id) for score, item_id in rows if item_id in records
+                ]
+                ids.append([item_id for _, item_id in rows])
+                # normalize cosine similarity from [-1, 1] to [0, 1] range
+                distances.append(
+                    [(min(max(score, -1.0), 1.0) + 1.0) / 2.0 for score, _ in rows]
+                )
+                documents.append([records[item_id][0] for _, item_id in rows])
+                metadatas.append([records[item_id][1] for _, item_id in rows])
+
+            return SearchResult(
+                ids=ids, distances=distances, documents=documents, metadatas=metadatas
+            )
+        except Exception as e:
+            log.exception(f"Error searching collection {collection_name}: {e}")
+            return None
+
+    def search_many(
+        self, collection_names: list[str], vectors: list[list[float | int]], limit: int
+    ) -> list[Optional[SearchResult]]:
+        # Every query vector of a collection is scored in a single matrix product
+        return [
+            self.search(collection_name=collection_name, vectors=vectors, limit=limit)
+            for collection_name in collection_names
+        ]
+
+    def _get_records(
+        self, collection_name: str, ids: set[str]
+    ) -> dict[str, tuple[str, dict]]:
+        records = {}
+        ids = list(ids)
+        with self._lock:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(ids), 500):
+                batch = ids[start : start + 500]
+                rows = self.db.execute(
+                    f"SELECT id, text, metadata FROM item WHERE collection = ? "
+                    f"AND id IN ({', '.join('?' * len(batch))})",
+                    (collection_name, *batch),
+                ).fetchall()
+                for item_id, text, metadata in rows:
+                    records[item_id] = (text, json.loads(metadata or "{}"))
+        return records
+
+    def _select(
+        self,
+        collection_name: str,
+        filter: Optional[dict] = None,
+        limit: Optional[int] = None,
+    ) -> list[tuple[str, str, str]]:
+        sql = "SELECT id, text, metadata FROM item WHERE collection = ?"
+        params = [collection_name]
+        for key, value in (filter or {}).items():
+            sql += " AND json_extract(metadata, ?) = ?"
+            params += [f'$."{key}"', value]
+        sql += " ORDER BY segment, row"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def _to_get_result(self, rows: list[tuple[str, str, str]]) -> GetResult:
+        return GetResult(
+            ids=[[row[0] for row in rows]],
+            documents=[[row[1] for row in rows]],
+            metadatas=[[json.loads(row[2] or "{}") for row in rows]],
+        )
+
+    def query(
+        self, collection_name: str, filter: dict, limit: Optional[int] = None
+    ) -> Optional[GetResult]:
+        try:
+            if not self.has_collection(collection_name):
+                return None
+            return self._to_get_result(self._select(collection_name, filter, limit))
+        except Exception as e:
+            log.exception(f"Error querying collection {collection_name}: {e}")
+            return None
+
+    def get(self, collection_name: str) -> Optional[GetResult]:
+        if not self.has_collection(collection_name):
+            return None
+        return self._to_get_result(self._select(collection_name))
+
+    def insert(self, collection_name: str, items: list[VectorItem]):
+        # Segments are append-only, inserting and upserting are the same operation
+        self.upsert(collection_name, items)
+
+    def upsert(self, collection_name: str, items: list[VectorItem]):
+        if not items:
+            return
+
+        vectors = _normalize(
+            np.asarray([item["vector"] for item in items], dtype=np.float32)
+        ).astype(self.dtype)
+
+        with self._lock:
+            with self.db:
+                # Taking the write lock serializes allocation across processes
+                self.db.execute("BEGIN IMMEDIATE")
+                self.db.execute(
+                    "INSERT OR IGNORE INTO collection (name, dimension) VALUES (?, ?)",
+                    (collection_name, vectors.shape[1]),
+                )
+                (dimension,) = self.db.execute(
+                    "SELECT dimension FROM collection WHERE name = ?",
+                    (collection_name,),
+                ).fetchone()
+                if vectors.shape[1] != dimension:
+                    raise ValueError(
+                        f"Vector dimension {vectors.shape[1]} does not match collection {collection_name} ({dimension})"
+                    )
+                segment_id = self._allocate_segment(collection_name)
+
+            collection = self._get_collection(collection_name)
+
+            # Later duplicates within the batch win
+            ids = [item["id"] for item in items]
+            last_row = {item_id: row for row, item_id in enumerate(ids)}
+            ids = [
+                item_id if last_row[item_id] == row else None
+                for row, item_id in enumerate(ids)
+            ]
+
+            path = collection.segment_path(segment_id)
+            self._write_segment(path, vectors)
+
+            with self.db:
+                self.db.execute("BEGIN IMMEDIATE")
+                previous, version = self._bump_version(collection_name)
+                if previous is None:
+                    raise ValueError(
+                        f"Collection {collection_name} was deleted during the upsert"
+                    )
+                self.db.execute(
+                    "INSERT INTO segment (collection, id, rows) VALUES (?, ?, ?)",
+                    (collection_name, segment_id, len(ids)),
+                )
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO item (collection, id, segment, row, text, metadata) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            collection_name,
+                            item["id"],
+                            segment_id,
+                            row,
+                            item["text"],
+                            json.dumps(item["metadata"] or {}, default=str),
+                        )
+                        for row, item in enumerate(items)
+                        if ids[row] is not None
+                    ],
+                )
+
+            # Otherwise another process wrote meanwhile, the next read reloads
+            if collection.version == previous:
+                for row, item_id in enumerate(ids):
+                    if item_id is None:
+                        continue
+                    self._kill(collection, item_id)
+                    collection.locations[item_id] = (segment_id, row)
+                collection.segments[segment_id] = _Segment(segment_id, path, ids)
+                collection.version = version
+
+        self._maybe_compact(collection)
+
+    def _kill(self, collection: _Collection, item_id: str):
+        location = collection.locations.pop(item_id, None)
+        if location is not None and location[0] in collection.segments:
+            collection.segments[location[0]].kill(location[1])
+
+    def delete(
+        self,
+        collection_name: str,
+        ids: Optional[list[str]] = None,
+        filter: Optional[dict] = None,
+    ):
+        with self._lock:
+            collection = self._get_collection(collection_name)
+            if collection is None:
+                log.debug(
+                    f"Attempted to delete from non-existent collection {collection_name}. Ignoring."
+                )
+                return
+
+            if not ids and filter:
+                ids = [row[0] for row in self._select(collection_name, filter)]
+            if not ids:
+                return
+
+            with self.db:
+                self.db.execute("BEGIN IMMEDIATE")
+                self.db.executemany(
+                    "DELETE FROM item WHERE collection = ? AND id = ?",
+                    [(collection_name, item_id) for item_id in ids],
+                )
+                previous, version = self._bump_version(collection_name)
+
+            if collection.version == previous:
+                for item_id in ids:
+                    self._kill(collection, item_id)
+                collection.version = version
+
+        self._maybe_compact(collection)
+
+    def reset(self):
+        with self._lock:
+            with self.db:
+                self.db.execute("BEGIN IMMEDIATE")
+                self.db.execute("DELETE FROM item")
+                self.db.execute("DELETE FROM segment")
+                self.db.execute("DELETE FROM collection")
+            self._collections = {}
+            for entry in os.listdir(self.path):
+                entry_path = os.path.join(self.path, entry)
+                if os.path.isdir(entry_path):
+                    shutil.rmtree(entry_path, ignore_errors=True)
+
+    ####################
+    # Compaction
+    ####################
+
+    def _maybe_compact(self, collection: _Collection):
+        with self._lock:
+            if collection.name in self._compacting:
+                return
+
+            segments = list(collection.segments.values())
+            total = sum(len(segment.ids) for segment in segments)
+            live = sum(segment.live_count for segment in segments)
+
+            if len(segments) > LOCAL_VECTOR_COMPACTION_MAX_SEGMENTS or (
+                total and (total - live) / total > LOCAL_VECTOR_COMPACTION_DEAD_RATIO
+            ):
+                self._compacting.add(collection.name)
+                self._compactor.submit(self._compact, collection)
+
+    def _compact(self, collection: _Collection):
+        try:
+            with self._lock:
+                if self._get_collection(collection.name) is not collection:
+                    return  # collection was dropped meanwhile
+
+                segments = list(collection.segments.values())
+                with self.db:
+                    self.db.execute("BEGIN IMMEDIATE")
+                    segment_id = self._allocate_segment(collection.name)
+                if segment_id is None:
+                    return
+
+                live_rows = [np.flatnonzero(segment.live) for segment in segments]
+                sources = [
+                    (segment.id, int(row), segment.ids[row])
+                    for segment, rows in zip(segments, live_rows)
+                    for row in rows
+                ]
+
+            # The heavy copy runs unlocked, rows superseded meanwhile, here or
+            # in another process, are detected when swapping the segments in
+            vectors = np.concatenate(
+                [
+                    np.asarray(segment.vectors[rows])
+                    for segment, rows in zip(segments, live_rows)
+                ]
+                or [np.empty((0, collection.dimension), dtype=self.dtype)]
+            )
+
+            path = collection.segment_path(segment_id)
+            self._write_segment(path, vectors)
+            if self.hnsw_enabled and len(vectors) >= LOCAL_VECTOR_HNSW_MIN_ROWS:
+                self._build_index(path, vectors)
+
+            source_ids = [segment.id for segment in segments]
+            placeholders = ", ".join("?" * len(source_ids))
+            with self._lock:
+                with self.db:
+                    self.db.execute("BEGIN IMMEDIATE")
+                    (remaining,) = self.db.execute(
+                        f"SELECT COUNT(*) FROM segment WHERE collection = ? "
+                        f"AND id IN ({placeholders})",
+                        (collection.name, *source_ids),
+                    ).fetchone()
+                    # Dropped, or compacted by another process meanwhile
+                    swapped = remaining == len(segments)
+
+                    if swapped:
+                        current = set(
+                            self.db.execute(
+                                f"SELECT segment, row, id FROM item WHERE collection = ? "
+                                f"AND segment IN ({placeholders})",
+                                (collection.name, *source_ids),
+                            ).fetchall()
+                        )
+                        ids = [
+                            source[2] if source in current else None
+                            for source in sources
+                        ]
+
+                        self.db.execute(
+                            "INSERT INTO segment (collection, id, rows) VALUES (?, ?, ?)",
+                            (collection.name, segment_id, len(ids)),
+                        )
+                        self.db.executemany(
+                            "UPDATE item SET segment = ?, row = ? WHERE collection = ? AND id = ?",
+                            [
+                                (segment_id, row, collection.name, item_id)
+                                for row, item_id in enumerate(ids)
+                                if item_id is not None
+                            ],
+                        )
+                        self.db.executemany(
+                            "DELETE FROM segment WHERE collection = ? AND id = ?",
+                            [(collection.name, segment.id) for segment in segments],
+                        )
+                        previous, version = self._bump_version(collection.name)
+
+                if not swapped:
+                    self._remove_segment_files(path)
+                    return
+
+                if collection.version == previous:
+                    for row, item_id in enumerate(ids):
+                        if item_id is not None:
+                            collection.locations[item_id] = (segment_id, row)
+                    collection.segments[segment_id] = self._load_segment(
+                        collection, segment_id, ids
+                    )
+                    for segment in segments:
+                        collection.segments.pop(segment.id, None)
+                    collection.version = version
+
+            for segment in segments:
+                self._remove_segment_files(segment.path)
+
+            log.info(
+                f"Compacted {len(segments)} segments of {collection.name} into {len(ids)} rows"
+            )
+        except Exception as e:
+            log.exception(f"Error compacting collection {collection.name}: {e}")
+        finally:
+            with self._lock:
+                self._compacting.discard(collection.name)
@@ -189,6 +189,19 @@ class MilvusClient(VectorDBBase):
         )
         return self._result_to_search_result(result)
 
+    def search_many(
+        self, collection_names: list[str], vectors: list[list[float | int]], limit: int
+    ) -> list[Optional[SearchResult]]:
+        # Milvus searches all query vectors of a collection in one request
+        results = []
+        for collection_name in collection_names:
+            try:
+                results.append(self.search(collection_name, vectors, limit))
+            except Exception as e:
+                log.warning(f"Error searching collection {collection_name}: {e}")
+                results.append(None)
+        return results
+
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         connections.connect(uri=MILVUS_URI, token=MILVUS_TOKEN, db_name=MILVUS_DB)
 
@@ -1,6 +1,10 @@
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+import hashlib
 import logging
 import json
+import math
+import re
+import time
 from sqlalchemy import (
     func,
     literal,
@@ -15,6 +19,7 @@ from sqlalchemy import (
     text,
     Text,
     Table,
+    union_all,
     values,
 )
 from sqlalchemy.sql import true
@@ -44,6 +49,15 @@ from open_webui.config import (
     PGVECTOR_POOL_MAX_OVERFLOW,
     PGVECTOR_POOL_TIMEOUT,
     PGVECTOR_POOL_RECYCLE,
+    PGVECTOR_INDEX_METHOD,
+    PGVECTOR_HNSW_M,
+    PGVECTOR_HNSW_EF_CONSTRUCTION,
+    PGVECTOR_HNSW_EF_SEARCH,
+    PGVECTOR_HNSW_ITERATIVE_SCAN,
+    PGVECTOR_IVFFLAT_LISTS,
+    PGVECTOR_IVFFLAT_PROBES,
+    PGVECTOR_EXACT_SEARCH_MAX_ROWS,
+    PGVECTOR_PARTIAL_INDEX_MIN_ROWS,
 )
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -55,6 +69,30 @@ log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 
+# Table-wide ANN index per method, the ivfflat name predates configurable indexes
+VECTOR_INDEX_NAMES = {
+    "ivfflat": "idx_document_chunk_vector",
+    "hnsw": "idx_document_chunk_vector_hnsw",
+}
+# Per-collection partial indexes, suffixed with a hash of the collection name
+PARTIAL_INDEX_PREFIX = "idx_document_chunk_vector_c_"
+
+# How long a collection is trusted to be too large for an exact search
+COLLECTION_SIZE_CACHE_TTL = 300
+
+
+def ivfflat_lists(rows: int) -> int:
+    # https://github.com/pgvector/pgvector?tab=readme-ov-file#ivfflat
+    # rows / 1000 up to 1M rows, sqrt(rows) beyond
+    if rows <= 1_000_000:
+        return max(rows // 1000, 1)
+    return int(math.sqrt(rows))
+
+
+def partial_index_name(collection_name: str) -> str:
+    return f"{PARTIAL_INDEX_PREFIX}{hashlib.md5(collection_name.encode()).hexdigest()[:16]}"
+
+
 def pgcrypto_encrypt(val, key):
     return func.pgp_sym_encrypt(val, literal(key))
 
@@ -157,13 +195,12 @@ class PgvectorClient(VectorDBBase):
             connection = self.session.connection()
             Base.metadata.create_all(bind=connection)
 
-            # Create an index on the vector column if it doesn't exist
-            self.session.execute(
-                text(
-                    "CREATE INDEX IF NOT EXISTS idx_document_chunk_vector "
-                    "ON document_chunk USING ivfflat (vector vector_cosine_ops) WITH (lists = 100);"
-                )
-            )
+            # Create the table-wide ANN index on an empty table only. Building
+            # one over existing rows (e.g. after PGVECTOR_INDEX_METHOD changed)
+            # would lock the table, `open-webui vector-maintenance` builds,
+            # rebuilds and resizes it concurrently instead
+            if PGVECTOR_INDEX_METHOD != "none":
+                self._create_vector_index()
             self.session.execute(
                 text(
                     "CREATE INDEX IF NOT EXISTS idx_document_chunk_collection_name "
@@ -171,12 +208,241 @@ class PgvectorClient(VectorDBBase):
                 )
             )
             self.session.commit()
+
+            self._collection_sizes: Dict[str, Tuple[int, float]] = {}
+            self.ivfflat_probes = self._get_ivfflat_probes()
+            self.session.rollback()
             log.info("Initialization complete.")
         except Exception as e:
             self.session.rollback()
             log.exception(f"Error during initialization: {e}")
             raise
 
+    def _vector_index_ddl(
+        self,
+        name: str,
+        rows: int,
+        collection_name: Optional[str] = None,
+        concurrently: bool = False,
+    ) -> str:
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            using = (
+                "hnsw (vector vector_cosine_ops) "
+                f"WITH (m = {PGVECTOR_HNSW_M}, ef_construction = {PGVECTOR_HNSW_EF_CONSTRUCTION})"
+            )
+        else:
+            lists = PGVECTOR_IVFFLAT_LISTS or ivfflat_lists(rows)
+            using = f"ivfflat (vector vector_cosine_ops) WITH (lists = {lists})"
+
+        ddl = (
+            f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}IF NOT EXISTS {name} "
+            f"ON document_chunk USING {using}"
+        )
+        if collection_name is not None:
+            # DDL takes no bind parameters, quote the literal ourselves
+            ddl += f" WHERE collection_name = '{collection_name.replace(chr(39), chr(39) * 2)}'"
+        return ddl
+
+    def _create_vector_index(self) -> None:
+        name = VECTOR_INDEX_NAMES[PGVECTOR_INDEX_METHOD]
+        exists = self.session.execute(
+            text("SELECT 1 FROM pg_indexes WHERE indexname = :name"),
+            {"name": name},
+        ).scalar()
+        if exists:
+            return
+
+        has_rows = self.session.execute(
+            text("SELECT EXISTS (SELECT 1 FROM document_chunk)")
+        ).scalar()
+        if has_rows:
+            log.warning(
+                f"No {PGVECTOR_INDEX_METHOD} index on document_chunk, searches fall "
+                "back to exact scans until `open-webui vector-maintenance` is run"
+            )
+            return
+
+        self.session.execute(text(self._vector_index_ddl(name, 0)))
+
+    def _get_ivfflat_probes(self) -> int:
+        if PGVECTOR_IVFFLAT_PROBES > 0:
+            return PGVECTOR_IVFFLAT_PROBES
+
+        # sqrt(lists) is the recall/latency trade-off suggested by pgvector
+        options = self.session.execute(
+            text("SELECT reloptions FROM pg_class WHERE relname = :name"),
+            {"name": VECTOR_INDEX_NAMES["ivfflat"]},
+        ).scalar()
+        for option in options or []:
+            match = re.fullmatch(r"lists=(\d+)", option)
+            if match:
+                return max(int(math.sqrt(int(match.group(1)))), 1)
+        return 1
+
+    def _get_collection_sizes(self, collection_names: List[str]) -> Dict[str, int]:
+        """
+        Row counts for query planning, capped just above
+        PGVECTOR_EXACT_SEARCH_MAX_ROWS so large collections stay cheap to count.
+        Counts of large collections are cached for COLLECTION_SIZE_CACHE_TTL.
+        """
+        now = time.monotonic()
+        sizes = {}
+        missing = []
+        for collection_name in set(collection_names):
+            cached = self._collection_sizes.get(collection_name)
+            if cached and now - cached[1] < COLLECTION_SIZE_CACHE_TTL:
+                sizes[collection_name] = cached[0]
+            else:
+                missing.append(collection_name)
+
+        if missing:
+            rows = self.session.execute(
+                text(
+                    "SELECT c.name, (SELECT count(*) FROM ("
+                    "SELECT 1 FROM document_chunk WHERE collection_name = c.name LIMIT :bound"
+                    ") AS t) FROM unnest(CAST(:names AS text[])) AS c(name)"
+                ),
+                {"names": missing, "bound": PGVECTOR_EXACT_SEARCH_MAX_ROWS + 1},
+            ).all()
+            for collection_name, size in rows:
+                sizes[collection_name] = size
+                # Only large collections are cached: their size just picks the
+                # ANN indexes over an exact scan. Small and empty ones are
+                # counted every time, so rows inserted by other workers are
+                # found right away
+                if size > PGVECTOR_EXACT_SEARCH_MAX_ROWS:
+                    self._collection_sizes[collection_name] = (size, now)
+                else:
+                    self._collection_sizes.pop(collection_name, None)
+
+        return sizes
+
+    def _apply_search_settings(self, exact: bool, limit: Optional[int]) -> None:
+        # SET LOCAL only lasts until the read-only transaction is rolled back
+        if exact:
+            # Small collections: bitmap scan on collection_name and an exact
+            # sort beats a table-wide ANN scan filtered after the fact
+            self.session.execute(text("SET LOCAL enable_indexscan = off"))
+            return
+
+        self.session.execute(text("SET LOCAL enable_indexscan = on"))
+        if PGVECTOR_INDEX_METHOD == "hnsw":
+            ef_search = min(max(PGVECTOR_HNSW_EF_SEARCH, limit or 0), 1000)
+            self.session.execute(text(f"SET LOCAL hnsw.ef_search = {ef_search}"))
+            if PGVECTOR_HNSW_ITERATIVE_SCAN:
+                self.session.execute(
+                    text("SELECT set_config('hnsw.iterative_scan', :value, true)"),
+                    {"value": PGVECTOR_HNSW_ITERATIVE_SCAN},
+                )
+        elif PGVECTOR_INDEX_METHOD == "ivfflat":
+            self.session.execute(
+                text(f"SET LOCAL ivfflat.probes = {int(self.ivfflat_probes)}")
+            )
+
+    def maintain(self, rebuild: bool = False) -> Dict[str, Any]:
+        """
+        Analyze document_chunk and bring its ANN indexes in line with the
+        configuration: the table-wide index for PGVECTOR_INDEX_METHOD (lists
+        re-sized from the current row count on rebuild) and a partial index
+        for every collection above PGVECTOR_PARTIAL_INDEX_MIN_ROWS.
+
+        Indexes are built concurrently, so this can run against a live
+        deployment.
+        """
+        summary = {"rows": 0, "created": [], "dropped": []}
+
+        engine = self.session.get_bind()
+        with engine.connect().execution_options(
+            isolation_level="AUTOCOMMIT"
+        ) as connection:
+
+            def execute(statement: str, params: Optional[dict] = None):
+                log.info(f"vector maintenance: {statement}")
+                return connection.execute(text(statement), params or {})
+
+            execute("ANALYZE document_chunk")
+            rows = connection.execute(
+                text(
+                    "SELECT reltuples::bigint FROM pg_class WHERE relname = 'document_chunk'"
+                )
+            ).scalar()
+            summary["rows"] = max(int(rows or 0), 0)
+
+            existing = dict(
+                connection.execute(
+                    text(
+                        "SELECT indexname, indexdef FROM pg_indexes "
+                        "WHERE tablename = 'document_chunk'"
+                    )
+                ).all()
+            )
+
+            def is_current(name: str) -> bool:
+                return (
+                    name in existing
+                    and f"USING {PGVECTOR_INDEX_METHOD} " in existing[name]
+                    and not rebuild
+                )
+
+            def drop(name: str):
+                execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                summary["dropped"].append(name)
+
+            def build(name: str, rows: int, collection_name: Optional[str] = None):
+                # Build a replacement next to the old index and swap them, so
+                # searches never run without an index
+                target = f"{name}_new" if name in existing else name
+                if target != name:
+                    execute(f"DROP INDEX CONCURRENTLY IF EXISTS {target}")
+                execute(
+                    self._vector_index_ddl(
+                        target, rows, collection_name=collection_name, concurrently=True
+                    )
+                )
+                if target != name:
+                    execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+                    execute(f"ALTER INDEX {target} RENAME TO {name}")
+                summary["created"].append(name)
+
+            if PGVECTOR_INDEX_METHOD != "none":
+                name = VECTOR_INDEX_NAMES[PGVECTOR_INDEX_METHOD]
+                if not is_current(name):
+                    build(name, summary["rows"])
+
+                # Only drop the index of the other method once the new one exists
+                for method, other in VECTOR_INDEX_NAMES.items():
+                    if method != PGVECTOR_INDEX_METHOD and other in existing:
+                        drop(other)
+
+            large = {}
+            if PGVECTOR_INDEX_METHOD != "none" and PGVECTOR_PARTIAL_INDEX_MIN_ROWS > 0:
+                large = dict(
+                    connection.execute(
+                        text(
+                            "SELECT collection_name, count(*) FROM document_chunk "
+                            "GROUP BY collection_name HAVING count(*) >= :min_rows"
+                        ),
+                        {"min_rows": PGVECTOR_PARTIAL_INDEX_MIN_ROWS},
+                    ).all()
+                )
+
+            wanted = {
+                partial_index_name(collection_name): (collection_name, size)
+                for collection_name, size in large.items()
+            }
+            for name in existing:
+                if name.startswith(PARTIAL_INDEX_PREFIX) and name not in wanted:
+                    drop(name)
+
+            for name, (collection_name, size) in wanted.items():
+                if not is_current(name):
+                    build(name, size, collection_name=collection_name)
+
+        self._collection_sizes = {}
+        self.ivfflat_probes = self._get_ivfflat_probes()
+        self.session.rollback()
+        return summary
+
     def check_vector_length(self) -> None:
         """
         Check if the VECTOR_LENGTH matches the existing vector column dimension in the database.
@@ -254,6 +520,7 @@ class PgvectorClient(VectorDBBase):
                         },
                     )
                 self.session.commit()
+                self._collection_sizes.pop(collection_name, None)
                 log.info(f"Encrypted & inserted {len(items)} into '{collection_name}'")
 
             else:
@@ -270,6 +537,7 @@ class PgvectorClient(VectorDBBase):
                     new_items.append(new_chunk)
                 self.session.bulk_save_objects(new_items)
                 self.session.commit()
+                self._collection_sizes.pop(collection_name, None)
                 log.info(
                     f"Inserted {len(new_items)} items into collection '{collection_name}'."
                 )
@@ -311,6 +579,7 @@ class PgvectorClient(VectorDBBase):
                         },
                     )
                 self.session.commit()
+                self._collection_sizes.pop(collection_name, None)
                 log.info(f"Encrypted & upserted {len(items)} into '{collection_name}'")
             else:
                 for item in items:
@@ -337,6 +606,7 @@ class PgvectorClient(VectorDBBase):
                         )
                         self.session.add(new_chunk)
                 self.session.commit()
+                self._collection_sizes.pop(collection_name, None)
                 log.info(
                     f"Upserted {len(items)} items into collection '{collection_name}'."
                 )
@@ -351,52 +621,129 @@ class PgvectorClient(VectorDBBase):
         vectors: List[List[float]],
         limit: Optional[int] = None,
     ) -> Optional[SearchResult]:
+        if not vectors:
+            return None
+        return self.search_many([collection_name], vectors, limit)[0]
+
+    def search_many(
+        self,
+        collection_names: List[str],
+        vectors: List[List[float]],
+        limit: Optional[int] = None,
+    ) -> List[Optional[SearchResult]]:
+        """
+        Search every collection with every query vector, one lateral
+        nearest-neighbour subquery per (collection, vector) pair.
+
+        Small collections are searched exactly, larger ones through the ANN
+        indexes (a collection's own partial index if it has one), so this
+        takes at most two round-trips.
+        """
         try:
-            if not vectors:
-                return None
+            if not vectors or not collection_names:
+                return [None] * len(collection_names)
 
             # Adjust query vectors to VECTOR_LENGTH
             vectors = [self.adjust_vector_length(vector) for vector in vectors]
             num_queries = len(vectors)
 
-            def vector_expr(vector):
-                return cast(array(vector), Vector(VECTOR_LENGTH))
-
-            # Create the values for query vectors
-            qid_col = column("qid", Integer)
-            q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
-            query_vectors = (
-                values(qid_col, q_vector_col)
-                .data(
-                    [(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)]
+            search_results = [
+                SearchResult(
+                    ids=[[] for _ in range(num_queries)],
+                    distances=[[] for _ in range(num_queries)],
+                    documents=[[] for _ in range(num_queries)],
+                    metadatas=[[] for _ in range(num_queries)],
                 )
-                .alias("query_vectors")
-            )
-
-            result_fields = [
-                DocumentChunk.id,
+                for _ in collection_names
             ]
-            if PGVECTOR_PGCRYPTO:
-                result_fields.append(
-                    pgcrypto_decrypt(
-                        DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text
-                    ).label("text")
-                )
-                result_fields.append(
-                    pgcrypto_decrypt(
-                        DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
-                    ).label("vmetadata")
+
+            sizes = self._get_collection_sizes(collection_names)
+            exact, approximate = [], []
+            for cid, collection_name in enumerate(collection_names):
+                size = sizes.get(collection_name, 0)
+                if size == 0:
+                    continue
+                if (
+                    PGVECTOR_INDEX_METHOD == "none"
+                    or size <= PGVECTOR_EXACT_SEARCH_MAX_ROWS
+                ):
+                    exact.append((cid, collection_name))
+                else:
+                    approximate.append((cid, collection_name))
+
+            results = []
+            for collections, is_exact in ((exact, True), (approximate, False)):
+                if not collections:
+                    continue
+                self._apply_search_settings(is_exact, limit)
+                results.extend(
+                    self.session.execute(
+                        self._search_statement(collections, vectors, limit)
+                    ).all()
                 )
-            else:
-                result_fields.append(DocumentChunk.text)
-                result_fields.append(DocumentChunk.vmetadata)
+
+            for row in sorted(results, key=lambda row: row.distance):
+                result = search_results[int(row.cid)]
+                qid = int(row.qid)
+                result.ids[qid].append(row.id)
+                # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
+                # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
+                result.distances[qid].append((2.0 - row.distance) / 2.0)
+                result.documents[qid].append(row.text)
+                result.metadatas[qid].append(row.vmetadata)
+
+            self.session.rollback()  # read-only transaction
+            return search_results
+        except Exception as e:
+            self.session.rollback()
+            log.exception(f"Error during search: {e}")
+            return [None] * len(collection_names)
+
+    def _search_statement(
+        self,
+        collections: List[Tuple[int, str]],
+        vectors: List[List[float]],
+        limit: Optional[int],
+    ):
+        def vector_expr(vector):
+            return cast(array(vector), Vector(VECTOR_LENGTH))
+
+        # Create the values for query vectors
+        qid_col = column("qid", Integer)
+        q_vector_col = column("q_vector", Vector(VECTOR_LENGTH))
+        query_vectors = (
+            values(qid_col, q_vector_col)
+            .data([(idx, vector_expr(vector)) for idx, vector in enumerate(vectors)])
+            .alias("query_vectors")
+        )
+
+        result_fields = [
+            DocumentChunk.id,
+        ]
+        if PGVECTOR_PGCRYPTO:
             result_fields.append(
-                (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
-                    "distance"
+                pgcrypto_decrypt(DocumentChunk.text, PGVECTOR_PGCRYPTO_KEY, Text).label(
+                    "text"
                 )
             )
+            result_fields.append(
+                pgcrypto_decrypt(
+                    DocumentChunk.vmetadata, PGVECTOR_PGCRYPTO_KEY, JSONB
+                ).label("vmetadata")
+            )
+        else:
+            result_fields.append(DocumentChunk.text)
+            result_fields.append(DocumentChunk.vmetadata)
+        result_fields.append(
+            (DocumentChunk.vector.cosine_distance(query_vectors.c.q_vector)).label(
+                "distance"
+            )
+        )
 
-            # Build the lateral subquery for each query vector
+        # The collection name is compared against a constant rather than a
+        # joined column, so the planner can pick the collection's partial index
+        selects = []
+        for cid, collection_name in collections:
             subq = (
                 select(*result_fields)
                 .where(DocumentChunk.collection_name == collection_name)
@@ -406,11 +753,11 @@ class PgvectorClient(VectorDBBase):
             )
             if limit is not None:
                 subq = subq.limit(limit)
-            subq = subq.lateral("result")
+            subq = subq.lateral(f"result_{cid}")
 
-            # Build the main query by joining query_vectors and the lateral subquery
-            stmt = (
+            selects.append(
                 select(
+                    literal(cid, Integer).label("cid"),
                     query_vectors.c.qid,
                     subq.c.id,
                     subq.c.text,
@@ -419,42 +766,9 @@ class PgvectorClient(VectorDBBase):
                 )
                 .select_from(query_vectors)
                 .join(subq, true())
-                .order_by(query_vectors.c.qid, subq.c.distance)
             )
 
-            result_proxy = self.session.execute(stmt)
-            results = result_proxy.all()
-
-            ids = [[] for _ in range(num_queries)]
-            distances = [[] for _ in range(num_queries)]
-            documents = [[] for _ in range(num_queries)]
-            metadatas = [[] for _ in range(num_queries)]
-
-            if not results:
-                return SearchResult(
-                    ids=ids,
-                    distances=distances,
-                    documents=documents,
-                    metadatas=metadatas,
-                )
-
-            for row in results:
-                qid = int(row.qid)
-                ids[qid].append(row.id)
-                # normalize and re-orders pgvec distance from [2, 0] to [0, 1] score range
-                # https://github.com/pgvector/pgvector?tab=readme-ov-file#querying
-                distances[qid].append((2.0 - row.distance) / 2.0)
-                documents[qid].append(row.text)
-                metadatas[qid].append(row.vmetadata)
-
-            self.session.rollback()  # read-only transaction
-            return SearchResult(
-                ids=ids, distances=distances, documents=documents, metadatas=metadatas
-            )
-        except Exception as e:
-            self.session.rollback()
-            log.exception(f"Error during search: {e}")
-            return None
+        return selects[0] if len(selects) == 1 else union_all(*selects)
 
     def query(
         self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
@@ -595,6 +909,7 @@ class PgvectorClient(VectorDBBase):
                         )
                 deleted = query.delete(synchronize_session=False)
             self.session.commit()
+            self._collection_sizes.pop(collection_name, None)
             log.info(f"Deleted {deleted} items from collection '{collection_name}'.")
         except Exception as e:
             self.session.rollback()
@@ -605,6 +920,7 @@ class PgvectorClient(VectorDBBase):
         try:
             deleted = self.session.query(DocumentChunk).delete()
             self.session.commit()
+            self._collection_sizes = {}
             log.info(
                 f"Reset complete. Deleted {deleted} items from 'document_chunk' table."
             )
@@ -167,6 +167,44 @@ class QdrantClient(VectorDBBase):
             distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
         )
 
+    def search_many(
+        self, collection_names: list[str], vectors: list[list[float | int]], limit: int
+    ) -> list[Optional[SearchResult]]:
+        # One batched request per collection answers every query vector
+        if limit is None:
+            limit = NO_LIMIT  # otherwise qdrant would set limit to 10!
+
+        results = []
+        for collection_name in collection_names:
+            try:
+                responses = self.client.query_batch_points(
+                    collection_name=f"{self.collection_prefix}_{collection_name}",
+                    requests=[
+                        models.QueryRequest(
+                            query=vector, limit=limit, with_payload=True
+                        )
+                        for vector in vectors
+                    ],
+                )
+                results.append(self._responses_to_search_result(responses))
+            except Exception as e:
+                log.warning(f"Error searching collection {collection_name}: {e}")
+                results.append(None)
+        return results
+
+    def _responses_to_search_result(self, responses) -> SearchResult:
+        rows = [self._result_to_get_result(response.points) for response in responses]
+        return SearchResult(
+            ids=[row.ids[0] for row in rows],
+            documents=[row.documents[0] for row in rows],
+            metadatas=[row.metadatas[0] for row in rows],
+            # qdrant distance is [-1, 1], normalize to [0, 1]
+            distances=[
+                [(point.score + 1.0) / 2.0 for point in response.points]
+                for response in responses
+            ],
+        )
+
     def query(self, collection_name: str, filter: dict, limit: Optional[int] = None):
         # Construct the filter string for querying
         if not self.has_collection(collection_name):
@@ -276,6 +276,68 @@ class QdrantClient(VectorDBBase):
             distances=[[(point.score + 1.0) / 2.0 for point in query_response.points]],
         )
 
+    def search_many(
+        self, collection_names: List[str], vectors: List[List[float | int]], limit: int
+    ) -> List[Optional[SearchResult]]:
+        """
+        Search several tenants with several query vectors. Tenants sharing a
+        multi-tenant collection are answered by a single batched request.
+        """
+        results: List[Optional[SearchResult]] = [None] * len(collection_names)
+        if not self.client or not vectors:
+            return results
+        if limit is None:
+            limit = NO_LIMIT
+
+        grouped: Dict[str, List[Tuple[int, str]]] = {}
+        for idx, collection_name in enumerate(collection_names):
+            mt_collection, tenant_id = self._get_collection_and_tenant_id(
+                collection_name
+            )
+            grouped.setdefault(mt_collection, []).append((idx, tenant_id))
+
+        for mt_collection, tenants in grouped.items():
+            try:
+                if not self.client.collection_exists(collection_name=mt_collection):
+                    continue
+
+                responses = self.client.query_batch_points(
+                    collection_name=mt_collection,
+                    requests=[
+                        models.QueryRequest(
+                            query=vector,
+                            limit=limit,
+                            filter=models.Filter(must=[_tenant_filter(tenant_id)]),
+                            with_payload=True,
+                        )
+                        for _, tenant_id in tenants
+                        for vector in vectors
+                    ],
+                )
+            except Exception as e:
+                log.warning(f"Error searching collection {mt_collection}: {e}")
+                continue
+
+            for position, (idx, _) in enumerate(tenants):
+                tenant_responses = responses[
+                    position * len(vectors) : (position + 1) * len(vectors)
+                ]
+                rows = [
+                    self._result_to_get_result(response.points)
+                    for response in tenant_responses
+                ]
+                results[idx] = SearchResult(
+                    ids=[row.ids[0] for row in rows],
+                    documents=[row.documents[0] for row in rows],
+                    metadatas=[row.metadatas[0] for row in rows],
+                    distances=[
+                        [(point.score + 1.0) / 2.0 for point in response.points]
+                        for response in tenant_responses
+                    ],
+                )
+
+        return results
+
     def query(
         self, collection_name: str, filter: Dict[str, Any], limit: Optional[int] = None
     ):
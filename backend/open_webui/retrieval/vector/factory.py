@@ -56,6 +56,10 @@ class Vector:
                 from open_webui.retrieval.vector.dbs.oracle23ai import Oracle23aiClient
 
                 return Oracle23aiClient()
+            case VectorType.LOCAL:
+                from open_webui.retrieval.vector.dbs.local import LocalVectorClient
+
+                return LocalVectorClient()
             case _:
                 raise ValueError(f"Unsupported vector type: {vector_type}")
 
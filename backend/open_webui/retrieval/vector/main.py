@@ -1,7 +1,19 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from pydantic import BaseModel
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional, Union
 
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Shared by the default search_many fallback so a RAG turn does not spin up a
+# fresh thread pool for every (collection, query) pair.
+_search_executor = ThreadPoolExecutor(thread_name_prefix="vector-search")
+
 
 class VectorItem(BaseModel):
     id: str
@@ -20,6 +32,22 @@ class SearchResult(GetResult):
     distances: Optional[List[List[float | int]]]
 
 
+def stack_search_results(
+    results: List[Optional[SearchResult]],
+) -> Optional[SearchResult]:
+    """Concatenate single-query results into one result with a row per query."""
+    if all(result is None for result in results):
+        return None
+
+    stacked = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+    for result in results:
+        for key, rows in stacked.items():
+            value = getattr(result, key, None) if result is not None else None
+            rows.append(value[0] if value else [])
+
+    return SearchResult(**stacked)
+
+
 class VectorDBBase(ABC):
     """
     Abstract base class for all vector database backends.
@@ -58,6 +86,59 @@ class VectorDBBase(ABC):
         """Search for similar vectors in a collection."""
         pass
 
+    def search_many(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+    ) -> List[Optional[SearchResult]]:
+        """
+        Search several collections with several query vectors at once.
+
+        Returns one result per collection name, in order, holding one row per
+        query vector, or None if the collection could not be searched.
+        Backends that can answer this in fewer round-trips override it; this
+        fallback runs one `search` per (collection, vector) pair on a shared
+        thread pool.
+        """
+
+        def search_one(collection_name, vector):
+            try:
+                return self.search(
+                    collection_name=collection_name, vectors=[vector], limit=limit
+                )
+            except Exception as e:
+                log.warning(f"Error searching collection {collection_name}: {e}")
+                return None
+
+        futures = [
+            [
+                _search_executor.submit(search_one, collection_name, vector)
+                for vector in vectors
+            ]
+            for collection_name in collection_names
+        ]
+        return [
+            stack_search_results([future.result() for future in row]) for row in futures
+        ]
+
+    async def search_async(
+        self, collection_name: str, vectors: List[List[Union[float, int]]], limit: int
+    ) -> Optional[SearchResult]:
+        """Async variant of `search`, backends with native async clients may override it."""
+        return await asyncio.to_thread(self.search, collection_name, vectors, limit)
+
+    async def search_many_async(
+        self,
+        collection_names: List[str],
+        vectors: List[List[Union[float, int]]],
+        limit: int,
+    ) -> List[Optional[SearchResult]]:
+        """Async variant of `search_many`, backends with native async clients may override it."""
+        return await asyncio.to_thread(
+            self.search_many, collection_names, vectors, limit
+        )
+
     @abstractmethod
     def query(
         self, collection_name: str, filter: Dict, limit: Optional[int] = None
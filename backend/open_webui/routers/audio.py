@@ -1,17 +1,17 @@
+import asyncio
 import hashlib
+import io
 import json
 import logging
 import os
 import uuid
 from functools import lru_cache
 from pydub import AudioSegment
-from pydub.silence import split_on_silence
+from pydub.silence import detect_silence, split_on_silence
 from concurrent.futures import ThreadPoolExecutor
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional
 
 from fnmatch import fnmatch
-import aiohttp
-import aiofiles
 import requests
 import mimetypes
 from urllib.parse import urljoin, quote
@@ -28,7 +28,7 @@ from fastapi import (
     APIRouter,
 )
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel
 
 
@@ -38,17 +38,25 @@ from open_webui.config import (
     WHISPER_MODEL_DIR,
     CACHE_DIR,
     WHISPER_LANGUAGE,
+    WHISPER_WORKERS,
+    WHISPER_BATCH_SIZE,
+    WHISPER_BATCH_WINDOW,
+    WHISPER_TIMEOUT,
 )
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import (
-    AIOHTTP_CLIENT_SESSION_SSL,
-    AIOHTTP_CLIENT_TIMEOUT,
     ENV,
     SRC_LOG_LEVELS,
     DEVICE_TYPE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
 )
+from open_webui.utils.speech_cache import (
+    get_speech_response,
+    speech_cache,
+    stream_speech_response,
+)
+from open_webui.utils.transcription import WhisperWorkerPool
 
 
 router = APIRouter()
@@ -62,8 +70,12 @@ AZURE_MAX_FILE_SIZE = AZURE_MAX_FILE_SIZE_MB * 1024 * 1024  # Convert MB to byte
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["AUDIO"])
 
-SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
-SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+whisper_pool = WhisperWorkerPool(
+    workers=WHISPER_WORKERS,
+    batch_size=WHISPER_BATCH_SIZE,
+    batch_window=WHISPER_BATCH_WINDOW,
+    timeout=WHISPER_TIMEOUT,
+)
 
 
 ##########################################
@@ -119,28 +131,13 @@ def convert_audio_to_mp3(file_path):
         return None
 
 
-def set_faster_whisper_model(model: str, auto_update: bool = False):
-    whisper_model = None
-    if model:
-        from faster_whisper import WhisperModel
-
-        faster_whisper_kwargs = {
-            "model_size_or_path": model,
-            "device": DEVICE_TYPE if DEVICE_TYPE and DEVICE_TYPE == "cuda" else "cpu",
-            "compute_type": "int8",
-            "download_root": WHISPER_MODEL_DIR,
-            "local_files_only": not auto_update,
-        }
-
-        try:
-            whisper_model = WhisperModel(**faster_whisper_kwargs)
-        except Exception:
-            log.warning(
-                "WhisperModel initialization failed, attempting download with local_files_only=False"
-            )
-            faster_whisper_kwargs["local_files_only"] = False
-            whisper_model = WhisperModel(**faster_whisper_kwargs)
-    return whisper_model
+def start_whisper_pool(request, auto_update: bool = False):
+    whisper_pool.start(
+        request.app.state.config.WHISPER_MODEL,
+        device=DEVICE_TYPE if DEVICE_TYPE and DEVICE_TYPE == "cuda" else "cpu",
+        download_root=WHISPER_MODEL_DIR,
+        auto_update=auto_update,
+    )
 
 
 ##########################################
@@ -253,11 +250,9 @@ async def update_audio_config(
     )
 
     if request.app.state.config.STT_ENGINE == "":
-        request.app.state.faster_whisper_model = set_faster_whisper_model(
-            form_data.stt.WHISPER_MODEL, WHISPER_MODEL_AUTO_UPDATE
-        )
+        start_whisper_pool(request, WHISPER_MODEL_AUTO_UPDATE)
     else:
-        request.app.state.faster_whisper_model = None
+        whisper_pool.stop()
 
     return {
         "tts": {
@@ -304,6 +299,43 @@ def load_speech_pipeline(request):
         )
 
 
+async def stream_transformers_speech(
+    request: Request, payload: dict
+) -> AsyncIterator[bytes]:
+    import torch
+    import soundfile as sf
+
+    def synthesize() -> bytes:
+        load_speech_pipeline(request)
+
+        embeddings_dataset = request.app.state.speech_speaker_embeddings_dataset
+
+        speaker_index = 6799
+        try:
+            speaker_index = embeddings_dataset["filename"].index(
+                request.app.state.config.TTS_MODEL
+            )
+        except Exception:
+            pass
+
+        speaker_embedding = torch.tensor(
+            embeddings_dataset[speaker_index]["xvector"]
+        ).unsqueeze(0)
+
+        speech = request.app.state.speech_synthesiser(
+            payload["input"],
+            forward_params={"speaker_embeddings": speaker_embedding},
+        )
+
+        buffer = io.BytesIO()
+        sf.write(
+            buffer, speech["audio"], samplerate=speech["sampling_rate"], format="MP3"
+        )
+        return buffer.getvalue()
+
+    yield await asyncio.to_thread(synthesize)
+
+
 @router.post("/speech")
 async def speech(request: Request, user=Depends(get_verified_user)):
     body = await request.body()
@@ -313,11 +345,9 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         + str(request.app.state.config.TTS_MODEL).encode("utf-8")
     ).hexdigest()
 
-    file_path = SPEECH_CACHE_DIR.joinpath(f"{name}.mp3")
-    file_body_path = SPEECH_CACHE_DIR.joinpath(f"{name}.json")
-
     # Check if the file already exists in the cache
-    if file_path.is_file():
+    file_path = speech_cache.get(name)
+    if file_path:
         return FileResponse(file_path)
 
     payload = None
@@ -327,66 +357,29 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         log.exception(e)
         raise HTTPException(status_code=400, detail="Invalid JSON payload")
 
-    r = None
+    stream = None
     if request.app.state.config.TTS_ENGINE == "openai":
         payload["model"] = request.app.state.config.TTS_MODEL
 
-        try:
-            timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-            async with aiohttp.ClientSession(
-                timeout=timeout, trust_env=True
-            ) as session:
-                r = await session.post(
-                    url=f"{request.app.state.config.TTS_OPENAI_API_BASE_URL}/audio/speech",
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "Authorization": f"Bearer {request.app.state.config.TTS_OPENAI_API_KEY}",
-                        **(
-                            {
-                                "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                                "X-OpenWebUI-User-Id": user.id,
-                                "X-OpenWebUI-User-Email": user.email,
-                                "X-OpenWebUI-User-Role": user.role,
-                            }
-                            if ENABLE_FORWARD_USER_INFO_HEADERS
-                            else {}
-                        ),
-                    },
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                )
-
-                r.raise_for_status()
-
-                async with aiofiles.open(file_path, "wb") as f:
-                    await f.write(await r.read())
-
-                async with aiofiles.open(file_body_path, "w") as f:
-                    await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-            detail = None
-
-            status_code = 500
-            detail = f"FLOAT CHAT: Server Connection Error"
-
-            if r is not None:
-                status_code = r.status
-
-                try:
-                    res = await r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error']}"
-                except Exception:
-                    detail = f"External: {e}"
-
-            raise HTTPException(
-                status_code=status_code,
-                detail=detail,
-            )
+        stream = lambda synthesis: stream_speech_response(
+            synthesis,
+            f"{request.app.state.config.TTS_OPENAI_API_BASE_URL}/audio/speech",
+            json=payload,
+            headers={
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {request.app.state.config.TTS_OPENAI_API_KEY}",
+                **(
+                    {
+                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                        "X-OpenWebUI-User-Id": user.id,
+                        "X-OpenWebUI-User-Email": user.email,
+                        "X-OpenWebUI-User-Role": user.role,
+                    }
+                    if ENABLE_FORWARD_USER_INFO_HEADERS
+                    else {}
+                ),
+            },
+        )
 
     elif request.app.state.config.TTS_ENGINE == "elevenlabs":
         voice_id = payload.get("voice", "")
@@ -397,149 +390,63 @@ async def speech(request: Request, user=Depends(get_verified_user)):
                 detail="Invalid voice id",
             )
 
-        try:
-            timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-            async with aiohttp.ClientSession(
-                timeout=timeout, trust_env=True
-            ) as session:
-                async with session.post(
-                    f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}",
-                    json={
-                        "text": payload["input"],
-                        "model_id": request.app.state.config.TTS_MODEL,
-                        "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
-                    },
-                    headers={
-                        "Accept": "audio/mpeg",
-                        "Content-Type": "application/json",
-                        "xi-api-key": request.app.state.config.TTS_API_KEY,
-                    },
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as r:
-                    r.raise_for_status()
-
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-            return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-            detail = None
-
-            try:
-                if r.status != 200:
-                    res = await r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error'].get('message', '')}"
-            except Exception:
-                detail = f"External: {e}"
-
-            raise HTTPException(
-                status_code=getattr(r, "status", 500) if r else 500,
-                detail=detail if detail else "FLOAT CHAT: Server Connection Error",
-            )
+        stream = lambda synthesis: stream_speech_response(
+            synthesis,
+            f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}/stream",
+            json={
+                "text": payload["input"],
+                "model_id": request.app.state.config.TTS_MODEL,
+                "voice_settings": {"stability": 0.5, "similarity_boost": 0.5},
+            },
+            headers={
+                "Accept": "audio/mpeg",
+                "Content-Type": "application/json",
+                "xi-api-key": request.app.state.config.TTS_API_KEY,
+            },
+        )
 
     elif request.app.state.config.TTS_ENGINE == "azure":
-        try:
-            payload = json.loads(body.decode("utf-8"))
-        except Exception as e:
-            log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
-
         region = request.app.state.config.TTS_AZURE_SPEECH_REGION or "eastus"
         base_url = request.app.state.config.TTS_AZURE_SPEECH_BASE_URL
         language = request.app.state.config.TTS_VOICE
         locale = "-".join(request.app.state.config.TTS_VOICE.split("-")[:1])
         output_format = request.app.state.config.TTS_AZURE_SPEECH_OUTPUT_FORMAT
 
-        try:
-            data = f"""<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{locale}">
+        data = f"""<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{locale}">
                 <voice name="{language}">{payload["input"]}</voice>
             </speak>"""
-            timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-            async with aiohttp.ClientSession(
-                timeout=timeout, trust_env=True
-            ) as session:
-                async with session.post(
-                    (base_url or f"https://{region}.tts.speech.microsoft.com")
-                    + "/cognitiveservices/v1",
-                    headers={
-                        "Ocp-Apim-Subscription-Key": request.app.state.config.TTS_API_KEY,
-                        "Content-Type": "application/ssml+xml",
-                        "X-Microsoft-OutputFormat": output_format,
-                    },
-                    data=data,
-                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
-                ) as r:
-                    r.raise_for_status()
 
-                    async with aiofiles.open(file_path, "wb") as f:
-                        await f.write(await r.read())
-
-                    async with aiofiles.open(file_body_path, "w") as f:
-                        await f.write(json.dumps(payload))
-
-                    return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-            detail = None
-
-            try:
-                if r.status != 200:
-                    res = await r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error'].get('message', '')}"
-            except Exception:
-                detail = f"External: {e}"
-
-            raise HTTPException(
-                status_code=getattr(r, "status", 500) if r else 500,
-                detail=detail if detail else "FLOAT CHAT: Server Connection Error",
-            )
+        stream = lambda synthesis: stream_speech_response(
+            synthesis,
+            (base_url or f"https://{region}.tts.speech.microsoft.com")
+            + "/cognitiveservices/v1",
+            headers={
+                "Ocp-Apim-Subscription-Key": request.app.state.config.TTS_API_KEY,
+                "Content-Type": "application/ssml+xml",
+                "X-Microsoft-OutputFormat": output_format,
+            },
+            data=data,
+        )
 
     elif request.app.state.config.TTS_ENGINE == "transformers":
-        payload = None
-        try:
-            payload = json.loads(body.decode("utf-8"))
-        except Exception as e:
-            log.exception(e)
-            raise HTTPException(status_code=400, detail="Invalid JSON payload")
+        stream = lambda synthesis: stream_transformers_speech(request, payload)
 
-        import torch
-        import soundfile as sf
-
-        load_speech_pipeline(request)
-
-        embeddings_dataset = request.app.state.speech_speaker_embeddings_dataset
-
-        speaker_index = 6799
-        try:
-            speaker_index = embeddings_dataset["filename"].index(
-                request.app.state.config.TTS_MODEL
-            )
-        except Exception:
-            pass
-
-        speaker_embedding = torch.tensor(
-            embeddings_dataset[speaker_index]["xvector"]
-        ).unsqueeze(0)
-
-        speech = request.app.state.speech_synthesiser(
-            payload["input"],
-            forward_params={"speaker_embeddings": speaker_embedding},
-        )
+    if stream is None:
+        return None
 
-        sf.write(file_path, speech["audio"], samplerate=speech["sampling_rate"])
+    return await get_speech_response(name, payload, stream)
 
-        async with aiofiles.open(file_body_path, "w") as f:
-            await f.write(json.dumps(payload))
 
-        return FileResponse(file_path)
+def transcribe_locally(
+    request, file_path: str, language: Optional[str] = None
+) -> Iterator[dict]:
+    """Yield the segments of `file_path` as the local whisper workers decode them."""
+    start_whisper_pool(request)
+    yield from whisper_pool.transcribe(
+        file_path,
+        language=language,
+        vad_filter=request.app.state.config.WHISPER_VAD_FILTER,
+    )
 
 
 def transcription_handler(request, file_path, metadata):
@@ -555,25 +462,12 @@ def transcription_handler(request, file_path, metadata):
     ]
 
     if request.app.state.config.STT_ENGINE == "":
-        if request.app.state.faster_whisper_model is None:
-            request.app.state.faster_whisper_model = set_faster_whisper_model(
-                request.app.state.config.WHISPER_MODEL
-            )
-
-        model = request.app.state.faster_whisper_model
-        segments, info = model.transcribe(
-            file_path,
-            beam_size=5,
-            vad_filter=request.app.state.config.WHISPER_VAD_FILTER,
-            language=languages[0],
-        )
-        log.info(
-            "Detected language '%s' with probability %f"
-            % (info.language, info.language_probability)
-        )
-
-        transcript = "".join([segment.text for segment in list(segments)])
-        data = {"text": transcript.strip()}
+        data = {
+            "text": "".join(
+                segment["text"]
+                for segment in transcribe_locally(request, file_path, languages[0])
+            ).strip()
+        }
 
         # save the transcript to a json file
         transcript_file = f"{file_dir}/{id}.json"
@@ -819,9 +713,35 @@ def transcription_handler(request, file_path, metadata):
             )
 
 
-def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None):
+def transcribe_stream(
+    request: Request, file_path: str, metadata: Optional[dict] = None
+) -> Iterator[dict]:
+    """
+    Transcribe `file_path`, yielding {"text": ...} for each partial transcript
+    as it becomes available and finally {"text": ..., "done": True} with the
+    full transcript. Only local whisper produces partial transcripts.
+    """
     log.info(f"transcribe: {file_path} {metadata}")
 
+    if request.app.state.config.STT_ENGINE == "":
+        # The whisper workers decode any format and segment long audio with
+        # the VAD, so there is nothing to convert, compress or split
+        metadata = metadata or {}
+        language = WHISPER_LANGUAGE or metadata.get("language", None)
+
+        texts = []
+        for segment in transcribe_locally(request, file_path, language):
+            texts.append(segment["text"])
+            yield {"text": segment["text"]}
+
+        data = {"text": "".join(texts).strip()}
+        transcript_file = f"{os.path.splitext(file_path)[0]}.json"
+        with open(transcript_file, "w") as f:
+            json.dump(data, f)
+
+        yield {**data, "done": True}
+        return
+
     if is_audio_conversion_required(file_path):
         file_path = convert_audio_to_mp3(file_path)
 
@@ -833,7 +753,7 @@ def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None
     # Always produce a list of chunk paths (could be one entry if small)
     try:
         chunk_paths = split_audio(file_path, MAX_FILE_SIZE)
-        print(f"Chunk paths: {chunk_paths}")
+        log.debug(f"Chunk paths: {chunk_paths}")
     except Exception as e:
         log.exception(e)
         raise HTTPException(
@@ -867,11 +787,18 @@ def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None
                 except Exception:
                     pass
 
-    return {
+    yield {
         "text": " ".join([result["text"] for result in results]),
+        "done": True,
     }
 
 
+def transcribe(request: Request, file_path: str, metadata: Optional[dict] = None):
+    for result in transcribe_stream(request, file_path, metadata):
+        if result.get("done"):
+            return {"text": result["text"]}
+
+
 def compress_audio(file_path):
     if os.path.getsize(file_path) > MAX_FILE_SIZE:
         id = os.path.splitext(os.path.basename(file_path))[
@@ -891,6 +818,24 @@ def compress_audio(file_path):
         return file_path
 
 
+def find_pause(audio, start, end, window_ms=10000):
+    """
+    Move a chunk boundary back to the middle of the last pause before `end`,
+    so that chunks are not cut mid-word. Returns `end` if there is no pause.
+    """
+    window_start = max(start + (end - start) // 2, end - window_ms)
+    pauses = detect_silence(
+        audio[window_start:end],
+        min_silence_len=300,
+        silence_thresh=audio.dBFS - 16,
+    )
+    if not pauses:
+        return end
+
+    pause_start, pause_end = pauses[-1]
+    return window_start + (pause_start + pause_end) // 2
+
+
 def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
     """
     Splits audio into chunks not exceeding max_bytes.
@@ -913,6 +858,8 @@ def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
 
     while start < duration_ms:
         end = min(start + approx_chunk_ms, duration_ms)
+        if end < duration_ms:
+            end = find_pause(audio, start, end)
         chunk = audio[start:end]
         chunk_path = f"{base}_chunk_{i}.{format}"
         chunk.export(chunk_path, format=format, bitrate=bitrate)
@@ -934,11 +881,26 @@ def split_audio(file_path, max_bytes, format="mp3", bitrate="32k"):
     return chunks
 
 
+def stream_transcription(
+    request: Request, file_path: str, metadata: Optional[dict] = None
+) -> Iterator[str]:
+    try:
+        for result in transcribe_stream(request, file_path, metadata):
+            if result.get("done"):
+                result = {**result, "filename": os.path.basename(file_path)}
+            yield f"data: {json.dumps(result)}\n\n"
+    except Exception as e:
+        log.exception(e)
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        yield f"data: {json.dumps({'error': ERROR_MESSAGES.DEFAULT(detail)})}\n\n"
+
+
 @router.post("/transcriptions")
 def transcription(
     request: Request,
     file: UploadFile = File(...),
     language: Optional[str] = Form(None),
+    stream: bool = Form(False),
     user=Depends(get_verified_user),
 ):
     log.info(f"file.content_type: {file.content_type}")
@@ -981,6 +943,12 @@ def transcription(
             if language:
                 metadata = {"language": language}
 
+            if stream:
+                return StreamingResponse(
+                    stream_transcription(request, file_path, metadata),
+                    media_type="text/event-stream",
+                )
+
             result = transcribe(request, file_path, metadata)
 
             return {
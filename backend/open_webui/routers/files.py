@@ -7,6 +7,7 @@ from pathlib import Path
 from typing import Optional
 from urllib.parse import quote
 import asyncio
+import re
 
 from fastapi import (
     BackgroundTasks,
@@ -21,9 +22,19 @@ from fastapi import (
     Query,
 )
 
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi.responses import (
+    FileResponse,
+    RedirectResponse,
+    Response,
+    StreamingResponse,
+)
+from open_webui.config import (
+    ENABLE_FILE_DEDUPLICATION,
+    STORAGE_CONTENT_DELIVERY,
+    STORAGE_PROVIDER,
+)
 from open_webui.constants import ERROR_MESSAGES
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import SRC_LOG_LEVELS, ENABLE_INGESTION_QUEUE
 from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 
 from open_webui.models.users import Users
@@ -33,6 +44,7 @@ from open_webui.models.files import (
     FileModelResponse,
     Files,
 )
+from open_webui.models.ingestion_jobs import IngestionJobs, IngestionJobResponse
 from open_webui.models.knowledge import Knowledges
 
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
@@ -40,6 +52,16 @@ from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
 from open_webui.storage.provider import Storage
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.file_dedup import (
+    release_file_collection,
+    release_file_storage,
+)
+from open_webui.utils.file_status import file_status_broker, update_file_status
+from open_webui.utils.ingestion import (
+    cancel_file_processing,
+    enqueue_file_processing,
+    set_ingestion_stage,
+)
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -85,49 +107,56 @@ def has_access_to_file(
 ############################
 
 
-def process_uploaded_file(request, file, file_path, file_item, file_metadata, user):
-    try:
-        if file.content_type:
-            stt_supported_content_types = getattr(
-                request.app.state.config, "STT_SUPPORTED_CONTENT_TYPES", []
-            )
+def process_uploaded_file_item(request, file_item, file_metadata, user):
+    """
+    Run the processing pipeline for an uploaded file. Errors are raised to the
+    caller, which is either `process_uploaded_file` or an ingestion worker.
+    """
+    content_type = file_item.meta.get("content_type") if file_item.meta else None
 
-            if any(
-                fnmatch(file.content_type, content_type)
-                for content_type in (
-                    stt_supported_content_types
-                    if stt_supported_content_types
-                    and any(t.strip() for t in stt_supported_content_types)
-                    else ["audio/*", "video/webm"]
-                )
-            ):
-                file_path = Storage.get_file(file_path)
-                result = transcribe(request, file_path, file_metadata)
+    if content_type:
+        stt_supported_content_types = getattr(
+            request.app.state.config, "STT_SUPPORTED_CONTENT_TYPES", []
+        )
 
-                process_file(
-                    request,
-                    ProcessFileForm(
-                        file_id=file_item.id, content=result.get("text", "")
-                    ),
-                    user=user,
-                )
-            elif (not file.content_type.startswith(("image/", "video/"))) or (
-                request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
-            ):
-                process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
-        else:
-            log.info(
-                f"File type {file.content_type} is not provided, but trying to process anyway"
+        if any(
+            fnmatch(content_type, supported_content_type)
+            for supported_content_type in (
+                stt_supported_content_types
+                if stt_supported_content_types
+                and any(t.strip() for t in stt_supported_content_types)
+                else ["audio/*", "video/webm"]
             )
+        ):
+            set_ingestion_stage("extract")
+            file_path = Storage.get_file(file_item.path)
+            result = transcribe(request, file_path, file_metadata)
+
+            process_file(
+                request,
+                ProcessFileForm(file_id=file_item.id, content=result.get("text", "")),
+                user=user,
+            )
+        elif (not content_type.startswith(("image/", "video/"))) or (
+            request.app.state.config.CONTENT_EXTRACTION_ENGINE == "external"
+        ):
             process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
+    else:
+        log.info(
+            f"File type {content_type} is not provided, but trying to process anyway"
+        )
+        process_file(request, ProcessFileForm(file_id=file_item.id), user=user)
+
+
+def process_uploaded_file(request, file_item, file_metadata, user):
+    try:
+        process_uploaded_file_item(request, file_item, file_metadata, user)
     except Exception as e:
         log.error(f"Error processing file: {file_item.id}")
-        Files.update_file_data_by_id(
+        update_file_status(
             file_item.id,
-            {
-                "status": "failed",
-                "error": str(e.detail) if hasattr(e, "detail") else str(e),
-            },
+            "failed",
+            error=str(e.detail) if hasattr(e, "detail") else str(e),
         )
 
 
@@ -198,7 +227,7 @@ def upload_file_handler(
         id = str(uuid.uuid4())
         name = filename
         filename = f"{id}_{filename}"
-        contents, file_path = Storage.upload_file(
+        file_path, file_size, file_hash = Storage.upload_file_stream(
             file.file,
             filename,
             {
@@ -209,43 +238,51 @@ def upload_file_handler(
             },
         )
 
-        file_item = Files.insert_new_file(
-            user.id,
-            FileForm(
-                **{
-                    "id": id,
-                    "filename": name,
-                    "path": file_path,
-                    "data": {
-                        **({"status": "pending"} if process else {}),
-                    },
-                    "meta": {
-                        "name": name,
-                        "content_type": file.content_type,
-                        "size": len(contents),
-                        "data": file_metadata,
-                    },
-                }
-            ),
+        form_data = FileForm(
+            **{
+                "id": id,
+                "filename": name,
+                "path": file_path,
+                "content_hash": file_hash,
+                "data": {
+                    **({"status": "pending"} if process else {}),
+                },
+                "meta": {
+                    "name": name,
+                    "content_type": file.content_type,
+                    "size": file_size,
+                    "data": file_metadata,
+                },
+            }
         )
 
+        if ENABLE_FILE_DEDUPLICATION:
+            file_item = Files.insert_new_deduplicated_file(user.id, form_data)
+            if file_item and file_item.path != file_path:
+                # The same bytes are stored already, drop the redundant copy
+                log.info(f"File {id} shares the stored contents of an older file")
+                Storage.delete_file(file_path)
+        else:
+            file_item = Files.insert_new_file(user.id, form_data)
+
         if process:
             if background_tasks and process_in_background:
-                background_tasks.add_task(
-                    process_uploaded_file,
-                    request,
-                    file,
-                    file_path,
-                    file_item,
-                    file_metadata,
-                    user,
-                )
+                if ENABLE_INGESTION_QUEUE:
+                    enqueue_file_processing(
+                        file_item.id, user.id, {"metadata": file_metadata}
+                    )
+                else:
+                    background_tasks.add_task(
+                        process_uploaded_file,
+                        request,
+                        file_item,
+                        file_metadata,
+                        user,
+                    )
                 return {"status": True, **file_item.model_dump()}
             else:
                 process_uploaded_file(
                     request,
-                    file,
-                    file_path,
                     file_item,
                     file_metadata,
                     user,
@@ -339,6 +376,7 @@ async def search_files(
 async def delete_all_files(user=Depends(get_admin_user)):
     result = Files.delete_all_files()
     if result:
+        IngestionJobs.delete_all_jobs()
         try:
             Storage.delete_all_files()
             VECTOR_DB_CLIENT.reset()
@@ -405,36 +443,95 @@ async def get_file_process_status(
         if stream:
             MAX_FILE_PROCESSING_DURATION = 3600 * 2
 
+            def to_event(data: dict) -> Optional[dict]:
+                status = data.get("status")
+                if not status:
+                    return None
+
+                event = {"status": status}
+                if status == "failed":
+                    event["error"] = data.get("error")
+                elif data.get("stage"):
+                    event["stage"] = data["stage"]
+                return event
+
             async def event_stream(file_item):
-                if file_item:
-                    for _ in range(MAX_FILE_PROCESSING_DURATION):
-                        file_item = Files.get_file_by_id(file_item.id)
-                        if file_item:
-                            data = file_item.model_dump().get("data", {})
-                            status = data.get("status")
-
-                            if status:
-                                event = {"status": status}
-                                if status == "failed":
-                                    event["error"] = data.get("error")
-
-                                yield f"data: {json.dumps(event)}\n\n"
-                                if status in ("completed", "failed"):
-                                    break
-                            else:
-                                # Legacy
-                                break
-
-                        await asyncio.sleep(0.5)
-                else:
-                    yield f"data: {json.dumps({'status': 'not_found'})}\n\n"
+                # Subscribe before reading the current state so no update is missed,
+                # after that status changes are pushed and the DB is not polled.
+                file_id = file_item.id
+                queue = file_status_broker.subscribe(file_id)
+                try:
+                    file_item = Files.get_file_by_id(file_id)
+                    if not file_item:
+                        yield f"data: {json.dumps({'status': 'not_found'})}\n\n"
+                        return
+
+                    event = to_event(file_item.data or {})
+                    if not event:
+                        # Legacy
+                        return
+
+                    deadline = (
+                        asyncio.get_running_loop().time() + MAX_FILE_PROCESSING_DURATION
+                    )
+                    while True:
+                        yield f"data: {json.dumps(event)}\n\n"
+                        if event["status"] in ("completed", "failed"):
+                            break
+
+                        timeout = deadline - asyncio.get_running_loop().time()
+                        if timeout <= 0:
+                            break
+
+                        try:
+                            event = to_event(
+                                await asyncio.wait_for(queue.get(), timeout=timeout)
+                            )
+                        except asyncio.TimeoutError:
+                            break
+
+                        if not event:
+                            break
+                finally:
+                    file_status_broker.unsubscribe(file_id, queue)
 
             return StreamingResponse(
                 event_stream(file),
                 media_type="text/event-stream",
             )
         else:
-            return {"status": file.data.get("status", "pending")}
+            job = (
+                IngestionJobs.get_latest_job_by_file_id(id)
+                if ENABLE_INGESTION_QUEUE
+                else None
+            )
+            return {
+                "status": file.data.get("status", "pending"),
+                **({"job": IngestionJobResponse(**job.model_dump())} if job else {}),
+            }
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+
+@router.post("/{id}/process/cancel")
+async def cancel_file_process(id: str, user=Depends(get_verified_user)):
+    file = Files.get_file_by_id(id)
+
+    if not file:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    if (
+        file.user_id == user.id
+        or user.role == "admin"
+        or has_access_to_file(id, "write", user)
+    ):
+        return {"status": cancel_file_processing(id)}
     else:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -520,9 +617,72 @@ async def update_file_data_content_by_id(
 ############################
 
 
+def get_remote_file_response(
+    request: Request,
+    file_path: str,
+    headers: dict,
+    content_type: Optional[str] = None,
+) -> Optional[Response]:
+    """
+    Serve a file straight from remote storage as configured by
+    STORAGE_CONTENT_DELIVERY, or return None to serve a local copy instead.
+    """
+    if STORAGE_PROVIDER == "local" or not file_path:
+        return None
+
+    if STORAGE_CONTENT_DELIVERY == "redirect":
+        url = Storage.get_presigned_url(
+            file_path,
+            content_type=content_type,
+            content_disposition=headers.get("Content-Disposition"),
+        )
+        return RedirectResponse(url) if url else None
+
+    if STORAGE_CONTENT_DELIVERY == "stream":
+        # Single "bytes=start-[end]" ranges only, anything else gets the whole file
+        match = re.fullmatch(
+            r"bytes=(\d+)-(\d*)", request.headers.get("range", "").strip()
+        )
+        start = int(match.group(1)) if match else 0
+        end = int(match.group(2)) if match and match.group(2) else None
+        if end is not None and end < start:
+            match, start, end = None, 0, None
+
+        try:
+            chunks, size = Storage.stream_file(file_path, start, end)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": "bytes */*"},
+            )
+
+        end = size - 1 if end is None else min(end, size - 1)
+        headers = {
+            **headers,
+            "Accept-Ranges": "bytes",
+            "Content-Length": str(end - start + 1),
+        }
+        if match:
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+        return StreamingResponse(
+            chunks,
+            status_code=(
+                status.HTTP_206_PARTIAL_CONTENT if match else status.HTTP_200_OK
+            ),
+            headers=headers,
+            media_type=content_type,
+        )
+
+    return None
+
+
 @router.get("/{id}/content")
 async def get_file_content_by_id(
-    id: str, user=Depends(get_verified_user), attachment: bool = Query(False)
+    id: str,
+    request: Request,
+    user=Depends(get_verified_user),
+    attachment: bool = Query(False),
 ):
     file = Files.get_file_by_id(id)
 
@@ -538,37 +698,41 @@ async def get_file_content_by_id(
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
-            file_path = Path(file_path)
+            # Handle Unicode filenames
+            filename = file.meta.get("name", file.filename)
+            encoded_filename = quote(filename)  # RFC5987 encoding
 
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                # Handle Unicode filenames
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)  # RFC5987 encoding
-
-                content_type = file.meta.get("content_type")
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)
-                headers = {}
+            content_type = file.meta.get("content_type")
+            headers = {}
 
-                if attachment:
+            if attachment:
+                headers["Content-Disposition"] = (
+                    f"attachment; filename*=UTF-8''{encoded_filename}"
+                )
+            else:
+                if content_type == "application/pdf" or filename.lower().endswith(
+                    ".pdf"
+                ):
+                    headers["Content-Disposition"] = (
+                        f"inline; filename*=UTF-8''{encoded_filename}"
+                    )
+                    content_type = "application/pdf"
+                elif content_type != "text/plain":
                     headers["Content-Disposition"] = (
                         f"attachment; filename*=UTF-8''{encoded_filename}"
                     )
-                else:
-                    if content_type == "application/pdf" or filename.lower().endswith(
-                        ".pdf"
-                    ):
-                        headers["Content-Disposition"] = (
-                            f"inline; filename*=UTF-8''{encoded_filename}"
-                        )
-                        content_type = "application/pdf"
-                    elif content_type != "text/plain":
-                        headers["Content-Disposition"] = (
-                            f"attachment; filename*=UTF-8''{encoded_filename}"
-                        )
 
+            response = get_remote_file_response(
+                request, file.path, headers, content_type
+            )
+            if response:
+                return response
+
+            file_path = Storage.get_file(file.path)
+            file_path = Path(file_path)
+
+            # Check if the file already exists in the cache
+            if file_path.is_file():
                 return FileResponse(file_path, headers=headers, media_type=content_type)
 
             else:
@@ -640,7 +804,9 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
 
 
 @router.get("/{id}/content/{file_name}")
-async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
+async def get_file_content_by_id(
+    id: str, request: Request, user=Depends(get_verified_user)
+):
     file = Files.get_file_by_id(id)
 
     if not file:
@@ -664,6 +830,10 @@ async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
         }
 
         if file_path:
+            response = get_remote_file_response(request, file_path, headers)
+            if response:
+                return response
+
             file_path = Storage.get_file(file_path)
             file_path = Path(file_path)
 
@@ -719,9 +889,11 @@ async def delete_file_by_id(id: str, user=Depends(get_verified_user)):
 
         result = Files.delete_file_by_id(id)
         if result:
+            IngestionJobs.delete_jobs_by_file_id(id)
             try:
-                Storage.delete_file(file.path)
+                release_file_storage(file)
                 VECTOR_DB_CLIENT.delete(collection_name=f"file-{id}")
+                release_file_collection(file)
             except Exception as e:
                 log.exception(e)
                 log.error("Error deleting files")
@@ -27,6 +27,7 @@ from open_webui.utils.images.comfyui import (
     ComfyUIGenerateImageForm,
     ComfyUIWorkflow,
     comfyui_generate_image,
+    get_comfyui_base_urls,
 )
 from pydantic import BaseModel
 
@@ -227,11 +228,12 @@ async def verify_url(request: Request, user=Depends(get_admin_user)):
             }
 
         try:
-            r = requests.get(
-                url=f"{request.app.state.config.COMFYUI_BASE_URL}/object_info",
-                headers=headers,
-            )
-            r.raise_for_status()
+            base_urls = get_comfyui_base_urls(request.app.state.config.COMFYUI_BASE_URL)
+            if not base_urls:
+                raise ValueError("No ComfyUI server configured")
+            for base_url in base_urls:
+                r = requests.get(url=f"{base_url}/object_info", headers=headers)
+                r.raise_for_status()
             return True
         except Exception:
             request.app.state.config.ENABLE_IMAGE_GENERATION = False
@@ -366,10 +368,11 @@ def get_models(request: Request, user=Depends(get_verified_user)):
             headers = {
                 "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
             }
-            r = requests.get(
-                url=f"{request.app.state.config.COMFYUI_BASE_URL}/object_info",
-                headers=headers,
-            )
+            # The servers run the same workflow, the first one lists the models
+            base_url = get_comfyui_base_urls(request.app.state.config.COMFYUI_BASE_URL)[
+                0
+            ]
+            r = requests.get(url=f"{base_url}/object_info", headers=headers)
             info = r.json()
 
             workflow = json.loads(request.app.state.config.COMFYUI_WORKFLOW)
@@ -653,7 +656,9 @@ async def image_generations(
                         "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
                     }
 
-                image_data, content_type = load_url_image_data(image["url"], headers)
+                image_data, content_type = await asyncio.to_thread(
+                    load_url_image_data, image["url"], headers
+                )
                 url = upload_image(
                     request,
                     image_data,
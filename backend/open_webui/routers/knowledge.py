@@ -22,6 +22,7 @@ from open_webui.storage.provider import Storage
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.utils.auth import get_verified_user
 from open_webui.utils.access_control import has_access, has_permission
+from open_webui.utils.file_dedup import release_file_collection
 
 
 from open_webui.env import SRC_LOG_LEVELS
@@ -568,6 +569,11 @@ def remove_file_from_knowledge_by_id(
         # Delete file from database
         Files.delete_file_by_id(form_data.file_id)
 
+        try:
+            release_file_collection(file)
+        except Exception as e:
+            log.debug(e)
+
     if knowledge:
         data = knowledge.data or {}
         file_ids = data.get("file_ids", [])
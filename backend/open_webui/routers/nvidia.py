@@ -32,47 +32,88 @@ from open_webui.utils.payload import (
 )
 from open_webui.utils.auth import get_verified_user, get_admin_user
 from open_webui.constants import ERROR_MESSAGES
+from open_webui.env import (
+    NVIDIA_API_BASE_URL,
+    NVIDIA_API_KEY,
+    NVIDIA_MODELS as NVIDIA_MODELS_CONFIG,
+    NVIDIA_MAX_CONNECTIONS,
+)
 
 log = logging.getLogger(__name__)
 router = APIRouter()
 
-# NVIDIA API Configuration
-NVIDIA_API_BASE_URL = "https://integrate.api.nvidia.com/v1"
-
-# Available NVIDIA models with hardcoded API keys for direct access
+# Models configured through NVIDIA_MODELS, with the fields of a model list entry
 NVIDIA_MODELS = [
     {
-        "id": "nvidia/qwen3-coder-480b-a35b-instruct",
-        "name": "Qwen3 Coder 480B A35B Instruct",
-        "object": "model",
-        "created": int(time.time()),
-        "owned_by": "nvidia",
-        "provider": "nvidia",
-        "api_key": "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",
-        "model_name": "qwen/qwen3-coder-480b-a35b-instruct"
-    },
-    {
-        "id": "nvidia/moonshotai-kimi-k2-instruct-0905",
-        "name": "Moonshot AI Kimi K2 Instruct 0905",
-        "object": "model",
-        "created": int(time.time()),
-        "owned_by": "nvidia",
-        "provider": "nvidia",
-        "api_key": "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",
-        "model_name": "moonshotai/kimi-k2-instruct-0905"
-    },
-    {
-        "id": "nvidia/deepseek-r1-0528",
-        "name": "DeepSeek R1 0528",
         "object": "model",
         "created": int(time.time()),
         "owned_by": "nvidia",
         "provider": "nvidia",
-        "api_key": "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",
-        "model_name": "deepseek-ai/deepseek-r1-0528"
+        "api_key": NVIDIA_API_KEY,
+        **model,
     }
+    for model in NVIDIA_MODELS_CONFIG
 ]
 
+# Shared by all requests, so that connections to the API are kept alive and
+# reused instead of being set up (TLS included) for every request
+nvidia_session: Optional[aiohttp.ClientSession] = None
+
+
+def get_nvidia_session() -> aiohttp.ClientSession:
+    global nvidia_session
+    if nvidia_session is None or nvidia_session.closed:
+        nvidia_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=NVIDIA_MAX_CONNECTIONS),
+            trust_env=True,
+        )
+    return nvidia_session
+
+
+async def close_nvidia_session():
+    if nvidia_session is not None:
+        await nvidia_session.close()
+
+
+def to_sse_event(line: bytes) -> bytes:
+    if line.startswith(b"data:"):
+        return line + b"\n\n"
+    return b"data: " + line + b"\n\n"
+
+
+async def stream_nvidia_response(response: aiohttp.ClientResponse):
+    """
+    Forward a streamed completion. Server-sent events are passed through as
+    the bytes arrive; any other line based stream is split into lines and
+    sent as events.
+    """
+    passthrough = "text/event-stream" in response.headers.get("Content-Type", "")
+    buffer = bytearray()
+    try:
+        async for chunk in response.content.iter_any():
+            if passthrough:
+                yield chunk
+                continue
+
+            buffer += chunk
+            start = 0
+            while (end := buffer.find(b"\n", start)) != -1:
+                line = bytes(buffer[start:end]).strip()
+                start = end + 1
+                if line:
+                    yield to_sse_event(line)
+            del buffer[:start]
+
+        if buffer.strip():
+            yield to_sse_event(bytes(buffer).strip())
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        log.error(f"Error in stream generator: {e}")
+        error_chunk = {
+            "error": {"message": f"Streaming error: {str(e)}", "type": "stream_error"}
+        }
+        yield f"\ndata: {json.dumps(error_chunk)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+
 
 class ChatCompletionRequest(BaseModel):
     model: str
@@ -106,15 +147,14 @@ def get_model_info(model_id: str):
 
 
 def get_nvidia_api_key(model_id: str = None):
-    """Get NVIDIA API key from hardcoded values based on model"""
+    """Get the NVIDIA API key of a model, or NVIDIA_API_KEY"""
     if model_id:
         model_info = get_model_info(model_id)
-        if model_info and "api_key" in model_info:
+        if model_info and model_info.get("api_key"):
             return model_info["api_key"]
 
-    # Fallback to first available model's API key
-    if NVIDIA_MODELS:
-        return NVIDIA_MODELS[0]["api_key"]
+    if NVIDIA_API_KEY:
+        return NVIDIA_API_KEY
 
     raise HTTPException(
         status_code=500,
@@ -134,9 +174,12 @@ def get_nvidia_headers(model_id: str = None):
 async def get_all_models(request: Request, user: UserModel = None) -> dict:
     """Get all available NVIDIA models (called from models utility)"""
     try:
-        # Return all models since API keys are hardcoded
+        # API keys stay on the server
         return {
-            "models": NVIDIA_MODELS
+            "models": [
+                {key: value for key, value in model.items() if key != "api_key"}
+                for model in NVIDIA_MODELS
+            ]
         }
     except Exception as e:
         log.exception(f"Error getting NVIDIA models: {e}")
@@ -183,6 +226,8 @@ async def generate_nvidia_chat_completion(
     user: UserModel = None
 ):
     """Generate chat completion using NVIDIA API"""
+    response = None
+    streaming = False
     try:
         log.info(f"NVIDIA chat completion request for model: {form_data.model}")
 
@@ -213,7 +258,7 @@ async def generate_nvidia_chat_completion(
                 detail=f"Model {form_data.model} not found"
             )
         
-        log.info(f"Using model info: {model_info['model_name']} with API key: {model_info['api_key'][:10]}...")
+        log.info(f"Using model info: {model_info['model_name']}")
         
         # Prepare the request payload
         payload = {
@@ -230,99 +275,39 @@ async def generate_nvidia_chat_completion(
 
         headers = get_nvidia_headers(form_data.model)
         
-        # Make request to NVIDIA API with timeout
-        timeout = aiohttp.ClientTimeout(total=120)  # 2 minute timeout
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.post(
-                f"{NVIDIA_API_BASE_URL}/chat/completions",
-                json=payload,
-                headers=headers
-            ) as response:
-                
-                if response.status != 200:
-                    error_text = await response.text()
-                    log.error(f"NVIDIA API error: {response.status} - {error_text}")
-                    raise HTTPException(
-                        status_code=response.status,
-                        detail=f"NVIDIA API error: {error_text}"
-                    )
-                
-                if form_data.stream:
-                    # Handle streaming response with reasoning content support
-                    async def stream_generator():
-                        try:
-                            buffer = ""
-                            async for chunk in response.content.iter_any():
-                                if chunk:
-                                    try:
-                                        chunk_text = chunk.decode('utf-8')
-                                        buffer += chunk_text
-
-                                        # Process complete lines
-                                        while '\n' in buffer:
-                                            line, buffer = buffer.split('\n', 1)
-                                            line = line.strip()
-
-                                            if line.startswith('data: '):
-                                                data_str = line[6:]  # Remove 'data: ' prefix
-                                                if data_str == '[DONE]':
-                                                    yield f"data: [DONE]\n\n".encode('utf-8')
-                                                    return
-                                                elif data_str:  # Only process non-empty data
-                                                    try:
-                                                        chunk_data = json.loads(data_str)
-                                                        # Handle reasoning content for DeepSeek R1
-                                                        if 'choices' in chunk_data and len(chunk_data['choices']) > 0:
-                                                            delta = chunk_data['choices'][0].get('delta', {})
-                                                            reasoning_content = delta.get('reasoning_content')
-                                                            if reasoning_content:
-                                                                # Add reasoning content to the response
-                                                                chunk_data['choices'][0]['delta']['reasoning_content'] = reasoning_content
-
-                                                        yield f"data: {json.dumps(chunk_data)}\n\n".encode('utf-8')
-                                                    except json.JSONDecodeError as e:
-                                                        log.warning(f"Failed to parse JSON chunk: {data_str[:100]}... - {e}")
-                                                        continue
-                                            elif line and not line.startswith(':'):  # Skip comment lines
-                                                yield f"{line}\n".encode('utf-8')
-                                    except UnicodeDecodeError as e:
-                                        log.warning(f"Failed to decode chunk: {e}")
-                                        continue
-
-                            # Process any remaining buffer
-                            if buffer.strip():
-                                if buffer.strip().startswith('data: '):
-                                    data_str = buffer.strip()[6:]
-                                    if data_str and data_str != '[DONE]':
-                                        try:
-                                            chunk_data = json.loads(data_str)
-                                            yield f"data: {json.dumps(chunk_data)}\n\n".encode('utf-8')
-                                        except json.JSONDecodeError:
-                                            pass
-
-                        except asyncio.CancelledError:
-                            log.info("Stream cancelled by client")
-                            yield f"data: [DONE]\n\n".encode('utf-8')
-                        except Exception as e:
-                            log.error(f"Error in stream generator: {e}")
-                            error_chunk = {
-                                "error": {
-                                    "message": f"Streaming error: {str(e)}",
-                                    "type": "stream_error"
-                                }
-                            }
-                            yield f"data: {json.dumps(error_chunk)}\n\n".encode('utf-8')
-                            yield f"data: [DONE]\n\n".encode('utf-8')
-
-                    return StreamingResponse(
-                        stream_generator(),
-                        media_type="text/plain"
-                    )
-                else:
-                    # Handle non-streaming response
-                    result = await response.json()
-                    return result
-                    
+        # Make request to NVIDIA API with timeout; a stream may run for longer
+        # as long as chunks keep arriving
+        timeout = aiohttp.ClientTimeout(
+            total=None if form_data.stream else 120, sock_read=120
+        )
+        response = await get_nvidia_session().post(
+            f"{NVIDIA_API_BASE_URL}/chat/completions",
+            json=payload,
+            headers=headers,
+            timeout=timeout,
+        )
+
+        if response.status != 200:
+            error_text = await response.text()
+            log.error(f"NVIDIA API error: {response.status} - {error_text}")
+            raise HTTPException(
+                status_code=response.status,
+                detail=f"NVIDIA API error: {error_text}"
+            )
+
+        if form_data.stream:
+            # The connection goes back to the pool once the stream is done
+            streaming = True
+            return StreamingResponse(
+                stream_nvidia_response(response),
+                media_type="text/event-stream",
+                background=BackgroundTask(response.release),
+            )
+        else:
+            # Handle non-streaming response
+            result = await response.json()
+            return result
+
     except HTTPException:
         raise
     except Exception as e:
@@ -331,6 +316,9 @@ async def generate_nvidia_chat_completion(
             status_code=500,
             detail=ERROR_MESSAGES.DEFAULT(f"Error generating chat completion: {e}")
         )
+    finally:
+        if response is not None and not streaming:
+            response.release()
 
 
 @router.post("/api/generate")
@@ -400,23 +388,22 @@ async def generate_nvidia_embeddings(
         
         headers = get_nvidia_headers(form_data.model)
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                f"{NVIDIA_API_BASE_URL}/embeddings",
-                json=payload,
-                headers=headers
-            ) as response:
-                
-                if response.status != 200:
-                    error_text = await response.text()
-                    log.error(f"NVIDIA embeddings API error: {response.status} - {error_text}")
-                    raise HTTPException(
-                        status_code=response.status,
-                        detail=f"NVIDIA embeddings API error: {error_text}"
-                    )
-                
-                result = await response.json()
-                return result
+        async with get_nvidia_session().post(
+            f"{NVIDIA_API_BASE_URL}/embeddings",
+            json=payload,
+            headers=headers
+        ) as response:
+
+            if response.status != 200:
+                error_text = await response.text()
+                log.error(f"NVIDIA embeddings API error: {response.status} - {error_text}")
+                raise HTTPException(
+                    status_code=response.status,
+                    detail=f"NVIDIA embeddings API error: {error_text}"
+                )
+
+            result = await response.json()
+            return result
                 
     except HTTPException:
         raise
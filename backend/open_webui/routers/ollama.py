@@ -1,12 +1,7 @@
-# TODO: Implement a more intelligent load balancing mechanism for distributing requests among multiple backend instances.
-# Current implementation uses a simple round-robin approach (random.choice). Consider incorporating algorithms like weighted round-robin,
-# least connections, or least response time for better resource utilization and performance optimization.
-
 import asyncio
 import json
 import logging
 import os
-import random
 import re
 import time
 from datetime import datetime
@@ -14,7 +9,6 @@ from datetime import datetime
 from typing import Optional, Union
 from urllib.parse import urlparse
 import aiohttp
-from aiocache import cached
 import requests
 from urllib.parse import quote
 
@@ -51,6 +45,8 @@ from open_webui.utils.payload import (
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.model_cache import ModelListCache
+from open_webui.utils.upstream import UpstreamCall, UpstreamRouter
 
 
 from open_webui.config import (
@@ -59,17 +55,26 @@ from open_webui.config import (
 from open_webui.env import (
     ENV,
     SRC_LOG_LEVELS,
-    MODELS_CACHE_TTL,
     AIOHTTP_CLIENT_SESSION_SSL,
     AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
     BYPASS_MODEL_ACCESS_CONTROL,
+    OLLAMA_ROUTING_POLICY,
+    OLLAMA_LOADED_MODELS_TTL,
 )
 from open_webui.constants import ERROR_MESSAGES
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["OLLAMA"])
 
+ollama_router = UpstreamRouter("ollama", policy=OLLAMA_ROUTING_POLICY)
+models_cache = ModelListCache()
+
+# Models loaded on each backend according to its /api/ps, so requests go where
+# their model is already in memory: url -> (time fetched, model ids)
+loaded_models: dict[str, tuple[float, set[str]]] = {}
+loaded_models_tasks: dict[str, asyncio.Task] = {}
+
 
 ##########################################
 #
@@ -110,11 +115,14 @@ async def send_get_request(url, key=None, user: UserModel = None):
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
     session: Optional[aiohttp.ClientSession],
+    call: Optional[UpstreamCall] = None,
 ):
     if response:
         response.close()
     if session:
         await session.close()
+    if call:
+        call.close()
 
 
 async def send_post_request(
@@ -125,7 +133,12 @@ async def send_post_request(
     content_type: Optional[str] = None,
     user: UserModel = None,
     metadata: Optional[dict] = None,
+    backend: Optional[str] = None,
 ):
+    # Requests to a routed backend are reported to the router until the
+    # response (or stream) is done
+    call = ollama_router.start(backend) if backend else None
+    streaming = False
 
     r = None
     try:
@@ -157,6 +170,8 @@ async def send_post_request(
             },
             ssl=AIOHTTP_CLIENT_SESSION_SSL,
         )
+        if call:
+            call.respond(r.status)
 
         if r.ok is False:
             try:
@@ -180,12 +195,13 @@ async def send_post_request(
             if content_type:
                 response_headers["Content-Type"] = content_type
 
+            streaming = True
             return StreamingResponse(
                 r.content,
                 status_code=r.status,
                 headers=response_headers,
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_response, response=r, session=session, call=call
                 ),
             )
         else:
@@ -195,6 +211,8 @@ async def send_post_request(
     except HTTPException as e:
         raise e  # Re-raise HTTPException to be handled by FastAPI
     except Exception as e:
+        if call:
+            call.fail()
         detail = f"Ollama: {e}"
 
         raise HTTPException(
@@ -204,6 +222,8 @@ async def send_post_request(
     finally:
         if not stream:
             await cleanup_response(r, session)
+        if call and not streaming:
+            call.close()
 
 
 def get_api_key(idx, url, configs):
@@ -214,6 +234,63 @@ def get_api_key(idx, url, configs):
     )  # Legacy support
 
 
+async def refresh_loaded_models(
+    url: str, key: Optional[str] = None, prefix_id: Optional[str] = None
+):
+    try:
+        response = await send_get_request(f"{url}/api/ps", key)
+        if response is not None:
+            loaded_models[url] = (
+                time.monotonic(),
+                {
+                    f"{prefix_id}.{model['model']}" if prefix_id else model["model"]
+                    for model in response.get("models", [])
+                },
+            )
+    finally:
+        loaded_models_tasks.pop(url, None)
+
+
+def get_loaded_models(request: Request, url_idx: int) -> set[str]:
+    """
+    The models loaded on a backend as last seen. Stale lists are refreshed in
+    the background so that routing never waits on /api/ps.
+    """
+    url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
+    fetched_at, models = loaded_models.get(url, (0.0, set()))
+
+    if (
+        time.monotonic() - fetched_at > OLLAMA_LOADED_MODELS_TTL
+        and url not in loaded_models_tasks
+        and ollama_router.is_available(url)
+    ):
+        api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
+            str(url_idx),
+            request.app.state.config.OLLAMA_API_CONFIGS.get(url, {}),  # Legacy support
+        )
+        loaded_models_tasks[url] = asyncio.create_task(
+            refresh_loaded_models(
+                url, api_config.get("key", None), api_config.get("prefix_id", None)
+            )
+        )
+
+    return models
+
+
+def choose_url_idx(request: Request, model: str, url_idxs: list[int]) -> int:
+    urls = {request.app.state.config.OLLAMA_BASE_URLS[idx]: idx for idx in url_idxs}
+    url = ollama_router.choose(
+        list(urls),
+        preferred=[
+            url for url, idx in urls.items() if model in get_loaded_models(request, idx)
+        ],
+    )
+
+    # The backend loads the model to serve the request
+    loaded_models.setdefault(url, (0.0, set()))[1].add(model)
+    return urls[url]
+
+
 ##########################################
 #
 # API routes
@@ -315,6 +392,7 @@ async def update_config(
         for key, value in request.app.state.config.OLLAMA_API_CONFIGS.items()
         if key in keys
     }
+    models_cache.clear()
 
     return {
         "ENABLE_OLLAMA_API": request.app.state.config.ENABLE_OLLAMA_API,
@@ -340,19 +418,39 @@ def merge_ollama_models_lists(model_lists):
     return list(merged_models.values())
 
 
-@cached(
-    ttl=MODELS_CACHE_TTL,
-    key=lambda _, user: f"ollama_all_models_{user.id}" if user else "ollama_all_models",
-)
+def get_all_models_cache_key(user: UserModel = None) -> str:
+    # Upstream lists only depend on the user when user info is forwarded
+    return (
+        f"ollama_all_models_{user.id}"
+        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+        else "ollama_all_models"
+    )
+
+
 async def get_all_models(request: Request, user: UserModel = None):
+    key = get_all_models_cache_key(user)
+    models = await models_cache.get(key, lambda: fetch_all_models(request, user))
+
+    # Shallow copy, callers replace the list with the user's filtered one
+    return {**models}
+
+
+async def fetch_all_models(request: Request, user: UserModel = None):
     log.info("get_all_models()")
     if request.app.state.config.ENABLE_OLLAMA_API:
+        # Each connection falls back to the last list it returned to this cache key
+        cache_key = get_all_models_cache_key(user)
         request_tasks = []
         for idx, url in enumerate(request.app.state.config.OLLAMA_BASE_URLS):
             if (str(idx) not in request.app.state.config.OLLAMA_API_CONFIGS) and (
                 url not in request.app.state.config.OLLAMA_API_CONFIGS  # Legacy support
             ):
-                request_tasks.append(send_get_request(f"{url}/api/tags", user=user))
+                request_tasks.append(
+                    models_cache.get_response(
+                        f"{cache_key}:{idx}",
+                        send_get_request(f"{url}/api/tags", user=user),
+                    )
+                )
             else:
                 api_config = request.app.state.config.OLLAMA_API_CONFIGS.get(
                     str(idx),
@@ -366,7 +464,10 @@ async def get_all_models(request: Request, user: UserModel = None):
 
                 if enable:
                     request_tasks.append(
-                        send_get_request(f"{url}/api/tags", key, user=user)
+                        models_cache.get_response(
+                            f"{cache_key}:{idx}",
+                            send_get_request(f"{url}/api/tags", key, user=user),
+                        )
                     )
                 else:
                     request_tasks.append(asyncio.ensure_future(asyncio.sleep(0, None)))
@@ -574,6 +675,20 @@ async def get_ollama_loaded_models(request: Request, user=Depends(get_admin_user
     return models
 
 
+@router.get("/backends")
+async def get_backend_metrics(user=Depends(get_admin_user)):
+    """
+    Routing stats of each Ollama backend and the models last seen loaded on it,
+    as seen by this worker process.
+    """
+    return {
+        **ollama_router.get_metrics(),
+        "loaded_models": {
+            url: sorted(models) for url, (_, models) in loaded_models.items()
+        },
+    }
+
+
 @router.get("/api/version")
 @router.get("/api/version/{url_idx}")
 async def get_ollama_versions(request: Request, url_idx: Optional[int] = None):
@@ -967,31 +1082,33 @@ async def show_model_info(
             detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
         )
 
-    url_idx = random.choice(models[model]["urls"])
+    url_idx = choose_url_idx(request, model, models[model]["urls"])
 
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     key = get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS)
 
     try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/show",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=json.dumps(form_data).encode(),
-        )
+        with ollama_router.track(url) as call:
+            r = requests.request(
+                method="POST",
+                url=f"{url}/api/show",
+                headers={
+                    "Content-Type": "application/json",
+                    **({"Authorization": f"Bearer {key}"} if key else {}),
+                    **(
+                        {
+                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                            "X-OpenWebUI-User-Id": user.id,
+                            "X-OpenWebUI-User-Email": user.email,
+                            "X-OpenWebUI-User-Role": user.role,
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                        else {}
+                    ),
+                },
+                data=json.dumps(form_data).encode(),
+            )
+            call.respond(r.status_code)
         r.raise_for_status()
 
         return r.json()
@@ -1041,7 +1158,7 @@ async def embed(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = choose_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1060,25 +1177,27 @@ async def embed(
         form_data.model = form_data.model.replace(f"{prefix_id}.", "")
 
     try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/embed",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=form_data.model_dump_json(exclude_none=True).encode(),
-        )
+        with ollama_router.track(url) as call:
+            r = requests.request(
+                method="POST",
+                url=f"{url}/api/embed",
+                headers={
+                    "Content-Type": "application/json",
+                    **({"Authorization": f"Bearer {key}"} if key else {}),
+                    **(
+                        {
+                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                            "X-OpenWebUI-User-Id": user.id,
+                            "X-OpenWebUI-User-Email": user.email,
+                            "X-OpenWebUI-User-Role": user.role,
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                        else {}
+                    ),
+                },
+                data=form_data.model_dump_json(exclude_none=True).encode(),
+            )
+            call.respond(r.status_code)
         r.raise_for_status()
 
         data = r.json()
@@ -1128,7 +1247,7 @@ async def embeddings(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = choose_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1147,25 +1266,27 @@ async def embeddings(
         form_data.model = form_data.model.replace(f"{prefix_id}.", "")
 
     try:
-        r = requests.request(
-            method="POST",
-            url=f"{url}/api/embeddings",
-            headers={
-                "Content-Type": "application/json",
-                **({"Authorization": f"Bearer {key}"} if key else {}),
-                **(
-                    {
-                        "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
-                        "X-OpenWebUI-User-Id": user.id,
-                        "X-OpenWebUI-User-Email": user.email,
-                        "X-OpenWebUI-User-Role": user.role,
-                    }
-                    if ENABLE_FORWARD_USER_INFO_HEADERS and user
-                    else {}
-                ),
-            },
-            data=form_data.model_dump_json(exclude_none=True).encode(),
-        )
+        with ollama_router.track(url) as call:
+            r = requests.request(
+                method="POST",
+                url=f"{url}/api/embeddings",
+                headers={
+                    "Content-Type": "application/json",
+                    **({"Authorization": f"Bearer {key}"} if key else {}),
+                    **(
+                        {
+                            "X-OpenWebUI-User-Name": quote(user.name, safe=" "),
+                            "X-OpenWebUI-User-Id": user.id,
+                            "X-OpenWebUI-User-Email": user.email,
+                            "X-OpenWebUI-User-Role": user.role,
+                        }
+                        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+                        else {}
+                    ),
+                },
+                data=form_data.model_dump_json(exclude_none=True).encode(),
+            )
+            call.respond(r.status_code)
         r.raise_for_status()
 
         data = r.json()
@@ -1221,7 +1342,7 @@ async def generate_completion(
             model = f"{model}:latest"
 
         if model in models:
-            url_idx = random.choice(models[model]["urls"])
+            url_idx = choose_url_idx(request, model, models[model]["urls"])
         else:
             raise HTTPException(
                 status_code=400,
@@ -1243,6 +1364,7 @@ async def generate_completion(
         payload=form_data.model_dump_json(exclude_none=True).encode(),
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
+        backend=url,
     )
 
 
@@ -1288,7 +1410,7 @@ async def get_ollama_url(request: Request, model: str, url_idx: Optional[int] =
                 status_code=400,
                 detail=ERROR_MESSAGES.MODEL_NOT_FOUND(model),
             )
-        url_idx = random.choice(models[model].get("urls", []))
+        url_idx = choose_url_idx(request, model, models[model].get("urls", []))
     url = request.app.state.config.OLLAMA_BASE_URLS[url_idx]
     return url, url_idx
 
@@ -1376,6 +1498,7 @@ async def generate_chat_completion(
         content_type="application/x-ndjson",
         user=user,
         metadata=metadata,
+        backend=url,
     )
 
 
@@ -1482,6 +1605,7 @@ async def generate_openai_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        backend=url,
     )
 
 
@@ -1564,6 +1688,7 @@ async def generate_openai_chat_completion(
         key=get_api_key(url_idx, url, request.app.state.config.OLLAMA_API_CONFIGS),
         user=user,
         metadata=metadata,
+        backend=url,
     )
 
 
@@ -5,8 +5,6 @@ import logging
 from typing import Optional
 
 import aiohttp
-from aiocache import cached
-import requests
 from urllib.parse import quote
 
 from azure.identity import DefaultAzureCredential, get_bearer_token_provider
@@ -22,16 +20,13 @@ from pydantic import BaseModel
 from starlette.background import BackgroundTask
 
 from open_webui.models.models import Models
-from open_webui.config import (
-    CACHE_DIR,
-)
 from open_webui.env import (
-    MODELS_CACHE_TTL,
     AIOHTTP_CLIENT_SESSION_SSL,
     AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_MODEL_LIST,
     ENABLE_FORWARD_USER_INFO_HEADERS,
     BYPASS_MODEL_ACCESS_CONTROL,
+    OPENAI_ROUTING_POLICY,
 )
 from open_webui.models.users import UserModel
 
@@ -48,12 +43,26 @@ from open_webui.utils.misc import (
 )
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.speech_cache import (
+    get_speech_response,
+    speech_cache,
+    stream_speech_response,
+)
 from open_webui.utils.access_control import has_access
+from open_webui.utils.model_cache import ModelListCache
+from open_webui.utils.upstream import UpstreamBusyError, UpstreamCall, UpstreamRouter
 
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["OPENAI"])
 
+# Spreads requests for a model across the connections that serve it
+openai_router = UpstreamRouter("openai", policy=OPENAI_ROUTING_POLICY)
+models_cache = ModelListCache()
+
+# Responses after which a chat completion is retried on another connection
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 
 ##########################################
 #
@@ -93,11 +102,14 @@ async def send_get_request(url, key=None, user: UserModel = None):
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
     session: Optional[aiohttp.ClientSession],
+    call: Optional[UpstreamCall] = None,
 ):
     if response:
         response.close()
     if session:
         await session.close()
+    if call:
+        call.close()
 
 
 def openai_reasoning_model_handler(payload):
@@ -269,6 +281,7 @@ async def update_config(
         for key, value in request.app.state.config.OPENAI_API_CONFIGS.items()
         if key in keys
     }
+    models_cache.clear()
 
     return {
         "ENABLE_OPENAI_API": request.app.state.config.ENABLE_OPENAI_API,
@@ -289,13 +302,9 @@ async def speech(request: Request, user=Depends(get_verified_user)):
         body = await request.body()
         name = hashlib.sha256(body).hexdigest()
 
-        SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
-        SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        file_path = SPEECH_CACHE_DIR.joinpath(f"{name}.mp3")
-        file_body_path = SPEECH_CACHE_DIR.joinpath(f"{name}.json")
-
         # Check if the file already exists in the cache
-        if file_path.is_file():
+        file_path = speech_cache.get(name)
+        if file_path:
             return FileResponse(file_path)
 
         url = request.app.state.config.OPENAI_API_BASE_URLS[idx]
@@ -309,45 +318,17 @@ async def speech(request: Request, user=Depends(get_verified_user)):
             request, url, key, api_config, user=user
         )
 
-        r = None
-        try:
-            r = requests.post(
-                url=f"{url}/audio/speech",
+        return await get_speech_response(
+            name,
+            json.loads(body.decode("utf-8")),
+            lambda synthesis: stream_speech_response(
+                synthesis,
+                f"{url}/audio/speech",
                 data=body,
                 headers=headers,
                 cookies=cookies,
-                stream=True,
-            )
-
-            r.raise_for_status()
-
-            # Save the streaming content to a file
-            with open(file_path, "wb") as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    f.write(chunk)
-
-            with open(file_body_path, "w") as f:
-                json.dump(json.loads(body.decode("utf-8")), f)
-
-            # Return the saved file
-            return FileResponse(file_path)
-
-        except Exception as e:
-            log.exception(e)
-
-            detail = None
-            if r is not None:
-                try:
-                    res = r.json()
-                    if "error" in res:
-                        detail = f"External: {res['error']}"
-                except Exception:
-                    detail = f"External: {e}"
-
-            raise HTTPException(
-                status_code=r.status_code if r else 500,
-                detail=detail if detail else "FLOAT CHAT: Server Connection Error",
-            )
+            ),
+        )
 
     except ValueError:
         raise HTTPException(status_code=401, detail=ERROR_MESSAGES.OPENAI_NOT_FOUND)
@@ -357,6 +338,9 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
     if not request.app.state.config.ENABLE_OPENAI_API:
         return []
 
+    # Each connection falls back to the last list it returned to this cache key
+    cache_key = get_all_models_cache_key(user)
+
     # Check if API KEYS length is same than API URLS length
     num_urls = len(request.app.state.config.OPENAI_API_BASE_URLS)
     num_keys = len(request.app.state.config.OPENAI_API_KEYS)
@@ -376,10 +360,13 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
             url not in request.app.state.config.OPENAI_API_CONFIGS  # Legacy support
         ):
             request_tasks.append(
-                send_get_request(
-                    f"{url}/models",
-                    request.app.state.config.OPENAI_API_KEYS[idx],
-                    user=user,
+                models_cache.get_response(
+                    f"{cache_key}:{idx}",
+                    send_get_request(
+                        f"{url}/models",
+                        request.app.state.config.OPENAI_API_KEYS[idx],
+                        user=user,
+                    ),
                 )
             )
         else:
@@ -396,10 +383,13 @@ async def get_all_models_responses(request: Request, user: UserModel) -> list:
             if enable:
                 if len(model_ids) == 0:
                     request_tasks.append(
-                        send_get_request(
-                            f"{url}/models",
-                            request.app.state.config.OPENAI_API_KEYS[idx],
-                            user=user,
+                        models_cache.get_response(
+                            f"{cache_key}:{idx}",
+                            send_get_request(
+                                f"{url}/models",
+                                request.app.state.config.OPENAI_API_KEYS[idx],
+                                user=user,
+                            ),
                         )
                     )
                 else:
@@ -479,11 +469,24 @@ async def get_filtered_models(models, user):
     return filtered_models
 
 
-@cached(
-    ttl=MODELS_CACHE_TTL,
-    key=lambda _, user: f"openai_all_models_{user.id}" if user else "openai_all_models",
-)
+def get_all_models_cache_key(user: UserModel) -> str:
+    # Upstream lists only depend on the user when user info is forwarded
+    return (
+        f"openai_all_models_{user.id}"
+        if ENABLE_FORWARD_USER_INFO_HEADERS and user
+        else "openai_all_models"
+    )
+
+
 async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
+    key = get_all_models_cache_key(user)
+    models = await models_cache.get(key, lambda: fetch_all_models(request, user))
+
+    # Shallow copy, callers replace the list with the user's filtered one
+    return {**models}
+
+
+async def fetch_all_models(request: Request, user: UserModel) -> dict[str, list]:
     log.info("get_all_models()")
 
     if not request.app.state.config.ENABLE_OPENAI_API:
@@ -540,7 +543,15 @@ async def get_all_models(request: Request, user: UserModel) -> dict[str, list]:
     models = {"data": merge_models_lists(map(extract_data, responses))}
     log.debug(f"models: {models}")
 
-    request.app.state.OPENAI_MODELS = {model["id"]: model for model in models["data"]}
+    # Every connection that exposes a model id can serve it
+    url_idxs = {}
+    for model in models["data"]:
+        url_idxs.setdefault(model["id"], []).append(model["urlIdx"])
+
+    request.app.state.OPENAI_MODELS = {
+        model["id"]: {**model, "urlIdxs": url_idxs[model["id"]]}
+        for model in models["data"]
+    }
     return models
 
 
@@ -808,8 +819,6 @@ async def generate_chat_completion(
     if BYPASS_MODEL_ACCESS_CONTROL:
         bypass_filter = True
 
-    idx = 0
-
     payload = {**form_data}
     metadata = payload.pop("metadata", None)
 
@@ -851,26 +860,12 @@ async def generate_chat_completion(
 
     await get_all_models(request, user=user)
     model = request.app.state.OPENAI_MODELS.get(model_id)
-    if model:
-        idx = model["urlIdx"]
-    else:
+    if not model:
         raise HTTPException(
             status_code=404,
             detail="Model not found",
         )
 
-    # Get the API config for the model
-    api_config = request.app.state.config.OPENAI_API_CONFIGS.get(
-        str(idx),
-        request.app.state.config.OPENAI_API_CONFIGS.get(
-            request.app.state.config.OPENAI_API_BASE_URLS[idx], {}
-        ),  # Legacy support
-    )
-
-    prefix_id = api_config.get("prefix_id", None)
-    if prefix_id:
-        payload["model"] = payload["model"].replace(f"{prefix_id}.", "")
-
     # Add user info to the payload if the model is a pipeline
     if "pipeline" in model and model.get("pipeline"):
         payload["user"] = {
@@ -880,65 +875,56 @@ async def generate_chat_completion(
             "role": user.role,
         }
 
-    url = request.app.state.config.OPENAI_API_BASE_URLS[idx]
-    key = request.app.state.config.OPENAI_API_KEYS[idx]
-
-    # Check if model is a reasoning model that needs special handling
-    if is_openai_reasoning_model(payload["model"]):
-        payload = openai_reasoning_model_handler(payload)
-    elif "api.openai.com" not in url:
-        # Remove "max_completion_tokens" from the payload for backward compatibility
-        if "max_completion_tokens" in payload:
-            payload["max_tokens"] = payload["max_completion_tokens"]
-            del payload["max_completion_tokens"]
-
-    if "max_tokens" in payload and "max_completion_tokens" in payload:
-        del payload["max_tokens"]
-
-    # Convert the modified body back to JSON
-    if "logit_bias" in payload:
-        payload["logit_bias"] = json.loads(
-            convert_logit_bias_input_to_json(payload["logit_bias"])
-        )
-
-    headers, cookies = await get_headers_and_cookies(
-        request, url, key, api_config, metadata, user=user
-    )
-
-    if api_config.get("azure", False):
-        api_version = api_config.get("api_version", "2023-03-15-preview")
-        request_url, payload = convert_to_azure_payload(url, payload, api_version)
-
-        # Only set api-key header if not using Azure Entra ID authentication
-        auth_type = api_config.get("auth_type", "bearer")
-        if auth_type not in ("azure_ad", "microsoft_entra_id"):
-            headers["api-key"] = key
-
-        headers["api-version"] = api_version
-        request_url = f"{request_url}/chat/completions?api-version={api_version}"
-    else:
-        request_url = f"{url}/chat/completions"
-
-    payload = json.dumps(payload)
+    # Connections that serve the model; until a response starts streaming, a
+    # request that fails on one is retried on the next
+    url_idxs = model.get("urlIdxs", [model["urlIdx"]])
 
     r = None
     session = None
+    call = None
     streaming = False
     response = None
 
     try:
-        session = aiohttp.ClientSession(
-            trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
-        )
+        while True:
+            idx, call = await acquire_connection(request, url_idxs)
+            url_idxs = [url_idx for url_idx in url_idxs if url_idx != idx]
 
-        r = await session.request(
-            method="POST",
-            url=request_url,
-            data=payload,
-            headers=headers,
-            cookies=cookies,
-            ssl=AIOHTTP_CLIENT_SESSION_SSL,
-        )
+            request_url, headers, cookies, data = await get_chat_completion_request(
+                request, idx, {**payload}, metadata, user
+            )
+
+            session = aiohttp.ClientSession(
+                trust_env=True,
+                timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT),
+            )
+            try:
+                r = await session.request(
+                    method="POST",
+                    url=request_url,
+                    data=data,
+                    headers=headers,
+                    cookies=cookies,
+                    ssl=AIOHTTP_CLIENT_SESSION_SSL,
+                )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                call.fail()
+                if not url_idxs:
+                    raise
+                log.warning(f"Connection {idx} failed ({e}), retrying on another")
+                await cleanup_response(None, session, call)
+                session = None
+                continue
+
+            call.respond(r.status)
+            if r.status in RETRY_STATUS_CODES and url_idxs:
+                log.warning(
+                    f"Connection {idx} responded {r.status}, retrying on another"
+                )
+                await cleanup_response(r, session, call)
+                r = session = None
+                continue
+            break
 
         # Check if response is SSE
         if "text/event-stream" in r.headers.get("Content-Type", ""):
@@ -948,7 +934,7 @@ async def generate_chat_completion(
                 status_code=r.status,
                 headers=dict(r.headers),
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_response, response=r, session=session, call=call
                 ),
             )
         else:
@@ -965,6 +951,8 @@ async def generate_chat_completion(
                     return PlainTextResponse(status_code=r.status, content=response)
 
             return response
+    except UpstreamBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         log.exception(e)
 
@@ -974,7 +962,92 @@ async def generate_chat_completion(
         )
     finally:
         if not streaming:
-            await cleanup_response(r, session)
+            await cleanup_response(r, session, call)
+
+
+async def acquire_connection(
+    request: Request, url_idxs: list[int]
+) -> tuple[int, UpstreamCall]:
+    """
+    Pick one of the connections serving a model by load and the connection's
+    `weight`, waiting while all of them are at their `max_concurrency`.
+    """
+    urls, weights, limits = {}, {}, {}
+    for idx in url_idxs:
+        url = request.app.state.config.OPENAI_API_BASE_URLS[idx]
+        api_config = request.app.state.config.OPENAI_API_CONFIGS.get(
+            str(idx),
+            request.app.state.config.OPENAI_API_CONFIGS.get(url, {}),  # Legacy support
+        )
+
+        urls.setdefault(url, idx)
+        weights[url] = float(api_config.get("weight", 1))
+        limits[url] = int(api_config.get("max_concurrency", 0) or 0)
+
+    call = await openai_router.acquire(
+        list(urls), weights=weights, limits=limits, timeout=AIOHTTP_CLIENT_TIMEOUT
+    )
+    return urls[call.backend], call
+
+
+async def get_chat_completion_request(
+    request: Request,
+    idx: int,
+    payload: dict,
+    metadata: Optional[dict],
+    user: UserModel,
+) -> tuple[str, dict, dict, str]:
+    """The URL, headers, cookies and body of a chat completion on connection `idx`."""
+    url = request.app.state.config.OPENAI_API_BASE_URLS[idx]
+    key = request.app.state.config.OPENAI_API_KEYS[idx]
+
+    # Get the API config for the model
+    api_config = request.app.state.config.OPENAI_API_CONFIGS.get(
+        str(idx),
+        request.app.state.config.OPENAI_API_CONFIGS.get(url, {}),  # Legacy support
+    )
+
+    prefix_id = api_config.get("prefix_id", None)
+    if prefix_id:
+        payload["model"] = payload["model"].replace(f"{prefix_id}.", "")
+
+    # Check if model is a reasoning model that needs special handling
+    if is_openai_reasoning_model(payload["model"]):
+        payload = openai_reasoning_model_handler(payload)
+    elif "api.openai.com" not in url:
+        # Remove "max_completion_tokens" from the payload for backward compatibility
+        if "max_completion_tokens" in payload:
+            payload["max_tokens"] = payload["max_completion_tokens"]
+            del payload["max_completion_tokens"]
+
+    if "max_tokens" in payload and "max_completion_tokens" in payload:
+        del payload["max_tokens"]
+
+    # Convert the modified body back to JSON
+    if "logit_bias" in payload:
+        payload["logit_bias"] = json.loads(
+            convert_logit_bias_input_to_json(payload["logit_bias"])
+        )
+
+    headers, cookies = await get_headers_and_cookies(
+        request, url, key, api_config, metadata, user=user
+    )
+
+    if api_config.get("azure", False):
+        api_version = api_config.get("api_version", "2023-03-15-preview")
+        request_url, payload = convert_to_azure_payload(url, payload, api_version)
+
+        # Only set api-key header if not using Azure Entra ID authentication
+        auth_type = api_config.get("auth_type", "bearer")
+        if auth_type not in ("azure_ad", "microsoft_entra_id"):
+            headers["api-key"] = key
+
+        headers["api-version"] = api_version
+        request_url = f"{request_url}/chat/completions?api-version={api_version}"
+    else:
+        request_url = f"{url}/chat/completions"
+
+    return request_url, headers, cookies, json.dumps(payload)
 
 
 async def embeddings(request: Request, form_data: dict, user):
@@ -4,6 +4,7 @@ import mimetypes
 import os
 import shutil
 import asyncio
+import itertools
 
 import uuid
 from datetime import datetime
@@ -24,11 +25,8 @@ from fastapi import (
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-import tiktoken
 
 
-from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
-from langchain_text_splitters import MarkdownHeaderTextSplitter
 from langchain_core.documents import Document
 
 from open_webui.models.files import FileModel, Files
@@ -41,6 +39,7 @@ from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
 # Document loaders
 from open_webui.retrieval.loaders.main import Loader
 from open_webui.retrieval.loaders.youtube import YoutubeLoader
+from open_webui.retrieval.splitter import iter_split_documents
 
 # Web search engines
 from open_webui.retrieval.web.main import SearchResult
@@ -82,9 +81,18 @@ from open_webui.utils.misc import (
     calculate_sha256_string,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.file_status import update_file_status
+from open_webui.utils.ingestion import in_ingestion_job, set_ingestion_stage
+from open_webui.utils.file_dedup import (
+    get_processed_duplicate,
+    get_shared_collection_name,
+    is_shared_collection,
+    release_file_collection,
+)
 
 from open_webui.config import (
     ENV,
+    ENABLE_FILE_DEDUPLICATION,
     RAG_EMBEDDING_MODEL_AUTO_UPDATE,
     RAG_EMBEDDING_MODEL_TRUST_REMOTE_CODE,
     RAG_RERANKING_MODEL_AUTO_UPDATE,
@@ -109,6 +117,9 @@ from open_webui.constants import ERROR_MESSAGES
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
 
+# Splits embedded per call while the rest of a document is still being split
+EMBEDDING_STREAM_BATCH_SIZE = 1024
+
 ##########################################
 #
 # Utility functions
@@ -1244,90 +1255,38 @@ def save_docs_to_vector_db(
                 raise ValueError(ERROR_MESSAGES.DUPLICATE_CONTENT)
 
     if split:
-        if request.app.state.config.TEXT_SPLITTER in ["", "character"]:
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
-        elif request.app.state.config.TEXT_SPLITTER == "token":
+        set_ingestion_stage("split")
+        if request.app.state.config.TEXT_SPLITTER not in [
+            "",
+            "character",
+            "token",
+            "markdown_header",
+        ]:
+            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+
+        if request.app.state.config.TEXT_SPLITTER == "token":
             log.info(
                 f"Using token text splitter: {request.app.state.config.TIKTOKEN_ENCODING_NAME}"
             )
-
-            tiktoken.get_encoding(str(request.app.state.config.TIKTOKEN_ENCODING_NAME))
-            text_splitter = TokenTextSplitter(
-                encoding_name=str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
-                chunk_size=request.app.state.config.CHUNK_SIZE,
-                chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                add_start_index=True,
-            )
-            docs = text_splitter.split_documents(docs)
         elif request.app.state.config.TEXT_SPLITTER == "markdown_header":
             log.info("Using markdown header text splitter")
 
-            # Define headers to split on - covering most common markdown header levels
-            headers_to_split_on = [
-                ("#", "Header 1"),
-                ("##", "Header 2"),
-                ("###", "Header 3"),
-                ("####", "Header 4"),
-                ("#####", "Header 5"),
-                ("######", "Header 6"),
-            ]
-
-            markdown_splitter = MarkdownHeaderTextSplitter(
-                headers_to_split_on=headers_to_split_on,
-                strip_headers=False,  # Keep headers in content for context
-            )
-
-            md_split_docs = []
-            for doc in docs:
-                md_header_splits = markdown_splitter.split_text(doc.page_content)
-                text_splitter = RecursiveCharacterTextSplitter(
-                    chunk_size=request.app.state.config.CHUNK_SIZE,
-                    chunk_overlap=request.app.state.config.CHUNK_OVERLAP,
-                    add_start_index=True,
-                )
-                md_header_splits = text_splitter.split_documents(md_header_splits)
-
-                # Convert back to Document objects, preserving original metadata
-                for split_chunk in md_header_splits:
-                    headings_list = []
-                    # Extract header values in order based on headers_to_split_on
-                    for _, header_meta_key_name in headers_to_split_on:
-                        if header_meta_key_name in split_chunk.metadata:
-                            headings_list.append(
-                                split_chunk.metadata[header_meta_key_name]
-                            )
-
-                    md_split_docs.append(
-                        Document(
-                            page_content=split_chunk.page_content,
-                            metadata={**doc.metadata, "headings": headings_list},
-                        )
-                    )
-
-            docs = md_split_docs
-        else:
-            raise ValueError(ERROR_MESSAGES.DEFAULT("Invalid text splitter"))
+        # Splits are produced (in parallel for large inputs) while earlier
+        # ones are being embedded
+        docs = iter_split_documents(
+            docs,
+            request.app.state.config.TEXT_SPLITTER,
+            request.app.state.config.CHUNK_SIZE,
+            request.app.state.config.CHUNK_OVERLAP,
+            str(request.app.state.config.TIKTOKEN_ENCODING_NAME),
+        )
+    else:
+        docs = iter(docs)
 
-    if len(docs) == 0:
+    first_doc = next(docs, None)
+    if first_doc is None:
         raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
-
-    texts = [doc.page_content for doc in docs]
-    metadatas = [
-        {
-            **doc.metadata,
-            **(metadata if metadata else {}),
-            "embedding_config": {
-                "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
-                "model": request.app.state.config.RAG_EMBEDDING_MODEL,
-            },
-        }
-        for doc in docs
-    ]
+    docs = itertools.chain([first_doc], docs)
 
     try:
         if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
@@ -1343,6 +1302,7 @@ def save_docs_to_vector_db(
                 return True
 
         log.info(f"generating embeddings for {collection_name}")
+        set_ingestion_stage("embed")
         embedding_function = get_embedding_function(
             request.app.state.config.RAG_EMBEDDING_ENGINE,
             request.app.state.config.RAG_EMBEDDING_MODEL,
@@ -1373,24 +1333,35 @@ def save_docs_to_vector_db(
             ),
         )
 
-        embeddings = embedding_function(
-            list(map(lambda x: x.replace("\n", " "), texts)),
-            prefix=RAG_EMBEDDING_CONTENT_PREFIX,
-            user=user,
-        )
-        log.info(f"embeddings generated {len(embeddings)} for {len(texts)} items")
-
-        items = [
-            {
-                "id": str(uuid.uuid4()),
-                "text": text,
-                "vector": embeddings[idx],
-                "metadata": metadatas[idx],
-            }
-            for idx, text in enumerate(texts)
-        ]
+        items = []
+        while batch := list(itertools.islice(docs, EMBEDDING_STREAM_BATCH_SIZE)):
+            texts = [doc.page_content for doc in batch]
+            embeddings = embedding_function(
+                list(map(lambda x: x.replace("\n", " "), texts)),
+                prefix=RAG_EMBEDDING_CONTENT_PREFIX,
+                user=user,
+            )
+
+            items.extend(
+                {
+                    "id": str(uuid.uuid4()),
+                    "text": text,
+                    "vector": embeddings[idx],
+                    "metadata": {
+                        **batch[idx].metadata,
+                        **(metadata if metadata else {}),
+                        "embedding_config": {
+                            "engine": request.app.state.config.RAG_EMBEDDING_ENGINE,
+                            "model": request.app.state.config.RAG_EMBEDDING_MODEL,
+                        },
+                    },
+                }
+                for idx, text in enumerate(texts)
+            )
+        log.info(f"embeddings generated for {len(items)} items")
 
         log.info(f"adding to collection {collection_name}")
+        set_ingestion_stage("index")
         VECTOR_DB_CLIENT.insert(
             collection_name=collection_name,
             items=items,
@@ -1428,6 +1399,8 @@ def process_file(
             if collection_name is None:
                 collection_name = f"file-{file.id}"
 
+            previous_collection_name = (file.meta or {}).get("collection_name")
+
             if form_data.content:
                 # Update the content in the file
                 # Usage: /files/{file_id}/data/content/update, /files/ (audio file upload pipeline)
@@ -1459,15 +1432,28 @@ def process_file(
                 # Check if the file has already been processed and save the content
                 # Usage: /knowledge/{id}/file/add, /knowledge/{id}/file/update
 
-                result = VECTOR_DB_CLIENT.query(
-                    collection_name=f"file-{file.id}", filter={"file_id": file.id}
-                )
+                if is_shared_collection(previous_collection_name):
+                    # Shared with other files, re-attribute the chunks to this one
+                    result = VECTOR_DB_CLIENT.get(
+                        collection_name=previous_collection_name
+                    )
+                    file_metadata = {
+                        "name": file.filename,
+                        "created_by": file.user_id,
+                        "file_id": file.id,
+                        "source": file.filename,
+                    }
+                else:
+                    result = VECTOR_DB_CLIENT.query(
+                        collection_name=f"file-{file.id}", filter={"file_id": file.id}
+                    )
+                    file_metadata = {}
 
                 if result is not None and len(result.ids[0]) > 0:
                     docs = [
                         Document(
                             page_content=result.documents[0][idx],
-                            metadata=result.metadatas[0][idx],
+                            metadata={**result.metadatas[0][idx], **file_metadata},
                         )
                         for idx, id in enumerate(result.ids[0])
                     ]
@@ -1489,6 +1475,32 @@ def process_file(
             else:
                 # Process the file and save the content
                 # Usage: /files/
+                if (
+                    ENABLE_FILE_DEDUPLICATION
+                    and file.content_hash
+                    and not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+                ):
+                    collection_name = get_shared_collection_name(request, file)
+                    duplicate = get_processed_duplicate(file, collection_name)
+                    if duplicate:
+                        # Same bytes processed the same way, reuse its text and vectors
+                        log.info(f"Reusing {collection_name} of file {duplicate.id}")
+                        text_content = duplicate.data.get("content", "")
+                        Files.update_file_data_by_id(file.id, {"content": text_content})
+                        Files.update_file_hash_by_id(file.id, duplicate.hash)
+                        Files.update_file_metadata_by_id(
+                            file.id, {"collection_name": collection_name}
+                        )
+                        update_file_status(file.id, "completed")
+
+                        return {
+                            "status": True,
+                            "collection_name": collection_name,
+                            "filename": file.filename,
+                            "content": text_content,
+                        }
+
+                set_ingestion_stage("extract")
                 file_path = file.path
                 if file_path:
                     file_path = Storage.get_file(file_path)
@@ -1568,7 +1580,7 @@ def process_file(
             Files.update_file_hash_by_id(file.id, hash)
 
             if request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
-                Files.update_file_data_by_id(file.id, {"status": "completed"})
+                update_file_status(file.id, "completed")
                 return {
                     "status": True,
                     "collection_name": None,
@@ -1599,10 +1611,14 @@ def process_file(
                             },
                         )
 
-                        Files.update_file_data_by_id(
-                            file.id,
-                            {"status": "completed"},
-                        )
+                        if (
+                            not form_data.collection_name
+                            and previous_collection_name != collection_name
+                        ):
+                            # e.g. edited content no longer uses the shared collection
+                            release_file_collection(file, previous_collection_name)
+
+                        update_file_status(file.id, "completed")
 
                         return {
                             "status": True,
@@ -1617,10 +1633,9 @@ def process_file(
 
         except Exception as e:
             log.exception(e)
-            Files.update_file_data_by_id(
-                file.id,
-                {"status": "failed"},
-            )
+            if not in_ingestion_job():
+                # Ingestion workers decide between retrying and failing the file
+                update_file_status(file.id, "failed", error=str(e))
 
             if "No pandoc was found" in str(e):
                 raise HTTPException(
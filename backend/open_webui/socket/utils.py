@@ -1,5 +1,5 @@
-import json
 import uuid
+from open_webui.utils import serialization
 from open_webui.utils.redis import get_redis_connection
 from open_webui.env import REDIS_KEY_PREFIX
 from typing import Optional, List, Tuple
@@ -57,14 +57,14 @@ class RedisDict:
         )
 
     def __setitem__(self, key, value):
-        serialized_value = json.dumps(value)
+        serialized_value = serialization.dumps(value)
         self.redis.hset(self.name, key, serialized_value)
 
     def __getitem__(self, key):
         value = self.redis.hget(self.name, key)
         if value is None:
             raise KeyError(key)
-        return json.loads(value)
+        return serialization.loads(value)
 
     def __delitem__(self, key):
         result = self.redis.hdel(self.name, key)
@@ -81,10 +81,13 @@ class RedisDict:
         return self.redis.hkeys(self.name)
 
     def values(self):
-        return [json.loads(v) for v in self.redis.hvals(self.name)]
+        return [serialization.loads(v) for v in self.redis.hvals(self.name)]
 
     def items(self):
-        return [(k, json.loads(v)) for k, v in self.redis.hgetall(self.name).items()]
+        return [
+            (k, serialization.loads(v))
+            for k, v in self.redis.hgetall(self.name).items()
+        ]
 
     def get(self, key, default=None):
         try:
@@ -123,7 +126,7 @@ class YdocManager:
         document_id = document_id.replace(":", "_")
         if self._redis:
             redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
-            await self._redis.rpush(redis_key, json.dumps(list(update)))
+            await self._redis.rpush(redis_key, serialization.dumps(list(update)))
         else:
             if document_id not in self._updates:
                 self._updates[document_id] = []
@@ -135,7 +138,7 @@ class YdocManager:
         if self._redis:
             redis_key = f"{self._redis_key_prefix}:{document_id}:updates"
             updates = await self._redis.lrange(redis_key, 0, -1)
-            return [bytes(json.loads(update)) for update in updates]
+            return [bytes(serialization.loads(update)) for update in updates]
         else:
             return self._updates.get(document_id, [])
 
@@ -0,0 +1,209 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class StorageCache:
+    """
+    Bounded read-through cache of objects downloaded from remote storage.
+
+    Downloaded objects are materialized at the local path the provider asks
+    for (so callers keep receiving plain file paths) and tracked in a small
+    SQLite index shared by every worker on the host. An entry is reused as
+    long as the remote ETag still matches; entries are evicted least recently
+    used first once the cache exceeds `max_size` bytes, and after `max_age`
+    seconds without a read. An object is never evicted by its own fetch, so
+    one larger than `max_size` is kept until the next fetch. Concurrent
+    downloads of the same object within a process are coalesced into one.
+    """
+
+    def __init__(
+        self, index_path: str, max_size: int, max_age: int, enabled: bool = True
+    ):
+        self.index_path = index_path
+        self.max_size = max_size
+        self.max_age = max_age
+        self.enabled = enabled
+
+        self._locks: dict[str, list] = {}  # local path -> [lock, waiters]
+        self._locks_lock = threading.Lock()
+
+        if self.enabled:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with self._db() as db:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS entry (
+                        path TEXT PRIMARY KEY,
+                        key TEXT NOT NULL,
+                        etag TEXT NOT NULL,
+                        size INTEGER NOT NULL,
+                        accessed_at REAL NOT NULL
+                    )
+                    """
+                )
+                db.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_entry_accessed_at ON entry (accessed_at)"
+                )
+
+    @contextmanager
+    def _db(self):
+        # One short-lived connection per operation keeps this safe to use from
+        # the threadpool and from several worker processes at once
+        db = sqlite3.connect(self.index_path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    @contextmanager
+    def _lock(self, path: str):
+        with self._locks_lock:
+            entry = self._locks.setdefault(path, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(path, None)
+
+    def fetch(
+        self,
+        key: str,
+        etag: Optional[str],
+        local_path: str,
+        download: Callable[[str], None],
+    ) -> str:
+        """
+        Return `local_path`, calling `download(tmp_path)` only if the cached
+        copy is missing or its ETag no longer matches `etag`.
+        """
+        if not self.enabled or not etag:
+            self._download(local_path, download)
+            return local_path
+
+        with self._lock(local_path):
+            if self._lookup(local_path, key, etag):
+                return local_path
+
+            log.debug(f"Storage cache miss for {key}")
+            self._download(local_path, download)
+            self.put(key, etag, local_path)
+
+        return local_path
+
+    def put(self, key: str, etag: Optional[str], local_path: str):
+        """Track a local copy of `key`, e.g. one written while uploading."""
+        if not self.enabled or not etag:
+            return
+
+        try:
+            size = os.path.getsize(local_path)
+            with self._db() as db:
+                db.execute(
+                    "INSERT OR REPLACE INTO entry (path, key, etag, size, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                    (local_path, key, str(etag), size, time.time()),
+                )
+            # The caller is about to read it, even if it alone is over budget
+            self._evict(keep=local_path)
+        except Exception as e:
+            log.warning(f"Failed to record {key} in the storage cache: {e}")
+
+    def discard(self, local_path: str):
+        if not self.enabled:
+            return
+
+        with self._db() as db:
+            db.execute("DELETE FROM entry WHERE path = ?", (local_path,))
+
+    def clear(self):
+        if not self.enabled:
+            return
+
+        with self._db() as db:
+            db.execute("DELETE FROM entry")
+
+    def _lookup(self, local_path: str, key: str, etag: str) -> bool:
+        with self._db() as db:
+            row = db.execute(
+                "SELECT key, etag, size FROM entry WHERE path = ?", (local_path,)
+            ).fetchone()
+            if row is None:
+                return False
+
+            try:
+                size = os.path.getsize(local_path)
+            except OSError:
+                size = None
+
+            if row != (key, str(etag), size):
+                db.execute("DELETE FROM entry WHERE path = ?", (local_path,))
+                return False
+
+            db.execute(
+                "UPDATE entry SET accessed_at = ? WHERE path = ?",
+                (time.time(), local_path),
+            )
+            return True
+
+    def _download(self, local_path: str, download: Callable[[str], None]):
+        # Download next to the target and move it in place, so readers never
+        # see a partially written file
+        tmp_path = f"{local_path}.{uuid.uuid4().hex}.part"
+        try:
+            download(tmp_path)
+            os.replace(tmp_path, local_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _evict(self, keep: Optional[str] = None):
+        with self._db() as db:
+            expired = db.execute(
+                "SELECT path FROM entry WHERE accessed_at < ? AND path IS NOT ?",
+                (time.time() - self.max_age, keep),
+            ).fetchall()
+
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entry").fetchone()[0]
+            excess = []
+            if total > self.max_size:
+                for path, size in db.execute(
+                    "SELECT path, size FROM entry ORDER BY accessed_at"
+                ):
+                    if total <= self.max_size:
+                        break
+                    if path == keep:
+                        continue
+                    excess.append((path,))
+                    total -= size
+
+            evicted = set(expired) | set(excess)
+            if not evicted:
+                return
+
+            db.executemany("DELETE FROM entry WHERE path = ?", list(evicted))
+
+        for (path,) in evicted:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                log.warning(f"Failed to evict {path} from the storage cache: {e}")
+
+        log.debug(f"Evicted {len(evicted)} objects from the storage cache")
@@ -1,12 +1,18 @@
 import os
 import shutil
 import json
+import hashlib
 import logging
 import re
+import uuid
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple, Dict
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import BinaryIO, Iterator, Optional, Tuple, Dict
+from urllib.parse import urlencode
 
 import boto3
+from boto3.s3.transfer import TransferConfig
 from botocore.config import Config
 from botocore.exceptions import ClientError
 from open_webui.config import (
@@ -25,20 +31,108 @@ from open_webui.config import (
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
     STORAGE_PROVIDER,
+    STORAGE_CACHE_ENABLED,
+    STORAGE_CACHE_MAX_AGE,
+    STORAGE_CACHE_MAX_SIZE_MB,
+    STORAGE_PRESIGNED_URL_EXPIRY,
+    CACHE_DIR,
     UPLOAD_DIR,
 )
 from google.cloud import storage
 from google.cloud.exceptions import GoogleCloudError, NotFound
 from open_webui.constants import ERROR_MESSAGES
 from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobSasPermissions, BlobServiceClient, generate_blob_sas
 from azure.core.exceptions import ResourceNotFoundError
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.storage.cache import StorageCache
 
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+STREAM_CHUNK_SIZE = 1024 * 1024
+# S3 multipart / GCS resumable chunk size, a multiple of 256 KiB as GCS requires
+UPLOAD_PART_SIZE = 8 * 1024 * 1024
+
+# Shared by the remote providers; objects are materialized in UPLOAD_DIR as before
+storage_cache = StorageCache(
+    os.path.join(CACHE_DIR, "storage", "index.sqlite3"),
+    max_size=STORAGE_CACHE_MAX_SIZE_MB * 1024 * 1024,
+    max_age=STORAGE_CACHE_MAX_AGE,
+    enabled=STORAGE_CACHE_ENABLED and STORAGE_PROVIDER != "local",
+)
+
+
+class HashingReader:
+    """
+    Read-only stream wrapper that computes the SHA-256 and size of the bytes
+    read through it, copying them to `spool` (if set) on the way.
+
+    The first chunk is read eagerly so empty uploads are rejected before
+    anything is sent to the storage backend.
+    """
+
+    def __init__(self, file: BinaryIO, spool: Optional[BinaryIO] = None):
+        self.file = file
+        self.spool = spool
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+        self._buffer = file.read(STREAM_CHUNK_SIZE)
+        if not self._buffer:
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if self._buffer:
+            if size is None or size < 0:
+                chunk, self._buffer = self._buffer + self.file.read(), b""
+            elif size > len(self._buffer):
+                # Multipart uploads need full reads, short parts are rejected
+                chunk = self._buffer + self.file.read(size - len(self._buffer))
+                self._buffer = b""
+            else:
+                chunk, self._buffer = self._buffer[:size], self._buffer[size:]
+        else:
+            chunk = self.file.read(size)
+
+        if chunk:
+            self.sha256.update(chunk)
+            self.size += len(chunk)
+            if self.spool is not None:
+                self.spool.write(chunk)
+        return chunk
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def tell(self) -> int:
+        return self.size
+
+    def drain(self):
+        while self.read(UPLOAD_PART_SIZE):
+            pass
+
+
+@contextmanager
+def spool_to_upload_dir(filename: str):
+    """
+    Yield a temporary file and the final path of `filename` in UPLOAD_DIR.
+    The file is moved into place only if the block completes.
+    """
+    file_path = f"{UPLOAD_DIR}/{filename}"
+    tmp_path = f"{file_path}.{uuid.uuid4().hex}.part"
+    try:
+        with open(tmp_path, "wb") as f:
+            yield f, file_path
+        os.replace(tmp_path, file_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 
 class StorageProvider(ABC):
     @abstractmethod
@@ -51,6 +145,16 @@ class StorageProvider(ABC):
     ) -> Tuple[bytes, str]:
         pass
 
+    def upload_file_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, int, str]:
+        """
+        Upload `file` without holding it in memory. Returns the stored path,
+        the size in bytes and the SHA-256 hex digest of the contents.
+        """
+        contents, file_path = self.upload_file(file, filename, tags)
+        return file_path, len(contents), hashlib.sha256(contents).hexdigest()
+
     @abstractmethod
     def delete_all_files(self) -> None:
         pass
@@ -59,6 +163,43 @@ class StorageProvider(ABC):
     def delete_file(self, file_path: str) -> None:
         pass
 
+    def get_presigned_url(
+        self,
+        file_path: str,
+        content_type: Optional[str] = None,
+        content_disposition: Optional[str] = None,
+    ) -> Optional[str]:
+        """Time-limited URL to download the file directly, if the backend supports it."""
+        return None
+
+    def stream_file(
+        self, file_path: str, start: int = 0, end: Optional[int] = None
+    ) -> Tuple[Iterator[bytes], int]:
+        """
+        Read bytes `start` to `end` (inclusive) of the file without keeping a
+        local copy. Returns the chunks and the total file size; raises
+        ValueError if `start` is past the end of the file.
+        """
+        local_file_path = self.get_file(file_path)
+        size = os.path.getsize(local_file_path)
+        if start >= size:
+            raise ValueError(f"Range start {start} exceeds file size {size}")
+
+        remaining = (size if end is None else min(end + 1, size)) - start
+
+        def chunks():
+            nonlocal remaining
+            with open(local_file_path, "rb") as f:
+                f.seek(start)
+                while remaining > 0:
+                    chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+
+        return chunks(), size
+
 
 class LocalStorageProvider(StorageProvider):
     @staticmethod
@@ -73,6 +214,16 @@ class LocalStorageProvider(StorageProvider):
             f.write(contents)
         return contents, file_path
 
+    @staticmethod
+    def upload_file_stream(
+        file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, int, str]:
+        reader = HashingReader(file)
+        with spool_to_upload_dir(filename) as (spool, file_path):
+            reader.spool = spool
+            reader.drain()
+        return file_path, reader.size, reader.sha256.hexdigest()
+
     @staticmethod
     def get_file(file_path: str) -> str:
         """Handles downloading of the file from local storage."""
@@ -168,10 +319,58 @@ class S3StorageProvider(StorageProvider):
                     Key=s3_key,
                     Tagging=tagging,
                 )
+            s3_file_path = f"s3://{self.bucket_name}/{s3_key}"
+            if storage_cache.enabled:
+                etag = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)[
+                    "ETag"
+                ]
+                storage_cache.put(s3_file_path, etag, file_path)
             return (
                 open(file_path, "rb").read(),
-                f"s3://{self.bucket_name}/{s3_key}",
+                s3_file_path,
+            )
+        except ClientError as e:
+            raise RuntimeError(f"Error uploading file to S3: {e}")
+
+    def upload_file_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, int, str]:
+        """Streams the file to S3, switching to a multipart upload for large files."""
+        reader = HashingReader(file)
+        s3_key = os.path.join(self.key_prefix, filename)
+
+        extra_args = {}
+        if S3_ENABLE_TAGGING and tags:
+            extra_args["Tagging"] = urlencode(
+                {
+                    self.sanitize_tag_value(k): self.sanitize_tag_value(v)
+                    for k, v in tags.items()
+                }
             )
+
+        try:
+            # The local copy is written as the body streams by, so reading the
+            # file right after the upload (e.g. to process it) is a cache hit
+            with spool_to_upload_dir(filename) as (spool, file_path):
+                reader.spool = spool
+                self.s3_client.upload_fileobj(
+                    reader,
+                    self.bucket_name,
+                    s3_key,
+                    ExtraArgs=extra_args or None,
+                    Config=TransferConfig(
+                        multipart_threshold=UPLOAD_PART_SIZE,
+                        multipart_chunksize=UPLOAD_PART_SIZE,
+                    ),
+                )
+
+            s3_file_path = f"s3://{self.bucket_name}/{s3_key}"
+            if storage_cache.enabled:
+                etag = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)[
+                    "ETag"
+                ]
+                storage_cache.put(s3_file_path, etag, file_path)
+            return s3_file_path, reader.size, reader.sha256.hexdigest()
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
@@ -180,11 +379,66 @@ class S3StorageProvider(StorageProvider):
         try:
             s3_key = self._extract_s3_key(file_path)
             local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+
+            # A HEAD request is enough to tell whether the cached copy is current
+            etag = None
+            if storage_cache.enabled:
+                etag = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)[
+                    "ETag"
+                ]
+
+            return storage_cache.fetch(
+                file_path,
+                etag,
+                local_file_path,
+                lambda path: self.s3_client.download_file(
+                    self.bucket_name, s3_key, path
+                ),
+            )
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
+    def get_presigned_url(
+        self,
+        file_path: str,
+        content_type: Optional[str] = None,
+        content_disposition: Optional[str] = None,
+    ) -> Optional[str]:
+        params = {"Bucket": self.bucket_name, "Key": self._extract_s3_key(file_path)}
+        if content_type:
+            params["ResponseContentType"] = content_type
+        if content_disposition:
+            params["ResponseContentDisposition"] = content_disposition
+
+        try:
+            return self.s3_client.generate_presigned_url(
+                "get_object", Params=params, ExpiresIn=STORAGE_PRESIGNED_URL_EXPIRY
+            )
+        except ClientError as e:
+            log.warning(f"Error generating presigned S3 URL: {e}")
+            return None
+
+    def stream_file(
+        self, file_path: str, start: int = 0, end: Optional[int] = None
+    ) -> Tuple[Iterator[bytes], int]:
+        try:
+            response = self.s3_client.get_object(
+                Bucket=self.bucket_name,
+                Key=self._extract_s3_key(file_path),
+                Range=f"bytes={start}-{'' if end is None else end}",
+            )
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                raise ValueError(f"Range start {start} exceeds file size")
+            raise RuntimeError(f"Error reading file from S3: {e}")
+
+        # ContentRange is "bytes start-end/size"
+        if "ContentRange" in response:
+            size = int(response["ContentRange"].rsplit("/", 1)[1])
+        else:
+            size = response["ContentLength"]
+        return response["Body"].iter_chunks(STREAM_CHUNK_SIZE), size
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from S3 storage."""
         try:
@@ -194,6 +448,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from S3: {e}")
 
         # Always delete from local storage
+        storage_cache.discard(self._get_local_file_path(s3_key))
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -213,6 +468,7 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from S3: {e}")
 
         # Always delete from local storage
+        storage_cache.clear()
         LocalStorageProvider.delete_all_files()
 
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
@@ -246,7 +502,26 @@ class GCSStorageProvider(StorageProvider):
         try:
             blob = self.bucket.blob(filename)
             blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            gcs_file_path = "gs://" + self.bucket_name + "/" + filename
+            storage_cache.put(gcs_file_path, blob.etag, file_path)
+            return contents, gcs_file_path
+        except GoogleCloudError as e:
+            raise RuntimeError(f"Error uploading file to GCS: {e}")
+
+    def upload_file_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, int, str]:
+        """Streams the file to GCS as a resumable upload."""
+        reader = HashingReader(file)
+        try:
+            with spool_to_upload_dir(filename) as (spool, file_path):
+                reader.spool = spool
+                blob = self.bucket.blob(filename, chunk_size=UPLOAD_PART_SIZE)
+                blob.upload_from_file(reader)
+
+            gcs_file_path = "gs://" + self.bucket_name + "/" + filename
+            storage_cache.put(gcs_file_path, blob.etag, file_path)
+            return gcs_file_path, reader.size, reader.sha256.hexdigest()
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
@@ -255,13 +530,65 @@ class GCSStorageProvider(StorageProvider):
         try:
             filename = file_path.removeprefix("gs://").split("/")[1]
             local_file_path = f"{UPLOAD_DIR}/{filename}"
+            # get_blob fetches the metadata, including the ETag
             blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
+            if blob is None:
+                raise NotFound(f"{file_path} not found")
 
-            return local_file_path
+            return storage_cache.fetch(
+                file_path, blob.etag, local_file_path, blob.download_to_filename
+            )
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
+    def get_presigned_url(
+        self,
+        file_path: str,
+        content_type: Optional[str] = None,
+        content_disposition: Optional[str] = None,
+    ) -> Optional[str]:
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        try:
+            return self.bucket.blob(filename).generate_signed_url(
+                version="v4",
+                expiration=timedelta(seconds=STORAGE_PRESIGNED_URL_EXPIRY),
+                method="GET",
+                response_type=content_type,
+                response_disposition=content_disposition,
+            )
+        except Exception as e:
+            # Signing needs service account credentials
+            log.warning(f"Error generating signed GCS URL: {e}")
+            return None
+
+    def stream_file(
+        self, file_path: str, start: int = 0, end: Optional[int] = None
+    ) -> Tuple[Iterator[bytes], int]:
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        try:
+            blob = self.bucket.get_blob(filename)
+        except NotFound as e:
+            raise RuntimeError(f"Error reading file from GCS: {e}")
+        if blob is None:
+            raise RuntimeError(f"Error reading file from GCS: {file_path} not found")
+        if start >= blob.size:
+            raise ValueError(f"Range start {start} exceeds file size {blob.size}")
+
+        remaining = (blob.size if end is None else min(end + 1, blob.size)) - start
+
+        def chunks():
+            nonlocal remaining
+            with blob.open("rb", chunk_size=STREAM_CHUNK_SIZE) as f:
+                f.seek(start)
+                while remaining > 0:
+                    chunk = f.read(min(STREAM_CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+
+        return chunks(), blob.size
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from GCS storage."""
         try:
@@ -272,6 +599,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from GCS: {e}")
 
         # Always delete from local storage
+        storage_cache.discard(f"{UPLOAD_DIR}/{filename}")
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -286,6 +614,7 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from GCS: {e}")
 
         # Always delete from local storage
+        storage_cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
@@ -317,8 +646,28 @@ class AzureStorageProvider(StorageProvider):
         contents, file_path = LocalStorageProvider.upload_file(file, filename, tags)
         try:
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
+            result = blob_client.upload_blob(contents, overwrite=True)
+            azure_file_path = f"{self.endpoint}/{self.container_name}/{filename}"
+            storage_cache.put(azure_file_path, result.get("etag"), file_path)
+            return contents, azure_file_path
+        except Exception as e:
+            raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
+
+    def upload_file_stream(
+        self, file: BinaryIO, filename: str, tags: Dict[str, str]
+    ) -> Tuple[str, int, str]:
+        """Streams the file to Azure Blob Storage as staged blocks."""
+        reader = HashingReader(file)
+        try:
+            with spool_to_upload_dir(filename) as (spool, file_path):
+                reader.spool = spool
+                blob_client = self.container_client.get_blob_client(filename)
+                # The stream is not seekable, so the SDK stages it block by block
+                result = blob_client.upload_blob(reader, overwrite=True)
+
+            azure_file_path = f"{self.endpoint}/{self.container_name}/{filename}"
+            storage_cache.put(azure_file_path, result.get("etag"), file_path)
+            return azure_file_path, reader.size, reader.sha256.hexdigest()
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
@@ -328,12 +677,75 @@ class AzureStorageProvider(StorageProvider):
             filename = file_path.split("/")[-1]
             local_file_path = f"{UPLOAD_DIR}/{filename}"
             blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+
+            etag = None
+            if storage_cache.enabled:
+                etag = blob_client.get_blob_properties().etag
+
+            def download(path: str):
+                with open(path, "wb") as download_file:
+                    download_file.write(blob_client.download_blob().readall())
+
+            return storage_cache.fetch(file_path, etag, local_file_path, download)
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
+    def get_presigned_url(
+        self,
+        file_path: str,
+        content_type: Optional[str] = None,
+        content_disposition: Optional[str] = None,
+    ) -> Optional[str]:
+        filename = file_path.split("/")[-1]
+        expiry = datetime.now(timezone.utc) + timedelta(
+            seconds=STORAGE_PRESIGNED_URL_EXPIRY
+        )
+        try:
+            if AZURE_STORAGE_KEY:
+                credential = {"account_key": AZURE_STORAGE_KEY}
+            else:
+                # Managed identities sign with a user delegation key instead
+                credential = {
+                    "user_delegation_key": self.blob_service_client.get_user_delegation_key(
+                        datetime.now(timezone.utc), expiry
+                    )
+                }
+
+            sas = generate_blob_sas(
+                account_name=self.blob_service_client.account_name,
+                container_name=self.container_name,
+                blob_name=filename,
+                permission=BlobSasPermissions(read=True),
+                expiry=expiry,
+                content_type=content_type,
+                content_disposition=content_disposition,
+                **credential,
+            )
+            return f"{self.container_client.get_blob_client(filename).url}?{sas}"
+        except Exception as e:
+            log.warning(f"Error generating Azure Blob Storage SAS URL: {e}")
+            return None
+
+    def stream_file(
+        self, file_path: str, start: int = 0, end: Optional[int] = None
+    ) -> Tuple[Iterator[bytes], int]:
+        filename = file_path.split("/")[-1]
+        blob_client = self.container_client.get_blob_client(filename)
+        try:
+            size = blob_client.get_blob_properties().size
+            if start >= size:
+                raise ValueError(f"Range start {start} exceeds file size {size}")
+
+            downloader = blob_client.download_blob(
+                offset=start,
+                length=(size if end is None else min(end + 1, size)) - start,
+                max_chunk_get_size=STREAM_CHUNK_SIZE,
+            )
+        except ResourceNotFoundError as e:
+            raise RuntimeError(f"Error reading file from Azure Blob Storage: {e}")
+
+        return downloader.chunks(), size
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from Azure Blob Storage."""
         try:
@@ -344,6 +756,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        storage_cache.discard(f"{UPLOAD_DIR}/{filename}")
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -356,6 +769,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        storage_cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
@@ -0,0 +1,86 @@
+import time
+
+import ftfy
+import pytest
+from fpdf import FPDF
+from langchain_community.document_loaders import PyPDFLoader
+from open_webui.retrieval.loaders.executor import ExtractionExecutor, _load_pdf_pages
+
+
+def sleep(seconds, value=None):
+    time.sleep(seconds)
+    return value
+
+
+@pytest.fixture
+def make_executor():
+    executors = []
+
+    def make_executor(**kwargs):
+        executor = ExtractionExecutor(**kwargs)
+        executors.append(executor)
+        return executor
+
+    yield make_executor
+    for executor in executors:
+        executor.shutdown()
+
+
+@pytest.fixture
+def pdf_path(tmp_path):
+    pdf = FPDF()
+    pdf.set_title("Executor test")
+    pdf.set_font("helvetica", size=12)
+    for page in range(7):
+        pdf.add_page()
+        pdf.multi_cell(0, 10, f"Page {page}\nThe quick brown fox jumps over the dog.")
+    path = tmp_path / "pages.pdf"
+    pdf.output(str(path))
+    return str(path)
+
+
+class TestExtractionExecutor:
+    def test_time_spent_queued_does_not_count(self, make_executor):
+        executor = make_executor(workers=1, timeout=1)
+
+        futures = [
+            executor._submit(sleep, (0.7, n), executor.timeout) for n in range(2)
+        ]
+        # The second task waits 0.7s for the only worker, then runs 0.7s
+        assert [future.result(timeout=10) for future in futures] == [0, 1]
+
+    def test_timeout_kills_only_the_stuck_worker(self, make_executor):
+        executor = make_executor(workers=2, timeout=0.5)
+
+        stuck = executor._submit(sleep, (30,), executor.timeout)
+        other = executor._submit(sleep, (1.5, "done"))
+        with pytest.raises(TimeoutError):
+            stuck.result(timeout=10)
+        # Started before the timeout and still running on the other worker
+        assert other.result(timeout=10) == "done"
+
+        # The pool replaced the killed worker
+        assert executor.submit(sleep, 0, "again").result(timeout=30) == "again"
+
+    def test_load_pdf_in_page_ranges(self, make_executor, pdf_path):
+        executor = make_executor(workers=2, pages_per_task=3)
+
+        docs = executor.load(
+            "", {}, "pages.pdf", "application/pdf", pdf_path, page_count=7
+        )
+        expected = PyPDFLoader(pdf_path).load()
+        assert [doc.metadata for doc in docs] == [doc.metadata for doc in expected]
+        assert [doc.page_content for doc in docs] == [
+            ftfy.fix_text(doc.page_content) for doc in expected
+        ]
+
+
+def test_load_pdf_pages_matches_pypdf_loader(pdf_path):
+    expected = PyPDFLoader(pdf_path).load()
+
+    docs = _load_pdf_pages(pdf_path, 2, 5)
+    assert [doc.metadata for doc in docs] == [doc.metadata for doc in expected[2:5]]
+    assert [doc.page_content for doc in docs] == [
+        ftfy.fix_text(doc.page_content) for doc in expected[2:5]
+    ]
+    assert "Page 3" in docs[1].page_content
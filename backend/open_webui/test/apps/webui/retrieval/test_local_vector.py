@@ -0,0 +1,158 @@
+import os
+
+import pytest
+from open_webui.retrieval.vector.dbs import local
+from open_webui.retrieval.vector.dbs.local import LocalVectorClient
+
+
+def item(id, vector, **metadata):
+    return {"id": id, "text": f"text {id}", "vector": vector, "metadata": metadata}
+
+
+def search_ids(client, vector, limit=10):
+    result = client.search("c", [vector], limit)
+    return result.ids[0] if result else None
+
+
+def wait_for_compaction(client):
+    client._compactor.submit(lambda: None).result(timeout=10)
+
+
+@pytest.fixture
+def make_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(local, "LOCAL_VECTOR_DB_PATH", str(tmp_path))
+    clients = []
+
+    def make_client():
+        client = LocalVectorClient()
+        clients.append(client)
+        return client
+
+    yield make_client
+    for client in clients:
+        client._compactor.shutdown(wait=True)
+        client.db.close()
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client()
+
+
+class TestLocalVectorClient:
+    def test_insert_and_search(self, client):
+        client.insert(
+            "c",
+            [
+                item("a", [1, 0, 0], file_id="f1"),
+                item("b", [0, 1, 0], file_id="f1"),
+                item("c", [1, 1, 0], file_id="f2"),
+            ],
+        )
+
+        result = client.search("c", [[1, 0, 0], [0, 1, 0]], 2)
+        assert result.ids == [["a", "c"], ["b", "c"]]
+        assert result.distances[0][0] == pytest.approx(1.0)
+        assert result.documents[0] == ["text a", "text c"]
+        assert result.metadatas[0][0] == {"file_id": "f1"}
+
+        assert client.query("c", {"file_id": "f2"}).ids == [["c"]]
+        assert client.get("c").ids == [["a", "b", "c"]]
+        assert client.search("missing", [[1, 0, 0]], 1) is None
+
+    def test_upsert_replaces_items(self, client):
+        client.insert("c", [item("a", [1, 0]), item("b", [0, 1])])
+        client.upsert("c", [item("a", [0, 1]), item("a", [-1, 0])])
+
+        assert search_ids(client, [-1, 0], 1) == ["a"]
+        assert sorted(client.get("c").ids[0]) == ["a", "b"]
+
+        with pytest.raises(ValueError):
+            client.upsert("c", [item("d", [1, 0, 0])])
+
+    def test_delete(self, client):
+        client.insert(
+            "c",
+            [item("a", [1, 0], file_id="f1"), item("b", [0, 1], file_id="f2")],
+        )
+        client.insert("c", [item("c", [1, 1], file_id="f2")])
+
+        client.delete("c", ids=["a"])
+        assert search_ids(client, [1, 0]) == ["c", "b"]
+
+        client.delete("c", filter={"file_id": "f2"})
+        assert search_ids(client, [1, 0]) == []
+
+        client.delete_collection("c")
+        assert not client.has_collection("c")
+        assert search_ids(client, [1, 0]) is None
+
+    def test_compaction_keeps_live_rows(self, client, monkeypatch):
+        monkeypatch.setattr(local, "LOCAL_VECTOR_COMPACTION_MAX_SEGMENTS", 2)
+
+        for n in range(3):
+            client.insert("c", [item(f"{n}", [1, n])])
+        client.delete("c", ids=["0"])
+        wait_for_compaction(client)
+
+        collection = client._get_collection("c")
+        assert len(collection.segments) == 1
+        assert sorted(os.listdir(collection.directory)) == [
+            os.path.basename(segment.path) for segment in collection.segments.values()
+        ]
+        assert sorted(search_ids(client, [1, 0])) == ["1", "2"]
+
+        # A client opening the directory afterwards sees the same state
+        client._collections.clear()
+        assert sorted(search_ids(client, [1, 0])) == ["1", "2"]
+
+
+class TestSharedDirectory:
+    """Two clients on one directory stand in for two worker processes."""
+
+    def test_writes_of_one_are_seen_by_the_other(self, make_client):
+        first, second = make_client(), make_client()
+
+        first.insert("c", [item("a", [1, 0])])
+        assert search_ids(second, [1, 0]) == ["a"]
+
+        # Each allocates its segment id in the database, neither overwrites
+        # the other's segment file
+        second.insert("c", [item("b", [0, 1])])
+        first.insert("c", [item("c", [1, 1])])
+        for client in (first, second):
+            assert sorted(search_ids(client, [1, 0])) == ["a", "b", "c"]
+
+        first.delete("c", ids=["b"])
+        second.upsert("c", [item("a", [-1, 0])])
+        for client in (first, second):
+            assert search_ids(client, [-1, 0], 1) == ["a"]
+            assert sorted(search_ids(client, [1, 0])) == ["a", "c"]
+
+        second.delete_collection("c")
+        assert search_ids(first, [1, 0]) is None
+        first.insert("c", [item("d", [1, 0])])
+        assert search_ids(second, [1, 0]) == ["d"]
+
+    def test_concurrent_compactions(self, make_client):
+        first, second = make_client(), make_client()
+        for n in range(3):
+            first.insert("c", [item(f"{n}", [1, n])])
+        assert sorted(search_ids(second, [1, 0])) == ["0", "1", "2"]
+
+        # The first compacts the same segments while the second copies them
+        write_segment = second._write_segment
+
+        def write_segment_during_compaction(path, vectors):
+            write_segment(path, vectors)
+            first._compact(first._collections["c"])
+
+        second._write_segment = write_segment_during_compaction
+        second._compact(second._collections["c"])
+
+        segments = first._get_collection("c").segments
+        assert len(segments) == 1
+        assert second._get_collection("c").segments.keys() == segments.keys()
+        assert len(os.listdir(first._collection_directory("c"))) == 1
+        for client in (first, second):
+            assert sorted(search_ids(client, [1, 0])) == ["0", "1", "2"]
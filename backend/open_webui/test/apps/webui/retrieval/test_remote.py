@@ -0,0 +1,132 @@
+import asyncio
+import threading
+
+import pytest
+from aiohttp import web
+from open_webui.retrieval.loaders import datalab_marker
+from open_webui.retrieval.loaders.datalab_marker import DatalabMarkerLoader
+from open_webui.retrieval.loaders.remote import RemoteExtractor
+
+
+class MockMarkerServer:
+    """Datalab Marker API that completes each request after two status checks."""
+
+    def __init__(self):
+        self.submissions = 0
+        self.polls = 0
+
+        app = web.Application()
+        app.router.add_post("/marker", self.submit)
+        app.router.add_get("/marker/{request_id}", self.check)
+        self.runner = web.AppRunner(app)
+
+        self.loop = asyncio.new_event_loop()
+        threading.Thread(target=self.loop.run_forever, daemon=True).start()
+        asyncio.run_coroutine_threadsafe(self.start(), self.loop).result()
+
+    async def start(self):
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    async def submit(self, request):
+        self.submissions += 1
+        data = await request.post()
+        content = data["file"].file.read().decode()
+        return web.json_response(
+            {
+                "success": True,
+                "request_id": content,
+                "request_check_url": f"{self.url}/marker/{content}",
+            }
+        )
+
+    async def check(self, request):
+        self.polls += 1
+        if self.polls % 3:
+            return web.json_response({"status": "processing"})
+        return web.json_response(
+            {
+                "status": "complete",
+                "success": True,
+                "markdown": f"# {request.match_info['request_id']}",
+                "page_count": 1,
+            }
+        )
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setattr(datalab_marker, "get_poll_delays", lambda: iter([0.01] * 100))
+    server = MockMarkerServer()
+    yield server
+    server.stop()
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    return RemoteExtractor(tmp_path / "cache", max_concurrency=2, max_age=3600)
+
+
+def load(extractor, server, file_path, **kwargs):
+    loader = DatalabMarkerLoader(
+        file_path=str(file_path),
+        api_key="key",
+        api_base_url=f"{server.url}/marker",
+        output_format="markdown",
+        **kwargs,
+    )
+    return extractor.load(
+        "datalab_marker",
+        str(file_path),
+        loader.get_cache_options(),
+        loader.load_async,
+    )
+
+
+def test_polls_until_complete(server, extractor, tmp_path):
+    file_path = tmp_path / "a.pdf"
+    file_path.write_text("a")
+
+    docs = load(extractor, server, file_path)
+    assert docs[0].page_content == "# a"
+    assert server.submissions == 1
+    assert server.polls == 3
+
+
+def test_reuses_result_for_same_content_and_options(server, extractor, tmp_path):
+    for name in ("a.pdf", "b.pdf"):
+        (tmp_path / name).write_text("a")
+
+    load(extractor, server, tmp_path / "a.pdf")
+    docs = load(extractor, server, tmp_path / "b.pdf")
+    assert docs[0].page_content == "# a"
+    assert server.submissions == 1
+
+    load(extractor, server, tmp_path / "b.pdf", force_ocr=True)
+    assert server.submissions == 2
+
+
+def test_concurrent_identical_loads_submit_once(server, extractor, tmp_path):
+    file_path = tmp_path / "a.pdf"
+    file_path.write_text("a")
+
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(load(extractor, server, file_path))
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert server.submissions == 1
+    assert [docs[0].page_content for docs in results] == ["# a"] * 4
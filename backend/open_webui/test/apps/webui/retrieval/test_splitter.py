@@ -0,0 +1,80 @@
+import pytest
+from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
+from langchain_core.documents import Document
+from langchain_text_splitters import MarkdownHeaderTextSplitter
+from open_webui.retrieval import splitter
+from open_webui.retrieval.loaders.executor import ExtractionExecutor
+from open_webui.retrieval.splitter import HEADERS_TO_SPLIT_ON, iter_split_documents
+
+DOCS = [
+    Document(
+        page_content="\n\n".join(
+            f"{'#' * (section % 3 + 1)} Section {section}\n\n"
+            + " ".join(f"word{doc}-{section}-{i}" for i in range(80))
+            for section in range(6)
+        ),
+        metadata={"source": f"doc{doc}.md"},
+    )
+    for doc in range(12)
+]
+
+
+def split_directly(docs, text_splitter):
+    if text_splitter == "character":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=200, chunk_overlap=20, add_start_index=True
+        ).split_documents(docs)
+    if text_splitter == "token":
+        return TokenTextSplitter(
+            chunk_size=50, chunk_overlap=5, add_start_index=True
+        ).split_documents(docs)
+
+    splits = []
+    for doc in docs:
+        md_splits = MarkdownHeaderTextSplitter(
+            headers_to_split_on=HEADERS_TO_SPLIT_ON, strip_headers=False
+        ).split_text(doc.page_content)
+        for chunk in RecursiveCharacterTextSplitter(
+            chunk_size=200, chunk_overlap=20, add_start_index=True
+        ).split_documents(md_splits):
+            splits.append(
+                Document(
+                    page_content=chunk.page_content,
+                    metadata={
+                        **doc.metadata,
+                        "headings": [
+                            chunk.metadata[key]
+                            for _, key in HEADERS_TO_SPLIT_ON
+                            if key in chunk.metadata
+                        ],
+                    },
+                )
+            )
+    return splits
+
+
+def split(text_splitter):
+    chunk_size, chunk_overlap = (50, 5) if text_splitter == "token" else (200, 20)
+    return list(iter_split_documents(DOCS, text_splitter, chunk_size, chunk_overlap))
+
+
+@pytest.mark.parametrize("text_splitter", ["character", "token", "markdown_header"])
+def test_matches_langchain_splitters(text_splitter):
+    assert split(text_splitter) == split_directly(DOCS, text_splitter)
+
+
+@pytest.mark.parametrize("text_splitter", ["character", "token", "markdown_header"])
+def test_parallel_split_matches_inline_split(monkeypatch, text_splitter):
+    executor = ExtractionExecutor(workers=2)
+    monkeypatch.setattr(splitter, "extraction_executor", executor)
+    # Every document in a batch of its own
+    monkeypatch.setattr(splitter, "PARALLEL_SPLIT_BATCH_SIZE", 1)
+    try:
+        assert split(text_splitter) == split_directly(DOCS, text_splitter)
+    finally:
+        executor.shutdown()
+
+
+def test_invalid_splitter():
+    with pytest.raises(ValueError):
+        list(iter_split_documents(DOCS, "sentence", 200, 20))
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+from open_webui.storage.cache import StorageCache
+
+
+def make_download(content: bytes, calls: list):
+    def download(path):
+        calls.append(path)
+        time.sleep(0.05)
+        with open(path, "wb") as f:
+            f.write(content)
+
+    return download
+
+
+class TestStorageCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return StorageCache(
+            str(tmp_path / "index" / "index.sqlite3"), max_size=25, max_age=3600
+        )
+
+    def test_fetch_reuses_matching_etag(self, cache, tmp_path):
+        calls = []
+        path = str(tmp_path / "a")
+        assert cache.fetch("s3://b/a", "e1", path, make_download(b"a" * 10, calls))
+        cache.fetch("s3://b/a", "e1", path, make_download(b"a" * 10, calls))
+        assert len(calls) == 1
+
+        cache.fetch("s3://b/a", "e2", path, make_download(b"b" * 10, calls))
+        assert len(calls) == 2
+        assert open(path, "rb").read() == b"b" * 10
+
+    def test_concurrent_fetches_download_once(self, cache, tmp_path):
+        calls = []
+        path = str(tmp_path / "a")
+        threads = [
+            threading.Thread(
+                target=cache.fetch,
+                args=("s3://b/a", "e1", path, make_download(b"a" * 10, calls)),
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+
+    def test_evicts_least_recently_used(self, cache, tmp_path):
+        calls = []
+        for name in ("a", "b"):
+            cache.fetch(
+                name, "e", str(tmp_path / name), make_download(b"x" * 10, calls)
+            )
+        cache.fetch("a", "e", str(tmp_path / "a"), make_download(b"x" * 10, calls))
+        cache.fetch("c", "e", str(tmp_path / "c"), make_download(b"x" * 10, calls))
+
+        assert (tmp_path / "a").exists()
+        assert not (tmp_path / "b").exists()
+        assert (tmp_path / "c").exists()
+
+    def test_failed_download_leaves_no_file(self, cache, tmp_path):
+        def download(path):
+            open(path, "wb").write(b"partial")
+            raise RuntimeError("connection reset")
+
+        with pytest.raises(RuntimeError):
+            cache.fetch("a", "e", str(tmp_path / "a"), download)
+        assert [p.name for p in tmp_path.iterdir()] == ["index"]
+
+    def test_never_evicts_the_fetched_object(self, cache, tmp_path):
+        calls = []
+        path = str(tmp_path / "big")
+        assert cache.fetch("big", "e", path, make_download(b"x" * 30, calls)) == path
+        assert open(path, "rb").read() == b"x" * 30
+
+        # Over budget already, the next fetch evicts the big object but not itself
+        cache.fetch("a", "e", str(tmp_path / "a"), make_download(b"x" * 10, calls))
+        assert not (tmp_path / "big").exists()
+        assert (tmp_path / "a").exists()
+
+        cache.max_size = 5
+        cache.fetch("b", "e", str(tmp_path / "b"), make_download(b"x" * 10, calls))
+        assert not (tmp_path / "a").exists()
+        assert (tmp_path / "b").exists()
@@ -1,3 +1,4 @@
+import hashlib
 import io
 import os
 import boto3
@@ -74,6 +75,20 @@ class TestLocalStorageProvider:
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
 
+    def test_upload_file_stream(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        file_path, size, sha256 = self.Storage.upload_file_stream(
+            io.BytesIO(self.file_content), self.filename, {}
+        )
+        assert file_path == str(upload_dir / self.filename)
+        assert (upload_dir / self.filename).read_bytes() == self.file_content
+        assert size == len(self.file_content)
+        assert sha256 == hashlib.sha256(self.file_content).hexdigest()
+        assert os.listdir(upload_dir) == [self.filename]
+        with pytest.raises(ValueError):
+            self.Storage.upload_file_stream(io.BytesIO(), self.filename_extra, {})
+        assert not (upload_dir / self.filename_extra).exists()
+
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         file_path = str(upload_dir / self.filename)
@@ -129,6 +144,21 @@ class TestS3StorageProvider:
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
 
+    def test_upload_file_stream(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
+        # Large enough for a multipart upload
+        file_content = os.urandom(provider.UPLOAD_PART_SIZE * 2 + 1)
+        s3_file_path, size, sha256 = self.Storage.upload_file_stream(
+            io.BytesIO(file_content), self.filename, {}
+        )
+        object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
+        assert file_content == object.get()["Body"].read()
+        assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
+        assert size == len(file_content)
+        assert sha256 == hashlib.sha256(file_content).hexdigest()
+        assert (upload_dir / self.filename).read_bytes() == file_content
+
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
@@ -0,0 +1,126 @@
+"""
+Compares splitting a markdown corpus with a fresh langchain splitter (as
+save_docs_to_vector_db did) against the cached, parallel splitter stage.
+
+    python -m open_webui.test.benchmarks.splitter --size-mb 100 --splitter token
+"""
+
+import argparse
+import random
+import time
+
+from langchain.text_splitter import RecursiveCharacterTextSplitter, TokenTextSplitter
+from langchain_core.documents import Document
+from langchain_text_splitters import MarkdownHeaderTextSplitter
+
+from open_webui.retrieval.loaders.executor import extraction_executor
+from open_webui.retrieval.splitter import (
+    HEADERS_TO_SPLIT_ON,
+    iter_split_documents,
+    split_documents,
+)
+
+WORDS = (
+    "the model retrieval document embedding vector query answer context chunk "
+    "token index search result source page section table figure value"
+).split()
+
+
+def generate_corpus(size_mb: int, doc_size_kb: int = 256) -> list[Document]:
+    rng = random.Random(0)
+    docs = []
+    for n in range(size_mb * 1024 // doc_size_kb):
+        sections = []
+        length = 0
+        while length < doc_size_kb * 1024:
+            heading = "#" * rng.randint(1, 4) + f" Section {len(sections)}"
+            paragraphs = "\n\n".join(
+                " ".join(rng.choices(WORDS, k=rng.randint(20, 120)))
+                for _ in range(rng.randint(1, 6))
+            )
+            sections.append(f"{heading}\n\n{paragraphs}")
+            length += len(sections[-1])
+        docs.append(
+            Document(page_content="\n\n".join(sections), metadata={"source": f"{n}.md"})
+        )
+    return docs
+
+
+def split_uncached(docs, text_splitter, chunk_size, chunk_overlap):
+    if text_splitter == "character":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+        ).split_documents(docs)
+    if text_splitter == "token":
+        return TokenTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+        ).split_documents(docs)
+
+    splits = []
+    markdown_splitter = MarkdownHeaderTextSplitter(
+        headers_to_split_on=HEADERS_TO_SPLIT_ON, strip_headers=False
+    )
+    for doc in docs:
+        md_header_splits = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size, chunk_overlap=chunk_overlap, add_start_index=True
+        ).split_documents(markdown_splitter.split_text(doc.page_content))
+        for chunk in md_header_splits:
+            headings = [
+                chunk.metadata[key]
+                for _, key in HEADERS_TO_SPLIT_ON
+                if key in chunk.metadata
+            ]
+            splits.append(
+                Document(
+                    page_content=chunk.page_content,
+                    metadata={**doc.metadata, "headings": headings},
+                )
+            )
+    return splits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument(
+        "--splitter",
+        choices=["character", "token", "markdown_header"],
+        default="markdown_header",
+    )
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--chunk-overlap", type=int, default=100)
+    args = parser.parse_args()
+
+    docs = generate_corpus(args.size_mb)
+    print(f"{len(docs)} documents, {sum(len(d.page_content) for d in docs):,} chars")
+    split_args = (args.splitter, args.chunk_size, args.chunk_overlap)
+
+    start = time.perf_counter()
+    expected = split_uncached(docs, *split_args)
+    print(f"uncached, sequential: {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    assert split_documents(docs, *split_args) == expected, "splits differ"
+    print(f"cached, sequential: {time.perf_counter() - start:.2f}s")
+
+    try:
+        start = time.perf_counter()
+        first_split = None
+        splits = []
+        for split in iter_split_documents(docs, *split_args):
+            if first_split is None:
+                first_split = time.perf_counter() - start
+            splits.append(split)
+        print(
+            f"cached, {extraction_executor.workers} workers: "
+            f"{time.perf_counter() - start:.2f}s (first split after {first_split:.2f}s)"
+        )
+    finally:
+        extraction_executor.shutdown()
+
+    assert splits == expected, "splits differ"
+    print(f"{len(splits)} identical splits")
+
+
+if __name__ == "__main__":
+    main()
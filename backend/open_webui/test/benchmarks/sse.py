@@ -0,0 +1,114 @@
+"""
+Compares parsing an OpenAI-style chat completion stream line by line as text
+with json.loads (as stream_body_handler did) against SSEDecoder and orjson.
+
+    python -m open_webui.test.benchmarks.sse --events 200000 --chunk-size 1024
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import aiohttp
+from aiohttp import web
+
+from open_webui.utils import sse
+
+
+def generate_stream(events: int) -> bytes:
+    lines = []
+    for n in range(events):
+        data = {
+            "id": "chatcmpl-0",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "model",
+            "choices": [
+                {"index": 0, "delta": {"content": f"token {n} "}, "finish_reason": None}
+            ],
+        }
+        lines.append(f"data: {json.dumps(data)}\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+async def start_upstream(body: bytes, chunk_size: int) -> tuple[web.AppRunner, str]:
+    async def completions(request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for start in range(0, len(body), chunk_size):
+            await response.write(body[start : start + chunk_size])
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/chat/completions", completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}/chat/completions"
+
+
+async def parse_text(content) -> int:
+    events = 0
+    # Relies on the proxy handing over whole lines, as iterating r.content does
+    async for line in content:
+        line = line.decode("utf-8", "replace").strip()
+        if not line or not line.startswith("data:"):
+            continue
+        data = line[len("data:") :].strip()
+        if data == "[DONE]":
+            continue
+        json.loads(data)
+        events += 1
+    return events
+
+
+async def parse_bytes(content) -> int:
+    events = 0
+    async for data in sse.SSEDecoder().iter_payloads(content.iter_any()):
+        if data == sse.DONE:
+            continue
+        sse.loads(data)
+        events += 1
+    return events
+
+
+async def run(events: int, chunk_size: int):
+    body = generate_stream(events)
+    print(f"{events} events, {len(body):,} bytes in {chunk_size} byte chunks")
+    runner, url = await start_upstream(body, chunk_size)
+    try:
+        async with aiohttp.ClientSession() as session:
+            for name, parse in (
+                ("text + json", parse_text),
+                ("bytes + orjson", parse_bytes),
+            ):
+                async with session.post(url) as r:
+                    start = time.perf_counter()
+                    cpu_start = time.process_time()
+                    parsed = await parse(r.content)
+                    elapsed = time.perf_counter() - start
+                    cpu = time.process_time() - cpu_start
+                print(
+                    f"{name}: {parsed} events in {elapsed:.2f}s, "
+                    f"{parsed / cpu:,.0f} events/s per core"
+                )
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.events, args.chunk_size))
+
+
+if __name__ == "__main__":
+    main()
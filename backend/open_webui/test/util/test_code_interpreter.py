@@ -0,0 +1,143 @@
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+import requests
+from open_webui.utils.code_interpreter import JupyterKernelPool
+
+pytest.importorskip("jupyter_server")
+pytest.importorskip("ipykernel")
+
+
+@pytest.fixture(scope="module")
+def jupyter(tmp_path_factory):
+    """A local Jupyter server signed into with a token."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    token = uuid.uuid4().hex
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "jupyter_server",
+            "--no-browser",
+            "--allow-root",
+            f"--port={port}",
+            "--ip=127.0.0.1",
+            f"--IdentityProvider.token={token}",
+            f"--ServerApp.root_dir={tmp_path_factory.mktemp('jupyter')}",
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                requests.get(f"{base_url}/api/status", params={"token": token})
+                break
+            except requests.ConnectionError:
+                if time.monotonic() > deadline or process.poll() is not None:
+                    pytest.skip("the Jupyter server did not start")
+                time.sleep(0.2)
+        yield base_url, token
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def kernel_ids(jupyter):
+    base_url, token = jupyter
+    response = requests.get(f"{base_url}/api/kernels", params={"token": token})
+    return {kernel["id"] for kernel in response.json()}
+
+
+def run(pool, jupyter, steps):
+    """
+    Run `(code, chat_id, timeout)` steps in one event loop, then close `pool`
+    and check that it shut down every kernel it started.
+    """
+    base_url, token = jupyter
+    before = kernel_ids(jupyter)
+
+    async def main():
+        try:
+            results = []
+            for code, chat_id, timeout in steps:
+                results.append(
+                    await pool.execute(
+                        base_url, code, token, timeout=timeout, chat_id=chat_id
+                    )
+                )
+                # Let the background shutdowns and refills run
+                await asyncio.sleep(0.5)
+            return results
+        finally:
+            await pool.close()
+
+    results = asyncio.run(main())
+    assert kernel_ids(jupyter) == before
+    return results
+
+
+class TestJupyterKernelPool:
+    def test_execution_isolation_uses_a_fresh_kernel(self, jupyter):
+        pool = JupyterKernelPool(size=1, isolation="execution")
+
+        first, second = run(
+            pool,
+            jupyter,
+            [("x = 1\nprint(x)", "c", 30), ("print(x)", "c", 30)],
+        )
+        assert first.stdout == "1"
+        assert "NameError" in second.stderr
+
+    def test_chat_isolation_keeps_the_chat_kernel(self, jupyter):
+        pool = JupyterKernelPool(size=1, isolation="chat", max_memory_mb=0)
+
+        results = run(
+            pool,
+            jupyter,
+            [
+                ("x = 1", "a", 30),
+                ("x = 2", "b", 30),
+                ("print(x)", "a", 30),
+                ("print(x)", "b", 30),
+                ("print(x)", None, 30),
+            ],
+        )
+        assert [result.stdout for result in results[2:4]] == ["1", "2"]
+        # Without a chat the execution gets a fresh kernel
+        assert "NameError" in results[4].stderr
+
+    def test_timed_out_kernel_is_replaced(self, jupyter):
+        pool = JupyterKernelPool(size=1, isolation="chat", max_memory_mb=0)
+
+        results = run(
+            pool,
+            jupyter,
+            [
+                ("x = 1", "a", 30),
+                ("import time\ntime.sleep(30)", "a", 1),
+                ("print(x)", "a", 30),
+            ],
+        )
+        assert "Execution timed out." in results[1].stderr
+        # A new kernel, not the one still sleeping, ran the next execution
+        assert "NameError" in results[2].stderr
+
+    def test_kernel_over_the_memory_limit_is_replaced(self, jupyter):
+        # Any kernel's peak RSS is above 1 MB
+        pool = JupyterKernelPool(size=1, isolation="chat", max_memory_mb=1)
+
+        first, second = run(
+            pool, jupyter, [("x = 1\nprint(x)", "a", 30), ("print(x)", "a", 30)]
+        )
+        assert first.stdout == "1"
+        assert "NameError" in second.stderr
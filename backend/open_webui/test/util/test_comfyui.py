@@ -0,0 +1,228 @@
+import asyncio
+import json
+
+from aiohttp import web
+from open_webui.utils.images import comfyui
+from open_webui.utils.images.comfyui import (
+    ComfyUIGenerateImageForm,
+    ComfyUIWorkflow,
+    close_comfyui_clients,
+    comfyui_generate_image,
+)
+
+WORKFLOW = {"3": {"inputs": {"seed": 0, "text": ""}}}
+
+
+class FakeComfyUI:
+    """Queues prompts and reports them done over the client's websocket."""
+
+    def __init__(self, status=200, error=None, hang=False):
+        self.prompts = []
+        self.sockets = {}
+        self.status = status
+        self.error = error
+        self.hang = hang
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/ws", self.ws)
+        app.router.add_post("/prompt", self.prompt)
+        app.router.add_get("/history/{prompt_id}", self.history)
+        return app
+
+    async def ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets[request.query["clientId"]] = ws
+        async for _ in ws:
+            pass
+        return ws
+
+    async def prompt(self, request):
+        if self.status != 200:
+            return web.json_response({"error": "failed"}, status=self.status)
+
+        data = await request.json()
+        prompt_id = f"p{len(self.prompts)}"
+        self.prompts.append(data["prompt"])
+
+        async def run():
+            await asyncio.sleep(0.01)
+            if self.error:
+                message = {
+                    "type": "execution_error",
+                    "data": {"prompt_id": prompt_id, "exception_message": self.error},
+                }
+            else:
+                message = {
+                    "type": "executing",
+                    "data": {"node": None, "prompt_id": prompt_id},
+                }
+            await self.sockets[data["client_id"]].send_str(json.dumps(message))
+
+        if not self.hang:
+            asyncio.create_task(run())
+        return web.json_response({"prompt_id": prompt_id})
+
+    async def history(self, request):
+        prompt_id = request.match_info["prompt_id"]
+        image = {"filename": f"{prompt_id}.png", "subfolder": "", "type": "output"}
+        return web.json_response(
+            {prompt_id: {"outputs": {"9": {"images": [image]}}, "status": {}}}
+        )
+
+
+def make_form(seed=None):
+    return ComfyUIGenerateImageForm(
+        workflow=ComfyUIWorkflow(
+            workflow=json.dumps(WORKFLOW),
+            nodes=[
+                {"type": "prompt", "node_ids": ["3"]},
+                {"type": "seed", "node_ids": ["3"], "key": "seed"},
+            ],
+        ),
+        prompt="a cat",
+        width=512,
+        height=512,
+        seed=seed,
+    )
+
+
+async def start(server: FakeComfyUI) -> tuple[web.AppRunner, str]:
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+class TestComfyUIClient:
+    def test_concurrent_prompts_share_one_websocket(self, monkeypatch):
+        monkeypatch.setattr(
+            comfyui, "comfyui_result_cache", comfyui.ComfyUIResultCache()
+        )
+        server = FakeComfyUI()
+
+        async def run():
+            runner, url = await start(server)
+            try:
+                results = await asyncio.gather(
+                    *[
+                        comfyui_generate_image("model", make_form(), "user", url, "")
+                        for _ in range(5)
+                    ]
+                )
+            finally:
+                await close_comfyui_clients()
+                await runner.cleanup()
+            return results
+
+        results = asyncio.run(run())
+        assert len(server.sockets) == 1
+        assert len(server.prompts) == 5
+        assert len({result["data"][0]["url"] for result in results}) == 5
+
+    def test_identical_seeded_requests_are_generated_once(self, monkeypatch):
+        monkeypatch.setattr(
+            comfyui, "comfyui_result_cache", comfyui.ComfyUIResultCache()
+        )
+        server = FakeComfyUI()
+
+        async def run():
+            runner, url = await start(server)
+            try:
+                first = await comfyui_generate_image(
+                    "model", make_form(seed=42), "user", url, ""
+                )
+                second = await comfyui_generate_image(
+                    "model", make_form(seed=42), "user", url, ""
+                )
+                other = await comfyui_generate_image(
+                    "model", make_form(seed=7), "user", url, ""
+                )
+            finally:
+                await close_comfyui_clients()
+                await runner.cleanup()
+            return first, second, other
+
+        first, second, other = asyncio.run(run())
+        assert first == second
+        assert other != first
+        assert len(server.prompts) == 2
+
+    def test_prompts_go_to_the_shortest_queue(self):
+        server = FakeComfyUI()
+
+        async def run():
+            runners, urls = [], []
+            for _ in range(2):
+                runner, url = await start(server)
+                runners.append(runner)
+                urls.append(url)
+            try:
+                # The first server is busy with prompts from other clients
+                comfyui.get_comfyui_client(urls[0]).queue_remaining = 10
+                result = await comfyui_generate_image(
+                    "model", make_form(), "user", ";".join(urls), ""
+                )
+            finally:
+                await close_comfyui_clients()
+                for runner in runners:
+                    await runner.cleanup()
+            return urls, result
+
+        urls, result = asyncio.run(run())
+        assert result["data"][0]["url"].startswith(urls[1])
+
+    def test_only_server_errors_count_as_failures(self, monkeypatch):
+        monkeypatch.setattr(
+            comfyui, "comfyui_result_cache", comfyui.ComfyUIResultCache()
+        )
+        servers = {
+            "execution_error": FakeComfyUI(error="Out of memory"),
+            "bad_request": FakeComfyUI(status=400),
+            "cancelled": FakeComfyUI(hang=True),
+            "server_error": FakeComfyUI(status=500),
+        }
+
+        async def run():
+            runners, urls = [], {}
+            for name, server in servers.items():
+                runner, urls[name] = await start(server)
+                runners.append(runner)
+            try:
+                for name in ("execution_error", "bad_request", "server_error"):
+                    result = await comfyui_generate_image(
+                        "model", make_form(), "user", urls[name], ""
+                    )
+                    assert result is None
+                try:
+                    await asyncio.wait_for(
+                        comfyui_generate_image(
+                            "model", make_form(), "user", urls["cancelled"], ""
+                        ),
+                        0.2,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                await close_comfyui_clients()
+                for runner in runners:
+                    await runner.cleanup()
+            return urls
+
+        urls = asyncio.run(run())
+        failures = {
+            name: comfyui.comfyui_router._stats(url).failures
+            for name, url in urls.items()
+        }
+        assert failures == {
+            "execution_error": 0,
+            "bad_request": 0,
+            "cancelled": 0,
+            "server_error": 1,
+        }
+        assert all(
+            comfyui.comfyui_router._stats(url).in_flight == 0 for url in urls.values()
+        )
@@ -0,0 +1,149 @@
+import threading
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from open_webui.models import files as files_model
+from open_webui.models.files import File, FileForm, Files
+from open_webui.utils import file_dedup
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Query, sessionmaker
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'webui.db'}")
+    File.__table__.create(engine)
+    SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(files_model, "get_db", get_db)
+    return get_db
+
+
+@pytest.fixture
+def storage(monkeypatch):
+    storage = SimpleNamespace(deleted=[])
+    monkeypatch.setattr(
+        file_dedup,
+        "Storage",
+        SimpleNamespace(delete_file=lambda path: storage.deleted.append(path)),
+    )
+    return storage
+
+
+def upload(id, content_hash="h", **data):
+    return Files.insert_new_deduplicated_file(
+        "u",
+        FileForm(
+            id=id,
+            filename=f"{id}.txt",
+            path=f"/uploads/{id}",
+            content_hash=content_hash,
+            data=data,
+            meta={"name": f"{id}.txt"},
+        ),
+    )
+
+
+def delete(file):
+    assert Files.delete_file_by_id(file.id)
+    file_dedup.release_file_storage(file)
+
+
+class TestStoredDuplicates:
+    def test_upload_shares_the_oldest_object(self, db):
+        first = upload("a")
+        assert first.path == "/uploads/a"
+        assert upload("b").path == "/uploads/a"
+        assert upload("c", content_hash="other").path == "/uploads/c"
+
+        assert Files.get_file_paths_by_content_hash("h") == {
+            "a": "/uploads/a",
+            "b": "/uploads/a",
+        }
+
+    def test_object_is_kept_until_the_last_file_is_deleted(self, db, storage):
+        first, second = upload("a"), upload("b")
+
+        delete(first)
+        assert storage.deleted == []
+        delete(second)
+        assert storage.deleted == ["/uploads/a"]
+
+    def test_delete_before_the_upload_commits(self, db, storage):
+        first = upload("a")
+        delete(first)
+
+        # The upload keeps its own object, the deleted one is gone
+        assert upload("b").path == "/uploads/b"
+        assert storage.deleted == ["/uploads/a"]
+
+    def test_concurrent_delete_waits_for_the_upload(self, db, storage, monkeypatch):
+        first = upload("a")
+        found = threading.Event()
+        first_row = Query.first
+
+        def find_and_wait(query):
+            row = first_row(query)
+            found.set()
+            # The delete below starts once the upload has found the duplicate
+            time.sleep(0.2)
+            return row
+
+        monkeypatch.setattr(Query, "first", find_and_wait)
+        thread = threading.Thread(target=upload, args=("b",))
+        thread.start()
+        assert found.wait(timeout=5)
+        delete(first)
+        thread.join()
+
+        assert storage.deleted == []
+        assert Files.get_file_by_id("b").path == "/uploads/a"
+
+
+class TestProcessedDuplicates:
+    def test_reuses_a_completed_file_of_the_collection(self, db):
+        upload("a", status="pending")
+        Files.update_file_metadata_by_id("a", {"collection_name": "file-shared-1"})
+        second = upload("b", status="pending")
+
+        assert file_dedup.get_processed_duplicate(second, "file-shared-1") is None
+
+        Files.update_file_data_by_id("a", {"status": "completed", "content": "text"})
+        duplicate = file_dedup.get_processed_duplicate(second, "file-shared-1")
+        assert duplicate.id == "a"
+        assert duplicate.data["content"] == "text"
+        assert file_dedup.get_processed_duplicate(second, "file-shared-2") is None
+
+    def test_shared_collection_is_dropped_with_the_last_file(self, db, monkeypatch):
+        dropped = []
+        monkeypatch.setattr(
+            file_dedup,
+            "VECTOR_DB_CLIENT",
+            SimpleNamespace(
+                has_collection=lambda collection_name: True,
+                delete_collection=lambda collection_name: dropped.append(
+                    collection_name
+                ),
+            ),
+        )
+        files = [upload(id) for id in ("a", "b")]
+        for file in files:
+            Files.update_file_metadata_by_id(
+                file.id, {"collection_name": "file-shared-1"}
+            )
+        files = [Files.get_file_by_id(file.id) for file in files]
+
+        for file in files:
+            Files.delete_file_by_id(file.id)
+            file_dedup.release_file_collection(file)
+        assert dropped == ["file-shared-1"]
@@ -0,0 +1,114 @@
+import asyncio
+import json
+import threading
+
+from open_webui.utils import file_status
+from open_webui.utils.file_status import REDIS_FILE_STATUS_CHANNEL, FileStatusBroker
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.closed = False
+
+    async def subscribe(self, channel):
+        self.redis.subscriptions.append(channel)
+
+    async def listen(self):
+        if len(self.redis.subscriptions) == 1:
+            raise ConnectionError("Connection reset by peer")
+        yield {"type": "subscribe", "data": 1}
+        while True:
+            yield await self.redis.messages.get()
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeRedis:
+    """An async client whose first subscription drops."""
+
+    def __init__(self):
+        self.subscriptions = []
+        self.published = []
+        self.messages = asyncio.Queue()
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    async def publish(self, channel, message):
+        await asyncio.sleep(0)
+        self.published.append((channel, json.loads(message)))
+
+
+async def wait_for(condition, timeout=2):
+    async def poll():
+        while not condition():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(poll(), timeout)
+
+
+class TestFileStatusBroker:
+    def test_relays_events_in_order_from_threads(self):
+        broker = FileStatusBroker()
+        redis = FakeRedis()
+
+        async def run():
+            await broker.start(redis)
+            queue = broker.subscribe("f")
+
+            def process():
+                for stage in ("extract", "embed", "completed"):
+                    broker.publish("f", "u", {"status": stage})
+
+            thread = threading.Thread(target=process)
+            thread.start()
+            thread.join()
+
+            # Stopping relays what is still queued
+            await broker.stop()
+            return [queue.get_nowait() for _ in range(3)]
+
+        local = asyncio.run(run())
+        expected = [{"status": s} for s in ("extract", "embed", "completed")]
+        assert local == expected
+        assert [channel for channel, _ in redis.published] == [
+            REDIS_FILE_STATUS_CHANNEL
+        ] * 3
+        assert [payload["data"] for _, payload in redis.published] == expected
+
+    def test_listener_resubscribes_after_losing_redis(self, monkeypatch):
+        monkeypatch.setattr(file_status, "REDIS_RECONNECT_DELAY", 0)
+        broker = FileStatusBroker()
+        redis = FakeRedis()
+
+        async def run():
+            await broker.start(redis)
+            queue = broker.subscribe("f")
+            await wait_for(lambda: len(redis.subscriptions) == 2)
+
+            for origin in (broker.origin, "other"):
+                redis.messages.put_nowait(
+                    {
+                        "type": "message",
+                        "data": json.dumps(
+                            {
+                                "origin": origin,
+                                "file_id": "f",
+                                "user_id": "u",
+                                "data": {"status": origin},
+                            }
+                        ),
+                    }
+                )
+            event = await asyncio.wait_for(queue.get(), 2)
+            tasks = set(broker._tasks)
+            await broker.stop()
+            await asyncio.sleep(0)
+            return event, tasks
+
+        event, tasks = asyncio.run(run())
+        # Events this process published are not delivered twice
+        assert event == {"status": "other"}
+        assert tasks and all(task.done() for task in tasks)
@@ -0,0 +1,221 @@
+import asyncio
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from pydantic import BaseModel
+from open_webui.models import tools as tools_model
+from open_webui.models.tools import ToolForm, Tools
+from open_webui.utils import filter as filter_utils
+from open_webui.utils import plugin
+from open_webui.utils.filter import FilterChain, compile_filter_chain
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+
+class AppendFilter:
+    """A filter module whose handlers append their valves' suffix to the body."""
+
+    class Valves(BaseModel):
+        suffix: str = ""
+
+    class UserValves(BaseModel):
+        name: str = "anonymous"
+
+    def __init__(self):
+        self.valves = self.Valves()
+
+    def inlet(self, body, __user__):
+        body["text"] += self.valves.suffix + ":" + __user__["valves"].name
+        return body
+
+    async def outlet(self, body):
+        body["text"] += self.valves.suffix
+        return body
+
+
+class FileFilter:
+    file_handler = True
+
+    def inlet(self, body):
+        return body
+
+
+@pytest.fixture
+def modules(monkeypatch):
+    modules = {}
+    valves = {}
+    loads = []
+
+    def get_function_module_for(request, function):
+        loads.append((function.id, function.updated_at))
+        return modules[function.id]()
+
+    monkeypatch.setattr(filter_utils, "_compiled_filters", {})
+    monkeypatch.setattr(
+        filter_utils, "get_function_module_for", get_function_module_for
+    )
+    monkeypatch.setattr(
+        filter_utils.Functions,
+        "get_function_valves_by_id",
+        lambda function_id: valves.get(function_id),
+    )
+    return SimpleNamespace(modules=modules, valves=valves, loads=loads)
+
+
+def make_function(function_id, updated_at=1):
+    return SimpleNamespace(id=function_id, updated_at=updated_at)
+
+
+class TestCompileFilterChain:
+    def test_chain_runs_handlers_in_order(self, modules):
+        modules.modules.update({"a": AppendFilter, "b": AppendFilter})
+        modules.valves.update({"a": {"suffix": "-a"}, "b": {"suffix": "-b"}})
+        user = {"id": "u", "settings": {"functions": {"valves": {"b": {"name": "x"}}}}}
+
+        chain = compile_filter_chain(
+            None, [make_function("a"), None, make_function("b")], "inlet", user
+        )
+        form_data, _ = asyncio.run(chain.run({"text": ""}, {"__user__": {"id": "u"}}))
+        assert form_data == {"text": "-a:anonymous-b:x"}
+
+        outlet = compile_filter_chain(None, [make_function("a")], "outlet")
+        form_data, _ = asyncio.run(outlet.run({"text": ""}, {}))
+        assert form_data == {"text": "-a"}
+
+    def test_missing_handlers_make_an_empty_chain(self, modules):
+        modules.modules["f"] = FileFilter
+        chain = compile_filter_chain(None, [make_function("f")], "outlet")
+
+        assert isinstance(chain, FilterChain)
+        assert not chain
+
+    def test_file_handler_drops_files(self, modules):
+        modules.modules["f"] = FileFilter
+        chain = compile_filter_chain(None, [make_function("f")], "inlet")
+
+        form_data, _ = asyncio.run(
+            chain.run({"files": [1], "metadata": {"files": [1]}}, {})
+        )
+        assert form_data == {"metadata": {}}
+
+    def test_compiled_filters_follow_updated_at(self, modules):
+        modules.modules["a"] = AppendFilter
+        modules.valves["a"] = {"suffix": "-1"}
+
+        compile_filter_chain(None, [make_function("a", 1)], "outlet")
+        compile_filter_chain(None, [make_function("a", 1)], "outlet")
+        assert modules.loads == [("a", 1)]
+
+        # A save in the same second still gets a new stamp
+        modules.valves["a"] = {"suffix": "-2"}
+        chain = compile_filter_chain(None, [make_function("a", 2)], "outlet")
+        assert modules.loads == [("a", 1), ("a", 2)]
+
+        form_data, _ = asyncio.run(chain.run({"text": ""}, {}))
+        assert form_data == {"text": "-2"}
+
+
+class TestGetFunctionModuleFor:
+    def test_edited_function_is_reloaded(self, monkeypatch):
+        loaded = []
+
+        def load_function_module(request, function):
+            loaded.append(function.updated_at)
+            state.FUNCTIONS[function.id] = f"module {function.updated_at}"
+            state.FUNCTION_VERSIONS[function.id] = function.updated_at
+            return state.FUNCTIONS[function.id], "filter", {}
+
+        def get_function_module(request, function_id):
+            raise AssertionError("The lagged version snapshot was consulted")
+
+        monkeypatch.setattr(filter_utils, "load_function_module", load_function_module)
+        monkeypatch.setattr(filter_utils, "get_function_module", get_function_module)
+        state = SimpleNamespace(FUNCTIONS={"a": "module 1"}, FUNCTION_VERSIONS={"a": 1})
+        request = SimpleNamespace(app=SimpleNamespace(state=state))
+
+        get_module = filter_utils.get_function_module_for
+        assert get_module(request, make_function("a", 1)) == "module 1"
+        assert get_module(request, make_function("a", 2)) == "module 2"
+        assert get_module(request, make_function("a", 2)) == "module 2"
+        assert loaded == [2]
+
+    def test_module_is_reused_while_its_source_is_unchanged(self, monkeypatch):
+        loaded = []
+
+        def load_function_module_by_id(function_id, content):
+            loaded.append(content)
+            return f"module {len(loaded)}", "filter", {}
+
+        monkeypatch.setattr(
+            plugin, "load_function_module_by_id", load_function_module_by_id
+        )
+        request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+
+        def load(updated_at, content):
+            function = SimpleNamespace(id="a", updated_at=updated_at, content=content)
+            return plugin.load_function_module(request, function)[0]
+
+        assert load(1, "v1") == "module 1"
+        # Valve saves and toggles bump the stamp only
+        assert load(2, "v1") == "module 1"
+        assert request.app.state.FUNCTION_VERSIONS["a"] == 2
+        assert load(3, "v2") == "module 2"
+        assert loaded == ["v1", "v2"]
+
+
+TOOL_CONTENT = """
+class Tools:
+    def __init__(self):
+        self.version = {version}
+"""
+
+
+@pytest.fixture
+def tools_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'webui.db'}")
+    tools_model.Tool.__table__.create(engine)
+    SessionLocal = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        session = SessionLocal()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(tools_model, "get_db", get_db)
+    # Every save below lands in the same second
+    monkeypatch.setattr(tools_model, "time", SimpleNamespace(time=lambda: 1700000000.5))
+    monkeypatch.setattr(plugin, "PLUGIN_VERSION_CHECK_INTERVAL", -1)
+    return get_db
+
+
+class TestToolModuleCache:
+    def test_same_second_saves_reload_only_new_code(self, tools_db, monkeypatch):
+        executed = []
+        load_tool_module_by_id = plugin.load_tool_module_by_id
+
+        def record_load(tool_id, content=None):
+            executed.append(content)
+            return load_tool_module_by_id(tool_id, content)
+
+        monkeypatch.setattr(plugin, "load_tool_module_by_id", record_load)
+        request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace()))
+        form_data = ToolForm(
+            id="t", name="t", content=TOOL_CONTENT.format(version=1), meta={}
+        )
+        Tools.insert_new_tool("u", form_data, [])
+
+        assert plugin.get_tool_module_from_cache(request, "t").version == 1
+
+        tool = Tools.update_tool_by_id("t", {"content": TOOL_CONTENT.format(version=2)})
+        assert tool.updated_at == 1700000001
+        assert plugin.get_tool_module_from_cache(request, "t").version == 2
+
+        # A valve save gets a new stamp but leaves the loaded module in place
+        module = plugin.get_tool_module_from_cache(request, "t")
+        assert Tools.update_tool_valves_by_id("t", {"a": 1}).updated_at == 1700000002
+        assert plugin.get_tool_module_from_cache(request, "t") is module
+        assert len(executed) == 2
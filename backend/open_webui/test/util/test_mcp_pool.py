@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from open_webui.utils.mcp import pool
+from open_webui.utils.mcp.pool import MCPSessionPool
+
+
+class FakeClient:
+    connects = 0
+
+    def __init__(self):
+        self.connected = False
+        self.tool_spec_calls = 0
+
+    async def connect(self, url, headers=None, message_handler=None):
+        FakeClient.connects += 1
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def list_tool_specs(self):
+        self.tool_spec_calls += 1
+        return [{"name": "echo"}]
+
+    async def call_tool(self, function_name, function_args):
+        return [function_args]
+
+
+@pytest.fixture(autouse=True)
+def fake_client(monkeypatch):
+    FakeClient.connects = 0
+    monkeypatch.setattr(pool, "MCPClient", FakeClient)
+
+
+class TestMCPSessionPool:
+    def test_sessions_are_reused_across_requests(self):
+        sessions = MCPSessionPool()
+
+        async def run():
+            first = await sessions.get("http://mcp", {"Authorization": "Bearer a"})
+            assert await first.list_tool_specs() == [{"name": "echo"}]
+
+            second = await sessions.get("http://mcp", {"Authorization": "Bearer a"})
+            assert second is first
+            assert await second.list_tool_specs() == [{"name": "echo"}]
+            assert first.client.tool_spec_calls == 1
+
+            # Different credentials never share a session
+            other = await sessions.get("http://mcp", {"Authorization": "Bearer b"})
+            assert other is not first
+
+            await sessions.close()
+            assert first.closed and not first.client.connected
+
+        asyncio.run(run())
+        assert FakeClient.connects == 2
+
+    def test_closed_session_is_replaced(self):
+        sessions = MCPSessionPool()
+
+        async def run():
+            first = await sessions.get("http://mcp")
+            await first.close()
+
+            second = await sessions.get("http://mcp")
+            assert second is not first
+            assert await second.call_tool("echo", {"a": 1}) == [{"a": 1}]
+            await sessions.close()
+
+        asyncio.run(run())
+        assert FakeClient.connects == 2
+
+    def test_idle_sessions_are_closed(self):
+        sessions = MCPSessionPool(idle_timeout=0.01)
+
+        async def run():
+            session = await sessions.get("http://mcp")
+            await asyncio.sleep(0.05)
+            assert session.closed
+            assert sessions.sessions == {}
+
+        asyncio.run(run())
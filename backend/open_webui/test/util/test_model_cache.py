@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from open_webui.utils.model_cache import ModelListCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the cache's clock; the event loop keeps real time
+    monkeypatch.setattr(
+        "open_webui.utils.model_cache.time", SimpleNamespace(monotonic=clock)
+    )
+    return clock
+
+
+class Upstream:
+    def __init__(self):
+        self.fetches = 0
+
+    async def fetch(self):
+        self.fetches += 1
+        await asyncio.sleep(0.01)
+        return {"models": [self.fetches]}
+
+
+class TestModelListCache:
+    def test_concurrent_misses_fetch_once(self, clock):
+        cache = ModelListCache(ttl=10, max_stale=60)
+        upstream = Upstream()
+
+        async def run():
+            return await asyncio.gather(
+                *[cache.get("models", upstream.fetch) for _ in range(50)]
+            )
+
+        results = asyncio.run(run())
+        assert upstream.fetches == 1
+        assert all(result == {"models": [1]} for result in results)
+
+    def test_serves_stale_list_while_refreshing(self, clock):
+        cache = ModelListCache(ttl=10, max_stale=60)
+        upstream = Upstream()
+
+        async def run():
+            await cache.get("models", upstream.fetch)
+
+            clock.now += 11
+            assert await cache.get("models", upstream.fetch) == {"models": [1]}
+            assert await cache.get("models", upstream.fetch) == {"models": [1]}
+
+            await asyncio.sleep(0.05)
+            assert await cache.get("models", upstream.fetch) == {"models": [2]}
+
+        asyncio.run(run())
+        assert upstream.fetches == 2
+
+    def test_waits_for_refresh_when_too_stale(self, clock):
+        cache = ModelListCache(ttl=10, max_stale=60)
+        upstream = Upstream()
+
+        async def run():
+            await cache.get("models", upstream.fetch)
+            clock.now += 71
+            return await cache.get("models", upstream.fetch)
+
+        assert asyncio.run(run()) == {"models": [2]}
+
+    def test_failed_connection_keeps_last_response(self, clock):
+        cache = ModelListCache(ttl=10, max_stale=60)
+
+        async def response(value):
+            return value
+
+        async def run():
+            first = await cache.get_response("a", response({"data": ["m"]}))
+            # Modifying a response does not change the kept copy
+            first["data"].append("n")
+
+            assert await cache.get_response("a", response(None)) == {"data": ["m"]}
+
+            clock.now += 61
+            assert await cache.get_response("a", response(None)) is None
+
+        asyncio.run(run())
+
+    def test_last_responses_are_per_key_and_cleared(self, clock):
+        cache = ModelListCache(ttl=10, max_stale=60)
+
+        async def response(value):
+            return value
+
+        async def run():
+            await cache.get_response("all_models_u1:0", response({"data": ["u1"]}))
+            # Another user's list from the same connection is not a fallback
+            assert await cache.get_response("all_models_u2:0", response(None)) is None
+
+            # Nor is a list fetched before the connections were changed
+            cache.clear()
+            assert await cache.get_response("all_models_u1:0", response(None)) is None
+
+        asyncio.run(run())
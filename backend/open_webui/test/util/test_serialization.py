@@ -0,0 +1,91 @@
+import datetime
+import json
+import math
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from open_webui.utils import serialization
+from open_webui.utils.serialization import ORJSONResponse
+
+CHAT = {
+    "id": "c1",
+    "title": "Café ☕ 数据 🚀",
+    "history": {
+        "currentId": "m2",
+        "messages": {
+            "m1": {"role": "user", "content": 'say "hi"\n\t\\', "timestamp": 1},
+            "m2": {
+                "role": "assistant",
+                "content": " line separator</script>",
+                "usage": {"total_tokens": 12, "cost": 0.1 + 0.2},
+                "parentId": "m1",
+                "done": True,
+                "files": [],
+                "error": None,
+            },
+        },
+    },
+    "params": {"temperature": 0.7, "seed": 2**63 - 1, "min_p": 1e-07, "max": 1e300},
+    "tags": ["a", "b"],
+}
+
+
+def stdlib_roundtrip(value):
+    return json.loads(json.dumps(value))
+
+
+class TestSerialization:
+    def test_reads_what_json_dumps_wrote(self):
+        for value in (CHAT, [], {}, None, "", 0, -0.0, 1.5, [2**64 - 1]):
+            # Rows and keys written before orjson was used
+            assert serialization.loads(json.dumps(value)) == stdlib_roundtrip(value)
+            assert serialization.loads(json.dumps(value).encode()) == value
+
+    def test_roundtrip_matches_json(self):
+        assert serialization.loads(serialization.dumps(CHAT)) == stdlib_roundtrip(CHAT)
+        assert serialization.dumps(CHAT) == json.dumps(
+            CHAT, ensure_ascii=False, separators=(",", ":")
+        ).replace("1e-07", "1e-7")
+
+    def test_non_str_keys(self):
+        # True == 1, so the bool key gets a dict of its own
+        for value in ({1: "a", 2.5: "b", None: "d"}, {True: "c"}):
+            assert serialization.loads(serialization.dumps(value)) == stdlib_roundtrip(
+                value
+            )
+
+    def test_nan(self):
+        # Written by json.dumps
+        assert math.isnan(serialization.loads("NaN"))
+        assert serialization.loads('{"a": Infinity}') == {"a": math.inf}
+        # Strict parsers reject the NaN token, so it is written as null
+        assert serialization.dumps([math.nan, -math.inf]) == "[null,null]"
+
+    def test_datetime(self):
+        value = {
+            "created": datetime.datetime(2024, 1, 2, 3, 4, 5, 678),
+            "updated": datetime.datetime(2024, 1, 2, tzinfo=datetime.timezone.utc),
+            "date": datetime.date(2024, 1, 2),
+        }
+        assert serialization.loads(serialization.dumps(value)) == jsonable_encoder(
+            value
+        )
+
+    def test_values_orjson_cannot_encode(self):
+        for value in ({"big": 2**64}, {"text": "\ud83d"}):
+            assert serialization.dumps(value) == json.dumps(
+                value, separators=(",", ":")
+            )
+            assert serialization.loads(serialization.dumps(value)) == value
+
+
+class TestORJSONResponse:
+    def test_matches_json_response(self):
+        content = jsonable_encoder({**CHAT, 1: None})
+        response = ORJSONResponse(content)
+        assert json.loads(response.body) == json.loads(JSONResponse(content).body)
+        assert response.media_type == JSONResponse.media_type
+
+    def test_falls_back_to_json_response(self):
+        content = {"big": 2**64}
+        assert ORJSONResponse(content).body == JSONResponse(content).body
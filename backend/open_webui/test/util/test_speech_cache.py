@@ -0,0 +1,101 @@
+import asyncio
+import os
+import time
+
+import pytest
+from fastapi import HTTPException
+from open_webui.utils import speech_cache as speech_cache_module
+from open_webui.utils.speech_cache import SpeechCache, get_speech_response
+
+
+class FakeEngine:
+    """A TTS engine that yields its chunks once `release` is set."""
+
+    def __init__(self, chunks=(b"a", b"b"), media_type="audio/mpeg"):
+        self.chunks = chunks
+        self.media_type = media_type
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def stream(self, synthesis):
+        self.calls += 1
+        synthesis.media_type = self.media_type
+        yield self.chunks[0]
+        await self.release.wait()
+        for chunk in self.chunks[1:]:
+            yield chunk
+
+
+async def read(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = SpeechCache(tmp_path, max_size=10, max_age=60)
+    monkeypatch.setattr(speech_cache_module, "speech_cache", cache)
+    return cache
+
+
+class TestSpeechCache:
+    def test_identical_requests_share_the_synthesis(self, cache):
+        engine = FakeEngine(media_type="audio/wav")
+
+        async def run():
+            responses = [
+                await get_speech_response("clip", {"input": "hi"}, engine.stream)
+                for _ in range(2)
+            ]
+            engine.release.set()
+            return responses, await asyncio.gather(*map(read, responses))
+
+        responses, bodies = asyncio.run(run())
+        assert engine.calls == 1
+        assert bodies == [b"ab", b"ab"]
+        assert [r.media_type for r in responses] == ["audio/wav", "audio/wav"]
+        assert (cache.path / "clip.mp3").read_bytes() == b"ab"
+        assert cache.get("clip") == cache.path / "clip.mp3"
+
+    def test_errors_before_the_first_chunk_are_raised(self, cache):
+        async def stream(synthesis):
+            raise HTTPException(status_code=401, detail="External: bad key")
+            yield
+
+        with pytest.raises(HTTPException) as e:
+            asyncio.run(get_speech_response("clip", {}, stream))
+        assert e.value.status_code == 401
+        assert cache.get("clip") is None
+
+    def test_stop_cancels_running_syntheses(self, cache):
+        engine = FakeEngine()
+
+        async def run():
+            response = await get_speech_response("clip", {}, engine.stream)
+            tasks = set(cache._tasks)
+            body = asyncio.create_task(read(response))
+            await cache.stop()
+            with pytest.raises(HTTPException):
+                await asyncio.wait_for(body, 2)
+            return tasks
+
+        tasks = asyncio.run(run())
+        assert tasks and all(task.cancelled() for task in tasks)
+        assert not cache._tasks
+        assert os.listdir(cache.path) == []
+
+    def test_evicts_expired_and_least_recently_used_clips(self, cache):
+        now = time.time()
+        for name, age in (("old", 120), ("a", 30), ("b", 20), ("c", 10)):
+            for ext in (".mp3", ".json"):
+                path = cache.path / f"{name}{ext}"
+                path.write_bytes(b"1234")
+                os.utime(path, (now - age, now - age))
+
+        cache.get("a")
+        cache.evict()
+        assert sorted(os.listdir(cache.path)) == [
+            "a.json",
+            "a.mp3",
+            "c.json",
+            "c.mp3",
+        ]
@@ -0,0 +1,57 @@
+import asyncio
+
+from open_webui.utils import sse
+from open_webui.utils.sse import SSEDecoder
+
+STREAM = (
+    b": keep-alive\r\n"
+    b'data: {"content": "caf\xc3\xa9"}\r\n\r\n'
+    b"event: message\n"
+    b'data:{"content": "b"}\n\n'
+    b"data: [DONE]\n\n"
+)
+
+
+def decode(chunks, prefix=sse.DATA_PREFIX):
+    decoder = SSEDecoder(prefix=prefix)
+    payloads = []
+    for chunk in chunks:
+        payloads.extend(decoder.feed(chunk))
+    return payloads + decoder.flush()
+
+
+class TestSSEDecoder:
+    def test_any_chunk_boundaries(self):
+        expected = [b'{"content": "caf\xc3\xa9"}', b'{"content": "b"}', sse.DONE]
+        assert decode([STREAM]) == expected
+        # Every chunk size, including ones that split the UTF-8 sequence
+        for size in range(1, len(STREAM)):
+            chunks = [STREAM[i : i + size] for i in range(0, len(STREAM), size)]
+            assert decode(chunks) == expected
+
+    def test_text_chunks(self):
+        assert decode(['data: {"a": 1}\n', "\n"]) == [b'{"a": 1}']
+
+    def test_ndjson(self):
+        chunks = [b'{"a": 1}\n{"a"', b": 2}\n\n", b'{"a": 3}']
+        payloads = decode(chunks, prefix=None)
+        assert [sse.loads(payload) for payload in payloads] == [
+            {"a": 1},
+            {"a": 2},
+            {"a": 3},
+        ]
+
+    def test_iter_payloads(self):
+        async def body():
+            for i in range(0, len(STREAM), 7):
+                yield STREAM[i : i + 7]
+
+        async def run():
+            return [p async for p in SSEDecoder().iter_payloads(body())]
+
+        assert asyncio.run(run())[-1] == sse.DONE
+
+    def test_encode_event(self):
+        assert sse.encode_event({"a": "é", 1: None}) == (
+            b'data: {"a":"\xc3\xa9","1":null}\n\n'
+        )
@@ -0,0 +1,106 @@
+import asyncio
+from types import SimpleNamespace
+
+from open_webui.utils import tools
+from open_webui.utils.tools import (
+    ToolServerCatalogue,
+    convert_openapi_to_tool_payload,
+    get_tool_server_operations,
+)
+
+OPENAPI = {
+    "paths": {
+        "/nodes/{id}": {
+            "get": {
+                "operationId": "get_node",
+                "parameters": [
+                    {"name": "id", "in": "path", "required": True, "schema": {}}
+                ],
+            },
+            "post": {
+                "operationId": "update_node",
+                "requestBody": {
+                    "content": {
+                        "application/json": {
+                            "schema": {"$ref": "#/components/schemas/Node"}
+                        }
+                    }
+                },
+            },
+        }
+    },
+    "components": {
+        "schemas": {
+            "Node": {
+                "type": "object",
+                "properties": {
+                    "name": {"type": "string"},
+                    "children": {
+                        "type": "array",
+                        "items": {"$ref": "#/components/schemas/Node"},
+                    },
+                },
+                "required": ["name"],
+            }
+        }
+    },
+}
+
+
+def make_request():
+    return SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                redis=None,
+                config=SimpleNamespace(TOOL_SERVER_CONNECTIONS=[]),
+                TOOL_SERVERS=[],
+            )
+        )
+    )
+
+
+class TestToolServerSpecs:
+    def test_self_referencing_schema(self):
+        specs = convert_openapi_to_tool_payload(OPENAPI)
+        update_node = next(spec for spec in specs if spec["name"] == "update_node")
+
+        properties = update_node["parameters"]["properties"]
+        assert properties["name"] == {"type": "string"}
+        # The recursion stops where the schema references itself
+        assert properties["children"] == {"type": "array", "items": {}}
+        assert update_node["parameters"]["required"] == ["name"]
+
+    def test_operations_index(self):
+        operations = get_tool_server_operations(OPENAPI)
+
+        assert operations["get_node"][:2] == ("/nodes/{id}", "get")
+        assert operations["update_node"][:2] == ("/nodes/{id}", "post")
+
+
+class TestToolServerCatalogue:
+    def test_servers_are_fetched_once_and_refreshed_in_background(self, monkeypatch):
+        fetches = []
+
+        async def get_tool_servers_data(servers, responses=None):
+            fetches.append(servers)
+            await asyncio.sleep(0.01)
+            return [{"id": "0", "idx": 0, "url": "http://tools", "openapi": OPENAPI}]
+
+        monkeypatch.setattr(tools, "get_tool_servers_data", get_tool_servers_data)
+        catalogue = ToolServerCatalogue(refresh_interval=60)
+        request = make_request()
+
+        async def run():
+            results = await asyncio.gather(*[catalogue.get(request) for _ in range(10)])
+            assert len(fetches) == 1
+            assert all(servers is results[0] for servers in results)
+            assert "update_node" in results[0][0]["operations"]
+
+            # An expired catalogue is served while it is refreshed
+            catalogue.loaded_at -= 61
+            assert await catalogue.get(request) is results[0]
+            await asyncio.sleep(0.05)
+            assert len(fetches) == 2
+            assert await catalogue.get(request) is not results[0]
+
+        asyncio.run(run())
@@ -0,0 +1,133 @@
+import queue
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from open_webui.utils import transcription
+from open_webui.utils.transcription import (
+    CHUNK_LENGTH,
+    SAMPLING_RATE,
+    TranscriptionError,
+    WhisperWorkerPool,
+)
+
+
+class FakePipeline:
+    """
+    Packs consecutive clips into windows of at most CHUNK_LENGTH seconds, as
+    newer faster-whisper releases do, and decodes one segment per window
+    whose text names the clips (by sample value) it heard.
+    """
+
+    def __init__(self):
+        self.windows = []
+
+    def transcribe(self, audio, clip_timestamps, **kwargs):
+        windows, window, duration = [], [], 0
+        for clip in clip_timestamps:
+            length = clip["end"] - clip["start"]
+            if window and duration + length > CHUNK_LENGTH * SAMPLING_RATE:
+                windows.append(window)
+                window, duration = [], 0
+            window.append(clip)
+            duration += length
+        windows.append(window)
+        self.windows = windows
+
+        segments = []
+        for window in windows:
+            heard = np.concatenate([audio[c["start"] : c["end"]] for c in window])
+            start = window[0]["start"] / SAMPLING_RATE
+            segments.append(
+                SimpleNamespace(
+                    start=start,
+                    end=start + 1.5,
+                    text=" ".join(str(v) for v in sorted(set(heard[heard > 0]))),
+                )
+            )
+        info = SimpleNamespace(language="en", language_probability=1.0)
+        return iter(segments), info
+
+
+def drain(events: queue.Queue) -> dict:
+    results = {}
+    while not events.empty():
+        kind, job_id, data = events.get()
+        results.setdefault(job_id, []).append((kind, data))
+    return results
+
+
+class FakeProcess:
+    def __init__(self, pid, alive=True):
+        self.pid = pid
+        self.exitcode = None if alive else -9
+        self.alive = alive
+
+    def is_alive(self):
+        return self.alive
+
+
+def make_running_pool(timeout=600) -> WhisperWorkerPool:
+    pool = WhisperWorkerPool(timeout=timeout)
+    pool._running = True
+    pool._jobs = queue.Queue()
+    return pool
+
+
+class TestTranscribeBatch:
+    def test_concatenated_clips_are_decoded_separately(self):
+        pipeline = FakePipeline()
+        events = queue.Queue()
+        items = [
+            ("a", "a.wav", "en", False, np.full(2 * SAMPLING_RATE, 1, np.float32)),
+            ("b", "b.wav", "en", False, np.full(3 * SAMPLING_RATE, 2, np.float32)),
+        ]
+
+        transcription._transcribe_batch(pipeline, items, "en", 8, events)
+
+        assert len(pipeline.windows) == 2
+        results = drain(events)
+        assert results["a"] == [
+            ("segment", {"start": 0.0, "end": 1.5, "text": "1.0"}),
+            ("done", {"language": "en", "language_probability": 1.0}),
+        ]
+        # The end is clamped to the utterance, the text is b's alone
+        assert results["b"][0] == (
+            "segment",
+            {"start": 0.0, "end": 1.5, "text": "2.0"},
+        )
+        assert results["b"][1][0] == "done"
+
+
+class TestWhisperWorkerPool:
+    def test_job_times_out_without_events(self):
+        pool = make_running_pool(timeout=0.05)
+
+        with pytest.raises(TranscriptionError, match="timed out"):
+            list(pool.transcribe("a.wav"))
+        assert pool._pending == {}
+
+    def test_dead_worker_fails_jobs_it_had_not_started(self, monkeypatch):
+        pool = make_running_pool()
+        pool._processes = [FakeProcess(1, alive=False)]
+        monkeypatch.setattr(pool, "_spawn", lambda: FakeProcess(2))
+
+        errors = []
+
+        def request():
+            try:
+                list(pool.transcribe("a.wav"))
+            except TranscriptionError as e:
+                errors.append(str(e))
+
+        thread = threading.Thread(target=request)
+        thread.start()
+        # Taken off the queue by the worker that then died, never "started"
+        pool._jobs.get(timeout=1)
+        pool._reap()
+        thread.join(timeout=1)
+
+        assert not thread.is_alive()
+        assert errors == ["Transcription worker exited unexpectedly"]
+        assert [process.pid for process in pool._processes] == [2]
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+import requests
+from open_webui.utils.upstream import UpstreamBusyError, UpstreamRouter
+
+BACKENDS = ["http://a", "http://b", "http://c"]
+
+
+def fail(router, backend, times=1):
+    for _ in range(times):
+        with pytest.raises(ConnectionError):
+            with router.track(backend):
+                raise ConnectionError()
+
+
+class TestUpstreamRouter:
+    def test_least_outstanding(self):
+        router = UpstreamRouter("test", policy="least_outstanding")
+        router.start("http://a")
+        router.start("http://b")
+
+        assert router.choose(BACKENDS) == "http://c"
+
+    def test_latency_ewma(self):
+        router = UpstreamRouter("test", policy="latency_ewma")
+        for backend, latency in zip(BACKENDS, [0.5, 0.1, 0.3]):
+            router._record(backend, True, latency)
+
+        assert router.choose(BACKENDS) == "http://b"
+
+        # Load outweighs a small latency advantage
+        for _ in range(5):
+            router.start("http://b")
+        assert router.choose(BACKENDS) == "http://c"
+
+    def test_prefers_resident_backends_until_they_are_busy(self):
+        router = UpstreamRouter("test", spillover=2)
+        router.start("http://b")
+
+        assert router.choose(BACKENDS, preferred=["http://b"]) == "http://b"
+
+        router.start("http://b")
+        assert router.choose(BACKENDS, preferred=["http://b"]) != "http://b"
+
+    def test_circuit_opens_after_consecutive_failures(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr("open_webui.utils.upstream.time.monotonic", lambda: now[0])
+        router = UpstreamRouter("test", failure_threshold=3, cooldown=30)
+
+        fail(router, "http://a", times=3)
+        assert not router.is_available("http://a")
+        assert router.choose(["http://a", "http://b"]) == "http://b"
+
+        # After the cooldown a single trial request is let through
+        now[0] += 31
+        assert router.choose(["http://a"]) == "http://a"
+        assert not router.is_available("http://a")
+
+        with router.track("http://a") as call:
+            call.respond(200)
+        assert router.is_available("http://a")
+        assert router.backends["http://a"].consecutive_failures == 0
+
+    def test_client_errors_are_not_failures(self):
+        router = UpstreamRouter("test", failure_threshold=1)
+        with router.track("http://a") as call:
+            call.respond(404)
+
+        assert router.is_available("http://a")
+        assert router.get_metrics()["backends"]["http://a"]["in_flight"] == 0
+
+    def test_only_transport_errors_are_failures(self):
+        router = UpstreamRouter("test", failure_threshold=1)
+        for error in (asyncio.CancelledError, ValueError, KeyboardInterrupt):
+            with pytest.raises(error):
+                with router.track("http://a"):
+                    raise error()
+        assert router.is_available("http://a")
+        assert router.backends["http://a"].failures == 0
+
+        for error in (requests.exceptions.ConnectTimeout, TimeoutError):
+            with pytest.raises(error):
+                with router.track("http://b"):
+                    raise error()
+        assert router.backends["http://b"].failures == 2
+        assert router.get_metrics()["backends"]["http://b"]["in_flight"] == 0
+
+    def test_all_backends_failing(self):
+        router = UpstreamRouter("test", failure_threshold=1)
+        fail(router, "http://a")
+
+        assert router.choose(["http://a"]) == "http://a"
+
+    def test_weights(self):
+        router = UpstreamRouter("test")
+        weights = {"http://a": 2, "http://b": 1}
+
+        counts = {"http://a": 0, "http://b": 0}
+        for _ in range(30):
+            backend = router.choose(list(weights), weights=weights)
+            router.start(backend)
+            counts[backend] += 1
+
+        assert counts == {"http://a": 20, "http://b": 10}
+
+    def test_zero_weight_drains_backend(self):
+        router = UpstreamRouter("test")
+        weights = {"http://a": 0, "http://b": 1}
+        router.start("http://b")
+
+        assert router.choose(list(weights), weights=weights) == "http://b"
+
+    def test_acquire_waits_for_concurrency_limit(self):
+        router = UpstreamRouter("test")
+        limits = {"http://a": 1, "http://b": 1}
+
+        async def run():
+            first = await router.acquire(list(limits), limits=limits)
+            second = await router.acquire(list(limits), limits=limits)
+            assert {first.backend, second.backend} == set(limits)
+
+            third = asyncio.create_task(router.acquire(list(limits), limits=limits))
+            await asyncio.sleep(0.01)
+            assert not third.done()
+
+            first.close()
+            assert (await third).backend == first.backend
+
+            with pytest.raises(UpstreamBusyError):
+                await router.acquire(list(limits), limits=limits, timeout=0.01)
+
+        asyncio.run(run())
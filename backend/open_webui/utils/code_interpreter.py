@@ -1,6 +1,7 @@
 import asyncio
 import json
 import logging
+import time
 import uuid
 from typing import Optional
 
@@ -8,7 +9,13 @@ import aiohttp
 import websockets
 from pydantic import BaseModel
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    JUPYTER_KERNEL_POOL_SIZE,
+    JUPYTER_KERNEL_ISOLATION,
+    JUPYTER_KERNEL_LEASE_TIMEOUT,
+    JUPYTER_KERNEL_MAX_MEMORY_MB,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -36,6 +43,7 @@ class JupyterCodeExecuter:
         token: str = "",
         password: str = "",
         timeout: int = 60,
+        session: Optional[aiohttp.ClientSession] = None,
     ):
         """
         :param base_url: Jupyter server URL (e.g., "http://localhost:8888")
@@ -43,6 +51,7 @@ class JupyterCodeExecuter:
         :param token: Jupyter authentication token (optional)
         :param password: Jupyter password (optional)
         :param timeout: WebSocket timeout in seconds (default: 60s)
+        :param session: Signed in session to reuse (optional)
         """
         self.base_url = base_url
         self.code = code
@@ -52,9 +61,16 @@ class JupyterCodeExecuter:
         self.kernel_id = ""
         if self.base_url[-1] != "/":
             self.base_url += "/"
-        self.session = aiohttp.ClientSession(trust_env=True, base_url=self.base_url)
+        self.owns_session = session is None
+        self.session = session or aiohttp.ClientSession(
+            trust_env=True, base_url=self.base_url
+        )
         self.params = {}
         self.result = ResultModel()
+        self.timed_out = False
+        # Expressions evaluated after the code, e.g. to check the kernel's memory
+        self.user_expressions = {}
+        self.user_expression_results = {}
 
     async def __aenter__(self):
         return self
@@ -68,7 +84,8 @@ class JupyterCodeExecuter:
                     response.raise_for_status()
             except Exception as err:
                 logger.exception("close kernel failed, %s", err)
-        await self.session.close()
+        if self.owns_session:
+            await self.session.close()
 
     async def run(self) -> ResultModel:
         try:
@@ -154,7 +171,7 @@ class JupyterCodeExecuter:
                         "code": self.code,
                         "silent": False,
                         "store_history": True,
-                        "user_expressions": {},
+                        "user_expressions": self.user_expressions,
                         "allow_stdin": False,
                         "stop_on_error": True,
                     },
@@ -164,7 +181,8 @@ class JupyterCodeExecuter:
         )
         # parse message
         stdout, stderr, result = "", "", []
-        while True:
+        idle, replied = False, not self.user_expressions
+        while not (idle and replied):
             try:
                 # wait for message
                 message = await asyncio.wait_for(ws.recv(), self.timeout)
@@ -190,21 +208,309 @@ class JupyterCodeExecuter:
                         stderr += "\n".join(message_data["content"]["traceback"])
                     case "status":
                         if message_data["content"]["execution_state"] == "idle":
-                            break
+                            idle = True
+                    case "execute_reply":
+                        self.user_expression_results = message_data["content"].get(
+                            "user_expressions", {}
+                        )
+                        replied = True
 
             except asyncio.TimeoutError:
                 stderr += "\nExecution timed out."
+                self.timed_out = True
                 break
         self.result.stdout = stdout.strip()
         self.result.stderr = stderr.strip()
         self.result.result = "\n".join(result).strip() if result else ""
 
 
+class JupyterKernelServer:
+    """
+    A Jupyter server's signed in session and its warm kernels.
+    """
+
+    def __init__(self, base_url: str, token: str = "", password: str = ""):
+        self.client = JupyterCodeExecuter(base_url, "", token, password)
+        self.signed_in = False
+        self.last_used = time.monotonic()
+
+        self.warm: list[str] = []
+        self.leases: dict[str, "JupyterKernelLease"] = {}
+        self._lock = asyncio.Lock()
+        self._fill_task: Optional[asyncio.Task] = None
+        self._shutdowns: set[asyncio.Task] = set()
+
+    async def sign_in(self):
+        async with self._lock:
+            if not self.signed_in:
+                await self.client.sign_in()
+                self.signed_in = True
+
+    async def start_kernel(self, ready_timeout: int = 30) -> str:
+        async with self.client.session.post(
+            url="api/kernels", params=self.client.params
+        ) as response:
+            response.raise_for_status()
+            kernel_id = (await response.json())["id"]
+
+        # Run nothing once, so that the kernel has finished starting by the
+        # time it is handed out
+        try:
+            await self.execute(kernel_id, "", ready_timeout)
+        except BaseException:
+            await self.shutdown_kernel(kernel_id)
+            raise
+        return kernel_id
+
+    async def is_alive(self, kernel_id: str) -> bool:
+        try:
+            async with self.client.session.get(
+                f"api/kernels/{kernel_id}", params=self.client.params
+            ) as response:
+                return response.status == 200
+        except Exception:
+            return False
+
+    async def shutdown_kernel(self, kernel_id: str):
+        try:
+            async with self.client.session.delete(
+                f"api/kernels/{kernel_id}", params=self.client.params
+            ) as response:
+                response.raise_for_status()
+        except Exception as err:
+            logger.warning("close kernel %s failed, %s", kernel_id, err)
+
+    def shutdown_kernel_later(self, kernel_id: str):
+        """Shut down `kernel_id` in the background; `close` waits for it."""
+        task = asyncio.create_task(self.shutdown_kernel(kernel_id))
+        self._shutdowns.add(task)
+        task.add_done_callback(self._shutdowns.discard)
+
+    async def acquire_kernel(self, size: int) -> str:
+        kernel_id = None
+        while self.warm:
+            candidate = self.warm.pop()
+            if await self.is_alive(candidate):
+                kernel_id = candidate
+                break
+
+        if kernel_id is None:
+            kernel_id = await self.start_kernel()
+
+        self.fill(size)
+        return kernel_id
+
+    def fill(self, size: int):
+        if len(self.warm) < size and (
+            self._fill_task is None or self._fill_task.done()
+        ):
+            self._fill_task = asyncio.create_task(self._fill(size))
+
+    async def _fill(self, size: int):
+        while len(self.warm) < size:
+            try:
+                self.warm.append(await self.start_kernel())
+            except Exception as err:
+                logger.warning("starting a warm kernel failed, %s", err)
+                return
+
+    async def execute(
+        self,
+        kernel_id: str,
+        code: str,
+        timeout: int,
+        user_expressions: Optional[dict] = None,
+    ) -> JupyterCodeExecuter:
+        executer = JupyterCodeExecuter(
+            self.client.base_url,
+            code,
+            self.client.token,
+            self.client.password,
+            timeout,
+            session=self.client.session,
+        )
+        executer.params = self.client.params
+        executer.kernel_id = kernel_id
+        executer.user_expressions = user_expressions or {}
+
+        await executer.execute_code()
+        return executer
+
+    async def close(self):
+        if self._fill_task is not None:
+            self._fill_task.cancel()
+            await asyncio.gather(self._fill_task, return_exceptions=True)
+
+        kernel_ids = self.warm + [
+            lease.kernel_id for lease in self.leases.values() if lease.kernel_id
+        ]
+        self.warm, self.leases = [], {}
+        await asyncio.gather(
+            *[self.shutdown_kernel(kernel_id) for kernel_id in kernel_ids],
+            *self._shutdowns,
+        )
+        await self.client.session.close()
+
+
+class JupyterKernelLease:
+    """
+    A kernel kept for the code interpreter runs of one chat.
+    """
+
+    def __init__(self):
+        self.kernel_id: Optional[str] = None
+        self.last_used = time.monotonic()
+        self.lock = asyncio.Lock()
+
+
+class JupyterKernelPool:
+    """
+    Started kernels kept ready on each Jupyter server, so that code runs
+    without waiting for a kernel to start.
+
+    With "execution" isolation every execution gets a fresh kernel, which is
+    shut down afterwards. With "chat" isolation a chat keeps its kernel, and
+    the variables defined in it, until it has been unused for `lease_timeout`
+    seconds; the kernel is replaced if an execution times out or the kernel's
+    peak memory exceeds `max_memory_mb`.
+    """
+
+    def __init__(
+        self,
+        size: int = JUPYTER_KERNEL_POOL_SIZE,
+        isolation: str = JUPYTER_KERNEL_ISOLATION,
+        lease_timeout: int = JUPYTER_KERNEL_LEASE_TIMEOUT,
+        max_memory_mb: int = JUPYTER_KERNEL_MAX_MEMORY_MB,
+    ):
+        self.size = size
+        self.isolation = isolation
+        self.lease_timeout = lease_timeout
+        self.max_memory_mb = max_memory_mb
+
+        self.servers: dict[tuple, JupyterKernelServer] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+    async def get_server(
+        self, base_url: str, token: str = "", password: str = ""
+    ) -> JupyterKernelServer:
+        key = (base_url, token or "", password or "")
+        server = self.servers.get(key)
+        if server is None:
+            server = self.servers[key] = JupyterKernelServer(base_url, token, password)
+
+        try:
+            await server.sign_in()
+        except Exception:
+            await self.remove_server(key)
+            raise
+        server.last_used = time.monotonic()
+
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap())
+        return server
+
+    async def remove_server(self, key: tuple):
+        server = self.servers.pop(key, None)
+        if server is not None:
+            await server.close()
+
+    async def execute(
+        self,
+        base_url: str,
+        code: str,
+        token: str = "",
+        password: str = "",
+        timeout: int = 60,
+        chat_id: Optional[str] = None,
+    ) -> ResultModel:
+        try:
+            server = await self.get_server(base_url, token, password)
+            if self.isolation == "chat" and chat_id:
+                return await self._execute_leased(server, chat_id, code, timeout)
+
+            kernel_id = await server.acquire_kernel(self.size)
+            try:
+                executer = await server.execute(kernel_id, code, timeout)
+            finally:
+                # Shut down in the background, the result is ready
+                server.shutdown_kernel_later(kernel_id)
+            return executer.result
+        except Exception as err:
+            logger.exception("execute code failed, %s", err)
+            status = getattr(err, "status", None)
+            if isinstance(err, aiohttp.ClientResponseError) and status in (401, 403):
+                # Signed out, sign in again on the next execution
+                await self.remove_server((base_url, token or "", password or ""))
+            return ResultModel(stderr=f"Error: {err}")
+
+    async def _execute_leased(
+        self, server: JupyterKernelServer, chat_id: str, code: str, timeout: int
+    ) -> ResultModel:
+        lease = server.leases.setdefault(chat_id, JupyterKernelLease())
+        async with lease.lock:
+            if lease.kernel_id is None or not await server.is_alive(lease.kernel_id):
+                lease.kernel_id = await server.acquire_kernel(self.size)
+
+            user_expressions = {}
+            if self.max_memory_mb:
+                user_expressions["max_rss"] = (
+                    "__import__('resource')"
+                    ".getrusage(__import__('resource').RUSAGE_SELF).ru_maxrss"
+                )
+
+            executer = await server.execute(
+                lease.kernel_id, code, timeout, user_expressions
+            )
+            lease.last_used = time.monotonic()
+
+            recycle = executer.timed_out
+            max_rss = executer.user_expression_results.get("max_rss", {})
+            if max_rss.get("status") == "ok":
+                # ru_maxrss is in kilobytes
+                memory_mb = int(max_rss["data"]["text/plain"]) / 1024
+                recycle = recycle or memory_mb > self.max_memory_mb
+
+            if recycle:
+                logger.info("replacing kernel %s of chat %s", lease.kernel_id, chat_id)
+                server.shutdown_kernel_later(lease.kernel_id)
+                lease.kernel_id = None
+
+            return executer.result
+
+    async def _reap(self):
+        while self.servers:
+            await asyncio.sleep(min(self.lease_timeout, 60))
+
+            expired = time.monotonic() - self.lease_timeout
+            for key, server in list(self.servers.items()):
+                for chat_id, lease in list(server.leases.items()):
+                    if lease.last_used < expired and not lease.lock.locked():
+                        server.leases.pop(chat_id, None)
+                        if lease.kernel_id:
+                            await server.shutdown_kernel(lease.kernel_id)
+
+                if not server.leases and server.last_used < expired:
+                    await self.remove_server(key)
+
+    async def close(self):
+        if self._reaper is not None:
+            self._reaper.cancel()
+        for key in list(self.servers):
+            await self.remove_server(key)
+
+
+jupyter_kernel_pool = JupyterKernelPool()
+
+
 async def execute_code_jupyter(
-    base_url: str, code: str, token: str = "", password: str = "", timeout: int = 60
+    base_url: str,
+    code: str,
+    token: str = "",
+    password: str = "",
+    timeout: int = 60,
+    chat_id: Optional[str] = None,
 ) -> dict:
-    async with JupyterCodeExecuter(
-        base_url, code, token, password, timeout
-    ) as executor:
-        result = await executor.run()
-        return result.model_dump()
+    result = await jupyter_kernel_pool.execute(
+        base_url, code, token, password, timeout, chat_id
+    )
+    return result.model_dump()
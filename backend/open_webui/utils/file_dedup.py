@@ -0,0 +1,132 @@
+import json
+import logging
+import os
+from typing import Optional
+
+from open_webui.models.files import FileModel, Files
+from open_webui.retrieval.vector.factory import VECTOR_DB_CLIENT
+from open_webui.storage.provider import Storage
+from open_webui.utils.misc import calculate_sha256_string
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+SHARED_COLLECTION_PREFIX = "file-shared-"
+
+# Settings that change the extracted text or the vectors of a file
+PROCESSING_CONFIG_KEYS = (
+    "CONTENT_EXTRACTION_ENGINE",
+    "PDF_EXTRACT_IMAGES",
+    "EXTERNAL_DOCUMENT_LOADER_URL",
+    "TIKA_SERVER_URL",
+    "DOCLING_SERVER_URL",
+    "DOCLING_DO_OCR",
+    "DOCLING_FORCE_OCR",
+    "DOCLING_OCR_ENGINE",
+    "DOCLING_OCR_LANG",
+    "DOCLING_PDF_BACKEND",
+    "DOCLING_TABLE_MODE",
+    "DOCLING_PIPELINE",
+    "DOCLING_DO_PICTURE_DESCRIPTION",
+    "DOCLING_PICTURE_DESCRIPTION_MODE",
+    "DOCLING_PICTURE_DESCRIPTION_LOCAL",
+    "DOCLING_PICTURE_DESCRIPTION_API",
+    "DATALAB_MARKER_API_BASE_URL",
+    "DATALAB_MARKER_ADDITIONAL_CONFIG",
+    "DATALAB_MARKER_FORCE_OCR",
+    "DATALAB_MARKER_PAGINATE",
+    "DATALAB_MARKER_STRIP_EXISTING_OCR",
+    "DATALAB_MARKER_DISABLE_IMAGE_EXTRACTION",
+    "DATALAB_MARKER_FORMAT_LINES",
+    "DATALAB_MARKER_USE_LLM",
+    "DATALAB_MARKER_OUTPUT_FORMAT",
+    "DOCUMENT_INTELLIGENCE_ENDPOINT",
+    "TEXT_SPLITTER",
+    "CHUNK_SIZE",
+    "CHUNK_OVERLAP",
+    "TIKTOKEN_ENCODING_NAME",
+    "RAG_EMBEDDING_ENGINE",
+    "RAG_EMBEDDING_MODEL",
+)
+
+
+def is_shared_collection(collection_name: Optional[str]) -> bool:
+    return bool(collection_name) and collection_name.startswith(
+        SHARED_COLLECTION_PREFIX
+    )
+
+
+def get_shared_collection_name(request, file: FileModel) -> str:
+    """
+    Name of the vector collection holding the processed contents of `file`,
+    shared by every file with the same bytes processed the same way.
+    """
+    config = request.app.state.config
+    fingerprint = {key: getattr(config, key, None) for key in PROCESSING_CONFIG_KEYS}
+    # The loader is picked by extension and content type
+    fingerprint["extension"] = os.path.splitext(file.filename)[1].lower()
+    fingerprint["content_type"] = (file.meta or {}).get("content_type")
+
+    key = calculate_sha256_string(
+        f"{file.content_hash}:{json.dumps(fingerprint, sort_keys=True, default=str)}"
+    )
+    return f"{SHARED_COLLECTION_PREFIX}{key[:32]}"
+
+
+def get_processed_duplicate(
+    file: FileModel, collection_name: str
+) -> Optional[FileModel]:
+    """Another file that was already processed into `collection_name`."""
+    for other in Files.get_file_metadatas_by_content_hash(file.content_hash):
+        if other.id == file.id or other.meta.get("collection_name") != collection_name:
+            continue
+
+        # Only candidates are read in full, their data holds the extracted text
+        other = Files.get_file_by_id(other.id)
+        if other and (other.data or {}).get("status") == "completed":
+            return other
+    return None
+
+
+def release_file_collection(file: FileModel, collection_name: Optional[str] = None):
+    """
+    Drop the vector collection of a deleted (or reprocessed) file, unless it
+    is a shared collection other files still point to.
+    """
+    collection_name = collection_name or (file.meta or {}).get("collection_name")
+    if not is_shared_collection(collection_name):
+        return
+
+    if file.content_hash and any(
+        other.meta.get("collection_name") == collection_name
+        for other in Files.get_file_metadatas_by_content_hash(file.content_hash)
+        if other.id != file.id
+    ):
+        return
+
+    log.info(f"Deleting shared collection {collection_name}, no files left")
+    if VECTOR_DB_CLIENT.has_collection(collection_name=collection_name):
+        VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+
+
+def release_file_storage(file: FileModel):
+    """
+    Delete the stored object of a deleted file unless other files share it.
+    Must run after the file's row is deleted, see
+    Files.insert_new_deduplicated_file.
+    """
+    if not file.path:
+        return
+
+    if file.content_hash and any(
+        path == file.path
+        for other_id, path in Files.get_file_paths_by_content_hash(
+            file.content_hash
+        ).items()
+        if other_id != file.id
+    ):
+        return
+
+    Storage.delete_file(file.path)
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+import uuid
+from typing import Optional
+
+from open_webui.models.files import FileModel, Files
+from open_webui.socket.main import sio, USER_POOL
+from open_webui.env import SRC_LOG_LEVELS, REDIS_KEY_PREFIX
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+REDIS_FILE_STATUS_CHANNEL = f"{REDIS_KEY_PREFIX}:files:status"
+
+# Seconds to wait before subscribing again after losing the Redis connection
+REDIS_RECONNECT_DELAY = 5
+
+
+class FileStatusBroker:
+    """
+    Fan-out of file processing status changes.
+
+    Status updates may be published from any thread (processing runs in the
+    threadpool or in ingestion workers). Subscribers in this process receive
+    them through asyncio queues; with Redis configured the event is also
+    relayed, in order, to every other process by a task on the event loop.
+    The process that produced an event emits it once over Socket.IO as
+    `file-events` to the file owner's sessions.
+    """
+
+    def __init__(self):
+        self.origin = str(uuid.uuid4())
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._outbox: Optional[asyncio.Queue] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def start(self, redis=None):
+        """Bind to the running event loop, relaying through `redis` (async client) if given."""
+        self._loop = asyncio.get_running_loop()
+
+        if redis is not None:
+            self._outbox = asyncio.Queue()
+            self._spawn(self._redis_relay(redis, self._outbox))
+            self._spawn(self._redis_listener(redis))
+
+    async def stop(self):
+        if self._outbox is not None:
+            # Relay the final statuses still queued, e.g. of an ingestion
+            # worker shutting down
+            await asyncio.sleep(0)
+            try:
+                await asyncio.wait_for(self._outbox.join(), timeout=5)
+            except asyncio.TimeoutError:
+                pass
+
+        for task in list(self._tasks):
+            task.cancel()
+        self._tasks.clear()
+        self._outbox = None
+        self._loop = None
+
+    def _spawn(self, coro) -> asyncio.Task:
+        # The loop only keeps weak references to tasks
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def publish(self, file_id: str, user_id: str, event: dict):
+        payload = {
+            "origin": self.origin,
+            "file_id": file_id,
+            "user_id": user_id,
+            "data": event,
+        }
+
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._dispatch, payload, True)
+
+    def subscribe(self, file_id: str) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(file_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, file_id: str, queue: asyncio.Queue):
+        queues = self._subscribers.get(file_id)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                self._subscribers.pop(file_id, None)
+
+    def _dispatch(self, payload: dict, local: bool):
+        for queue in self._subscribers.get(payload["file_id"], ()):
+            queue.put_nowait(payload["data"])
+
+        if local:
+            self._spawn(self._emit(payload))
+            if self._outbox is not None:
+                self._outbox.put_nowait(payload)
+
+    async def _emit(self, payload: dict):
+        try:
+            await asyncio.gather(
+                *[
+                    sio.emit(
+                        "file-events",
+                        {"file_id": payload["file_id"], "data": payload["data"]},
+                        to=session_id,
+                    )
+                    for session_id in USER_POOL.get(payload["user_id"], [])
+                ]
+            )
+        except Exception as e:
+            log.debug(f"Failed to emit file status for {payload['file_id']}: {e}")
+
+    async def _redis_relay(self, redis, outbox: asyncio.Queue):
+        while True:
+            payload = await outbox.get()
+            try:
+                await redis.publish(REDIS_FILE_STATUS_CHANNEL, json.dumps(payload))
+            except Exception as e:
+                log.warning(
+                    f"Failed to relay file status for {payload['file_id']}: {e}"
+                )
+            finally:
+                outbox.task_done()
+
+    async def _redis_listener(self, redis):
+        while True:
+            pubsub = redis.pubsub()
+            try:
+                await pubsub.subscribe(REDIS_FILE_STATUS_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    try:
+                        payload = json.loads(message["data"])
+                        if payload.get("origin") != self.origin:
+                            self._dispatch(payload, False)
+                    except Exception as e:
+                        log.exception(f"Error handling file status event: {e}")
+            except Exception as e:
+                log.warning(
+                    f"Lost the file status subscription ({e}), "
+                    f"resubscribing in {REDIS_RECONNECT_DELAY} seconds"
+                )
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(REDIS_RECONNECT_DELAY)
+
+
+file_status_broker = FileStatusBroker()
+
+
+def update_file_status(file_id: str, status: str, **data) -> Optional[FileModel]:
+    """Persist the processing status of a file and notify subscribers."""
+    file = Files.update_file_data_by_id(file_id, {"status": status, **data})
+    if file:
+        file_status_broker.publish(file.id, file.user_id, {"status": status, **data})
+    return file
+
+
+def publish_file_stage(file_id: str, user_id: str, stage: str):
+    """Notify subscribers of pipeline progress without touching the file row."""
+    file_status_broker.publish(file_id, user_id, {"status": "pending", "stage": stage})
@@ -1,7 +1,9 @@
 import inspect
 import logging
+from typing import Any, Optional
 
 from open_webui.utils.plugin import (
+    load_function_module,
     load_function_module_by_id,
     get_function_module_from_cache,
 )
@@ -22,115 +24,211 @@ def get_function_module(request, function_id, load_from_db=True):
     return function_module
 
 
+def get_function_module_for(request, function):
+    """
+    Get the module of an already fetched function, reusing the loaded module
+    only if it was loaded from this very version of the function.
+    """
+    functions = getattr(request.app.state, "FUNCTIONS", {})
+    versions = getattr(request.app.state, "FUNCTION_VERSIONS", {})
+    if function.id in functions and versions.get(function.id) == function.updated_at:
+        return functions[function.id]
+
+    # The function in hand is authoritative; the version snapshot used by
+    # get_function_module_from_cache may still lag behind an edit
+    function_module, _, _ = load_function_module(request, function)
+    return function_module
+
+
 def get_sorted_filter_ids(request, model: dict, enabled_filter_ids: list = None):
+    # A single query for every active filter, valves included for priorities
+    filters = {
+        function.id: function
+        for function in Functions.get_functions_by_type(
+            "filter", active_only=True, include_valves=True
+        )
+    }
+
     def get_priority(function_id):
-        function = Functions.get_function_by_id(function_id)
-        if function is not None:
-            valves = Functions.get_function_valves_by_id(function_id)
-            return valves.get("priority", 0) if valves else 0
-        return 0
+        valves = filters[function_id].valves
+        return valves.get("priority", 0) if valves else 0
 
-    filter_ids = [function.id for function in Functions.get_global_filter_functions()]
+    filter_ids = [function.id for function in filters.values() if function.is_global]
     if "info" in model and "meta" in model["info"]:
         filter_ids.extend(model["info"]["meta"].get("filterIds", []))
         filter_ids = list(set(filter_ids))
-    active_filter_ids = [
-        function.id
-        for function in Functions.get_functions_by_type("filter", active_only=True)
-    ]
 
     def get_active_status(filter_id):
-        function_module = get_function_module(request, filter_id)
+        function_module = get_function_module_for(request, filters[filter_id])
 
         if getattr(function_module, "toggle", None):
             return filter_id in (enabled_filter_ids or [])
 
         return True
 
-    active_filter_ids = [
-        filter_id for filter_id in active_filter_ids if get_active_status(filter_id)
+    filter_ids = [
+        fid for fid in filter_ids if fid in filters and get_active_status(fid)
     ]
-
-    filter_ids = [fid for fid in filter_ids if fid in active_filter_ids]
     filter_ids.sort(key=get_priority)
 
     return filter_ids
 
 
-async def process_filter_functions(
-    request, filter_functions, filter_type, form_data, extra_params
-):
-    skip_files = None
+class CompiledFilter:
+    """
+    A filter handler with its module valves applied and its signature
+    inspected, shared by every request until the function is updated.
+    """
+
+    def __init__(self, filter_id: str, function_module, filter_type: str):
+        self.id = filter_id
+        self.handler = getattr(function_module, filter_type, None)
+        self.is_coroutine = inspect.iscoroutinefunction(self.handler)
+        self.parameters = (
+            frozenset(inspect.signature(self.handler).parameters)
+            if self.handler
+            else frozenset()
+        )
+
+        # Check if the function has a file_handler variable
+        self.file_handler = (
+            getattr(function_module, "file_handler", None)
+            if filter_type == "inlet"
+            else None
+        )
+        self.user_valves_class = (
+            getattr(function_module, "UserValves", None)
+            if "__user__" in self.parameters
+            else None
+        )
+
+
+# (function id, filter type) -> (function updated_at, compiled filter)
+_compiled_filters: dict[tuple[str, str], tuple[int, CompiledFilter]] = {}
+
 
+def get_compiled_filter(request, function, filter_type: str) -> CompiledFilter:
+    # Every update of a function's content or valves gives it a new
+    # updated_at (see next_updated_at), even within the same second, which
+    # invalidates the compiled filter in every worker
+    cached = _compiled_filters.get((function.id, filter_type))
+    if cached and cached[0] == function.updated_at:
+        return cached[1]
+
+    function_module = get_function_module_for(request, function)
+
+    # Apply valves to the function
+    if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
+        valves = Functions.get_function_valves_by_id(function.id)
+        function_module.valves = function_module.Valves(**(valves if valves else {}))
+
+    compiled = CompiledFilter(function.id, function_module, filter_type)
+    _compiled_filters[(function.id, filter_type)] = (function.updated_at, compiled)
+    return compiled
+
+
+def get_user_valves(filter_id: str, user: dict) -> dict:
+    # The request's user already carries its settings, avoid another lookup
+    if "settings" not in user:
+        return Functions.get_user_valves_by_id_and_user_id(filter_id, user["id"])
+
+    settings = user.get("settings") or {}
+    return (settings.get("functions") or {}).get("valves", {}).get(filter_id, {})
+
+
+class FilterChain:
+    """
+    The filters of one type for one request, resolved once so that running
+    the chain (e.g. for every streamed chunk) does not touch the database.
+    An empty chain is falsy, callers can skip it entirely.
+    """
+
+    def __init__(self, filter_type: str, filters: list[tuple[CompiledFilter, Any]]):
+        self.filter_type = filter_type
+        self.filters = filters
+
+    def __bool__(self):
+        return bool(self.filters)
+
+    async def run(self, form_data, extra_params):
+        skip_files = None
+
+        for compiled, user_valves in self.filters:
+            if compiled.file_handler is not None:
+                skip_files = compiled.file_handler
+
+            try:
+                # Prepare parameters
+                params = {"body": form_data}
+                if self.filter_type == "stream":
+                    params = {"event": form_data}
+
+                params = params | {
+                    k: v
+                    for k, v in {
+                        **extra_params,
+                        "__id__": compiled.id,
+                    }.items()
+                    if k in compiled.parameters
+                }
+
+                # Handle user parameters
+                if user_valves is not None and "__user__" in params:
+                    params["__user__"]["valves"] = user_valves
+
+                # Execute handler
+                if compiled.is_coroutine:
+                    form_data = await compiled.handler(**params)
+                else:
+                    form_data = compiled.handler(**params)
+
+            except Exception as e:
+                log.debug(f"Error in {self.filter_type} handler {compiled.id}: {e}")
+                raise e
+
+        # Handle file cleanup for inlet
+        if skip_files:
+            if "files" in form_data.get("metadata", {}):
+                del form_data["metadata"]["files"]
+            if "files" in form_data:
+                del form_data["files"]
+
+        return form_data, {}
+
+
+def compile_filter_chain(
+    request, filter_functions, filter_type: str, user: Optional[dict] = None
+) -> FilterChain:
+    filters = []
     for function in filter_functions:
-        filter = function
-        filter_id = function.id
-        if not filter:
+        if not function:
             continue
 
-        function_module = get_function_module(
-            request, filter_id, load_from_db=(filter_type != "stream")
-        )
-        # Prepare handler function
-        handler = getattr(function_module, filter_type, None)
-        if not handler:
+        compiled = get_compiled_filter(request, function, filter_type)
+        if not compiled.handler:
             continue
 
-        # Check if the function has a file_handler variable
-        if filter_type == "inlet" and hasattr(function_module, "file_handler"):
-            skip_files = function_module.file_handler
-
-        # Apply valves to the function
-        if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
-            function_module.valves = function_module.Valves(
-                **(valves if valves else {})
-            )
-
-        try:
-            # Prepare parameters
-            sig = inspect.signature(handler)
-
-            params = {"body": form_data}
-            if filter_type == "stream":
-                params = {"event": form_data}
-
-            params = params | {
-                k: v
-                for k, v in {
-                    **extra_params,
-                    "__id__": filter_id,
-                }.items()
-                if k in sig.parameters
-            }
-
-            # Handle user parameters
-            if "__user__" in sig.parameters:
-                if hasattr(function_module, "UserValves"):
-                    try:
-                        params["__user__"]["valves"] = function_module.UserValves(
-                            **Functions.get_user_valves_by_id_and_user_id(
-                                filter_id, params["__user__"]["id"]
-                            )
-                        )
-                    except Exception as e:
-                        log.exception(f"Failed to get user values: {e}")
-
-            # Execute handler
-            if inspect.iscoroutinefunction(handler):
-                form_data = await handler(**params)
-            else:
-                form_data = handler(**params)
-
-        except Exception as e:
-            log.debug(f"Error in {filter_type} handler {filter_id}: {e}")
-            raise e
-
-    # Handle file cleanup for inlet
-    if skip_files:
-        if "files" in form_data.get("metadata", {}):
-            del form_data["metadata"]["files"]
-        if "files" in form_data:
-            del form_data["files"]
-
-    return form_data, {}
+        user_valves = None
+        if compiled.user_valves_class is not None and user:
+            try:
+                user_valves = compiled.user_valves_class(
+                    **(get_user_valves(function.id, user) or {})
+                )
+            except Exception as e:
+                log.exception(f"Failed to get user values: {e}")
+
+        filters.append((compiled, user_valves))
+
+    return FilterChain(filter_type, filters)
+
+
+async def process_filter_functions(
+    request, filter_functions, filter_type, form_data, extra_params
+):
+    chain = filter_functions
+    if not isinstance(chain, FilterChain):
+        chain = compile_filter_chain(
+            request, filter_functions, filter_type, extra_params.get("__user__")
+        )
+
+    return await chain.run(form_data, extra_params)
@@ -1,13 +1,16 @@
 import asyncio
+import hashlib
 import json
 import logging
 import random
 import urllib.parse
-import urllib.request
+import uuid
+from collections import OrderedDict
 from typing import Optional
 
-import websocket  # NOTE: websocket-client (https://github.com/websocket-client/websocket-client)
-from open_webui.env import SRC_LOG_LEVELS
+import aiohttp
+from open_webui.env import SRC_LOG_LEVELS, COMFYUI_RESULT_CACHE_SIZE
+from open_webui.utils.upstream import UpstreamRouter
 from pydantic import BaseModel
 
 log = logging.getLogger(__name__)
@@ -15,35 +18,24 @@ log.setLevel(SRC_LOG_LEVELS["COMFYUI"])
 
 default_headers = {"User-Agent": "Mozilla/5.0"}
 
+# Seconds between history checks while waiting for a prompt, in case its
+# completion message was missed while the websocket reconnected
+HISTORY_POLL_INTERVAL = 5
 
-def queue_prompt(prompt, client_id, base_url, api_key):
-    log.info("queue_prompt")
-    p = {"prompt": prompt, "client_id": client_id}
-    data = json.dumps(p).encode("utf-8")
-    log.debug(f"queue_prompt data: {data}")
-    try:
-        req = urllib.request.Request(
-            f"{base_url}/prompt",
-            data=data,
-            headers={**default_headers, "Authorization": f"Bearer {api_key}"},
-        )
-        response = urllib.request.urlopen(req).read()
-        return json.loads(response)
-    except Exception as e:
-        log.exception(f"Error while queuing prompt: {e}")
-        raise e
+comfyui_router = UpstreamRouter("comfyui")
 
 
-def get_image(filename, subfolder, folder_type, base_url, api_key):
-    log.info("get_image")
-    data = {"filename": filename, "subfolder": subfolder, "type": folder_type}
-    url_values = urllib.parse.urlencode(data)
-    req = urllib.request.Request(
-        f"{base_url}/view?{url_values}",
-        headers={**default_headers, "Authorization": f"Bearer {api_key}"},
-    )
-    with urllib.request.urlopen(req) as response:
-        return response.read()
+class ComfyUIError(Exception):
+    """The server answered, but rejected the workflow or failed to run it."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def get_comfyui_base_urls(base_url: str) -> list[str]:
+    """Several servers can be given, separated by ";"."""
+    return [url.strip().rstrip("/") for url in base_url.split(";") if url.strip()]
 
 
 def get_image_url(filename, subfolder, folder_type, base_url):
@@ -53,42 +45,246 @@ def get_image_url(filename, subfolder, folder_type, base_url):
     return f"{base_url}/view?{url_values}"
 
 
-def get_history(prompt_id, base_url, api_key):
-    log.info("get_history")
-
-    req = urllib.request.Request(
-        f"{base_url}/history/{prompt_id}",
-        headers={**default_headers, "Authorization": f"Bearer {api_key}"},
-    )
-    with urllib.request.urlopen(req) as response:
-        return json.loads(response.read())
-
-
-def get_images(ws, prompt, client_id, base_url, api_key):
-    prompt_id = queue_prompt(prompt, client_id, base_url, api_key)["prompt_id"]
-    output_images = []
-    while True:
-        out = ws.recv()
-        if isinstance(out, str):
-            message = json.loads(out)
-            if message["type"] == "executing":
-                data = message["data"]
-                if data["node"] is None and data["prompt_id"] == prompt_id:
-                    break  # Execution is done
+class ComfyUIClient:
+    """
+    An async client for one ComfyUI server.
+
+    All prompts are queued under the client's id, so the server reports
+    their progress on a single websocket, which is shared by every request
+    and dispatched to the waiting request by prompt id.
+    """
+
+    def __init__(self, base_url: str, api_key: str = ""):
+        self.base_url = base_url
+        self.api_key = api_key
+        self.client_id = uuid.uuid4().hex
+
+        # Prompts in the server's queue, as last reported by the server
+        self.queue_remaining = 0
+
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._reader: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+        self._waiters: dict[str, asyncio.Future] = {}
+        # Prompts that finished before their request started waiting
+        self._finished: OrderedDict[str, Optional[str]] = OrderedDict()
+
+    @property
+    def headers(self) -> dict:
+        headers = {**default_headers}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return headers
+
+    async def connect(self):
+        async with self._lock:
+            if self._session is None or self._session.closed:
+                self._session = aiohttp.ClientSession(
+                    trust_env=True, headers=self.headers
+                )
+
+            if self._ws is None or self._ws.closed:
+                ws_url = self.base_url.replace("http://", "ws://").replace(
+                    "https://", "wss://"
+                )
+                self._ws = await self._session.ws_connect(
+                    f"{ws_url}/ws?clientId={self.client_id}", heartbeat=30
+                )
+                self._reader = asyncio.create_task(self._read(self._ws))
+                log.info(f"WebSocket connection to {self.base_url} established.")
+
+    async def _read(self, ws: aiohttp.ClientWebSocketResponse):
+        try:
+            async for msg in ws:
+                if msg.type != aiohttp.WSMsgType.TEXT:
+                    continue  # previews are binary data
+
+                message = json.loads(msg.data)
+                data = message.get("data", {})
+                if message["type"] == "status":
+                    self.queue_remaining = (
+                        data.get("status", {})
+                        .get("exec_info", {})
+                        .get("queue_remaining", 0)
+                    )
+                elif message["type"] == "executing":
+                    if data.get("node") is None and data.get("prompt_id"):
+                        self._finish(data["prompt_id"], None)  # Execution is done
+                elif message["type"] == "execution_error":
+                    self._finish(
+                        data.get("prompt_id"),
+                        data.get("exception_message", "Execution failed"),
+                    )
+        except Exception as e:
+            log.warning(f"WebSocket connection to {self.base_url} failed: {e}")
+
+    def _finish(self, prompt_id: str, error: Optional[str]):
+        waiter = self._waiters.pop(prompt_id, None)
+        if waiter is not None:
+            if not waiter.done():
+                waiter.set_result(error)
+        elif prompt_id not in self._finished:
+            self._finished[prompt_id] = error
+            while len(self._finished) > 1024:
+                self._finished.popitem(last=False)
+
+    async def queue_prompt(self, prompt: dict) -> str:
+        log.info("queue_prompt")
+        async with self._session.post(
+            f"{self.base_url}/prompt",
+            json={"prompt": prompt, "client_id": self.client_id},
+        ) as response:
+            if response.status >= 400:
+                raise ComfyUIError(
+                    f"Error while queuing prompt: {await response.text()}",
+                    response.status,
+                )
+            return (await response.json())["prompt_id"]
+
+    async def get_history(self, prompt_id: str) -> dict:
+        log.info("get_history")
+        async with self._session.get(
+            f"{self.base_url}/history/{prompt_id}"
+        ) as response:
+            response.raise_for_status()
+            return await response.json()
+
+    async def wait(self, prompt_id: str) -> dict:
+        """
+        Wait for a prompt to finish and return its history entry.
+        """
+        if prompt_id in self._finished:
+            error = self._finished.pop(prompt_id)
         else:
-            continue  # previews are binary data
+            waiter = self._waiters[prompt_id] = (
+                asyncio.get_running_loop().create_future()
+            )
+            try:
+                while True:
+                    try:
+                        error = await asyncio.wait_for(
+                            asyncio.shield(waiter), HISTORY_POLL_INTERVAL
+                        )
+                        break
+                    except asyncio.TimeoutError:
+                        await self.connect()
+                        history = await self.get_history(prompt_id)
+                        if prompt_id in history:
+                            status = history[prompt_id].get("status", {})
+                            error = (
+                                "Execution failed"
+                                if status.get("status_str") == "error"
+                                else None
+                            )
+                            break
+            finally:
+                self._waiters.pop(prompt_id, None)
+
+        if error:
+            raise ComfyUIError(error)
+        return (await self.get_history(prompt_id))[prompt_id]
 
-    history = get_history(prompt_id, base_url, api_key)[prompt_id]
-    for o in history["outputs"]:
-        for node_id in history["outputs"]:
-            node_output = history["outputs"][node_id]
+    async def generate(self, prompt: dict) -> dict:
+        await self.connect()
+        prompt_id = await self.queue_prompt(prompt)
+        history = await self.wait(prompt_id)
+
+        output_images = []
+        for node_output in history["outputs"].values():
             if "images" in node_output:
                 for image in node_output["images"]:
                     url = get_image_url(
-                        image["filename"], image["subfolder"], image["type"], base_url
+                        image["filename"],
+                        image["subfolder"],
+                        image["type"],
+                        self.base_url,
                     )
                     output_images.append({"url": url})
-    return {"data": output_images}
+        return {"data": output_images}
+
+    async def close(self):
+        if self._ws is not None:
+            await self._ws.close()
+        if self._session is not None:
+            await self._session.close()
+
+
+comfyui_clients: dict[tuple[str, str], ComfyUIClient] = {}
+
+
+def get_comfyui_client(base_url: str, api_key: str = "") -> ComfyUIClient:
+    key = (base_url, api_key or "")
+    client = comfyui_clients.get(key)
+    if client is None:
+        client = comfyui_clients[key] = ComfyUIClient(base_url, api_key)
+    return client
+
+
+def choose_comfyui_client(base_urls: list[str], api_key: str = "") -> ComfyUIClient:
+    """
+    Pick the server with the shortest queue. Besides the prompts this
+    worker has in flight, a server's weight is lowered by the prompts
+    queued on it by others.
+    """
+    clients = {url: get_comfyui_client(url, api_key) for url in base_urls}
+
+    weights = {}
+    for url, client in clients.items():
+        in_flight = comfyui_router._stats(url).in_flight
+        weights[url] = 1 / (1 + max(client.queue_remaining - in_flight, 0))
+
+    return clients[comfyui_router.choose(base_urls, weights=weights)]
+
+
+async def close_comfyui_clients():
+    clients = list(comfyui_clients.values())
+    comfyui_clients.clear()
+    for client in clients:
+        await client.close()
+
+
+class ComfyUIResultCache:
+    """
+    Results of deterministic workflows, keyed by a hash of the workflow, so
+    that identical requests (same workflow, prompt and seed) are generated
+    once. Concurrent identical requests share the same generation.
+    """
+
+    def __init__(self, size: int = COMFYUI_RESULT_CACHE_SIZE):
+        self.size = size
+        self._results: OrderedDict[str, asyncio.Future] = OrderedDict()
+
+    @staticmethod
+    def get_key(base_urls: list[str], workflow: dict) -> str:
+        return hashlib.sha256(
+            json.dumps([sorted(base_urls), workflow], sort_keys=True).encode()
+        ).hexdigest()
+
+    async def get(self, key: str, generate) -> dict:
+        if not self.size:
+            return await generate()
+
+        result = self._results.get(key)
+        if result is not None:
+            self._results.move_to_end(key)
+            return await asyncio.shield(result)
+
+        result = self._results[key] = asyncio.ensure_future(generate())
+        while len(self._results) > self.size:
+            self._results.popitem(last=False)
+
+        try:
+            return await asyncio.shield(result)
+        except BaseException:
+            # Failures are not cached
+            if self._results.get(key) is result:
+                self._results.pop(key)
+            raise
+
+
+comfyui_result_cache = ComfyUIResultCache()
 
 
 class ComfyUINodeInput(BaseModel):
@@ -119,8 +315,9 @@ class ComfyUIGenerateImageForm(BaseModel):
 async def comfyui_generate_image(
     model: str, payload: ComfyUIGenerateImageForm, client_id, base_url, api_key
 ):
-    ws_url = base_url.replace("http://", "ws://").replace("https://", "wss://")
     workflow = json.loads(payload.workflow.workflow)
+    # Results are only reused when the workflow does not get a random seed
+    deterministic = True
 
     for node in payload.workflow.nodes:
         if node.type:
@@ -158,6 +355,7 @@ async def comfyui_generate_image(
                         node.key if node.key else "steps"
                     ] = payload.steps
             elif node.type == "seed":
+                deterministic = deterministic and bool(payload.seed)
                 seed = (
                     payload.seed
                     if payload.seed
@@ -169,25 +367,35 @@ async def comfyui_generate_image(
             for node_id in node.node_ids:
                 workflow[node_id]["inputs"][node.key] = node.value
 
-    try:
-        ws = websocket.WebSocket()
-        headers = {"Authorization": f"Bearer {api_key}"}
-        ws.connect(f"{ws_url}/ws?clientId={client_id}", header=headers)
-        log.info("WebSocket connection established.")
-    except Exception as e:
-        log.exception(f"Failed to connect to WebSocket server: {e}")
-        return None
+    base_urls = get_comfyui_base_urls(base_url)
+
+    async def generate():
+        client = choose_comfyui_client(base_urls, api_key)
+        call = comfyui_router.start(client.base_url)
+        try:
+            log.info(f"Sending workflow to {client.base_url}.")
+            log.info(f"Workflow: {workflow}")
+            result = await client.generate(workflow)
+            call.respond(200)
+            return result
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+            call.fail()
+            raise
+        except (aiohttp.ClientResponseError, ComfyUIError) as e:
+            # Only 5xx responses count against the server, a workflow that
+            # fails to run or a cancelled request says nothing about its health
+            if e.status:
+                call.respond(e.status)
+            raise
+        finally:
+            call.close()
 
     try:
-        log.info("Sending workflow to WebSocket server.")
-        log.info(f"Workflow: {workflow}")
-        images = await asyncio.to_thread(
-            get_images, ws, workflow, client_id, base_url, api_key
-        )
+        if deterministic:
+            return await comfyui_result_cache.get(
+                ComfyUIResultCache.get_key(base_urls, workflow), generate
+            )
+        return await generate()
     except Exception as e:
         log.exception(f"Error while receiving images: {e}")
-        images = None
-
-    ws.close()
-
-    return images
+        return None
@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from starlette.datastructures import Headers
+
+from open_webui.models.files import Files
+from open_webui.models.ingestion_jobs import IngestionJobModel, IngestionJobs
+from open_webui.models.users import Users
+from open_webui.utils.file_status import publish_file_stage, update_file_status
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    INGESTION_JOB_LOCK_TIMEOUT,
+    INGESTION_JOB_MAX_ATTEMPTS,
+    INGESTION_JOB_RETRY_BACKOFF,
+    INGESTION_WORKER_CONCURRENCY,
+    INGESTION_WORKER_POLL_INTERVAL,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+
+# Ingestion job executing in the current context, if any. asyncio.to_thread copies
+# the context, so the processing pipeline can report stages without having the job
+# threaded through every call.
+_current_job: ContextVar[Optional[IngestionJobModel]] = ContextVar(
+    "ingestion_job", default=None
+)
+
+# Worker running in this process, used to wake it up as soon as a job is enqueued
+_worker: Optional["IngestionWorker"] = None
+
+
+class IngestionJobCancelled(Exception):
+    pass
+
+
+def set_ingestion_stage(stage: str):
+    """
+    Record the pipeline stage (extract, split, embed, index) of the current
+    ingestion job and abort if the job has been cancelled meanwhile. No-op
+    outside of an ingestion worker.
+    """
+    job = _current_job.get()
+    if not job:
+        return
+
+    status = IngestionJobs.update_job_stage_by_id(job.id, stage, job.locked_by)
+    if status == "cancelled":
+        raise IngestionJobCancelled(f"Ingestion job {job.id} was cancelled")
+
+    publish_file_stage(job.file_id, job.user_id, stage)
+
+
+def in_ingestion_job() -> bool:
+    """Whether the final file status is owned by an ingestion worker."""
+    return _current_job.get() is not None
+
+
+def enqueue_file_processing(
+    file_id: str, user_id: str, data: Optional[dict] = None
+) -> Optional[IngestionJobModel]:
+    job = IngestionJobs.insert_new_job(
+        file_id,
+        user_id,
+        max_attempts=INGESTION_JOB_MAX_ATTEMPTS,
+        data=data,
+    )
+
+    if job and _worker is not None:
+        _worker.notify()
+
+    return job
+
+
+def cancel_file_processing(file_id: str) -> bool:
+    cancelled = IngestionJobs.cancel_jobs_by_file_id(file_id) > 0
+    if cancelled:
+        update_file_status(file_id, "failed", error="Processing cancelled")
+    return cancelled
+
+
+def get_internal_request(app) -> Request:
+    # Creating a mock request object so the processing pipeline can read app.state
+    return Request(
+        {
+            "type": "http",
+            "asgi.version": "3.0",
+            "asgi.spec_version": "2.0",
+            "method": "POST",
+            "path": "/internal/ingestion",
+            "query_string": b"",
+            "headers": Headers({}).raw,
+            "client": ("127.0.0.1", 12345),
+            "server": ("127.0.0.1", 80),
+            "scheme": "http",
+            "app": app,
+        }
+    )
+
+
+class IngestionWorker:
+    """
+    Pulls jobs from the persistent ingestion queue and runs them with bounded
+    concurrency. Several workers (web processes and/or dedicated
+    `open-webui ingest-worker` processes) can share the same queue.
+    """
+
+    def __init__(self, app, concurrency: int = INGESTION_WORKER_CONCURRENCY):
+        self.app = app
+        self.concurrency = concurrency
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+    def notify(self):
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self):
+        global _worker
+
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._run_slot(slot))
+            for slot in range(self.concurrency)
+        ]
+        _worker = self
+
+        log.info(
+            f"Ingestion worker {self.worker_id} started with {self.concurrency} slots"
+        )
+
+    async def stop(self):
+        global _worker
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        if _worker is self:
+            _worker = None
+
+    async def run_forever(self):
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    async def _run_slot(self, slot: int):
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim_next_job)
+            except Exception as e:
+                log.exception(f"Error claiming ingestion job: {e}")
+                job = None
+
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=INGESTION_WORKER_POLL_INTERVAL
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await asyncio.to_thread(self._run_job, job)
+
+    def _claim_next_job(self) -> Optional[IngestionJobModel]:
+        for job in IngestionJobs.expire_stale_jobs(INGESTION_JOB_LOCK_TIMEOUT):
+            log.error(f"Ingestion job {job.id} failed: its worker stopped")
+            update_file_status(
+                job.file_id,
+                "failed",
+                error="The worker stopped while processing the file",
+            )
+        return IngestionJobs.claim_next_job(self.worker_id)
+
+    def _run_job(self, job: IngestionJobModel):
+        # Imported lazily, the routers import this module to enqueue jobs
+        from open_webui.routers.files import process_uploaded_file_item
+
+        token = _current_job.set(job)
+        try:
+            file_item = Files.get_file_by_id(job.file_id)
+            user = Users.get_user_by_id(job.user_id)
+            if not file_item or not user:
+                IngestionJobs.update_job_by_id(
+                    job.id, {"status": "failed", "error": "File or user not found"}
+                )
+                return
+
+            log.info(
+                f"Processing file {file_item.id} (job {job.id}, attempt {job.attempts})"
+            )
+            update_file_status(file_item.id, "pending")
+            process_uploaded_file_item(
+                get_internal_request(self.app),
+                file_item,
+                (job.data or {}).get("metadata", {}),
+                user,
+            )
+
+            completed = IngestionJobs.finish_job_by_id(
+                job.id,
+                job.locked_by,
+                {
+                    "status": "completed",
+                    "stage": None,
+                    "error": None,
+                    "locked_by": None,
+                    "locked_at": None,
+                },
+            )
+            if not completed:
+                self._handle_lost_job(job)
+        except Exception as e:
+            self._handle_job_error(job, e)
+        finally:
+            _current_job.reset(token)
+
+    def _handle_lost_job(self, job: IngestionJobModel):
+        """The job was cancelled or re-claimed while this worker ran it."""
+        if IngestionJobs.get_job_status_by_id(job.id) == "cancelled":
+            log.info(f"Ingestion job {job.id} cancelled")
+            IngestionJobs.update_job_by_id(
+                job.id, {"locked_by": None, "locked_at": None}
+            )
+            update_file_status(job.file_id, "failed", error="Processing cancelled")
+        else:
+            log.warning(f"Ingestion job {job.id} was taken over by another worker")
+
+    def _handle_job_error(self, job: IngestionJobModel, e: Exception):
+        error = str(e.detail) if hasattr(e, "detail") else str(e)
+
+        # process_file wraps every error, so look at the stored status to tell a
+        # cancellation apart from a genuine failure
+        if IngestionJobs.get_job_status_by_id(job.id) == "cancelled":
+            return self._handle_lost_job(job)
+
+        if job.attempts < job.max_attempts:
+            delay = INGESTION_JOB_RETRY_BACKOFF * (2 ** (job.attempts - 1))
+            log.warning(
+                f"Ingestion job {job.id} failed (attempt {job.attempts}/{job.max_attempts}), retrying in {delay:.0f}s: {error}"
+            )
+            updated = {"status": "queued", "next_attempt_at": int(time.time() + delay)}
+        else:
+            log.error(f"Ingestion job {job.id} failed: {error}")
+            updated = {"status": "failed"}
+
+        finished = IngestionJobs.finish_job_by_id(
+            job.id,
+            job.locked_by,
+            {**updated, "error": error, "locked_by": None, "locked_at": None},
+        )
+        if not finished:
+            self._handle_lost_job(job)
+        elif updated["status"] == "queued":
+            update_file_status(job.file_id, "pending")
+        else:
+            update_file_status(job.file_id, "failed", error=error)
@@ -3,6 +3,7 @@ from typing import Optional
 from contextlib import AsyncExitStack
 
 from mcp import ClientSession
+from mcp.client.session import MessageHandlerFnT
 from mcp.client.auth import OAuthClientProvider, TokenStorage
 from mcp.client.streamable_http import streamablehttp_client
 from mcp.shared.auth import OAuthClientInformationFull, OAuthClientMetadata, OAuthToken
@@ -13,7 +14,12 @@ class MCPClient:
         self.session: Optional[ClientSession] = None
         self.exit_stack = AsyncExitStack()
 
-    async def connect(self, url: str, headers: Optional[dict] = None):
+    async def connect(
+        self,
+        url: str,
+        headers: Optional[dict] = None,
+        message_handler: Optional[MessageHandlerFnT] = None,
+    ):
         try:
             self._streams_context = streamablehttp_client(url, headers=headers)
 
@@ -21,7 +27,7 @@ class MCPClient:
             read_stream, write_stream, _ = transport
 
             self._session_context = ClientSession(
-                read_stream, write_stream
+                read_stream, write_stream, message_handler=message_handler
             )  # pylint: disable=W0201
 
             self.session = await self.exit_stack.enter_async_context(
@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
+from mcp import types
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    MCP_SESSION_IDLE_TIMEOUT,
+    MCP_TOOL_SPECS_TTL,
+)
+from open_webui.utils.mcp.client import MCPClient
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Sessions unused for longer than this are pinged before they are reused
+HEALTH_CHECK_INTERVAL = 30
+HEALTH_CHECK_TIMEOUT = 5
+
+
+class MCPSession:
+    """
+    An MCP client session that outlives the request that opened it.
+
+    The transport and session contexts must be exited by the task that entered
+    them, so each session is owned by a task of its own until it is closed.
+    """
+
+    def __init__(self, url: str, headers: Optional[dict] = None):
+        self.url = url
+        self.headers = headers
+        self.client = MCPClient()
+
+        self.last_used = time.monotonic()
+        self.in_use = 0
+
+        self._tool_specs: Optional[list[dict]] = None
+        self._tool_specs_at = 0.0
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def closed(self) -> bool:
+        return self._task is None or self._task.done()
+
+    async def connect(self):
+        connected = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(connected))
+        await connected
+
+    async def _run(self, connected: asyncio.Future):
+        try:
+            await self.client.connect(
+                self.url, headers=self.headers, message_handler=self._handle_message
+            )
+        except Exception as e:
+            connected.set_exception(e)
+            return
+
+        connected.set_result(None)
+        try:
+            await self._closing.wait()
+        finally:
+            try:
+                await self.client.disconnect()
+            except Exception as e:
+                log.debug(f"Error closing MCP session to {self.url}: {e}")
+
+    async def _handle_message(self, message):
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            self._tool_specs = None
+        elif isinstance(message, Exception):
+            log.debug(f"MCP session to {self.url} received an error: {message}")
+
+    async def is_healthy(self) -> bool:
+        if self.closed:
+            return False
+        if time.monotonic() - self.last_used < HEALTH_CHECK_INTERVAL:
+            return True
+
+        try:
+            await asyncio.wait_for(
+                self.client.session.send_ping(), timeout=HEALTH_CHECK_TIMEOUT
+            )
+            return True
+        except Exception as e:
+            log.info(f"MCP session to {self.url} failed its health check: {e}")
+            return False
+
+    async def list_tool_specs(self) -> list[dict]:
+        if (
+            self._tool_specs is None
+            or time.monotonic() - self._tool_specs_at > MCP_TOOL_SPECS_TTL
+        ):
+            self._tool_specs = await self.client.list_tool_specs()
+            self._tool_specs_at = time.monotonic()
+        return self._tool_specs
+
+    async def call_tool(self, function_name: str, function_args: dict):
+        self.in_use += 1
+        try:
+            result = await self.client.call_tool(function_name, function_args)
+            self.last_used = time.monotonic()
+            return result
+        except Exception:
+            # Have the session checked before it is used again
+            self.last_used = 0.0
+            raise
+        finally:
+            self.in_use -= 1
+
+    async def close(self):
+        self._closing.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._task), timeout=10)
+            except Exception as e:
+                log.debug(f"Error waiting for MCP session to {self.url}: {e}")
+
+
+class MCPSessionPool:
+    """
+    Long-lived MCP sessions shared by all requests of the worker, one per
+    server URL and set of auth headers. Sessions are health checked before
+    reuse after a quiet period and closed after `idle_timeout` seconds unused.
+    """
+
+    def __init__(self, idle_timeout: int = MCP_SESSION_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+
+        self.sessions: dict[str, MCPSession] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._evictor: Optional[asyncio.Task] = None
+
+    async def get(self, url: str, headers: Optional[dict] = None) -> MCPSession:
+        key = hashlib.sha256(
+            json.dumps([url, headers or {}], sort_keys=True).encode()
+        ).hexdigest()
+
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            session = self.sessions.get(key)
+            if session is not None and not await session.is_healthy():
+                self.sessions.pop(key, None)
+                await session.close()
+                session = None
+
+            if session is None:
+                session = MCPSession(url, headers)
+                await session.connect()
+                self.sessions[key] = session
+
+            session.last_used = time.monotonic()
+
+        if self._evictor is None or self._evictor.done():
+            self._evictor = asyncio.create_task(self._evict_idle())
+        return session
+
+    async def _evict_idle(self):
+        while self.sessions:
+            await asyncio.sleep(min(self.idle_timeout, 60))
+
+            expired = time.monotonic() - self.idle_timeout
+            for key, session in list(self.sessions.items()):
+                if session.closed or (
+                    session.in_use == 0 and session.last_used < expired
+                ):
+                    self.sessions.pop(key, None)
+                    lock = self._locks.get(key)
+                    if lock is not None and not lock.locked():
+                        self._locks.pop(key, None)
+                    await session.close()
+
+    async def close(self):
+        if self._evictor is not None:
+            self._evictor.cancel()
+        sessions, self.sessions = list(self.sessions.values()), {}
+        for session in sessions:
+            await session.close()
+
+
+mcp_session_pool = MCPSessionPool()
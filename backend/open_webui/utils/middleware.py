@@ -90,10 +90,12 @@ from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.filter import (
     get_sorted_filter_ids,
     process_filter_functions,
+    compile_filter_chain,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
 from open_webui.utils.payload import apply_system_prompt_to_body
-from open_webui.utils.mcp.client import MCPClient
+from open_webui.utils.mcp.pool import mcp_session_pool
+from open_webui.utils import sse
 
 
 from open_webui.config import (
@@ -1010,7 +1012,6 @@ async def process_chat_payload(request, form_data, user, metadata, model):
 
     tools_dict = {}
 
-    mcp_clients = []
     mcp_tools_dict = {}
 
     if tool_ids:
@@ -1071,35 +1072,36 @@ async def process_chat_payload(request, form_data, user, metadata, model):
                             log.error(f"Error getting OAuth token: {e}")
                             oauth_token = None
 
-                    mcp_client = MCPClient()
-                    await mcp_client.connect(
-                        url=mcp_server_connection.get("url", ""),
-                        headers=headers if headers else None,
-                    )
+                    url = mcp_server_connection.get("url", "")
+                    headers = headers if headers else None
 
-                    tool_specs = await mcp_client.list_tool_specs()
+                    mcp_session = await mcp_session_pool.get(url, headers)
+                    tool_specs = await mcp_session.list_tool_specs()
                     for tool_spec in tool_specs:
 
-                        def make_tool_function(function_name):
+                        def make_tool_function(function_name, url, headers):
                             async def tool_function(**kwargs):
-                                return await mcp_client.call_tool(
+                                # Looked up on every call, the pool replaces
+                                # sessions that have gone away since
+                                mcp_session = await mcp_session_pool.get(url, headers)
+                                return await mcp_session.call_tool(
                                     function_name,
                                     function_args=kwargs,
                                 )
 
                             return tool_function
 
-                        tool_function = make_tool_function(tool_spec["name"])
+                        tool_function = make_tool_function(
+                            tool_spec["name"], url, headers
+                        )
 
                         mcp_tools_dict[tool_spec["name"]] = {
                             "spec": tool_spec,
                             "callable": tool_function,
                             "type": "mcp",
-                            "client": mcp_client,
+                            "client": mcp_session.client,
                             "direct": False,
                         }
-
-                    mcp_clients.append(mcp_client)
                 except Exception as e:
                     log.debug(e)
                     continue
@@ -1129,9 +1131,6 @@ async def process_chat_payload(request, form_data, user, metadata, model):
                     "server": tool_server,
                 }
 
-    if mcp_clients:
-        metadata["mcp_clients"] = mcp_clients
-
     if tools_dict:
         if metadata.get("params", {}).get("function_calling") == "native":
             # If the function calling is native, then call the tools function calling handler
@@ -1624,6 +1623,10 @@ async def process_chat_response(
             request, model, metadata.get("filter_ids", [])
         )
     ]
+    # Resolved once, stream filters run for every chunk of the response
+    stream_filter_chain = compile_filter_chain(
+        request, filter_functions, "stream", extra_params.get("__user__")
+    )
 
     # Streaming response
     if event_emitter and event_caller:
@@ -2089,31 +2092,20 @@ async def process_chat_response(
                             delta_count = 0
                             last_delta_data = None
 
-                    async for line in response.body_iterator:
-                        line = line.decode("utf-8") if isinstance(line, bytes) else line
-                        data = line
-
-                        # Skip empty lines
-                        if not data.strip():
-                            continue
-
-                        # "data:" is the prefix for each event
-                        if not data.startswith("data:"):
+                    # Payloads of the "data:" lines, split on bytes whatever
+                    # the upstream's chunking
+                    sse_decoder = sse.SSEDecoder()
+                    async for data in sse_decoder.iter_payloads(response.body_iterator):
+                        if data == sse.DONE:
                             continue
 
-                        # Remove the prefix
-                        data = data[len("data:") :].strip()
-
                         try:
-                            data = json.loads(data)
-
-                            data, _ = await process_filter_functions(
-                                request=request,
-                                filter_functions=filter_functions,
-                                filter_type="stream",
-                                form_data=data,
-                                extra_params={"__body__": form_data, **extra_params},
-                            )
+                            data = sse.loads(data)
+
+                            if stream_filter_chain:
+                                data, _ = await stream_filter_chain.run(
+                                    data, {"__body__": form_data, **extra_params}
+                                )
 
                             if data:
                                 if "event" in data:
@@ -2358,12 +2350,8 @@ async def process_chat_response(
                                         }
                                     )
                         except Exception as e:
-                            done = "data: [DONE]" in line
-                            if done:
-                                pass
-                            else:
-                                log.debug(f"Error: {e}")
-                                continue
+                            log.debug(f"Error: {e}")
+                            continue
                     await flush_pending_delta_data()
 
                     if content_blocks:
@@ -2800,6 +2788,7 @@ async def process_chat_response(
                                             else None
                                         ),
                                         request.app.state.config.CODE_INTERPRETER_JUPYTER_TIMEOUT,
+                                        chat_id=metadata.get("chat_id"),
                                     )
                                 else:
                                     output = {
@@ -2957,30 +2946,24 @@ async def process_chat_response(
 
     else:
         # Fallback to the original response
+        if not stream_filter_chain and not events:
+            # Nothing inspects the chunks, forward the upstream bytes as is
+            return response
+
         async def stream_wrapper(original_generator, events):
             def wrap_item(item):
                 return f"data: {item}\n\n"
 
             for event in events:
-                event, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=event,
-                    extra_params=extra_params,
-                )
+                if stream_filter_chain:
+                    event, _ = await stream_filter_chain.run(event, extra_params)
 
                 if event:
                     yield wrap_item(json.dumps(event))
 
             async for data in original_generator:
-                data, _ = await process_filter_functions(
-                    request=request,
-                    filter_functions=filter_functions,
-                    filter_type="stream",
-                    form_data=data,
-                    extra_params=extra_params,
-                )
+                if stream_filter_chain:
+                    data, _ = await stream_filter_chain.run(data, extra_params)
 
                 if data:
                     yield data
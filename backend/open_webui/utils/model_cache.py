@@ -0,0 +1,90 @@
+import asyncio
+import copy
+import logging
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from open_webui.env import SRC_LOG_LEVELS, MODELS_CACHE_TTL, MODELS_CACHE_MAX_STALE
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class ModelListCache:
+    """
+    Upstream model lists, shared by every user of the worker.
+
+    A list is fetched at most once per `ttl` seconds: concurrent misses wait
+    for the same fetch, and an expired list is served for up to `max_stale`
+    more seconds while a single background fetch refreshes it. A `ttl` of
+    None caches lists until they are cleared.
+
+    Each connection's last successful response is also kept, so that a
+    connection that fails or times out keeps its models in the list for
+    `max_stale` seconds instead of dropping out of it. Responses are kept
+    per connection and list, so a list fetched for one user never stands in
+    for another's.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[int] = MODELS_CACHE_TTL,
+        max_stale: int = MODELS_CACHE_MAX_STALE,
+    ):
+        self.ttl = ttl
+        self.max_stale = max_stale
+
+        self._lists: dict[str, tuple[float, Any]] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._responses: dict[str, tuple[float, Any]] = {}
+
+    async def get(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._lists.get(key)
+        if entry is not None:
+            fetched_at, value = entry
+            age = time.monotonic() - fetched_at
+            if self.ttl is None or age <= self.ttl:
+                return value
+            if age <= self.ttl + self.max_stale:
+                self._refresh(key, fetch)
+                return value
+
+        # Shielded so that a cancelled caller does not cancel the fetch that
+        # other callers are waiting for
+        return await asyncio.shield(self._refresh(key, fetch))
+
+    def _refresh(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.create_task(self._fetch(key, fetch))
+        return task
+
+    async def _fetch(self, key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await fetch()
+            self._lists[key] = (time.monotonic(), value)
+            return value
+        finally:
+            self._tasks.pop(key, None)
+
+    def clear(self):
+        # Connections may have been changed, their last responses are stale
+        self._lists.clear()
+        self._responses.clear()
+
+    async def get_response(self, key: str, response: Awaitable[Any]) -> Any:
+        """
+        A connection's model list response, or its last successful one if
+        the request failed (returned None).
+        """
+        response = await response
+        if response is not None:
+            # Callers modify responses in place (e.g. prefixing model ids)
+            self._responses[key] = (time.monotonic(), copy.deepcopy(response))
+            return response
+
+        entry = self._responses.get(key)
+        if entry is not None and time.monotonic() - entry[0] <= self.max_stale:
+            log.warning(f"Using the last model list for {key}")
+            return copy.deepcopy(entry[1])
+        return None
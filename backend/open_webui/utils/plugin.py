@@ -1,13 +1,22 @@
+import hashlib
 import os
 import re
 import subprocess
 import sys
+import threading
+import time
 from importlib import util
 import types
 import tempfile
 import logging
-
-from open_webui.env import SRC_LOG_LEVELS, PIP_OPTIONS, PIP_PACKAGE_INDEX_OPTIONS
+from typing import Callable, Optional
+
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    PIP_OPTIONS,
+    PIP_PACKAGE_INDEX_OPTIONS,
+    PLUGIN_VERSION_CHECK_INTERVAL,
+)
 from open_webui.models.functions import Functions
 from open_webui.models.tools import Tools
 
@@ -77,8 +86,10 @@ def load_tool_module_by_id(tool_id, content=None):
 
         content = tool.content
 
-        content = replace_imports(content)
-        Tools.update_tool_by_id(tool_id, {"content": content})
+        new_content = replace_imports(content)
+        if new_content != content:
+            content = new_content
+            Tools.update_tool_by_id(tool_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         # Install required packages found within the frontmatter
@@ -122,8 +133,10 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
             raise Exception(f"Function not found: {function_id}")
         content = function.content
 
-        content = replace_imports(content)
-        Functions.update_function_by_id(function_id, {"content": content})
+        new_content = replace_imports(content)
+        if new_content != content:
+            content = new_content
+            Functions.update_function_by_id(function_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         install_frontmatter_requirements(frontmatter.get("requirements", ""))
@@ -166,62 +179,168 @@ def load_function_module_by_id(function_id: str, content: str | None = None):
         os.unlink(temp_file.name)
 
 
-def get_function_module_from_cache(request, function_id, load_from_db=True):
-    if load_from_db:
-        # Always load from the database by default
-        # This is useful for hooks like "inlet" or "outlet" where the content might change
-        # and we want to ensure the latest content is used.
+class ModuleVersions:
+    """
+    Snapshot of the updated_at stamp of every function (or tool), refreshed
+    with a single query at most every PLUGIN_VERSION_CHECK_INTERVAL seconds.
+
+    While a loaded module's stamp is unchanged, resolving it neither reads nor
+    compares its source. A new stamp only means the row was written (its
+    valves or flags may be all that changed); the module is re-executed only
+    if the hash of its source differs. Updates made through another worker
+    are picked up within the check interval.
+    """
 
-        function = Functions.get_function_by_id(function_id)
-        if not function:
-            raise Exception(f"Function not found: {function_id}")
-        content = function.content
+    def __init__(self, get_versions: Callable[[], dict[str, int]]):
+        self._get_versions = get_versions
+        self._versions: dict[str, int] = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
 
-        new_content = replace_imports(content)
-        if new_content != content:
-            content = new_content
-            # Update the function content in the database
-            Functions.update_function_by_id(function_id, {"content": content})
+    def get(self, id: str) -> Optional[int]:
+        if time.monotonic() - self._checked_at > PLUGIN_VERSION_CHECK_INTERVAL:
+            with self._lock:
+                if time.monotonic() - self._checked_at > PLUGIN_VERSION_CHECK_INTERVAL:
+                    self._versions = self._get_versions()
+                    self._checked_at = time.monotonic()
+        return self._versions.get(id)
+
+    def invalidate(self):
+        self._checked_at = 0.0
 
-        if (
-            hasattr(request.app.state, "FUNCTION_CONTENTS")
-            and function_id in request.app.state.FUNCTION_CONTENTS
-        ) and (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            if request.app.state.FUNCTION_CONTENTS[function_id] == content:
-                return request.app.state.FUNCTIONS[function_id], None, None
-
-        function_module, function_type, frontmatter = load_function_module_by_id(
-            function_id, content
-        )
-    else:
-        # Load from cache (e.g. "stream" hook)
-        # This is useful for performance reasons
 
-        if (
-            hasattr(request.app.state, "FUNCTIONS")
-            and function_id in request.app.state.FUNCTIONS
-        ):
-            return request.app.state.FUNCTIONS[function_id], None, None
+function_versions = ModuleVersions(Functions.get_function_versions)
+tool_versions = ModuleVersions(Tools.get_tool_versions)
 
-        function_module, function_type, frontmatter = load_function_module_by_id(
-            function_id
-        )
 
+def get_content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def cache_function_module(
+    request, function_id, function_module, version: int, content: str
+):
     if not hasattr(request.app.state, "FUNCTIONS"):
         request.app.state.FUNCTIONS = {}
-
+    if not hasattr(request.app.state, "FUNCTION_VERSIONS"):
+        request.app.state.FUNCTION_VERSIONS = {}
     if not hasattr(request.app.state, "FUNCTION_CONTENTS"):
         request.app.state.FUNCTION_CONTENTS = {}
 
     request.app.state.FUNCTIONS[function_id] = function_module
-    request.app.state.FUNCTION_CONTENTS[function_id] = content
+    request.app.state.FUNCTION_VERSIONS[function_id] = version
+    request.app.state.FUNCTION_CONTENTS[function_id] = get_content_hash(content)
+    function_versions.invalidate()
+
+
+def evict_function_module(request, function_id):
+    getattr(request.app.state, "FUNCTIONS", {}).pop(function_id, None)
+    getattr(request.app.state, "FUNCTION_VERSIONS", {}).pop(function_id, None)
+    getattr(request.app.state, "FUNCTION_CONTENTS", {}).pop(function_id, None)
+    function_versions.invalidate()
+
+
+def get_function_module_from_cache(request, function_id, load_from_db=True):
+    function_module = getattr(request.app.state, "FUNCTIONS", {}).get(function_id)
+    if function_module is not None:
+        if not load_from_db:
+            # Serve from cache without any check (e.g. "stream" hook)
+            # This is useful for performance reasons
+            return function_module, None, None
+
+        # Hooks like "inlet" or "outlet" must see the latest content, which
+        # the version stamp tells us without loading the source
+        version = getattr(request.app.state, "FUNCTION_VERSIONS", {}).get(function_id)
+        if version is not None and version == function_versions.get(function_id):
+            return function_module, None, None
+
+    function = Functions.get_function_by_id(function_id)
+    if not function:
+        raise Exception(f"Function not found: {function_id}")
+    return load_function_module(request, function)
+
+
+def load_function_module(request, function):
+    """
+    Load the module of an already fetched function and cache it, reusing the
+    loaded module if it was executed from the same source.
+    """
+    content = function.content
+    version = function.updated_at
+
+    new_content = replace_imports(content)
+    if new_content != content:
+        content = new_content
+        # Update the function content in the database
+        updated = Functions.update_function_by_id(function.id, {"content": content})
+        if updated:
+            version = updated.updated_at
+
+    function_module = getattr(request.app.state, "FUNCTIONS", {}).get(function.id)
+    content_hash = getattr(request.app.state, "FUNCTION_CONTENTS", {}).get(function.id)
+    if function_module is not None and content_hash == get_content_hash(content):
+        # Only the valves or flags changed
+        cache_function_module(request, function.id, function_module, version, content)
+        return function_module, None, None
+
+    function_module, function_type, frontmatter = load_function_module_by_id(
+        function.id, content
+    )
+    cache_function_module(request, function.id, function_module, version, content)
 
     return function_module, function_type, frontmatter
 
 
+def cache_tool_module(request, tool_id, tool_module, version: int, content: str):
+    if not hasattr(request.app.state, "TOOLS"):
+        request.app.state.TOOLS = {}
+    if not hasattr(request.app.state, "TOOL_VERSIONS"):
+        request.app.state.TOOL_VERSIONS = {}
+    if not hasattr(request.app.state, "TOOL_CONTENTS"):
+        request.app.state.TOOL_CONTENTS = {}
+
+    request.app.state.TOOLS[tool_id] = tool_module
+    request.app.state.TOOL_VERSIONS[tool_id] = version
+    request.app.state.TOOL_CONTENTS[tool_id] = get_content_hash(content)
+    tool_versions.invalidate()
+
+
+def evict_tool_module(request, tool_id):
+    getattr(request.app.state, "TOOLS", {}).pop(tool_id, None)
+    getattr(request.app.state, "TOOL_VERSIONS", {}).pop(tool_id, None)
+    getattr(request.app.state, "TOOL_CONTENTS", {}).pop(tool_id, None)
+    tool_versions.invalidate()
+
+
+def get_tool_module_from_cache(request, tool_id):
+    tool_module = getattr(request.app.state, "TOOLS", {}).get(tool_id)
+    if tool_module is not None:
+        version = getattr(request.app.state, "TOOL_VERSIONS", {}).get(tool_id)
+        if version is not None and version == tool_versions.get(tool_id):
+            return tool_module
+
+    tool = Tools.get_tool_by_id(tool_id)
+    if not tool:
+        raise Exception(f"Toolkit not found: {tool_id}")
+    content = tool.content
+    version = tool.updated_at
+
+    new_content = replace_imports(content)
+    if new_content != content:
+        content = new_content
+        updated = Tools.update_tool_by_id(tool_id, {"content": content})
+        if updated:
+            version = updated.updated_at
+
+    tool_module = getattr(request.app.state, "TOOLS", {}).get(tool_id)
+    content_hash = getattr(request.app.state, "TOOL_CONTENTS", {}).get(tool_id)
+    if tool_module is None or content_hash != get_content_hash(content):
+        tool_module, _ = load_tool_module_by_id(tool_id, content=content)
+    cache_tool_module(request, tool_id, tool_module, version, content)
+
+    return tool_module
+
+
 def install_frontmatter_requirements(requirements: str):
     if requirements:
         try:
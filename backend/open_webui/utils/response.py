@@ -1,5 +1,6 @@
 import json
 from uuid import uuid4
+from open_webui.utils import sse
 from open_webui.utils.misc import (
     openai_chat_chunk_message_template,
     openai_chat_completion_message_template,
@@ -100,8 +101,10 @@ def convert_response_ollama_to_openai(ollama_response: dict) -> dict:
 
 
 async def convert_streaming_response_ollama_to_openai(ollama_streaming_response):
-    async for data in ollama_streaming_response.body_iterator:
-        data = json.loads(data)
+    # Ollama streams newline delimited JSON
+    decoder = sse.SSEDecoder(prefix=None)
+    async for data in decoder.iter_payloads(ollama_streaming_response.body_iterator):
+        data = sse.loads(data)
 
         model = data.get("model", "ollama")
         message_content = data.get("message", {}).get("content", None)
@@ -122,10 +125,9 @@ async def convert_streaming_response_ollama_to_openai(ollama_streaming_response)
             model, message_content, reasoning_content, openai_tool_calls, usage
         )
 
-        line = f"data: {json.dumps(data)}\n\n"
-        yield line
+        yield sse.encode_event(data)
 
-    yield "data: [DONE]\n\n"
+    yield sse.DONE_EVENT
 
 
 def convert_embedding_response_ollama_to_openai(response) -> dict:
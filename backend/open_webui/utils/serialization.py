@@ -0,0 +1,48 @@
+"""
+JSON encoding and decoding backed by orjson, for database columns, Redis
+values and API responses.
+
+Output is compact UTF-8. Keys that are not strings are converted the way
+json.dumps converts them. Datetimes, dates and times are written as their
+isoformat(). NaN and infinities are written as null, because strict JSON
+parsers (Postgres, browsers) reject the tokens json.dumps writes for them.
+Values orjson cannot encode (integers over 64 bits, lone surrogates) and
+documents it cannot parse (NaN tokens written by json.dumps) fall back to
+the json module, so existing rows and keys keep loading.
+"""
+
+import json
+from typing import Any, Union
+
+import orjson
+from fastapi.responses import JSONResponse
+
+OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumpb(obj: Any) -> bytes:
+    try:
+        return orjson.dumps(obj, option=OPTIONS)
+    except TypeError:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    return dumpb(obj).decode("utf-8")
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    try:
+        return orjson.loads(data)
+    except orjson.JSONDecodeError:
+        return json.loads(data)
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson, used as the app's default response class."""
+
+    def render(self, content: Any) -> bytes:
+        try:
+            return orjson.dumps(content, option=OPTIONS)
+        except TypeError:
+            return super().render(content)
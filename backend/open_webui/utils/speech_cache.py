@@ -0,0 +1,307 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional
+
+import aiofiles
+import aiohttp
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+from open_webui.config import (
+    CACHE_DIR,
+    AUDIO_TTS_CACHE_MAX_SIZE_MB,
+    AUDIO_TTS_CACHE_MAX_AGE,
+    AUDIO_TTS_CACHE_CLEANUP_INTERVAL,
+)
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    AIOHTTP_CLIENT_SESSION_SSL,
+    AIOHTTP_CLIENT_TIMEOUT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["AUDIO"])
+
+
+class SpeechSynthesis:
+    """
+    A synthesis in progress. The audio is buffered as it arrives so every
+    request for the same clip can stream it from the first byte. The engine's
+    stream sets `media_type` before it yields the first chunk.
+    """
+
+    def __init__(self):
+        self.media_type = "audio/mpeg"
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.error: Optional[Exception] = None
+        self._changed = asyncio.Condition()
+
+    async def append(self, chunk: bytes):
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def finish(self, error: Optional[Exception] = None):
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def wait_started(self):
+        """Wait for the first chunk, or for the synthesis to end (e.g. with an error)."""
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.chunks or self.done)
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        sent = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: len(self.chunks) > sent or self.done
+                )
+                chunks = self.chunks[sent:]
+                done, error = self.done, self.error
+
+            for chunk in chunks:
+                yield chunk
+            sent += len(chunks)
+
+            if done and sent == len(self.chunks):
+                if error:
+                    raise error
+                return
+
+
+SPEECH_CACHE_DIR = CACHE_DIR / "audio" / "speech"
+SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+
+class SpeechCache:
+    """
+    On-disk cache of synthesized speech bounded by size and idle age.
+
+    Clips are `<name>.mp3` files (with the request body next to them as
+    `<name>.json`); a cache hit bumps the file's mtime, which is what the
+    least-recently-used eviction sorts on, so several workers can share the
+    directory. Identical requests arriving while a clip is being synthesized
+    attach to the running synthesis instead of calling the engine again.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_size: int,
+        max_age: int,
+        cleanup_interval: int = 3600,
+    ):
+        self.path = path
+        self.max_size = max_size
+        self.max_age = max_age
+        self.cleanup_interval = cleanup_interval
+
+        self._inflight: dict[str, SpeechSynthesis] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._janitor: Optional[asyncio.Task] = None
+
+    def get(self, name: str) -> Optional[Path]:
+        file_path = self.path / f"{name}.mp3"
+        try:
+            os.utime(file_path)
+        except FileNotFoundError:
+            return None
+        return file_path
+
+    def synthesize(
+        self,
+        name: str,
+        payload: dict,
+        stream: Callable[[SpeechSynthesis], AsyncIterator[bytes]],
+    ) -> SpeechSynthesis:
+        """
+        Return the running synthesis of `name`, or start one from
+        `stream(synthesis)`. The synthesis runs in its own task so it completes
+        (and is cached) even if the client that started it goes away.
+        """
+        synthesis = self._inflight.get(name)
+        if synthesis is None:
+            synthesis = SpeechSynthesis()
+            self._inflight[name] = synthesis
+            task = asyncio.create_task(self._run(name, payload, stream, synthesis))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return synthesis
+
+    async def _run(
+        self,
+        name: str,
+        payload: dict,
+        stream: Callable[[SpeechSynthesis], AsyncIterator[bytes]],
+        synthesis: SpeechSynthesis,
+    ):
+        file_path = self.path / f"{name}.mp3"
+        tmp_path = self.path / f"{name}.{uuid.uuid4().hex}.part"
+        try:
+            async with aiofiles.open(tmp_path, "wb") as f:
+                async for chunk in stream(synthesis):
+                    await f.write(chunk)
+                    await synthesis.append(chunk)
+
+            os.replace(tmp_path, file_path)
+            async with aiofiles.open(self.path / f"{name}.json", "w") as f:
+                await f.write(json.dumps(payload))
+
+            await synthesis.finish()
+        except asyncio.CancelledError:
+            # Shutting down; release the requests streaming this clip
+            await synthesis.finish(
+                HTTPException(status_code=503, detail="Speech synthesis cancelled")
+            )
+            raise
+        except Exception as e:
+            log.exception(f"Error synthesizing speech {name}: {e}")
+            await synthesis.finish(e)
+        finally:
+            self._inflight.pop(name, None)
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def start(self):
+        if self._janitor is None:
+            self._janitor = asyncio.create_task(self._run_janitor())
+
+    async def stop(self):
+        if self._janitor is not None:
+            self._janitor.cancel()
+            self._janitor = None
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_janitor(self):
+        while True:
+            try:
+                await asyncio.to_thread(self.evict)
+            except Exception as e:
+                log.exception(f"Error cleaning up the speech cache: {e}")
+            await asyncio.sleep(self.cleanup_interval)
+
+    def evict(self):
+        now = time.time()
+        clips = []
+        for entry in os.scandir(self.path):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+
+            name, ext = os.path.splitext(entry.name)
+            if ext == ".part":
+                # Left behind by a worker that died mid-synthesis
+                if stat.st_mtime < now - self.max_age:
+                    self._remove(entry.path)
+            elif ext == ".mp3":
+                clips.append((stat.st_mtime, stat.st_size, name))
+
+        clips.sort()
+        total = sum(size for _, size, _ in clips)
+        evicted = 0
+        for mtime, size, name in clips:
+            if mtime >= now - self.max_age and total <= self.max_size:
+                break
+            self._remove(self.path / f"{name}.mp3")
+            self._remove(self.path / f"{name}.json")
+            total -= size
+            evicted += 1
+
+        if evicted:
+            log.info(f"Evicted {evicted} clips from the speech cache")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+speech_cache = SpeechCache(
+    SPEECH_CACHE_DIR,
+    max_size=AUDIO_TTS_CACHE_MAX_SIZE_MB * 1024 * 1024,
+    max_age=AUDIO_TTS_CACHE_MAX_AGE,
+    cleanup_interval=AUDIO_TTS_CACHE_CLEANUP_INTERVAL,
+)
+
+
+async def raise_for_speech_status(r: aiohttp.ClientResponse):
+    if r.ok:
+        return
+
+    detail = None
+    try:
+        res = await r.json()
+        if "error" in res:
+            error = res["error"]
+            detail = f"External: {error.get('message', '') if isinstance(error, dict) else error}"
+    except Exception:
+        detail = f"External: {r.status} {r.reason}"
+
+    raise HTTPException(
+        status_code=r.status,
+        detail=detail if detail else "FLOAT CHAT: Server Connection Error",
+    )
+
+
+async def stream_speech_response(
+    synthesis: SpeechSynthesis, url: str, **kwargs
+) -> AsyncIterator[bytes]:
+    """
+    Stream synthesized audio from a TTS API as it is produced, taking the
+    synthesis' media type from the response.
+    """
+    try:
+        timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
+        async with aiohttp.ClientSession(timeout=timeout, trust_env=True) as session:
+            async with session.post(url, ssl=AIOHTTP_CLIENT_SESSION_SSL, **kwargs) as r:
+                await raise_for_speech_status(r)
+                if r.content_type.startswith("audio/"):
+                    synthesis.media_type = r.content_type
+                async for chunk in r.content.iter_any():
+                    yield chunk
+    except HTTPException:
+        raise
+    except Exception as e:
+        log.exception(e)
+        raise HTTPException(
+            status_code=500, detail="FLOAT CHAT: Server Connection Error"
+        )
+
+
+async def get_speech_response(
+    name: str,
+    payload: dict,
+    stream: Callable[[SpeechSynthesis], AsyncIterator[bytes]],
+) -> StreamingResponse:
+    """
+    Stream clip `name` to the client while it is synthesized, sharing the
+    synthesis with identical requests already in flight.
+    """
+    synthesis = speech_cache.synthesize(name, payload, stream)
+
+    # Errors before the first byte can still be reported with a status code
+    await synthesis.wait_started()
+    if synthesis.error and not synthesis.chunks:
+        if isinstance(synthesis.error, HTTPException):
+            raise synthesis.error
+        raise HTTPException(
+            status_code=500, detail="FLOAT CHAT: Server Connection Error"
+        )
+
+    return StreamingResponse(synthesis.stream(), media_type=synthesis.media_type)
@@ -0,0 +1,85 @@
+"""
+Server-sent events and newline delimited JSON, handled as bytes.
+
+Upstream streams are split into lines without decoding them. Streams that
+nothing needs to inspect (no stream filter and no chat to save the message
+to) are forwarded without being split or parsed at all; the chat pipeline
+parses every payload, since each delta is accumulated into the message.
+"""
+
+from typing import Any, AsyncIterable, AsyncIterator, Optional, Union
+
+import orjson
+
+DATA_PREFIX = b"data:"
+DONE = b"[DONE]"
+DONE_EVENT = b"data: [DONE]\n\n"
+
+
+class SSEDecoder:
+    """
+    Yields the payload of each `data:` line of a byte stream, whatever the
+    chunk boundaries are. With `prefix=None` every non-empty line is a
+    payload, as in newline delimited JSON.
+
+    Only the unfinished last line of a chunk is copied into the decoder's
+    buffer; whole lines are sliced straight out of the chunk.
+    """
+
+    def __init__(self, prefix: Optional[bytes] = DATA_PREFIX):
+        self.prefix = prefix
+        self.buffer = bytearray()
+
+    def feed(self, chunk: Union[bytes, str]) -> list[bytes]:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+
+        if self.buffer:
+            self.buffer += chunk
+            data = self.buffer
+        else:
+            data = chunk
+
+        payloads = []
+        start = 0
+        while (end := data.find(b"\n", start)) != -1:
+            payload = self._payload(data, start, end)
+            if payload:
+                payloads.append(payload)
+            start = end + 1
+
+        if data is self.buffer:
+            del self.buffer[:start]
+        elif start < len(data):
+            self.buffer += data[start:]
+        return payloads
+
+    def flush(self) -> list[bytes]:
+        payload = self._payload(self.buffer, 0, len(self.buffer))
+        self.buffer.clear()
+        return [payload] if payload else []
+
+    def _payload(self, data, start: int, end: int) -> Optional[bytes]:
+        if self.prefix is None:
+            return bytes(data[start:end].strip()) or None
+        if data.startswith(self.prefix, start):
+            return bytes(data[start + len(self.prefix) : end].strip()) or None
+        # Comments, "event:"/"id:" fields and blank lines
+        return None
+
+    async def iter_payloads(
+        self, body_iterator: AsyncIterable[Union[bytes, str]]
+    ) -> AsyncIterator[bytes]:
+        async for chunk in body_iterator:
+            for payload in self.feed(chunk):
+                yield payload
+        for payload in self.flush():
+            yield payload
+
+
+def loads(payload: Union[bytes, str]) -> Any:
+    return orjson.loads(payload)
+
+
+def encode_event(data: Any) -> bytes:
+    return b"data: " + orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS) + b"\n\n"
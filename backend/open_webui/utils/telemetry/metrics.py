@@ -8,6 +8,8 @@ Metrics collected:
 
 * http.server.requests (counter)
 * http.server.duration (histogram, milliseconds)
+* webui.upstream.in_flight, webui.upstream.latency, webui.upstream.failures
+  (per model backend)
 
 Attributes used: http.method, http.route, http.status_code
 
@@ -47,6 +49,7 @@ from open_webui.env import (
 )
 from open_webui.socket.main import get_active_user_ids
 from open_webui.models.users import Users
+from open_webui.utils import upstream
 
 _EXPORT_INTERVAL_MILLIS = 10_000  # 10 seconds
 
@@ -99,6 +102,18 @@ def _build_meter_provider(resource: Resource) -> MeterProvider:
         View(
             instrument_name="webui.users.active",
         ),
+        View(
+            instrument_name="webui.upstream.in_flight",
+            attribute_keys=["upstream.name", "upstream.backend"],
+        ),
+        View(
+            instrument_name="webui.upstream.latency",
+            attribute_keys=["upstream.name", "upstream.backend"],
+        ),
+        View(
+            instrument_name="webui.upstream.failures",
+            attribute_keys=["upstream.name", "upstream.backend"],
+        ),
     ]
 
     provider = MeterProvider(
@@ -159,6 +174,43 @@ def setup_metrics(app: FastAPI, resource: Resource) -> None:
         callbacks=[observe_active_users],
     )
 
+    def observe_upstream(field: str):
+        def callback(
+            options: metrics.CallbackOptions,
+        ) -> Sequence[metrics.Observation]:
+            return [
+                metrics.Observation(
+                    value=getattr(stats, field),
+                    attributes={"upstream.name": name, "upstream.backend": backend},
+                )
+                for name, router in upstream.routers.items()
+                for backend, stats in list(router.backends.items())
+                if getattr(stats, field) is not None
+            ]
+
+        return callback
+
+    meter.create_observable_gauge(
+        name="webui.upstream.in_flight",
+        description="Requests in flight to each model backend",
+        unit="requests",
+        callbacks=[observe_upstream("in_flight")],
+    )
+
+    meter.create_observable_gauge(
+        name="webui.upstream.latency",
+        description="Moving average time to response of each model backend",
+        unit="s",
+        callbacks=[observe_upstream("latency")],
+    )
+
+    meter.create_observable_counter(
+        name="webui.upstream.failures",
+        description="Failed requests to each model backend",
+        unit="requests",
+        callbacks=[observe_upstream("failures")],
+    )
+
     # FastAPI middleware
     @app.middleware("http")
     async def _metrics_middleware(request: Request, call_next):
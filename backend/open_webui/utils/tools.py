@@ -6,6 +6,7 @@ import aiohttp
 import asyncio
 import yaml
 import json
+import time
 
 from pydantic import BaseModel
 from pydantic.fields import FieldInfo
@@ -36,12 +37,13 @@ from langchain_core.utils.function_calling import (
 
 from open_webui.models.tools import Tools
 from open_webui.models.users import UserModel
-from open_webui.utils.plugin import load_tool_module_by_id
+from open_webui.utils.plugin import get_tool_module_from_cache
 from open_webui.env import (
     SRC_LOG_LEVELS,
     AIOHTTP_CLIENT_TIMEOUT,
     AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA,
     AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL,
+    TOOL_SERVER_SPECS_REFRESH_INTERVAL,
 )
 
 import copy
@@ -131,39 +133,39 @@ async def get_tools(
                         ]
                     )
 
-                    specs = tool_server_data.get("specs", [])
-                    for spec in specs:
-                        function_name = spec["name"]
+                    auth_type = tool_server_connection.get("auth_type", "bearer")
 
-                        auth_type = tool_server_connection.get("auth_type", "bearer")
+                    cookies = {}
+                    headers = {}
 
-                        cookies = {}
-                        headers = {}
-
-                        if auth_type == "bearer":
-                            headers["Authorization"] = (
-                                f"Bearer {tool_server_connection.get('key', '')}"
-                            )
-                        elif auth_type == "none":
-                            # No authentication
-                            pass
-                        elif auth_type == "session":
-                            cookies = request.cookies
+                    if auth_type == "bearer":
+                        headers["Authorization"] = (
+                            f"Bearer {tool_server_connection.get('key', '')}"
+                        )
+                    elif auth_type == "none":
+                        # No authentication
+                        pass
+                    elif auth_type == "session":
+                        cookies = request.cookies
+                        headers["Authorization"] = (
+                            f"Bearer {request.state.token.credentials}"
+                        )
+                    elif auth_type == "system_oauth":
+                        cookies = request.cookies
+                        oauth_token = extra_params.get("__oauth_token__", None)
+                        if oauth_token:
                             headers["Authorization"] = (
-                                f"Bearer {request.state.token.credentials}"
+                                f"Bearer {oauth_token.get('access_token', '')}"
                             )
-                        elif auth_type == "system_oauth":
-                            cookies = request.cookies
-                            oauth_token = extra_params.get("__oauth_token__", None)
-                            if oauth_token:
-                                headers["Authorization"] = (
-                                    f"Bearer {oauth_token.get('access_token', '')}"
-                                )
 
-                        headers["Content-Type"] = "application/json"
+                    headers["Content-Type"] = "application/json"
+
+                    specs = tool_server_data.get("specs", [])
+                    for spec in specs:
+                        function_name = spec["name"]
 
                         def make_tool_function(
-                            function_name, tool_server_data, headers
+                            function_name, tool_server_data, headers, cookies
                         ):
                             async def tool_function(**kwargs):
                                 return await execute_tool_server(
@@ -177,18 +179,11 @@ async def get_tools(
 
                             return tool_function
 
-                        tool_function = make_tool_function(
-                            function_name, tool_server_data, headers
-                        )
-
-                        callable = get_async_tool_function_and_apply_extra_params(
-                            tool_function,
-                            {},
-                        )
-
                         tool_dict = {
                             "tool_id": tool_id,
-                            "callable": callable,
+                            "callable": make_tool_function(
+                                function_name, tool_server_data, headers, cookies
+                            ),
                             "spec": spec,
                             # Misc info
                             "type": "external",
@@ -210,10 +205,7 @@ async def get_tools(
             else:
                 continue
         else:
-            module = request.app.state.TOOLS.get(tool_id, None)
-            if module is None:
-                module, _ = load_tool_module_by_id(tool_id)
-                request.app.state.TOOLS[tool_id] = module
+            module = get_tool_module_from_cache(request, tool_id)
 
             extra_params["__id__"] = tool_id
 
@@ -405,32 +397,46 @@ def get_tool_specs(tool_module: object) -> list[dict]:
     return specs
 
 
-def resolve_schema(schema, components):
+def resolve_schema(schema, components, resolved_refs: Optional[dict] = None):
     """
     Recursively resolves a JSON schema using OpenAPI components.
+
+    Each `$ref` is resolved once per `resolved_refs` dict, which callers can
+    share across the schemas of a spec. A schema that references itself is
+    resolved to an empty schema where it recurses.
     """
     if not schema:
         return {}
 
+    if resolved_refs is None:
+        resolved_refs = {}
+
     if "$ref" in schema:
         ref_path = schema["$ref"]
-        ref_parts = ref_path.strip("#/").split("/")
-        resolved = components
-        for part in ref_parts[1:]:  # Skip the initial 'components'
-            resolved = resolved.get(part, {})
-        return resolve_schema(resolved, components)
-
-    resolved_schema = copy.deepcopy(schema)
-
-    # Recursively resolve inner schemas
-    if "properties" in resolved_schema:
-        for prop, prop_schema in resolved_schema["properties"].items():
-            resolved_schema["properties"][prop] = resolve_schema(
-                prop_schema, components
+        if ref_path not in resolved_refs:
+            resolved_refs[ref_path] = {}
+
+            ref_parts = ref_path.strip("#/").split("/")
+            resolved = components
+            for part in ref_parts[1:]:  # Skip the initial 'components'
+                resolved = resolved.get(part, {})
+            resolved_refs[ref_path] = resolve_schema(
+                resolved, components, resolved_refs
             )
-
-    if "items" in resolved_schema:
-        resolved_schema["items"] = resolve_schema(resolved_schema["items"], components)
+        return copy.deepcopy(resolved_refs[ref_path])
+
+    # Recursively resolve inner schemas, copying the rest
+    resolved_schema = {}
+    for key, value in schema.items():
+        if key == "properties":
+            resolved_schema[key] = {
+                prop: resolve_schema(prop_schema, components, resolved_refs)
+                for prop, prop_schema in value.items()
+            }
+        elif key == "items":
+            resolved_schema[key] = resolve_schema(value, components, resolved_refs)
+        else:
+            resolved_schema[key] = copy.deepcopy(value)
 
     return resolved_schema
 
@@ -446,6 +452,7 @@ def convert_openapi_to_tool_payload(openapi_spec):
         list: A list of tool payloads.
     """
     tool_payload = []
+    resolved_refs = {}
 
     for path, methods in openapi_spec.get("paths", {}).items():
         for method, operation in methods.items():
@@ -492,7 +499,9 @@ def convert_openapi_to_tool_payload(openapi_spec):
                     json_schema = content.get("application/json", {}).get("schema")
                     if json_schema:
                         resolved_schema = resolve_schema(
-                            json_schema, openapi_spec.get("components", {})
+                            json_schema,
+                            openapi_spec.get("components", {}),
+                            resolved_refs,
                         )
 
                         if resolved_schema.get("properties"):
@@ -516,35 +525,121 @@ def convert_openapi_to_tool_payload(openapi_spec):
     return tool_payload
 
 
-async def set_tool_servers(request: Request):
-    request.app.state.TOOL_SERVERS = await get_tool_servers_data(
-        request.app.state.config.TOOL_SERVER_CONNECTIONS
-    )
+def get_tool_server_operations(openapi: dict) -> dict[str, tuple[str, str, dict]]:
+    """
+    Index an OpenAPI spec's operations by operationId, as (path, method,
+    operation) tuples.
+    """
+    operations = {}
+    for route_path, methods in openapi.get("paths", {}).items():
+        for http_method, operation in methods.items():
+            if isinstance(operation, dict) and operation.get("operationId"):
+                operations.setdefault(
+                    operation["operationId"],
+                    (route_path, http_method.lower(), operation),
+                )
+    return operations
 
-    if request.app.state.redis is not None:
-        await request.app.state.redis.set(
-            "tool_servers", json.dumps(request.app.state.TOOL_SERVERS)
-        )
 
-    return request.app.state.TOOL_SERVERS
+class ToolServerCatalogue:
+    """
+    The OpenAPI tool servers' specs, kept in process between requests.
 
+    With Redis, servers are stored under a version number, and workers only
+    reload them when another worker has refreshed them. Specs older than
+    `refresh_interval` seconds are refetched in the background, using
+    conditional requests so that unchanged specs are not parsed again.
+    """
 
-async def get_tool_servers(request: Request):
-    tool_servers = []
-    if request.app.state.redis is not None:
-        try:
-            tool_servers = json.loads(await request.app.state.redis.get("tool_servers"))
-            request.app.state.TOOL_SERVERS = tool_servers
-        except Exception as e:
-            log.error(f"Error fetching tool_servers from Redis: {e}")
+    def __init__(self, refresh_interval: int = TOOL_SERVER_SPECS_REFRESH_INTERVAL):
+        self.refresh_interval = refresh_interval
 
-    if not tool_servers:
-        tool_servers = await set_tool_servers(request)
+        self.servers: list[dict] = []
+        self.version: Optional[str] = None
+        self.loaded_at: Optional[float] = None
 
-    return tool_servers
+        # Last response of each spec URL, for conditional requests
+        self.responses: dict[str, dict] = {}
 
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
 
-async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
+    def load(self, servers: list[dict], version: Optional[str]):
+        self.servers = [
+            {
+                **server,
+                "operations": get_tool_server_operations(server.get("openapi", {})),
+            }
+            for server in servers
+        ]
+        self.version = version
+        self.loaded_at = time.monotonic()
+
+    async def get(self, request: Request) -> list[dict]:
+        redis = request.app.state.redis
+        if redis is not None:
+            try:
+                version = await redis.get("tool_servers:version")
+                if version is not None and version != self.version:
+                    servers = json.loads(await redis.get("tool_servers"))
+                    self.load(servers, version)
+                    request.app.state.TOOL_SERVERS = servers
+            except Exception as e:
+                log.error(f"Error fetching tool_servers from Redis: {e}")
+
+        if (
+            self.loaded_at is None
+            or time.monotonic() - self.loaded_at > self.refresh_interval
+        ):
+            if self._refresh_task is None or self._refresh_task.done():
+                self._refresh_task = asyncio.create_task(self.refresh(request))
+
+            # Only the first load is waited for, later ones happen in the
+            # background
+            if self.loaded_at is None:
+                await asyncio.shield(self._refresh_task)
+
+        return self.servers
+
+    async def refresh(self, request: Request) -> list[dict]:
+        async with self._lock:
+            servers = await get_tool_servers_data(
+                request.app.state.config.TOOL_SERVER_CONNECTIONS, self.responses
+            )
+
+            version = None
+            redis = request.app.state.redis
+            if redis is not None:
+                try:
+                    await redis.set("tool_servers", json.dumps(servers))
+                    version = str(await redis.incr("tool_servers:version"))
+                except Exception as e:
+                    log.error(f"Error storing tool_servers in Redis: {e}")
+
+            self.load(servers, version)
+            request.app.state.TOOL_SERVERS = servers
+            return self.servers
+
+
+tool_server_catalogue = ToolServerCatalogue()
+
+
+async def set_tool_servers(request: Request):
+    return await tool_server_catalogue.refresh(request)
+
+
+async def get_tool_servers(request: Request):
+    return await tool_server_catalogue.get(request)
+
+
+async def get_tool_server_data(
+    token: str, url: str, responses: Optional[dict] = None
+) -> Dict[str, Any]:
+    """
+    Fetch and convert a tool server's OpenAPI spec. If a `responses` dict is
+    given, the last response of each URL is kept in it and the spec is only
+    converted again when the server reports that it changed.
+    """
     headers = {
         "Accept": "application/json",
         "Content-Type": "application/json",
@@ -552,6 +647,15 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
     if token:
         headers["Authorization"] = f"Bearer {token}"
 
+    cached = responses.get(url) if responses is not None else None
+    if cached and cached["token"] == token:
+        if cached["etag"]:
+            headers["If-None-Match"] = cached["etag"]
+        if cached["last_modified"]:
+            headers["If-Modified-Since"] = cached["last_modified"]
+    else:
+        cached = None
+
     error = None
     try:
         timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA)
@@ -559,10 +663,16 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
             async with session.get(
                 url, headers=headers, ssl=AIOHTTP_CLIENT_SESSION_TOOL_SERVER_SSL
             ) as response:
+                if response.status == 304 and cached:
+                    log.debug(f"Tool server spec at {url} is unchanged")
+                    return cached["data"]
+
                 if response.status != 200:
                     error_body = await response.json()
                     raise Exception(error_body)
 
+                etag = response.headers.get("ETag")
+                last_modified = response.headers.get("Last-Modified")
                 text_content = None
 
                 # Check if URL ends with .yaml or .yml to determine format
@@ -594,11 +704,21 @@ async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
         "specs": convert_openapi_to_tool_payload(res),
     }
 
+    if responses is not None:
+        responses[url] = {
+            "token": token,
+            "etag": etag,
+            "last_modified": last_modified,
+            "data": data,
+        }
+
     log.info(f"Fetched data: {data}")
     return data
 
 
-async def get_tool_servers_data(servers: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+async def get_tool_servers_data(
+    servers: List[Dict[str, Any]], responses: Optional[dict] = None
+) -> List[Dict[str, Any]]:
     # Prepare list of enabled servers along with their original index
     server_entries = []
     for idx, server in enumerate(servers):
@@ -629,7 +749,8 @@ async def get_tool_servers_data(servers: List[Dict[str, Any]]) -> List[Dict[str,
 
     # Create async tasks to fetch data
     tasks = [
-        get_tool_server_data(token, url) for (_, _, _, url, _, token) in server_entries
+        get_tool_server_data(token, url, responses)
+        for (_, _, _, url, _, token) in server_entries
     ]
 
     # Execute tasks concurrently
@@ -677,33 +798,14 @@ async def execute_tool_server(
 ) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
     error = None
     try:
-        openapi = server_data.get("openapi", {})
-        paths = openapi.get("paths", {})
-
-        matching_route = None
-        for route_path, methods in paths.items():
-            for http_method, operation in methods.items():
-                if isinstance(operation, dict) and operation.get("operationId") == name:
-                    matching_route = (route_path, methods)
-                    break
-            if matching_route:
-                break
-
-        if not matching_route:
-            raise Exception(f"No matching route found for operationId: {name}")
+        operations = server_data.get("operations")
+        if operations is None:
+            operations = get_tool_server_operations(server_data.get("openapi", {}))
 
-        route_path, methods = matching_route
-
-        method_entry = None
-        for http_method, operation in methods.items():
-            if operation.get("operationId") == name:
-                method_entry = (http_method.lower(), operation)
-                break
-
-        if not method_entry:
-            raise Exception(f"No matching method found for operationId: {name}")
+        if name not in operations:
+            raise Exception(f"No matching route found for operationId: {name}")
 
-        http_method, operation = method_entry
+        route_path, http_method, operation = operations[name]
 
         path_params = {}
         query_params = {}
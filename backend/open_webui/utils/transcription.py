@@ -0,0 +1,437 @@
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Iterator, Optional
+
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["AUDIO"])
+
+SAMPLING_RATE = 16000
+# Longest audio Whisper decodes in a single window; shorter utterances from
+# several requests can share one batched forward pass, one window each
+CHUNK_LENGTH = 30
+
+
+class TranscriptionError(Exception):
+    pass
+
+
+def load_whisper_model(
+    model: str,
+    device: str = "cpu",
+    download_root: Optional[str] = None,
+    auto_update: bool = False,
+    cpu_threads: int = 0,
+):
+    from faster_whisper import WhisperModel
+
+    faster_whisper_kwargs = {
+        "model_size_or_path": model,
+        "device": device,
+        "compute_type": "int8",
+        "download_root": download_root,
+        "local_files_only": not auto_update,
+        "cpu_threads": cpu_threads,
+    }
+
+    try:
+        return WhisperModel(**faster_whisper_kwargs)
+    except Exception:
+        log.warning(
+            "WhisperModel initialization failed, attempting download with local_files_only=False"
+        )
+        faster_whisper_kwargs["local_files_only"] = False
+        return WhisperModel(**faster_whisper_kwargs)
+
+
+class WhisperWorkerPool:
+    """
+    Local faster-whisper transcription in dedicated worker processes.
+
+    Each worker loads the model once and serves jobs from a shared queue, so
+    transcription neither competes with the web worker for the GIL nor shares
+    a single model instance between request threads. Segments are streamed
+    back as they are decoded. Short utterances (voice calls) that arrive
+    within `batch_window` seconds of each other are decoded together in one
+    batch; longer audio is segmented with the VAD and its segments batched.
+    """
+
+    def __init__(
+        self,
+        workers: int = 1,
+        batch_size: int = 8,
+        batch_window: float = 0.05,
+        timeout: float = 600,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        # Seconds a request waits for the next event of its job
+        self.timeout = timeout
+
+        self.model = None
+        self._options = None
+        self._context = None
+        self._processes: list = []
+        self._jobs = None
+        self._events = None
+        self._listener: Optional[threading.Thread] = None
+        self._running = False
+
+        # job id -> [events of the job, pid of the worker running it]
+        self._pending: dict[str, list] = {}
+        self._pending_lock = threading.Lock()
+        # Serializes starting and stopping the workers
+        self._lock = threading.Lock()
+
+    def start(
+        self,
+        model: str,
+        device: str = "cpu",
+        download_root: Optional[str] = None,
+        auto_update: bool = False,
+    ):
+        """Start the workers, restarting them if `model` changed."""
+        with self._lock:
+            if self._running and self.model == model:
+                return
+            self._stop()
+
+            log.info(f"Starting {self.workers} whisper workers for model {model}")
+            # Spawn rather than fork: the web worker holds threads, sockets
+            # and possibly a CUDA context that must not leak into children
+            context = multiprocessing.get_context("spawn")
+            self.model = model
+            self._options = {
+                "model": model,
+                "device": device,
+                "download_root": download_root,
+                "auto_update": auto_update,
+                "cpu_threads": (
+                    max((os.cpu_count() or 1) // self.workers, 1)
+                    if device == "cpu"
+                    else 0
+                ),
+            }
+            self._context = context
+            self._jobs = context.Queue()
+            self._events = context.Queue()
+            self._processes = [self._spawn() for _ in range(self.workers)]
+
+            self._running = True
+            self._listener = threading.Thread(
+                target=self._listen, name="whisper-events", daemon=True
+            )
+            self._listener.start()
+
+    def _spawn(self):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(
+                self._options,
+                self.batch_size,
+                self.batch_window,
+                self._jobs,
+                self._events,
+            ),
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def stop(self, timeout: float = 10):
+        with self._lock:
+            self._stop(timeout)
+
+    def _stop(self, timeout: float = 10):
+        if not self._running:
+            return
+        self._running = False
+
+        for _ in self._processes:
+            self._jobs.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+
+        self._listener.join(timeout)
+        self._fail_pending("Transcription workers were stopped")
+        self.model = None
+
+    def transcribe(
+        self,
+        file_path: str,
+        language: Optional[str] = None,
+        vad_filter: bool = False,
+    ) -> Iterator[dict]:
+        """
+        Yield the segments of `file_path` ({"start", "end", "text"}) as the
+        worker decodes them.
+        """
+        if not self._running:
+            raise TranscriptionError("Transcription workers are not running")
+
+        job_id = str(uuid.uuid4())
+        events = queue.SimpleQueue()
+        with self._pending_lock:
+            self._pending[job_id] = [events, None]
+        self._jobs.put((job_id, file_path, language, vad_filter))
+
+        try:
+            while True:
+                try:
+                    kind, data = events.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TranscriptionError("Transcription timed out")
+
+                if kind == "segment":
+                    yield data
+                elif kind == "done":
+                    log.info(
+                        "Detected language '%s' with probability %f"
+                        % (data["language"], data["language_probability"])
+                    )
+                    return
+                else:
+                    raise TranscriptionError(data)
+        finally:
+            with self._pending_lock:
+                self._pending.pop(job_id, None)
+
+    def _listen(self):
+        while self._running or self._pending:
+            try:
+                kind, job_id, data = self._events.get(timeout=1)
+            except queue.Empty:
+                self._reap()
+                if not self._running:
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+
+            with self._pending_lock:
+                pending = self._pending.get(job_id)
+                if pending is None:
+                    continue
+                if kind == "started":
+                    pending[1] = data
+                else:
+                    pending[0].put((kind, data))
+
+    def _reap(self):
+        """Fail the jobs of workers that died (e.g. killed for OOM) and replace them."""
+        # Skip this round while the workers are being started or stopped
+        if not self._lock.acquire(blocking=False):
+            return
+
+        try:
+            if not self._running:
+                return
+
+            for i, process in enumerate(self._processes):
+                if process.is_alive():
+                    continue
+
+                log.error(
+                    f"Whisper worker {process.pid} exited with code {process.exitcode}"
+                )
+                # The worker may have taken jobs off the queue without
+                # reporting them started, and those would never finish
+                self._fail_pending(
+                    "Transcription worker exited unexpectedly",
+                    pids={process.pid, None},
+                )
+                self._processes[i] = self._spawn()
+        finally:
+            self._lock.release()
+
+    def _fail_pending(self, message: str, pids: Optional[set] = None):
+        with self._pending_lock:
+            for events, worker_pid in self._pending.values():
+                if pids is None or worker_pid in pids:
+                    events.put(("error", message))
+
+
+def _worker_main(options, batch_size, batch_window, jobs, events):
+    from faster_whisper import BatchedInferencePipeline
+
+    pid = os.getpid()
+    try:
+        pipeline = BatchedInferencePipeline(model=load_whisper_model(**options))
+        load_error = None
+    except Exception as e:
+        log.exception(f"Failed to load whisper model {options['model']}: {e}")
+        pipeline = None
+        load_error = f"Failed to load whisper model: {e}"
+
+    stopping = False
+    while not stopping:
+        job = jobs.get()
+        if job is None:
+            return
+
+        if load_error:
+            events.put(("error", job[0], load_error))
+            continue
+
+        batch = [_decode(job, pid, events)]
+        if _is_short(batch[0]):
+            # Give concurrent utterances a moment to join the batch
+            deadline = time.monotonic() + batch_window
+            while len(batch) < batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    job = jobs.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if job is None:
+                    stopping = True
+                    break
+                batch.append(_decode(job, pid, events))
+
+        batch = [item for item in batch if item is not None]
+        short = {}
+        for item in batch:
+            if _is_short(item):
+                short.setdefault(item[2], []).append(item)
+            else:
+                _transcribe(pipeline, item, batch_size, events)
+
+        for language, items in short.items():
+            _transcribe_batch(pipeline, items, language, batch_size, events)
+
+
+def _decode(job, pid, events):
+    from faster_whisper import decode_audio
+
+    job_id, file_path = job[0], job[1]
+    events.put(("started", job_id, pid))
+    try:
+        return (*job, decode_audio(file_path, sampling_rate=SAMPLING_RATE))
+    except Exception as e:
+        events.put(("error", job_id, f"Failed to decode audio: {e}"))
+        return None
+
+
+def _is_short(item) -> bool:
+    return (
+        item is not None
+        and not item[3]  # vad_filter
+        and len(item[4]) < CHUNK_LENGTH * SAMPLING_RATE
+    )
+
+
+def _transcribe(pipeline, item, batch_size, events):
+    job_id, _, language, vad_filter, audio = item
+    try:
+        segments, info = pipeline.transcribe(
+            audio,
+            language=language,
+            beam_size=5,
+            batch_size=batch_size,
+            # Anything longer than one window is segmented on speech boundaries
+            vad_filter=vad_filter or len(audio) >= CHUNK_LENGTH * SAMPLING_RATE,
+        )
+        for segment in segments:
+            events.put(
+                (
+                    "segment",
+                    job_id,
+                    {"start": segment.start, "end": segment.end, "text": segment.text},
+                )
+            )
+        events.put(
+            (
+                "done",
+                job_id,
+                {
+                    "language": info.language,
+                    "language_probability": info.language_probability,
+                },
+            )
+        )
+    except Exception as e:
+        log.exception(e)
+        events.put(("error", job_id, str(e)))
+
+
+def _transcribe_batch(pipeline, items, language, batch_size, events):
+    """Decode several short utterances in one pass, one window per utterance."""
+    import numpy as np
+
+    if len(items) == 1:
+        return _transcribe(pipeline, items[0], batch_size, events)
+
+    # Every utterance is padded with silence to a whole window (Whisper pads
+    # shorter audio the same way), so that the pipeline cannot pack two
+    # requests' audio into one window and decode a segment spanning both
+    window = CHUNK_LENGTH * SAMPLING_RATE
+    audio = np.zeros(window * len(items), dtype=np.float32)
+    clips = []
+    for i, item in enumerate(items):
+        audio[i * window : i * window + len(item[4])] = item[4]
+        clips.append({"start": i * window, "end": (i + 1) * window})
+
+    try:
+        segments, info = pipeline.transcribe(
+            audio,
+            language=language,
+            # Without a language every utterance gets its own detection
+            multilingual=language is None,
+            beam_size=5,
+            batch_size=batch_size,
+            clip_timestamps=clips,
+        )
+
+        done = 0
+        for segment in segments:
+            index = min(int(segment.start // CHUNK_LENGTH), len(items) - 1)
+            for item in items[done:index]:
+                _done(item[0], info, events)
+            done = max(done, index)
+
+            offset = index * CHUNK_LENGTH
+            events.put(
+                (
+                    "segment",
+                    items[index][0],
+                    {
+                        "start": segment.start - offset,
+                        "end": min(
+                            segment.end - offset, len(items[index][4]) / SAMPLING_RATE
+                        ),
+                        "text": segment.text,
+                    },
+                )
+            )
+
+        for item in items[done:]:
+            _done(item[0], info, events)
+    except Exception as e:
+        log.exception(e)
+        for item in items:
+            events.put(("error", item[0], str(e)))
+
+
+def _done(job_id, info, events):
+    events.put(
+        (
+            "done",
+            job_id,
+            {
+                "language": info.language,
+                "language_probability": info.language_probability,
+            },
+        )
+    )
@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Collection, Iterator, Mapping, Optional, Sequence
+
+import aiohttp
+import requests
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    UPSTREAM_FAILURE_THRESHOLD,
+    UPSTREAM_FAILURE_COOLDOWN,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+ROUTING_POLICIES = ("least_outstanding", "latency_ewma", "random")
+
+# Raised when a backend could not be reached or did not answer in time
+TRANSPORT_ERRORS = (
+    ConnectionError,
+    TimeoutError,
+    aiohttp.ClientConnectionError,
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+)
+
+# Routers by name, for metrics
+routers: dict[str, "UpstreamRouter"] = {}
+
+
+class UpstreamBusyError(Exception):
+    """Every backend stayed at its concurrency limit for the whole timeout."""
+
+
+@dataclass
+class BackendStats:
+    in_flight: int = 0
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    # Exponentially weighted moving average of the time to response, in seconds
+    latency: Optional[float] = None
+    # Requests are not routed to the backend until then (circuit open)
+    retry_at: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency": self.latency,
+            "available": self.retry_at <= time.monotonic(),
+        }
+
+
+class UpstreamCall:
+    """A request in flight to a backend, reported back to its router."""
+
+    def __init__(self, router: "UpstreamRouter", backend: str):
+        self.router = router
+        self.backend = backend
+        self.started_at = time.monotonic()
+        self.recorded = False
+        self.closed = False
+
+    def respond(self, status: int):
+        """Record the backend's response; 5xx responses count as failures."""
+        if not self.recorded:
+            self.recorded = True
+            self.router._record(
+                self.backend, status < 500, time.monotonic() - self.started_at
+            )
+
+    def fail(self):
+        """Record that the backend could not be reached or timed out."""
+        if not self.recorded:
+            self.recorded = True
+            self.router._record(self.backend, False)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self.router._stats(self.backend).in_flight -= 1
+            self.router._wake()
+
+
+class UpstreamRouter:
+    """
+    Picks which of several equivalent backends serves a request.
+
+    Policies:
+      - least_outstanding: the backend with the fewest requests in flight
+      - latency_ewma: the lowest moving average latency, scaled by the
+        requests in flight
+      - random: uniformly at random
+
+    `weights` scale each backend's share of the load (0 drains a backend).
+    `preferred` backends (e.g. those that already have the model loaded) win
+    as long as one of them has fewer than `spillover` requests in flight.
+    Health is checked passively: after `failure_threshold` consecutive
+    failures a backend is skipped for `cooldown` seconds, then receives a
+    single trial request that closes or reopens the circuit.
+
+    Stats are kept per process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        policy: str = "least_outstanding",
+        alpha: float = 0.3,
+        spillover: int = 4,
+        failure_threshold: int = UPSTREAM_FAILURE_THRESHOLD,
+        cooldown: float = UPSTREAM_FAILURE_COOLDOWN,
+    ):
+        if policy not in ROUTING_POLICIES:
+            log.warning(
+                f"Unknown routing policy {policy} for {name}, using least_outstanding"
+            )
+            policy = "least_outstanding"
+
+        self.name = name
+        self.policy = policy
+        self.alpha = alpha
+        self.spillover = spillover
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.backends: dict[str, BackendStats] = {}
+        self._waiters: list[asyncio.Future] = []
+        routers[name] = self
+
+    def _stats(self, backend: str) -> BackendStats:
+        stats = self.backends.get(backend)
+        if stats is None:
+            stats = self.backends[backend] = BackendStats()
+        return stats
+
+    def is_available(self, backend: str) -> bool:
+        return self._stats(backend).retry_at <= time.monotonic()
+
+    def choose(
+        self,
+        backends: Sequence[str],
+        preferred: Collection[str] = (),
+        weights: Optional[Mapping[str, float]] = None,
+    ) -> str:
+        if not backends:
+            raise IndexError("No backends to choose from")
+        weights = weights or {}
+
+        candidates = [
+            backend
+            for backend in backends
+            if self.is_available(backend) and weights.get(backend, 1) > 0
+        ]
+        if not candidates:
+            # Everything is failing or drained; let the caller see the error
+            candidates = list(backends)
+
+        preferred = [backend for backend in candidates if backend in preferred]
+        if (
+            preferred
+            and min(self._stats(backend).in_flight for backend in preferred)
+            < self.spillover
+        ):
+            candidates = preferred
+
+        backend = self._select(candidates, weights)
+
+        stats = self._stats(backend)
+        if stats.consecutive_failures >= self.failure_threshold:
+            # Half-open: hold off other requests until this trial completes
+            stats.retry_at = time.monotonic() + self.cooldown
+        return backend
+
+    def _select(self, candidates: list[str], weights: Mapping[str, float]) -> str:
+        if len(candidates) == 1:
+            return candidates[0]
+
+        def weight(backend):
+            return max(weights.get(backend, 1), 1e-6)
+
+        if self.policy == "random":
+            return random.choices(candidates, [weight(b) for b in candidates])[0]
+
+        if self.policy == "latency_ewma":
+            known = [
+                self._stats(backend).latency
+                for backend in candidates
+                if self._stats(backend).latency is not None
+            ]
+            # Backends without measurements yet are assumed to be the fastest
+            default = min(known) if known else 0.0
+
+            def score(backend):
+                stats = self._stats(backend)
+                latency = stats.latency if stats.latency is not None else default
+                return latency * (stats.in_flight + 1) / weight(backend)
+
+        else:
+
+            def score(backend):
+                return (self._stats(backend).in_flight + 1) / weight(backend)
+
+        best = min(score(backend) for backend in candidates)
+        return random.choice(
+            [backend for backend in candidates if score(backend) == best]
+        )
+
+    def start(self, backend: str) -> UpstreamCall:
+        stats = self._stats(backend)
+        stats.in_flight += 1
+        stats.requests += 1
+        return UpstreamCall(self, backend)
+
+    async def acquire(
+        self,
+        backends: Sequence[str],
+        preferred: Collection[str] = (),
+        weights: Optional[Mapping[str, float]] = None,
+        limits: Optional[Mapping[str, int]] = None,
+        timeout: Optional[float] = None,
+    ) -> UpstreamCall:
+        """
+        Choose a backend and start a call to it, waiting while every backend
+        has reached its limit of concurrent requests (no limit if 0).
+        """
+        limits = limits or {}
+        deadline = time.monotonic() + timeout if timeout else None
+
+        while True:
+            open_backends = [
+                backend
+                for backend in backends
+                if not limits.get(backend)
+                or self._stats(backend).in_flight < limits[backend]
+            ]
+            if open_backends:
+                return self.start(self.choose(open_backends, preferred, weights))
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await asyncio.wait_for(
+                    waiter,
+                    max(deadline - time.monotonic(), 0) if deadline else None,
+                )
+            except asyncio.TimeoutError:
+                raise UpstreamBusyError(
+                    f"All {self.name} backends are at their concurrency limit"
+                )
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def _wake(self):
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    @contextmanager
+    def track(self, backend: str) -> Iterator[UpstreamCall]:
+        """
+        Track a request that completes within the block. Connection errors and
+        timeouts count as failures of the backend; any other exception,
+        cancellation included, only ends the call.
+        """
+        call = self.start(backend)
+        try:
+            yield call
+        except TRANSPORT_ERRORS:
+            call.fail()
+            raise
+        finally:
+            call.close()
+
+    def _record(self, backend: str, ok: bool, latency: Optional[float] = None):
+        stats = self._stats(backend)
+        if ok:
+            stats.consecutive_failures = 0
+            stats.retry_at = 0.0
+            stats.latency = (
+                latency
+                if stats.latency is None
+                else self.alpha * latency + (1 - self.alpha) * stats.latency
+            )
+            return
+
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        if stats.consecutive_failures >= self.failure_threshold:
+            if stats.consecutive_failures == self.failure_threshold:
+                log.warning(
+                    f"{self.name} backend {backend} failed {stats.consecutive_failures} "
+                    f"times in a row, skipping it for {self.cooldown} seconds"
+                )
+            stats.retry_at = time.monotonic() + self.cooldown
+
+    def get_metrics(self) -> dict:
+        return {
+            "policy": self.policy,
+            "backends": {
+                backend: stats.to_dict() for backend, stats in self.backends.items()
+            },
+        }
@@ -5,6 +5,7 @@ Tests the API keys directly without going through the FloatChat router
 """
 
 import asyncio
+import os
 import aiohttp
 import json
 
@@ -16,17 +17,17 @@ MODELS_TO_TEST = [
     {
         "name": "Qwen3 Coder 480B",
         "model": "qwen/qwen3-coder-480b-a35b-instruct",
-        "api_key": "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"
+        "api_key": os.environ["NVIDIA_API_KEY"]
     },
     {
         "name": "Kimi K2 Instruct",
         "model": "moonshotai/kimi-k2-instruct-0905",
-        "api_key": "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"
+        "api_key": os.environ["NVIDIA_API_KEY"]
     },
     {
         "name": "DeepSeek R1",
         "model": "deepseek-ai/deepseek-r1-0528",
-        "api_key": "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"
+        "api_key": os.environ["NVIDIA_API_KEY"]
     }
 ]
 
@@ -3,6 +3,8 @@
 Fixed test script for NVIDIA API with actual content
 """
 
+import os
+
 from openai import OpenAI
 import json
 
@@ -10,7 +12,7 @@ import json
 print("🧪 Testing Kimi K2 with actual content...")
 client = OpenAI(
     base_url="https://integrate.api.nvidia.com/v1",
-    api_key="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"
+    api_key=os.environ["NVIDIA_API_KEY"]
 )
 
 completion = client.chat.completions.create(
@@ -33,7 +35,7 @@ print("\n" + "="*50)
 print("🧪 Testing Qwen3 Coder with actual content...")
 client2 = OpenAI(
     base_url="https://integrate.api.nvidia.com/v1",
-    api_key="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"
+    api_key=os.environ["NVIDIA_API_KEY"]
 )
 
 completion2 = client2.chat.completions.create(
@@ -56,7 +58,7 @@ print("\n" + "="*50)
 print("🧪 Testing DeepSeek R1 with actual content...")
 client3 = OpenAI(
     base_url="https://integrate.api.nvidia.com/v1",
-    api_key="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"
+    api_key=os.environ["NVIDIA_API_KEY"]
 )
 
 completion3 = client3.chat.completions.create(